@@ -17,6 +17,26 @@ def create_app(config_name='default'):
     # Initialize extensions
     init_extensions(app)
     
+    # Keep team and guide counters current on every flush
+    from app.services.metrics_service import register_metric_listeners
+    register_metric_listeners()
+    
+    # Keep the in-process location index current on every commit
+    from app.services.location_service import register_location_listeners
+    register_location_listeners()
+    
+    # Drop cached map tiles when locations or activities change
+    from app.services.tile_service import register_tile_listeners
+    register_tile_listeners()
+    
+    # Queue a metrics recalculation whenever route geometry is written
+    from app.services.route_service import register_route_listeners
+    register_route_listeners()
+    
+    # Drop cached session profiles when a user's own fields or roles change
+    from app.services.profile_cache import register_profile_listeners
+    register_profile_listeners()
+    
     # Register blueprints
     with app.app_context():
         # Import and register blueprints here to avoid circular imports
@@ -30,6 +50,9 @@ def create_app(config_name='default'):
         from app.api.activity_dates import activity_dates_bp
         from app.api.resources import resources_bp
         from app.api.permissions import permissions_bp
+        from app.api.reservations import reservations_bp
+        from app.api.payments import payments_bp
+        from app.api.earnings import earnings_bp
         
         app.register_blueprint(auth_bp, url_prefix='/api/auth')
         app.register_blueprint(activities_bp, url_prefix='/api/activities')
@@ -41,6 +64,9 @@ def create_app(config_name='default'):
         app.register_blueprint(activity_dates_bp, url_prefix='/api/activity-dates')
         app.register_blueprint(resources_bp, url_prefix='/api/resources')
         app.register_blueprint(permissions_bp, url_prefix='/api/permissions')
+        app.register_blueprint(reservations_bp, url_prefix='/api/reservations')
+        app.register_blueprint(payments_bp, url_prefix='/api/payments')
+        app.register_blueprint(earnings_bp, url_prefix='/api/earnings')
     
         # Create tables if they don't exist
         try:
@@ -56,6 +82,13 @@ def create_app(config_name='default'):
             print(f"Error during database initialization: {str(e)}")
             print("Database tables may not be fully initialized.")
             print("Try running 'python db_setup.py --reset' to reset the database.")
+        
+        # Compile the global permission matrix up front; it is rebuilt when it expires
+        try:
+            from app.services.permission_matrix import reload_global_matrix
+            reload_global_matrix(app)
+        except Exception as e:
+            print(f"Global permission matrix will be compiled on first use: {str(e)}")
     
     # Health check route
     @app.route('/api/health')
@@ -8,14 +8,56 @@ from app.models.location import Location
 from app.models.activity_type import ActivityType
 from app.models.team import Team
 from app.models.team_member import TeamMember
+from app.services.activity_service import ActivityService
+from app.utils.pagination import decode_cursor, get_page_size
 from flask_jwt_extended import get_jwt_identity
 
+def _parse_page_args():
+    """
+    Read the keyset pagination arguments from the query string
+    
+    Returns:
+        tuple: (after, limit, error_response) where after is the decoded cursor
+               or None, and error_response is set when the cursor is invalid
+    """
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            return None, None, (jsonify({'error': 'Invalid cursor'}), 400)
+        
+        # Activity pages are keyed on created_at, so the cursor must carry one
+        if after[0] is None:
+            return None, None, (jsonify({'error': 'Invalid cursor'}), 400)
+    
+    limit = get_page_size(request.args.get('limit', type=int))
+    return after, limit, None
+
 def get_all_activities():
-    """Get all activities from the database"""
+    """Get a page of the activity catalog, optionally filtered"""
     try:
-        activities = Activity.query.all()
-        activities_list = [activity.to_dict() for activity in activities]
-        return jsonify({'activities': activities_list}), 200
+        after, limit, error_response = _parse_page_args()
+        if error_response:
+            return error_response
+        
+        filters = {
+            'activity_type_id': request.args.get('activity_type_id', type=int),
+            'location_id': request.args.get('location_id', type=int),
+            'difficulty_level': request.args.get('difficulty_level'),
+            'activity_status': request.args.get('activity_status'),
+            'min_price': request.args.get('min_price', type=float),
+            'max_price': request.args.get('max_price', type=float),
+            'search': (request.args.get('search') or '').strip()
+        }
+        
+        page, error = ActivityService.get_all_activities(filters, after, limit)
+        if error:
+            print(error)
+            return jsonify({'error': 'Failed to fetch activities'}), 500
+        
+        return jsonify(page), 200
     except Exception as e:
         print(f"Error fetching activities: {str(e)}")
         return jsonify({'error': 'Failed to fetch activities'}), 500
@@ -32,56 +74,19 @@ def get_activity_by_id(activity_id):
         return jsonify({'error': 'Failed to fetch activity details'}), 500
 
 def get_my_activities():
-    """Get activities based on user's role in the team"""
+    """Get a page of the activities visible to the user based on their team roles"""
     try:
         current_user_id = get_jwt_identity()
         
-        # Find all teams where the user is a member
-        team_memberships = TeamMember.query.filter_by(user_id=current_user_id).all()
-        
-        if not team_memberships:
-            # User is not part of any team, only show activities they created
-            activities = Activity.query.filter_by(created_by=current_user_id).all()
-            return jsonify({'activities': [activity.to_dict() for activity in activities]}), 200
-        
-        # Process each team membership based on role level
-        all_activities = []
-        
-        for membership in team_memberships:
-            team_id = membership.team_id
-            role_level = membership.role_level
-            
-            # Level 1 (Master Guide) and Level 2 (Tactical Guide): Can see all team activities
-            if role_level <= 2:  
-                team_activities = Activity.query.filter_by(team_id=team_id).all()
-                all_activities.extend(team_activities)
-            
-            # Level 3 (Technical Guide): Can see activities they created or are leading
-            elif role_level == 3:
-                team_activities = Activity.query.filter(
-                    Activity.team_id == team_id,
-                    (Activity.created_by == current_user_id) | (Activity.leader_id == current_user_id)
-                ).all()
-                all_activities.extend(team_activities)
-            
-            # Level 4 (Base Guide): Can only see activities they created
-            elif role_level == 4:
-                team_activities = Activity.query.filter(
-                    Activity.team_id == team_id,
-                    Activity.created_by == current_user_id
-                ).all()
-                all_activities.extend(team_activities)
-        
-        # Remove duplicates (in case a user has same activities in multiple teams)
-        unique_activities = []
-        activity_ids = set()
+        after, limit, error_response = _parse_page_args()
+        if error_response:
+            return error_response
         
-        for activity in all_activities:
-            if activity.activity_id not in activity_ids:
-                activity_ids.add(activity.activity_id)
-                unique_activities.append(activity)
+        page, error = ActivityService.get_user_activities(current_user_id, after, limit)
+        if error:
+            raise Exception(error)
         
-        return jsonify({'activities': [activity.to_dict() for activity in unique_activities]}), 200
+        return jsonify(page), 200
         
     except Exception as e:
         print(f"Error fetching user activities: {str(e)}")
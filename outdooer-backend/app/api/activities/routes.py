@@ -38,19 +38,19 @@ def get_activities_by_team(team_id):
         
         # Filter activities based on role level
         if membership.role_level <= 2:  # Master Guide and Tactical Guide
-            activities = Activity.query.filter_by(team_id=team_id).all()
+            activities = Activity.query_with_relations().filter_by(team_id=team_id).all()
         elif membership.role_level == 3:  # Technical Guide
-            activities = Activity.query.filter(
+            activities = Activity.query_with_relations().filter(
                 Activity.team_id == team_id,
                 (Activity.created_by == current_user_id) | (Activity.leader_id == current_user_id)
             ).all()
         else:  # Base Guide
-            activities = Activity.query.filter(
+            activities = Activity.query_with_relations().filter(
                 Activity.team_id == team_id,
                 Activity.created_by == current_user_id
             ).all()
         
-        return jsonify({'activities': [activity.to_dict() for activity in activities]}), 200
+        return jsonify({'activities': Activity.serialize_list(activities)}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
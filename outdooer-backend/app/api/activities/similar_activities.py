@@ -15,7 +15,7 @@ def find_similar_activities(team_id, activity_type_id, location_id, exclude_acti
     Retorna:
     - Lista de actividades similares
     """
-    query = Activity.query.filter_by(
+    query = Activity.query_with_relations().filter_by(
         team_id=team_id,
         activity_type_id=activity_type_id,
         location_id=location_id
@@ -1,11 +1,13 @@
 # app/api/activity_dates/routes.py
-from flask import jsonify, request
+from flask import jsonify, request, current_app
 from app import db
 from app.models.activity import Activity
 from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
 from app.models.team_member import TeamMember
+from app.services.activity_date_service import ActivityDateService
+from app.services.schedule_service import ScheduleService
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
 from . import activity_dates_bp
 
 # Get guide instances for a guide
@@ -116,6 +118,17 @@ def add_activity_date():
             end_time_value = time.fromisoformat(data.get('end_time'))
         except (ValueError, TypeError):
             return jsonify({'error': 'Invalid date or time format. Use YYYY-MM-DD for date and HH:MM:SS for time'}), 400
+        
+        # Reject dates that double-book the guide
+        if data.get('status', 'open') not in ScheduleService.INACTIVE_DATE_STATUSES:
+            start, end = ScheduleService.slot_interval(date_value, start_time_value, end_time_value)
+            conflicts = ScheduleService.check_interval(current_user_id, start, end)
+            if conflicts:
+                db.session.rollback()
+                return jsonify({
+                    'error': ScheduleService.conflict_message(conflicts),
+                    'conflicts': conflicts
+                }), 409
             
         # Create the date
         activity_date = ActivityAvailableDate(
@@ -145,29 +158,65 @@ def add_activity_date():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Add a recurring series of dates to an activity instance
+@activity_dates_bp.route('/recurring', methods=['POST'])
+@jwt_required()
+def add_recurring_dates():
+    """Expand a recurrence rule and add all of its dates in one transaction"""
+    try:
+        data = request.get_json() or {}
+        current_user_id = get_jwt_identity()
+        
+        required_fields = ['activity_id', 'start_date', 'start_time', 'end_time']
+        for field in required_fields:
+            if not data.get(field):
+                return jsonify({'error': f'{field} is required'}), 400
+        
+        # Accept an RRULE string or the equivalent object
+        recurrence = data.get('rrule') or data.get('recurrence')
+        if not recurrence:
+            return jsonify({'error': 'rrule or recurrence is required'}), 400
+        
+        result, error = ActivityDateService.add_recurring_dates(
+            guide_id=current_user_id,
+            activity_id=data['activity_id'],
+            start_date_str=data['start_date'],
+            recurrence=recurrence,
+            start_time_str=data['start_time'],
+            end_time_str=data['end_time'],
+            exceptions=data.get('exceptions'),
+            max_reservations=data.get('max_reservations', 10),
+            location=data.get('location'),
+            status=data.get('status', 'open')
+        )
+        
+        if error:
+            if error == "Activity not found":
+                return jsonify({'error': error}), 404
+            if error.startswith("You "):
+                return jsonify({'error': error}), 403
+            if error.startswith("Schedule conflict"):
+                return jsonify({'error': error}), 409
+            return jsonify({'error': error}), 400
+        
+        return jsonify({
+            'message': f"{result['created']} activity dates added successfully",
+            **result
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Get dates for an activity
 @activity_dates_bp.route('/for-activity/<int:activity_id>', methods=['GET'])
 @jwt_required()
 def get_activity_dates(activity_id):
     """Get all available dates for an activity"""
     try:
-        # Verify if activity exists
-        activity = Activity.query.get_or_404(activity_id)
-        
-        # Get all instances for this activity
-        instances = GuideActivityInstance.query.filter_by(activity_id=activity_id, is_active=True).all()
-        
-        # Get all dates from all instances
-        all_dates = []
-        for instance in instances:
-            dates = ActivityAvailableDate.query.filter_by(activity_instance_id=instance.instance_id).all()
-            
-            for date_obj in dates:
-                date_dict = date_obj.to_dict()
-                date_dict['guide_id'] = instance.guide_id
-                date_dict['guide_name'] = f"{instance.guide.first_name} {instance.guide.last_name}" if instance.guide else "Unknown"
-                date_dict['activity_id'] = activity_id
-                all_dates.append(date_dict)
+        # Dates, instances and guides in one joined query
+        all_dates, error = ActivityDateService.get_activity_dates(activity_id)
+        if error:
+            return jsonify({"error": error}), 404 if error == "Activity not found" else 500
         
         return jsonify({"dates": all_dates}), 200
     except Exception as e:
@@ -181,25 +230,128 @@ def get_my_activity_dates():
     try:
         current_user_id = get_jwt_identity()
         
-        # Get instances for this guide
-        instances = GuideActivityInstance.query.filter_by(guide_id=current_user_id, is_active=True).all()
-        
-        # Get all dates for all instances
-        all_dates = []
-        for instance in instances:
-            dates = ActivityAvailableDate.query.filter_by(activity_instance_id=instance.instance_id).all()
-            
-            for date_obj in dates:
-                date_dict = date_obj.to_dict()
-                date_dict['guide_id'] = instance.guide_id
-                date_dict['activity_id'] = instance.activity_id
-                date_dict['activity_title'] = instance.activity.title if instance.activity else "Unknown"
-                all_dates.append(date_dict)
+        # Dates, instances and activities in one joined query
+        all_dates, error = ActivityDateService.get_guide_activity_dates(current_user_id)
+        if error:
+            return jsonify({"error": error}), 500
         
         return jsonify({"dates": all_dates}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Get the availability calendar for an activity, team or guide
+@activity_dates_bp.route('/calendar', methods=['GET'])
+@jwt_required()
+def get_calendar():
+    """Get available dates within a [from, to] window, optionally grouped by day"""
+    try:
+        activity_id = request.args.get('activity_id', type=int)
+        team_id = request.args.get('team_id', type=int)
+        guide_id = request.args.get('guide_id', type=int)
+        
+        if activity_id is None and team_id is None and guide_id is None:
+            return jsonify({"error": "One of activity_id, team_id or guide_id is required"}), 400
+        
+        try:
+            date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else date.today()
+            date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else \
+                date_from + timedelta(days=current_app.config.get('CALENDAR_DEFAULT_DAYS', 31) - 1)
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        
+        if date_to < date_from:
+            return jsonify({"error": "'to' must not be before 'from'"}), 400
+        
+        max_days = current_app.config.get('CALENDAR_MAX_DAYS', 366)
+        if (date_to - date_from).days + 1 > max_days:
+            return jsonify({"error": f"Calendar window cannot exceed {max_days} days"}), 400
+        
+        group_by_day = request.args.get('group_by') == 'day'
+        
+        result, error = ActivityDateService.get_calendar(
+            date_from,
+            date_to,
+            activity_id=activity_id,
+            team_id=team_id,
+            guide_id=guide_id,
+            status=request.args.get('status'),
+            group_by_day=group_by_day
+        )
+        
+        if error:
+            return jsonify({"error": error}), 500
+        
+        response = {
+            "from": date_from.isoformat(),
+            "to": date_to.isoformat()
+        }
+        response["days" if group_by_day else "dates"] = result
+        
+        return jsonify(response), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Check a batch of slots against a guide's schedule
+@activity_dates_bp.route('/check-schedule', methods=['POST'])
+@jwt_required()
+def check_schedule():
+    """Report which of the given slots would double-book a guide"""
+    try:
+        data = request.get_json() or {}
+        current_user_id = get_jwt_identity()
+        guide_id = data.get('guide_id') or current_user_id
+        
+        slots = data.get('slots')
+        if not isinstance(slots, list) or not slots:
+            return jsonify({'error': 'slots must be a non-empty list'}), 400
+        
+        max_slots = current_app.config.get('SCHEDULE_CHECK_MAX_SLOTS', 500)
+        if len(slots) > max_slots:
+            return jsonify({'error': f'Cannot check more than {max_slots} slots at once'}), 400
+        
+        if not ScheduleService.can_view_schedule(current_user_id, guide_id):
+            return jsonify({'error': "You do not have permission to view this guide's schedule"}), 403
+        
+        # Slots are either {date, start_time, end_time} or {start, end} datetimes
+        intervals = []
+        for position, slot in enumerate(slots):
+            try:
+                if slot.get('date'):
+                    interval = ScheduleService.slot_interval(
+                        date.fromisoformat(slot['date']),
+                        time.fromisoformat(slot['start_time']),
+                        time.fromisoformat(slot['end_time'])
+                    )
+                else:
+                    interval = (datetime.fromisoformat(slot['start']), datetime.fromisoformat(slot['end']))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                return jsonify({'error': f'Invalid slot at index {position}'}), 400
+            
+            if interval[1] <= interval[0]:
+                return jsonify({'error': f'Slot at index {position} must end after it starts'}), 400
+            intervals.append(interval)
+        
+        exclude_date_ids = [data['exclude_date_id']] if data.get('exclude_date_id') else []
+        results = ScheduleService.find_conflicts(
+            guide_id,
+            intervals,
+            exclude_date_ids=exclude_date_ids,
+            check_each_other=True
+        )
+        
+        return jsonify({
+            'guide_id': guide_id,
+            'has_conflicts': any(results),
+            'results': [{
+                'index': position,
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'conflicts': conflicts
+            } for position, ((start, end), conflicts) in enumerate(zip(intervals, results))]
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Update a date
 @activity_dates_bp.route('/activity-dates/<int:date_id>', methods=['PUT'])
 @jwt_required()
@@ -255,6 +407,22 @@ def update_activity_date(date_id):
         if 'status' in data:
             activity_date.status = data['status']
         
+        # Re-check the guide's schedule when the slot moves or is reopened
+        if {'date', 'start_time', 'end_time', 'status'} & set(data) and \
+                activity_date.status not in ScheduleService.INACTIVE_DATE_STATUSES:
+            start, end = ScheduleService.slot_interval(
+                activity_date.date, activity_date.start_time, activity_date.end_time
+            )
+            conflicts = ScheduleService.check_interval(
+                instance.guide_id, start, end, exclude_date_ids=(date_id,)
+            )
+            if conflicts:
+                db.session.rollback()
+                return jsonify({
+                    'error': ScheduleService.conflict_message(conflicts),
+                    'conflicts': conflicts
+                }), 409
+        
         db.session.commit()
         
         # Prepare response with additional data
@@ -3,10 +3,8 @@ from flask import jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from datetime import datetime
 from app import db  # Now properly imported from app/__init__.py
-from app.utils.security import check_password_hash
-from app.models.user import User, UserRole
-from app.models.team import Team
-from app.models.team_member import TeamMember
+from app.utils.security import check_password_hash, generate_password_hash, needs_rehash
+from app.models.user import User
 from app.services.auth_service import AuthService
 from . import auth_bp
 
@@ -22,6 +20,10 @@ def login():
         if not user or not check_password_hash(user.password_hash, data['password']):
             return jsonify({"error": "Invalid credentials"}), 401
 
+        # Upgrade hashes made with an outdated method or cost
+        if needs_rehash(user.password_hash):
+            user.password_hash = generate_password_hash(data['password'])
+
         access_token = create_access_token(identity=user.user_id)
         user.last_login = datetime.utcnow()
         db.session.commit()
@@ -75,59 +77,12 @@ def get_current_user():
     """Get current user info from JWT token"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        if not user:
+        
+        # Served from the profile cache unless the user, their roles, memberships or teams changed
+        user_data = AuthService.get_session_profile(current_user_id)
+        if not user_data:
             return jsonify({"error": "User not found"}), 404
 
-        user_data = {
-            "user_id": user.user_id,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "profile_image_url": user.profile_image_url,
-            "account_status": user.account_status,
-            "roles": [],
-            "teams": []
-        }
-
-        try:
-            user_roles = UserRole.query.filter_by(user_id=current_user_id).all()
-            user_data["roles"] = [role.role_type for role in user_roles] if user_roles else []
-        except Exception as role_error:
-            print(f"Error fetching user roles: {str(role_error)}")
-            user_data["roles"] = []
-
-        try:
-            team_memberships = []
-            memberships = TeamMember.query.filter_by(user_id=current_user_id).all()
-            for membership in memberships:
-                try:
-                    team = Team.query.get(membership.team_id)
-                    if team:
-                        is_master_guide = team.master_guide_id == current_user_id
-                        role_name = {
-                            1: "Master Guide",
-                            2: "Tactical Guide",
-                            3: "Technical Guide",
-                            4: "Base Guide"
-                        }.get(membership.role_level, "Unknown")
-
-                        team_data = {
-                            'team_id': team.team_id,
-                            'team_name': team.team_name,
-                            'role_level': membership.role_level,
-                            'role_name': role_name,
-                            'is_master_guide': is_master_guide,
-                            'team_status': team.team_status
-                        }
-                        team_memberships.append(team_data)
-                except Exception as team_error:
-                    print(f"Error processing team {membership.team_id}: {str(team_error)}")
-            user_data["teams"] = team_memberships
-        except Exception as teams_error:
-            print(f"Error fetching team memberships: {str(teams_error)}")
-            user_data["teams"] = []
-
         return jsonify(user_data), 200
     except Exception as e:
         print(f"Error retrieving user data: {str(e)}")
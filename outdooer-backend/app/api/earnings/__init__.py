@@ -0,0 +1,6 @@
+# app/api/earnings/__init__.py
+from flask import Blueprint
+
+earnings_bp = Blueprint('earnings', __name__)
+
+from . import routes  # Import routes to register them with the blueprint
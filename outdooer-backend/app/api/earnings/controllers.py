@@ -0,0 +1,96 @@
+# app/api/earnings/controllers.py
+
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from app import db
+from app.services.earnings_service import EarningsService
+from app.services.permission_service import PermissionService
+from app.tasks.jobs import enqueue
+
+def get_my_summary():
+    """Get the current guide's earnings totals per status"""
+    try:
+        summary, error = EarningsService.get_guide_summary(get_jwt_identity())
+        if error:
+            raise Exception(error)
+        return jsonify(summary), 200
+    except Exception as e:
+        print(f"Error fetching earnings summary: {str(e)}")
+        return jsonify({'error': 'Failed to fetch earnings summary'}), 500
+
+def get_my_payouts():
+    """Get the current guide's payouts"""
+    try:
+        payouts, error = EarningsService.get_guide_payouts(get_jwt_identity())
+        if error:
+            raise Exception(error)
+        return jsonify({'payouts': payouts}), 200
+    except Exception as e:
+        print(f"Error fetching payouts: {str(e)}")
+        return jsonify({'error': 'Failed to fetch payouts'}), 500
+
+def create_team_payouts(team_id):
+    """Create one payout per guide from a team's pending earnings"""
+    try:
+        has_permission, _, error = PermissionService.check_permission(get_jwt_identity(), team_id, 'manage_revenue')
+        if not has_permission:
+            return jsonify({'error': error}), 403
+
+        data = request.get_json(silent=True) or {}
+
+        created_before = None
+        if data.get('created_before'):
+            try:
+                created_before = datetime.fromisoformat(data['created_before'])
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid created_before. Use an ISO 8601 datetime'}), 400
+
+        min_amount = data.get('min_amount')
+        if min_amount is not None:
+            try:
+                if isinstance(min_amount, bool):
+                    raise TypeError(min_amount)
+                min_amount = Decimal(str(min_amount))
+                if not min_amount.is_finite() or min_amount < 0:
+                    raise ValueError(min_amount)
+            except (TypeError, ValueError, InvalidOperation):
+                return jsonify({'error': 'Invalid min_amount. Use a non-negative number'}), 400
+
+        payment_method = data.get('payment_method', 'bank_transfer')
+        if not isinstance(payment_method, str) or not 0 < len(payment_method.strip()) <= 50:
+            return jsonify({'error': 'Invalid payment_method. Use a name of at most 50 characters'}), 400
+
+        notes = data.get('notes')
+        if notes is not None and not isinstance(notes, str):
+            return jsonify({'error': 'Invalid notes. Use a string'}), 400
+
+        if data.get('async'):
+            job_id = enqueue('earnings.create_payouts', {
+                'team_id': team_id,
+                'created_before': created_before.isoformat() if created_before else None,
+                'payment_method': payment_method,
+                'min_amount': str(min_amount) if min_amount is not None else None,
+                'notes': notes
+            })
+            db.session.commit()
+            return jsonify({'message': 'Payout computation queued', 'job_id': job_id}), 202
+
+        result, error = EarningsService.create_payouts(
+            team_id=team_id,
+            created_before=created_before,
+            payment_method=payment_method,
+            min_amount=min_amount,
+            notes=notes
+        )
+        if error:
+            raise Exception(error)
+
+        return jsonify({
+            'message': f"{len(result['payouts'])} payouts created",
+            **result
+        }), 201
+    except Exception as e:
+        print(f"Error creating payouts for team {team_id}: {str(e)}")
+        return jsonify({'error': 'Failed to create payouts'}), 500
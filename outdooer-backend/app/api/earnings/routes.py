@@ -0,0 +1,26 @@
+# app/api/earnings/routes.py
+from flask_jwt_extended import jwt_required
+from . import earnings_bp
+from .controllers import (
+    get_my_summary as get_my_summary_controller,
+    get_my_payouts as get_my_payouts_controller,
+    create_team_payouts as create_team_payouts_controller
+)
+
+@earnings_bp.route('/my-summary', methods=['GET'])
+@jwt_required()
+def get_my_summary_route():
+    """Get the current guide's earnings totals"""
+    return get_my_summary_controller()
+
+@earnings_bp.route('/my-payouts', methods=['GET'])
+@jwt_required()
+def get_my_payouts_route():
+    """Get the current guide's payouts"""
+    return get_my_payouts_controller()
+
+@earnings_bp.route('/team/<int:team_id>/payouts', methods=['POST'])
+@jwt_required()
+def create_team_payouts_route(team_id):
+    """Roll a team's pending earnings into payouts"""
+    return create_team_payouts_controller(team_id)
@@ -3,10 +3,12 @@
 from flask import jsonify, request
 from app.database import db
 from app.models.expedition import Expedition, ExpeditionActivity
-from app.models.team_member import TeamMember
-from app.models.team_role_permissions import TeamRolePermissions
+from app.services.permission_service import PermissionService
+from app.services.schedule_service import ScheduleService
+from app.services.route_service import RouteService
 from flask_jwt_extended import get_jwt_identity
 from datetime import datetime
+import hashlib
 
 # =======================
 # Helpers
@@ -14,8 +16,7 @@ from datetime import datetime
 
 def get_user_role_level(user_id, team_id):
     """Return the role level of a user within a team."""
-    member = TeamMember.query.filter_by(user_id=user_id, team_id=team_id).first()
-    return member.role_level if member else None
+    return PermissionService.get_role_level(user_id, team_id)
 
 def check_expedition_permission(user_id, team_id, permission_key):
     """Check if user has permission for expedition operation."""
@@ -24,30 +25,23 @@ def check_expedition_permission(user_id, team_id, permission_key):
     if not role_level:
         return False, "You are not a member of this team"
     
-    # First check team-specific permissions
-    team_permission = TeamRolePermissions.query.filter_by(
-        team_id=team_id,
-        role_level=role_level,
-        permission_key=permission_key
-    ).first()
-    
-    # If team-specific permission exists, use it
-    if team_permission:
-        return team_permission.is_enabled, None
-    
-    # Fall back to global permissions
-    global_permission = TeamRolePermissions.query.filter_by(
-        team_id=None,
-        role_level=role_level,
-        permission_key=permission_key
-    ).first()
-    
-    if global_permission:
-        return global_permission.is_enabled, None
+    # Cached team overrides first, then the precompiled global matrix
+    is_enabled = PermissionService.is_permission_enabled(team_id, role_level, permission_key)
+    if is_enabled is not None:
+        return is_enabled, None
     
     # Default to no permission if no rules found
     return False, "Permission not defined"
 
+def check_leader_schedule(expedition):
+    """Return the commitments of the expedition's leader that it would overlap."""
+    if not expedition.leader_id or expedition.expedition_status in ScheduleService.INACTIVE_EXPEDITION_STATUSES:
+        return []
+    
+    start, end = ScheduleService.expedition_interval(expedition.start_date, expedition.end_date)
+    exclude = (expedition.expedition_id,) if expedition.expedition_id else ()
+    return ScheduleService.check_interval(expedition.leader_id, start, end, exclude_expedition_ids=exclude)
+
 # =======================
 # Expedition Endpoints
 # =======================
@@ -122,6 +116,17 @@ def create_expedition():
             expedition_status=data.get('expedition_status', 'active')
         )
 
+        if expedition.end_date < expedition.start_date:
+            return jsonify({'error': 'End date must not be before start date'}), 400
+
+        # Reject expeditions that double-book their leader
+        conflicts = check_leader_schedule(expedition)
+        if conflicts:
+            return jsonify({
+                'error': ScheduleService.conflict_message(conflicts),
+                'conflicts': conflicts
+            }), 409
+
         db.session.add(expedition)
         db.session.commit()
         db.session.refresh(expedition)
@@ -167,6 +172,16 @@ def update_expedition(expedition_id):
                     value = datetime.fromisoformat(value)
                 setattr(expedition, key, value)
 
+        # Re-check the leader's schedule when the dates, leader or status change
+        if {'start_date', 'end_date', 'leader_id', 'expedition_status'} & set(data):
+            conflicts = check_leader_schedule(expedition)
+            if conflicts:
+                db.session.rollback()
+                return jsonify({
+                    'error': ScheduleService.conflict_message(conflicts),
+                    'conflicts': conflicts
+                }), 409
+
         expedition.updated_at = datetime.utcnow()
         db.session.commit()
         
@@ -261,4 +276,65 @@ def add_expedition_activities(expedition_id):
     except Exception as e:
         db.session.rollback()
         print(f"Error adding activities to expedition {expedition_id}: {e}")
-        return jsonify({'error': f'Failed to add activities: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Failed to add activities: {str(e)}'}), 500
+
+# =======================
+# Expedition Route
+# =======================
+
+def get_expedition_route_geometry(expedition_id):
+    try:
+        zoom = request.args.get('zoom', type=int)
+        if zoom is not None and not 0 <= zoom <= 24:
+            return jsonify({'error': 'zoom must be between 0 and 24'}), 400
+
+        route, error = RouteService.get_geometry(expedition_id, zoom)
+        if error:
+            print(f"Error fetching route for expedition {expedition_id}: {error}")
+            return jsonify({'error': 'Failed to fetch expedition route'}), 500
+        if route is None:
+            return jsonify({'error': 'Expedition has no route'}), 404
+
+        response = jsonify({'route': route})
+        response.set_etag(hashlib.sha1(f"{route['updated_at']}:{route['polyline']}".encode()).hexdigest())
+        return response.make_conditional(request)
+    except Exception as e:
+        print(f"Error fetching route for expedition {expedition_id}: {e}")
+        return jsonify({'error': 'Failed to fetch expedition route'}), 500
+
+def save_expedition_route(expedition_id):
+    try:
+        data = request.get_json() or {}
+        expedition = Expedition.query.get_or_404(expedition_id)
+        current_user_id = get_jwt_identity()
+        
+        # Check permission to update expedition
+        team_id = expedition.team_id
+        has_permission, error_msg = check_expedition_permission(
+            current_user_id, team_id, 'update_expedition'
+        )
+        
+        # Special case: Technical guides (level 3) can update their own expeditions
+        if not has_permission:
+            role_level = get_user_role_level(current_user_id, team_id)
+            is_own_expedition = expedition.created_by == current_user_id or expedition.leader_id == current_user_id
+            
+            # Level 3 guide can update own expedition
+            if role_level == 3 and is_own_expedition:
+                has_permission = True
+                
+        if not has_permission:
+            return jsonify({'error': error_msg or 'You do not have permission to update this expedition\'s route'}), 403
+
+        route, error = RouteService.save_route(expedition_id, data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        return jsonify({
+            'message': 'Expedition route saved successfully',
+            'route': route.to_dict()
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error saving route for expedition {expedition_id}: {e}")
+        return jsonify({'error': f'Failed to save route: {str(e)}'}), 500
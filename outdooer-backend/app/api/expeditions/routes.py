@@ -12,7 +12,9 @@ from .controllers import (
     get_all_expeditions,
     get_expedition_by_id,
     get_expedition_activities,
-    add_expedition_activities
+    add_expedition_activities,
+    get_expedition_route_geometry,
+    save_expedition_route
 )
 
 # Get all expeditions (with optional filtering)
@@ -61,6 +63,19 @@ def get_expedition_activities_route(expedition_id):
 def add_expedition_activities_route(expedition_id):
     return add_expedition_activities(expedition_id)
 
+# Get the expedition route at the level of detail of a map zoom
+@expeditions_bp.route('/<int:expedition_id>/route', methods=['GET'])
+@jwt_required()
+def get_expedition_route_geometry_route(expedition_id):
+    return get_expedition_route_geometry(expedition_id)
+
+# Create or replace the expedition route
+@expeditions_bp.route('/<int:expedition_id>/route', methods=['PUT'])
+@jwt_required()
+@check_role_permission('update_expedition')
+def save_expedition_route_route(expedition_id):
+    return save_expedition_route(expedition_id)
+
 # Get expeditions created by a user
 @expeditions_bp.route('/created-by/<int:user_id>', methods=['GET'])
 @jwt_required()
@@ -2,8 +2,11 @@
 from flask import jsonify
 from . import locations_bp
 from app.models.location import Location
-from flask import request
+from flask import current_app, request, make_response
 from app import db
+from app.services.location_service import LocationService
+from app.services.tile_service import TileService
+from app.utils.pagination import get_page_size
 
 @locations_bp.route('', methods=['GET'])
 def get_locations():
@@ -32,42 +35,73 @@ def get_locations():
 
 @locations_bp.route('/search', methods=['GET'])
 def search_locations():
-    """Search locations by name, country, region, or type"""
+    """Autocomplete locations by name, alias or address"""
     search_term = request.args.get('q', '')
     
-    if not search_term or len(search_term) < 2:
+    if len(search_term.strip()) < 2:
         return jsonify({'error': 'Search term must be at least 2 characters'}), 400
     
+    locations, error = LocationService.autocomplete(
+        search_term,
+        limit=get_page_size(request.args.get('limit', type=int))
+    )
+    if error:
+        print(f"Error searching locations: {error}")
+        return jsonify({'error': 'Failed to search locations'}), 500
+    
+    return jsonify({'locations': locations}), 200
+
+@locations_bp.route('/nearby', methods=['GET'])
+def get_nearby_locations():
+    """Get locations near a point, nearest first"""
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    radius_km = request.args.get('radius_km', type=float)
+
+    if lat is None or lng is None or not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        return jsonify({'error': 'lat and lng are required and must be valid coordinates'}), 400
+
+    max_radius = current_app.config.get('LOCATION_MAX_RADIUS_KM', 500)
+    if radius_km is not None and not 0 < radius_km <= max_radius:
+        return jsonify({'error': f'radius_km must be greater than 0 and at most {max_radius}'}), 400
+
+    locations, error = LocationService.nearby(
+        lat,
+        lng,
+        radius_km=radius_km,
+        limit=get_page_size(request.args.get('limit', type=int)),
+        location_type=request.args.get('type')
+    )
+    if error:
+        print(f"Error fetching nearby locations: {error}")
+        return jsonify({'error': 'Failed to fetch nearby locations'}), 500
+
+    return jsonify({'locations': locations}), 200
+
+
+@locations_bp.route('/tiles/<int:z>/<int:x>/<int:y>.mvt', methods=['GET'])
+def get_location_tile(z, x, y):
+    """Get a Mapbox Vector Tile of locations, clustered below the clustering zoom"""
+    if z > current_app.config.get('LOCATION_TILE_MAX_ZOOM', 20) or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({'error': 'Tile coordinates out of range'}), 404
+
     try:
-        # Create search pattern for case-insensitive partial matching
-        search_pattern = f"%{search_term}%"
-        
-        # Query locations that match across multiple fields
-        locations = Location.query.filter(
-            db.or_(
-                Location.location_name.ilike(search_pattern),
-                Location.country_code.ilike(search_pattern),
-                Location.region_code.ilike(search_pattern),
-                Location.location_type.ilike(search_pattern),
-                Location.formatted_address.ilike(search_pattern)
-            )
-        ).limit(20).all()
-        
-        # Convert to list of dictionaries
-        locations_list = []
-        for location in locations:
-            locations_list.append({
-                'location_id': location.location_id,
-                'location_name': location.location_name,
-                'location_type': location.location_type,
-                'country_code': location.country_code,
-                'region_code': location.region_code,
-                'formatted_address': location.formatted_address,
-                'latitude': float(location.latitude) if location.latitude else None,
-                'longitude': float(location.longitude) if location.longitude else None
-            })
-        
-        return jsonify({'locations': locations_list}), 200
+        tile = TileService.get_tile(z, x, y)
     except Exception as e:
-        print(f"Error searching locations: {str(e)}")
-        return jsonify({'error': 'Failed to search locations'}), 500
\ No newline at end of file
+        print(f"Error building location tile {z}/{x}/{y}: {str(e)}")
+        return jsonify({'error': 'Failed to build location tile'}), 500
+
+    if not tile.body:
+        response = make_response('', 204)
+    elif 'gzip' in request.accept_encodings:
+        response = make_response(tile.body)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = make_response(tile.decompressed())
+
+    response.headers['Content-Type'] = 'application/vnd.mapbox-vector-tile'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('LOCATION_TILE_TTL', 60)
+    response.set_etag(tile.etag)
+    return response.make_conditional(request)
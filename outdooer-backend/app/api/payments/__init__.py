@@ -0,0 +1,6 @@
+# app/api/payments/__init__.py
+from flask import Blueprint
+
+payments_bp = Blueprint('payments', __name__)
+
+from . import routes  # Import routes to register them with the blueprint
@@ -0,0 +1,75 @@
+# app/api/payments/controllers.py
+
+import json
+from flask import jsonify, request, current_app
+from flask_jwt_extended import get_jwt_identity
+from marshmallow import ValidationError
+from app.schemas.payment import PaymentCreateSchema
+from app.services.payment_service import PaymentService
+
+payment_create_schema = PaymentCreateSchema()
+
+def _record(data, user_id=None):
+    """Validate a payment body and record it, returning the HTTP response"""
+    try:
+        data = payment_create_schema.load(data)
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid payment data', 'details': e.messages}), 400
+
+    result, error = PaymentService.record_payment(data, user_id)
+    if error:
+        if error == "Reservation not found":
+            return jsonify({'error': error}), 404
+        if error.startswith("You "):
+            return jsonify({'error': error}), 403
+        if error.startswith("Cannot "):
+            return jsonify({'error': error}), 409
+        print(error)
+        return jsonify({'error': 'Failed to record payment'}), 500
+
+    # Replays answer 200 with the stored payment, so retries are harmless
+    if result['created']:
+        return jsonify({'message': 'Payment recorded successfully', **result}), 201
+    return jsonify({'message': 'Payment already recorded', **result}), 200
+
+def record_payment():
+    """Record a pending payment for a reservation of the current user"""
+    try:
+        return _record(request.get_json() or {}, get_jwt_identity())
+    except Exception as e:
+        print(f"Error recording payment: {str(e)}")
+        return jsonify({'error': 'Failed to record payment'}), 500
+
+def payment_webhook():
+    """Record a payment pushed by the gateway, authenticated by an HMAC signature"""
+    try:
+        body = request.get_data()
+        secret = current_app.config.get('PAYMENT_WEBHOOK_SECRET')
+        if not PaymentService.verify_signature(secret, body, request.headers.get('X-Webhook-Signature')):
+            return jsonify({'error': 'Invalid signature'}), 401
+
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            return jsonify({'error': 'Invalid JSON body'}), 400
+
+        return _record(data)
+    except Exception as e:
+        print(f"Error processing payment webhook: {str(e)}")
+        return jsonify({'error': 'Failed to record payment'}), 500
+
+def get_reservation_payments(reservation_id):
+    """Get the payments of a reservation"""
+    try:
+        payments, error = PaymentService.get_reservation_payments(reservation_id, get_jwt_identity())
+        if error:
+            if error == "Reservation not found":
+                return jsonify({'error': error}), 404
+            if error.startswith("You "):
+                return jsonify({'error': error}), 403
+            raise Exception(error)
+
+        return jsonify({'payments': payments}), 200
+    except Exception as e:
+        print(f"Error fetching payments for reservation {reservation_id}: {str(e)}")
+        return jsonify({'error': 'Failed to fetch payments'}), 500
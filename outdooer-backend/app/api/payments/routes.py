@@ -0,0 +1,25 @@
+# app/api/payments/routes.py
+from flask_jwt_extended import jwt_required
+from . import payments_bp
+from .controllers import (
+    record_payment as record_payment_controller,
+    payment_webhook as payment_webhook_controller,
+    get_reservation_payments as get_reservation_payments_controller
+)
+
+@payments_bp.route('/', methods=['POST'])
+@jwt_required()
+def record_payment_route():
+    """Record a pending payment for one of the current user's reservations"""
+    return record_payment_controller()
+
+@payments_bp.route('/webhook', methods=['POST'])
+def payment_webhook_route():
+    """Record a payment reported by the gateway"""
+    return payment_webhook_controller()
+
+@payments_bp.route('/reservation/<int:reservation_id>', methods=['GET'])
+@jwt_required()
+def get_reservation_payments_route(reservation_id):
+    """Get the payments of a reservation"""
+    return get_reservation_payments_controller(reservation_id)
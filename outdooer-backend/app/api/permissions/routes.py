@@ -1,8 +1,8 @@
 # app/api/permissions/routes.py
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.permission_service import PermissionService
-from app.models.team_role_configuration import TeamRoleConfiguration
+from app.services.permission_cache import PermissionCache
 from app.models.team_role_permissions import TeamRolePermissions
 from app.models.expedition import Expedition
 from app.models.activity import Activity
@@ -31,15 +31,15 @@ def check_permission():
         if not operation:
             return jsonify({'error': 'Operation is required'}), 400
         
-        # If resource_id is provided, get the resource to determine team_id
-        if resource_id and not team_id:
+        # If resource_id is provided, the resource's own team is checked
+        if resource_id:
             if 'expedition' in operation:
                 resource = Expedition.query.get_or_404(resource_id)
                 team_id = resource.team_id
             elif 'activity' in operation:
                 resource = Activity.query.get_or_404(resource_id)
                 team_id = resource.team_id
-            else:
+            elif not team_id:
                 return jsonify({'error': 'Cannot determine team_id from resource'}), 400
         
         if not team_id:
@@ -72,6 +72,44 @@ def check_permission():
     except Exception as e:
         return jsonify({'error': str(e), 'has_permission': False}), 500
 
+@permissions_bp.route('/check-bulk', methods=['POST'])
+@jwt_required()
+def check_permissions_bulk():
+    """
+    Endpoint to evaluate many permission checks in one call
+    
+    Expects {"checks": [{"operation", "resource_id", "team_id"}, ...]} and
+    returns the results in request order plus a decision map keyed by
+    "<operation>_<resource_id>_<team_id>" (empty strings for missing IDs)
+    """
+    try:
+        data = request.get_json() or {}
+        current_user_id = get_jwt_identity()
+        
+        checks = data.get('checks')
+        
+        if not isinstance(checks, list) or not all(isinstance(check, dict) for check in checks):
+            return jsonify({'error': 'checks must be a list of objects'}), 400
+        
+        max_checks = current_app.config.get('MAX_BULK_PERMISSION_CHECKS', 200)
+        if len(checks) > max_checks:
+            return jsonify({'error': f'At most {max_checks} checks can be evaluated per request'}), 400
+        
+        results = PermissionService.check_permissions_bulk(current_user_id, checks)
+        
+        decisions = {}
+        for check, result in zip(checks, results):
+            key = f"{check.get('operation') or ''}_{check.get('resource_id') or ''}_{check.get('team_id') or ''}"
+            decisions[key] = result['has_permission']
+        
+        return jsonify({
+            'results': results,
+            'decisions': decisions
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @permissions_bp.route('/user', methods=['GET'])
 @jwt_required()
 def get_user_permissions():
@@ -99,23 +137,8 @@ def get_role_configurations():
     Get all global role configurations (defaults for all teams)
     """
     try:
-        # Get all role configurations
-        configurations = TeamRoleConfiguration.query.all()
-        
-        # Organize by role level and operation
-        result = {}
-        
-        for config in configurations:
-            role_level = config.role_level
-            operation = config.operation
-            is_permitted = config.is_permitted
-            
-            if role_level not in result:
-                result[role_level] = {}
-                
-            result[role_level][operation] = is_permitted
-        
-        return jsonify(result)
+        # Served from the precompiled global matrix, organized by role level
+        return jsonify(PermissionService.get_global_permissions())
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -233,6 +256,7 @@ def update_team_permissions(team_id):
                     updated_count += 1
         
         db.session.commit()
+        PermissionCache.invalidate(team_id)
         
         return jsonify({
             'message': f'Successfully updated {updated_count} team permissions',
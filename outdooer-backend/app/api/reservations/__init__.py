@@ -0,0 +1,6 @@
+# app/api/reservations/__init__.py
+from flask import Blueprint
+
+reservations_bp = Blueprint('reservations', __name__)
+
+from . import routes  # Import routes to register them with the blueprint
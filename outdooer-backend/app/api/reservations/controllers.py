@@ -0,0 +1,151 @@
+# app/api/reservations/controllers.py
+
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from marshmallow import ValidationError
+from app.schemas.reservation import ReservationCreateSchema
+from app.services.reservation_service import ReservationService
+from app.utils.pagination import decode_cursor, get_page_size
+
+reservation_create_schema = ReservationCreateSchema()
+
+def _parse_page_args():
+    """
+    Read the keyset pagination arguments from the query string
+
+    Returns:
+        tuple: (after, limit, error_response) where after is the decoded cursor
+               or None, and error_response is set when the cursor is invalid
+    """
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            return None, None, (jsonify({'error': 'Invalid cursor'}), 400)
+
+        # Reservation pages are keyed on created_at, so the cursor must carry one
+        if after[0] is None:
+            return None, None, (jsonify({'error': 'Invalid cursor'}), 400)
+
+    limit = get_page_size(request.args.get('limit', type=int))
+    return after, limit, None
+
+def _parse_filters():
+    """Read the optional reservation filters from the query string"""
+    return {
+        'status': request.args.get('status'),
+        'activity_id': request.args.get('activity_id', type=int)
+    }
+
+def create_reservation():
+    """Book seats on an activity date for the given participants"""
+    try:
+        try:
+            data = reservation_create_schema.load(request.get_json() or {})
+        except ValidationError as e:
+            return jsonify({'error': 'Invalid reservation data', 'details': e.messages}), 400
+
+        reservation, error = ReservationService.create_reservation(
+            get_jwt_identity(),
+            data['available_date_id'],
+            data['participants']
+        )
+
+        if error:
+            if error == "Activity date not found":
+                return jsonify({'error': error}), 404
+            if error.startswith("Not enough seats") or error.startswith("This date"):
+                return jsonify({'error': error}), 409
+            if error.startswith("Error"):
+                print(error)
+                return jsonify({'error': 'Failed to create reservation'}), 500
+            return jsonify({'error': error}), 400
+
+        return jsonify({
+            'message': 'Reservation created successfully',
+            'reservation': reservation
+        }), 201
+    except Exception as e:
+        print(f"Error creating reservation: {str(e)}")
+        return jsonify({'error': 'Failed to create reservation'}), 500
+
+def get_my_reservations():
+    """Get a page of the current user's reservations"""
+    try:
+        after, limit, error_response = _parse_page_args()
+        if error_response:
+            return error_response
+
+        page, error = ReservationService.get_user_reservations(
+            get_jwt_identity(), _parse_filters(), after, limit
+        )
+        if error:
+            raise Exception(error)
+
+        return jsonify(page), 200
+    except Exception as e:
+        print(f"Error fetching reservations: {str(e)}")
+        return jsonify({'error': 'Failed to fetch reservations'}), 500
+
+def get_team_reservations(team_id):
+    """Get a page of the reservations on a team's activities"""
+    try:
+        after, limit, error_response = _parse_page_args()
+        if error_response:
+            return error_response
+
+        page, error = ReservationService.get_team_reservations(
+            team_id, get_jwt_identity(), _parse_filters(), after, limit
+        )
+        if error:
+            if error.startswith("You "):
+                return jsonify({'error': error}), 403
+            raise Exception(error)
+
+        return jsonify(page), 200
+    except Exception as e:
+        print(f"Error fetching team reservations: {str(e)}")
+        return jsonify({'error': 'Failed to fetch team reservations'}), 500
+
+def get_reservation(reservation_id):
+    """Get a specific reservation"""
+    try:
+        reservation, error = ReservationService.get_reservation(reservation_id, get_jwt_identity())
+        if error:
+            if error == "Reservation not found":
+                return jsonify({'error': error}), 404
+            if error.startswith("You "):
+                return jsonify({'error': error}), 403
+            raise Exception(error)
+
+        return jsonify({'reservation': reservation}), 200
+    except Exception as e:
+        print(f"Error fetching reservation {reservation_id}: {str(e)}")
+        return jsonify({'error': 'Failed to fetch reservation'}), 500
+
+def cancel_reservation(reservation_id):
+    """Cancel a reservation and give its seats back"""
+    try:
+        data = request.get_json(silent=True) or {}
+
+        reservation, error = ReservationService.cancel_reservation(
+            reservation_id, get_jwt_identity(), data.get('reason')
+        )
+        if error:
+            if error == "Reservation not found":
+                return jsonify({'error': error}), 404
+            if error.startswith("You "):
+                return jsonify({'error': error}), 403
+            if error.startswith("Only "):
+                return jsonify({'error': error}), 409
+            raise Exception(error)
+
+        return jsonify({
+            'message': 'Reservation canceled successfully',
+            'reservation': reservation
+        }), 200
+    except Exception as e:
+        print(f"Error canceling reservation {reservation_id}: {str(e)}")
+        return jsonify({'error': 'Failed to cancel reservation'}), 500
@@ -0,0 +1,40 @@
+# app/api/reservations/routes.py
+from flask_jwt_extended import jwt_required
+from . import reservations_bp
+from .controllers import (
+    create_reservation as create_reservation_controller,
+    get_my_reservations as get_my_reservations_controller,
+    get_team_reservations as get_team_reservations_controller,
+    get_reservation as get_reservation_controller,
+    cancel_reservation as cancel_reservation_controller
+)
+
+@reservations_bp.route('/', methods=['POST'])
+@jwt_required()
+def create_reservation_route():
+    """Book seats on an activity date"""
+    return create_reservation_controller()
+
+@reservations_bp.route('/my-reservations', methods=['GET'])
+@jwt_required()
+def get_my_reservations_route():
+    """Get a page of the current user's reservations"""
+    return get_my_reservations_controller()
+
+@reservations_bp.route('/team/<int:team_id>', methods=['GET'])
+@jwt_required()
+def get_team_reservations_route(team_id):
+    """Get a page of the reservations on a team's activities"""
+    return get_team_reservations_controller(team_id)
+
+@reservations_bp.route('/<int:reservation_id>', methods=['GET'])
+@jwt_required()
+def get_reservation_route(reservation_id):
+    """Get a specific reservation"""
+    return get_reservation_controller(reservation_id)
+
+@reservations_bp.route('/<int:reservation_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_reservation_route(reservation_id):
+    """Cancel a reservation and release its seats"""
+    return cancel_reservation_controller(reservation_id)
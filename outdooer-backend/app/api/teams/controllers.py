@@ -6,7 +6,10 @@ from app.models.team_member import TeamMember
 from app.models.team_role_configuration import TeamRoleConfiguration
 from app.models.user import User, UserRole
 from app.models.invitation import InvitationCode
+from app.services.permission_cache import PermissionCache
+from app.services.profile_cache import ProfileCache
 from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.orm import aliased
 from datetime import datetime, timedelta
 
 def get_my_teams():
@@ -14,30 +17,51 @@ def get_my_teams():
     try:
         current_user_id = get_jwt_identity()
         
-        # Find team memberships for the user
-        team_memberships = TeamMember.query.filter_by(user_id=current_user_id).all()
-        
-        if not team_memberships:
-            return jsonify({'teams': []}), 200
+        # Member counts of the user's teams, aggregated once
+        user_team_ids = db.session.query(TeamMember.team_id).filter(
+            TeamMember.user_id == current_user_id
+        )
+        member_counts = db.session.query(
+            TeamMember.team_id.label('team_id'),
+            db.func.count(TeamMember.team_member_id).label('member_count')
+        ).filter(
+            TeamMember.team_id.in_(user_team_ids)
+        ).group_by(TeamMember.team_id).subquery()
+        
+        master_guide = aliased(User)
+        
+        # Memberships, teams, master guides and member counts in a single query
+        rows = db.session.query(
+            TeamMember.role_level,
+            Team.team_id,
+            Team.team_name,
+            Team.master_guide_id,
+            Team.team_status,
+            master_guide.user_id.label('master_guide_user_id'),
+            master_guide.first_name,
+            master_guide.last_name,
+            member_counts.c.member_count
+        ).join(
+            Team, Team.team_id == TeamMember.team_id
+        ).outerjoin(
+            master_guide, master_guide.user_id == Team.master_guide_id
+        ).outerjoin(
+            member_counts, member_counts.c.team_id == Team.team_id
+        ).filter(
+            TeamMember.user_id == current_user_id
+        ).order_by(TeamMember.team_member_id).all()
         
-        # Get team details
         teams_list = []
-        for membership in team_memberships:
-            team = Team.query.get(membership.team_id)
-            
-            if team:
-                # Get master guide name
-                master_guide = User.query.get(team.master_guide_id) if team.master_guide_id else None
-                
-                teams_list.append({
-                    'team_id': team.team_id,
-                    'team_name': team.team_name,
-                    'role_level': membership.role_level,
-                    'is_master_guide': team.master_guide_id == current_user_id,
-                    'master_guide_name': f"{master_guide.first_name} {master_guide.last_name}" if master_guide else None,
-                    'member_count': TeamMember.query.filter_by(team_id=team.team_id).count(),
-                    'team_status': team.team_status
-                })
+        for row in rows:
+            teams_list.append({
+                'team_id': row.team_id,
+                'team_name': row.team_name,
+                'role_level': row.role_level,
+                'is_master_guide': row.master_guide_id == current_user_id,
+                'master_guide_name': f"{row.first_name} {row.last_name}" if row.master_guide_user_id else None,
+                'member_count': row.member_count or 0,
+                'team_status': row.team_status
+            })
         
         return jsonify({'teams': teams_list}), 200
     except Exception as e:
@@ -75,9 +99,7 @@ def get_team_details(team_id):
             db.session.commit()
         
         # Count members by role level
-        role_counts = {}
-        for level in range(1, 5):
-            role_counts[f'level_{level}_count'] = TeamMember.query.filter_by(team_id=team_id, role_level=level).count()
+        role_counts = TeamMember.role_level_counts(team_id)
         
         team_details = {
             'team_id': team.team_id,
@@ -94,7 +116,7 @@ def get_team_details(team_id):
                 'level_4_name': role_config.level_4_name
             },
             'member_counts': role_counts,
-            'total_members': TeamMember.query.filter_by(team_id=team_id).count(),
+            'total_members': sum(role_counts.values()),
             'user_role_level': team_member.role_level
         }
         
@@ -217,6 +239,8 @@ def create_team():
         db.session.add(team_membership)
         db.session.add(role_config)
         db.session.commit()
+        ProfileCache.invalidate(current_user_id)
+        PermissionCache.forget_memberships(current_user_id)
         
         return jsonify({
             'message': 'Team created successfully',
@@ -258,6 +282,7 @@ def update_team(team_id):
         
         team.updated_at = datetime.utcnow()
         db.session.commit()
+        ProfileCache.invalidate_team(team_id)
         
         return jsonify({
             'message': 'Team updated successfully',
@@ -289,6 +314,7 @@ def delete_team(team_id):
         team.team_status = 'deleted'
         team.updated_at = datetime.utcnow()
         db.session.commit()
+        ProfileCache.invalidate_team(team_id)
         
         return jsonify({'message': 'Team deleted successfully'}), 200
     except Exception as e:
@@ -392,6 +418,8 @@ def update_member_role(team_id, user_id):
             member_to_update.role_level = new_role_level
             member_to_update.updated_at = datetime.utcnow()
             db.session.commit()
+            ProfileCache.invalidate(user_id)
+            PermissionCache.forget_memberships(user_id)
         
         # Get role name for the response
         role_config = TeamRoleConfiguration.query.filter_by(team_id=team_id).first()
@@ -444,6 +472,8 @@ def remove_team_member(team_id, user_id):
         # Remove the member
         TeamMember.query.filter_by(team_id=team_id, user_id=user_id).delete()
         db.session.commit()
+        ProfileCache.invalidate(user_id)
+        PermissionCache.forget_memberships(user_id)
         
         return jsonify({'message': 'Team member removed successfully'}), 200
     except Exception as e:
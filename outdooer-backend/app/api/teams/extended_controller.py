@@ -62,12 +62,7 @@ def get_team_role_config(team_id):
             } for log in audit_logs]
             
         # Get role usage statistics
-        role_counts = {}
-        for level in range(1, 5):
-            role_counts[f'level_{level}_count'] = TeamMember.query.filter_by(
-                team_id=team_id, 
-                role_level=level
-            ).count()
+        role_counts = TeamMember.role_level_counts(team_id)
             
         return jsonify({
             'role_config': {
@@ -245,42 +240,26 @@ def get_team_settings_with_permissions(team_id):
         # Add team metrics if user has permission
         if permissions['view_team_metrics']:
             # Count members by role level
-            role_counts = {}
-            for level in range(1, 5):
-                role_counts[f'level_{level}_count'] = TeamMember.query.filter_by(
-                    team_id=team_id, 
-                    role_level=level
-                ).count()
+            role_counts = TeamMember.role_level_counts(team_id)
             
-            # Add activity and expedition counts
-            from app.models.activity import Activity
-            from app.models.expedition import Expedition
+            # Activity, expedition and reservation counters are maintained incrementally
+            from app.services.metrics_service import MetricsService
             
-            activities_count = Activity.query.filter_by(team_id=team_id).count()
-            expeditions_count = Expedition.query.filter_by(team_id=team_id).count()
+            team_metrics = MetricsService.get_team_metrics(team_id)
             
             response['metrics'] = {
                 'member_counts': role_counts,
                 'total_members': sum(role_counts.values()),
-                'activities_count': activities_count,
-                'expeditions_count': expeditions_count
+                'activities_count': team_metrics['total_activities_count'],
+                'expeditions_count': team_metrics['total_expeditions_count'],
+                'current_reservation_count': team_metrics['current_reservation_count']
             }
         
         # Add revenue settings if user has permission
         if permissions['view_revenue_settings']:
             from app.models.team import TeamRevenueSharing
             
-            revenue_settings = {}
-            for level in range(1, 5):
-                revenue_sharing = TeamRevenueSharing.query.filter_by(
-                    team_id=team_id,
-                    role_level=level
-                ).first()
-                
-                if revenue_sharing:
-                    revenue_settings[f'level_{level}_percentage'] = float(revenue_sharing.percentage)
-            
-            response['revenue_settings'] = revenue_settings
+            response['revenue_settings'] = TeamRevenueSharing.percentages_for_team(team_id)
                 
         return jsonify(response), 200
     except Exception as e:
@@ -2,11 +2,10 @@
 from functools import wraps
 from flask import request, jsonify, g
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from app.models.team_member import TeamMember
-from app.models.team_role_configuration import TeamRoleConfiguration
-from app.models.team_role_permissions import TeamRolePermissions
 from app.models.expedition import Expedition
 from app.models.activity import Activity
+from app.services.permission_service import PermissionService
+from app.services.permission_matrix import get_global_matrix
 
 def check_role_permission(operation):
     """
@@ -42,36 +41,14 @@ def check_role_permission(operation):
             if not team_id:
                 return jsonify({'error': 'Team ID not provided or resource not found'}), 400
             
-            # Get user's role level in this team
-            team_membership = TeamMember.query.filter_by(
-                user_id=current_user_id,
-                team_id=team_id
-            ).first()
+            # Get user's role level in this team (memoized for the request)
+            role_level = PermissionService.get_role_level(current_user_id, team_id)
             
-            if not team_membership:
+            if role_level is None:
                 return jsonify({'error': 'You are not a member of this team'}), 403
             
-            role_level = team_membership.role_level
-            
-            # First check team-specific permissions
-            permission_key = operation
-            team_permission = TeamRolePermissions.query.filter_by(
-                team_id=team_id,
-                role_level=role_level,
-                permission_key=permission_key
-            ).first()
-            
-            # If team-specific permission exists, use it
-            if team_permission:
-                has_permission = team_permission.is_enabled
-            else:
-                # Fall back to global role configuration
-                global_permission = TeamRoleConfiguration.query.filter_by(
-                    role_level=role_level,
-                    operation=operation
-                ).first()
-                
-                has_permission = global_permission.is_permitted if global_permission else False
+            # Team overrides first, then the precompiled global matrix
+            has_permission = bool(PermissionService.is_permission_enabled(team_id, role_level, operation))
             
             # Special case for update operations - Technical Guides can update their own resources
             if not has_permission and operation in ['update_expedition', 'update_activity'] and role_level == 3:
@@ -85,8 +62,7 @@ def check_role_permission(operation):
                     has_permission = True
             
             if not has_permission:
-                role_names = {1: 'Master Guide', 2: 'Tactical Guide', 3: 'Technical Guide', 4: 'Base Guide'}
-                role_name = role_names.get(role_level, f'Level {role_level} Guide')
+                role_name = get_global_matrix().role_name(role_level)
                 
                 return jsonify({
                     'error': f'{role_name}s do not have permission to {operation.replace("_", " ")}'
@@ -0,0 +1,43 @@
+"""
+Migration script to add the activity calendar index
+
+Calendar queries select the available dates of a set of activity instances
+within a [from, to] window. This index turns each instance's part of the
+query into a single index range scan.
+
+Usage:
+    python -m migrations.add_activity_calendar_index
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add the activity calendar index"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            CREATE INDEX IF NOT EXISTS idx_activity_available_date_instance_date
+                ON public.activity_available_date (activity_instance_id, date);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully created idx_activity_available_date_instance_date index.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,43 @@
+"""
+Migration script to add the activity catalog pagination index
+
+The public activity catalog is paginated with a keyset on
+(created_at, activity_id). This index lets every page be served as a
+single index range scan regardless of how deep the client pages.
+
+Usage:
+    python -m migrations.add_activity_catalog_index
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add the activity catalog index"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            CREATE INDEX IF NOT EXISTS idx_activities_created_at_id
+                ON public.activities (created_at, activity_id);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully created idx_activities_created_at_id index.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,77 @@
+"""
+Migration script to add the background job queue
+
+background_jobs is the queue read by the worker in app/tasks/jobs.py. The
+partial indexes cover only queued and running rows, so claiming the next due
+job and sweeping stale locks stay index range scans however many finished
+jobs the table keeps. The unique partial index on dedupe_key lets enqueue
+skip a job whose key is already queued.
+
+Usage:
+    python -m migrations.add_background_jobs
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add the background job queue"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            CREATE TABLE IF NOT EXISTS public.background_jobs
+            (
+                job_id serial NOT NULL,
+                job_name character varying(100) NOT NULL,
+                payload text,
+                dedupe_key character varying(255),
+                status character varying(20) NOT NULL DEFAULT 'queued',
+                attempts integer NOT NULL DEFAULT 0,
+                max_attempts integer NOT NULL DEFAULT 5,
+                run_at timestamp without time zone NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                locked_by character varying(100),
+                locked_at timestamp without time zone,
+                last_error text,
+                created_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+                started_at timestamp without time zone,
+                finished_at timestamp without time zone,
+                duration_ms integer,
+                CONSTRAINT background_jobs_pkey PRIMARY KEY (job_id)
+            );
+            
+            CREATE INDEX IF NOT EXISTS idx_background_jobs_due
+                ON public.background_jobs (run_at, job_id)
+                WHERE status = 'queued';
+            
+            CREATE INDEX IF NOT EXISTS idx_background_jobs_running
+                ON public.background_jobs (locked_at)
+                WHERE status = 'running';
+            
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_background_jobs_dedupe
+                ON public.background_jobs (dedupe_key)
+                WHERE status = 'queued';
+            
+            CREATE INDEX IF NOT EXISTS idx_background_jobs_name_status
+                ON public.background_jobs (job_name, status);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully created the background job queue.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,57 @@
+"""
+Migration script to add email delivery tracking to communications
+
+Notifications are written to communications by the fan-out job in
+app/tasks/notification_jobs.py and emailed later by the delivery job, which
+marks them with delivered_at. The partial index covers only undelivered
+rows, so each delivery batch is an index range scan; the recipient index
+serves per-user inbox listings. Rows that existed before this migration are
+marked delivered so they are not emailed retroactively.
+
+Usage:
+    python -m migrations.add_communication_delivery
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add email delivery tracking to communications"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            ALTER TABLE public.communications
+                ADD COLUMN IF NOT EXISTS delivered_at timestamp without time zone;
+            
+            UPDATE public.communications
+                SET delivered_at = COALESCE(created_at, CURRENT_TIMESTAMP)
+                WHERE delivered_at IS NULL;
+            
+            CREATE INDEX IF NOT EXISTS idx_communications_undelivered
+                ON public.communications (communication_id)
+                WHERE delivered_at IS NULL;
+            
+            CREATE INDEX IF NOT EXISTS idx_communications_recipient_created
+                ON public.communications (recipient_id, created_at);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully added email delivery tracking to communications.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
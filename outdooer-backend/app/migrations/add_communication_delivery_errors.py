@@ -0,0 +1,45 @@
+"""
+Migration script to record refused email deliveries on communications
+
+The delivery job in app/tasks/notification_jobs.py counts the times the mail
+server refused a communication's email and keeps the last error, and stops
+trying after NOTIFICATION_MAX_DELIVERY_ATTEMPTS, so one bad address cannot
+block the queue.
+
+Usage:
+    python -m migrations.add_communication_delivery_errors
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to record refused email deliveries"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            ALTER TABLE public.communications
+                ADD COLUMN IF NOT EXISTS delivery_attempts integer NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS delivery_error text;
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully added delivery error tracking to communications.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,55 @@
+"""
+Migration script to add the guide earnings and payout indexes
+
+The unique index on guideearnings(payment_id) makes earnings computation
+idempotent: a payment can be split only once. Payout runs scan pending
+earnings per guide and team, and payout details are read per payout.
+
+Usage:
+    python -m migrations.add_earnings_indexes
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add the guide earnings and payout indexes"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_guideearnings_payment_id
+                ON public.guideearnings (payment_id);
+            
+            CREATE INDEX IF NOT EXISTS idx_guideearnings_status_guide
+                ON public.guideearnings (earnings_status, guide_id);
+            
+            CREATE INDEX IF NOT EXISTS idx_guideearnings_team_id
+                ON public.guideearnings (team_id);
+            
+            CREATE INDEX IF NOT EXISTS idx_guidepayouts_guide_id
+                ON public.guidepayouts (guide_id);
+            
+            CREATE INDEX IF NOT EXISTS idx_guidepayoutdetails_payout_id
+                ON public.guidepayoutdetails (payout_id);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully created guide earnings and payout indexes.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,43 @@
+"""
+Migration script to add the location alias index
+
+The location autocomplete index reloads the aliases of locations changed
+since its last search, filtered by location_id. This index serves that
+lookup, so a reload reads only the changed locations' aliases.
+
+Usage:
+    python -m migrations.add_location_alias_index
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add the location alias index"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            CREATE INDEX IF NOT EXISTS idx_location_aliases_location
+                ON public.location_aliases (location_id);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully created the location alias index.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,44 @@
+"""
+Migration script to add the location coordinates index
+
+Nearby searches that cannot use the in-process grid index (filtered by
+location type, or with LOCATION_INDEX_ENABLED off) preselect rows with a
+latitude/longitude bounding box. This index serves that range condition, so
+only the rows around the point are read.
+
+Usage:
+    python -m migrations.add_location_spatial_index
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add the location coordinates index"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            CREATE INDEX IF NOT EXISTS idx_locations_lat_lng
+                ON public.locations (latitude, longitude);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully created the location coordinates index.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,63 @@
+"""
+Migration script to add the payment outbox
+
+payment_outbox holds the downstream effects of recorded payments until the
+worker in app/tasks/payment_processing.py applies them. The partial index
+covers only unprocessed rows, so claiming a chunk stays an index range scan
+no matter how much history the table keeps. Payments are also indexed by
+reservation for the per-reservation listing; transaction_id is already
+covered by its UNIQUE constraint.
+
+Usage:
+    python -m migrations.add_payment_outbox
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add the payment outbox"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            CREATE TABLE IF NOT EXISTS public.payment_outbox
+            (
+                outbox_id serial NOT NULL,
+                payment_id integer NOT NULL REFERENCES public.payments (payment_id),
+                event_type character varying(50) NOT NULL,
+                payload text,
+                attempts integer NOT NULL DEFAULT 0,
+                last_error text,
+                created_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+                processed_at timestamp without time zone,
+                CONSTRAINT payment_outbox_pkey PRIMARY KEY (outbox_id)
+            );
+            
+            CREATE INDEX IF NOT EXISTS idx_payment_outbox_pending
+                ON public.payment_outbox (event_type, outbox_id)
+                WHERE processed_at IS NULL;
+            
+            CREATE INDEX IF NOT EXISTS idx_payments_reservation_id
+                ON public.payments (reservation_id);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully created the payment outbox.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
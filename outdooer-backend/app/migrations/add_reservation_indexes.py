@@ -0,0 +1,64 @@
+"""
+Migration script to link reservations to activity dates and index them
+
+Reservations book seats on a specific activity date, so they get an
+available_date_id column. The indexes back the listings of the reservation
+endpoints: a user's reservations keyset-paginated by (created_at,
+reservation_id), a team's reservations filtered per activity and status,
+and the participants of a page loaded by reservation_id.
+
+Usage:
+    python -m migrations.add_reservation_indexes
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add the reservation date link and indexes"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            ALTER TABLE public.reservations
+                ADD COLUMN IF NOT EXISTS available_date_id integer
+                REFERENCES public.activity_available_date (available_date_id);
+            
+            CREATE INDEX IF NOT EXISTS idx_reservations_user_created
+                ON public.reservations (user_id, created_at, reservation_id);
+            
+            CREATE INDEX IF NOT EXISTS idx_reservations_activity_status
+                ON public.reservations (activity_id, status);
+            
+            CREATE INDEX IF NOT EXISTS idx_reservations_status
+                ON public.reservations (status);
+            
+            CREATE INDEX IF NOT EXISTS idx_reservations_expedition_id
+                ON public.reservations (expedition_id);
+            
+            CREATE INDEX IF NOT EXISTS idx_reservations_available_date_id
+                ON public.reservations (available_date_id);
+            
+            CREATE INDEX IF NOT EXISTS idx_reservationparticipants_reservation_id
+                ON public.reservationparticipants (reservation_id);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully added reservation date link and indexes.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
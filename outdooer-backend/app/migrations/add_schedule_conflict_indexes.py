@@ -0,0 +1,48 @@
+"""
+Migration script to add the guide schedule conflict indexes
+
+Double-booking checks load a guide's commitments within a time window:
+the dates of their activity instances and the expeditions they lead. These
+indexes let both lookups start from the guide instead of scanning every
+instance and expedition; dates are then range-scanned per instance through
+idx_activity_available_date_instance_date.
+
+Usage:
+    python -m migrations.add_schedule_conflict_indexes
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to add the guide schedule conflict indexes"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            CREATE INDEX IF NOT EXISTS idx_guide_activity_instance_guide
+                ON public.guide_activity_instance (guide_id);
+            
+            CREATE INDEX IF NOT EXISTS idx_expeditions_leader_start
+                ON public.expeditions (leader_id, start_date);
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully created guide schedule conflict indexes.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,42 @@
+"""
+Migration script to backfill team and guide metrics
+
+The team settings page reads activity, expedition and reservation counts from
+teammetrics and guidemetrics instead of counting the source tables on every
+request, and writes only add their deltas to those rows. On an existing
+database the rows start empty, so this script recomputes every counter from
+the source tables once (MetricsService.reconcile). It is a required deploy
+step when upgrading, to run before the new application code serves requests;
+it is safe to run again.
+
+Usage:
+    python -m migrations.backfill_metrics
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from app.services.metrics_service import MetricsService
+
+def run_migration():
+    """Run the migration to backfill team and guide metrics"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            result = MetricsService.reconcile()
+            db.session.commit()
+            
+            print(f"Successfully backfilled metrics of {result['teams']} teams and {result['guides']} guides.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
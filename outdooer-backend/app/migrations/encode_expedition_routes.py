@@ -0,0 +1,71 @@
+"""
+Migration script to store expedition routes as encoded polylines
+
+Adds point_count and route_levels to expeditionroutes, then rewrites every
+route_points JSON array as an encoded polyline (precision 6) with its
+simplified zoom levels, through RouteService.apply_points. Rows are
+converted in chunks of 100 committed separately, so the script can be
+interrupted and re-run: converted rows no longer start with '['.
+
+Usage:
+    python -m migrations.encode_expedition_routes
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to store expedition routes as encoded polylines"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            from app.models.expedition import ExpeditionRoute
+            from app.services.route_service import RouteService
+            
+            sql = """
+            ALTER TABLE public.expeditionroutes
+                ADD COLUMN IF NOT EXISTS point_count integer;
+            
+            ALTER TABLE public.expeditionroutes
+                ADD COLUMN IF NOT EXISTS route_levels text;
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            converted = skipped = 0
+            last_id = 0
+            while True:
+                routes = ExpeditionRoute.query.filter(
+                    ExpeditionRoute.expedition_route_id > last_id,
+                    ExpeditionRoute.route_points.like('[%')
+                ).order_by(ExpeditionRoute.expedition_route_id).limit(100).all()
+                if not routes:
+                    break
+                
+                for route in routes:
+                    points = RouteService.get_points(route)
+                    if len(points) < 2:
+                        skipped += 1
+                        continue
+                    RouteService.apply_points(route, points)
+                    converted += 1
+                last_id = routes[-1].expedition_route_id
+                db.session.commit()
+            
+            print(f"Successfully encoded {converted} expedition routes ({skipped} with fewer than 2 points left as they were).")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
@@ -0,0 +1,51 @@
+"""
+Migration script to make reservations.created_at required
+
+Reservation lists are paginated with a keyset on (created_at,
+reservation_id). A NULL created_at cannot be encoded in a cursor and never
+compares in the (created_at, id) < (...) condition, so paging stopped at
+such rows. Rows without a created_at are backfilled from updated_at (or the
+current time), and the column gets a server default and a NOT NULL
+constraint.
+
+Usage:
+    python -m migrations.require_reservation_created_at
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def run_migration():
+    """Run the migration to make reservations.created_at required"""
+    try:
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        
+        with app.app_context():
+            sql = """
+            UPDATE public.reservations
+                SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+                WHERE created_at IS NULL;
+            
+            ALTER TABLE public.reservations
+                ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP,
+                ALTER COLUMN created_at SET NOT NULL;
+            """
+            
+            db.session.execute(text(sql))
+            db.session.commit()
+            
+            print("Successfully made reservations.created_at required.")
+            
+    except Exception as e:
+        print(f"Error executing migration: {e}")
+        return
+
+if __name__ == '__main__':
+    run_migration()
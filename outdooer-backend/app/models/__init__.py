@@ -12,6 +12,9 @@ from app.models.team_role_permissions import TeamRolePermissions
 # Import location-related models
 from app.models.location import Location, LocationAlias
 
+# Import route models
+from app.models.route import Route
+
 # Import invitation models
 from app.models.invitation import InvitationCode, InvitationUsage
 
@@ -28,5 +31,23 @@ from app.models.activity_date import GuideActivityInstance, ActivityAvailableDat
 # Import expedition models
 from app.models.expedition import Expedition, ExpeditionActivity, ExpeditionLocation, ExpeditionResource, ExpeditionRoute
 
+# Import reservation models
+from app.models.reservation import Reservation, ReservationParticipant
+
+# Import payment models
+from app.models.payment import Payment, PaymentOutbox
+
+# Import earnings models
+from app.models.earnings import GuideEarning, GuidePayout, GuidePayoutDetail
+
+# Import metrics models
+from app.models.metrics import GuideMetrics
+
+# Import communication models
+from app.models.communication import Communication
+
+# Import background job models
+from app.models.job import BackgroundJob
+
 # Import audit models
 from app.models.audit_log import TeamSettingsAuditLog
\ No newline at end of file
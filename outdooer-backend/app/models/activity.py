@@ -1,6 +1,7 @@
 # app/models/activity.py
 from app import db
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 
 
 class Activity(db.Model):
@@ -18,11 +19,16 @@ class Activity(db.Model):
     difficulty_level = db.Column(db.String(50))
     created_by = db.Column(db.Integer, db.ForeignKey('users.user_id'))
     leader_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Keyset pagination key, so never NULL
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     activity_status = db.Column(db.String(20), default='active')
     act_cover_image_url = db.Column(db.String(255))
     
+    # Composite index backing the keyset-paginated catalog listing
+    __table_args__ = (
+        db.Index('idx_activities_created_at_id', 'created_at', 'activity_id'),
+    )
+    
     # Define relationships - fixing the location relationship
     location = db.relationship('Location', backref='activities')
     team = db.relationship('Team', back_populates='activities')
@@ -30,6 +36,28 @@ class Activity(db.Model):
     creator = db.relationship('User', foreign_keys=[created_by], back_populates='created_activities')
     leader = db.relationship('User', foreign_keys=[leader_id], back_populates='led_activities')
     
+    @classmethod
+    def query_with_relations(cls):
+        """
+        Query activities with every relationship used by to_dict() loaded up front.
+        
+        All five relationships are many-to-one, so they are joined into the same
+        SELECT. Serializing a list loaded through this query costs a single
+        round-trip instead of up to 5N+1 lazy loads.
+        """
+        return cls.query.options(
+            joinedload(cls.location),
+            joinedload(cls.activity_type),
+            joinedload(cls.leader),
+            joinedload(cls.creator),
+            joinedload(cls.team)
+        )
+    
+    @staticmethod
+    def serialize_list(activities):
+        """Convert a list of activities loaded with query_with_relations() to dictionaries."""
+        return [activity.to_dict() for activity in activities]
+    
     def to_dict(self):
         """Convert the Activity model to a dictionary."""
         try:
@@ -95,7 +123,7 @@ def find_similar_activities(team_id, activity_type_id, location_id, exclude_acti
     Returns:
     - List of similar activities
     """
-    query = Activity.query.filter_by(
+    query = Activity.query_with_relations().filter_by(
         team_id=team_id,
         activity_type_id=activity_type_id,
         location_id=location_id
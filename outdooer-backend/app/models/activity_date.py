@@ -1,6 +1,8 @@
 # app/models/activity_date.py
 from app import db
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm.util import identity_key
 
 class GuideActivityInstance(db.Model):
     __tablename__ = 'guide_activity_instance'
@@ -12,6 +14,11 @@ class GuideActivityInstance(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Backs guide schedule lookups
+    __table_args__ = (
+        db.Index('idx_guide_activity_instance_guide', 'guide_id'),
+    )
+    
     # Relaciones
     guide = db.relationship('User', foreign_keys=[guide_id], backref='guided_activity_instances')
     activity = db.relationship('Activity', backref='guide_instances')
@@ -42,6 +49,85 @@ class ActivityAvailableDate(db.Model):
     location = db.Column(db.String(255))
     status = db.Column(db.String(20), default='open')  # Values: open, closed, canceled
     
+    # Composite index backing calendar range scans per instance
+    __table_args__ = (
+        db.Index('idx_activity_available_date_instance_date', 'activity_instance_id', 'date'),
+    )
+    
+    @classmethod
+    def reserve_seats(cls, available_date_id, seats=1):
+        """
+        Atomically take seats on an open date
+        
+        The capacity check and the increment are a single conditional UPDATE,
+        so concurrent bookings can never oversell: the row lock serializes
+        them and each one re-evaluates the condition against the committed
+        count. The change is part of the current transaction; rolling it back
+        returns the seats.
+        
+        Args:
+            available_date_id: ID of the date
+            seats: Number of seats to take
+            
+        Returns:
+            int or None: Reservations after the update, or None if the date is
+            not open or does not have enough free seats
+        """
+        if seats < 1:
+            raise ValueError("seats must be at least 1")
+        
+        table = cls.__table__
+        current = func.coalesce(table.c.current_reservations, 0)
+        statement = table.update().where(
+            table.c.available_date_id == available_date_id,
+            table.c.status == 'open',
+            current + seats <= table.c.max_reservations
+        ).values(current_reservations=current + seats)
+        
+        return cls._apply_seat_update(available_date_id, statement)
+    
+    @classmethod
+    def release_seats(cls, available_date_id, seats=1):
+        """
+        Atomically give back seats, e.g. when a reservation is canceled
+        
+        Returns:
+            int or None: Reservations after the update, or None if fewer than
+            `seats` seats are taken
+        """
+        if seats < 1:
+            raise ValueError("seats must be at least 1")
+        
+        table = cls.__table__
+        current = func.coalesce(table.c.current_reservations, 0)
+        statement = table.update().where(
+            table.c.available_date_id == available_date_id,
+            current >= seats
+        ).values(current_reservations=current - seats)
+        
+        return cls._apply_seat_update(available_date_id, statement)
+    
+    @classmethod
+    def _apply_seat_update(cls, available_date_id, statement):
+        """Run a seat counter UPDATE and return the new count, or None if no row matched"""
+        if db.engine.dialect.full_returning:
+            row = db.session.execute(statement.returning(cls.__table__.c.current_reservations)).first()
+            reservations = row[0] if row else None
+        elif db.session.execute(statement).rowcount == 1:
+            # The row stays locked by our UPDATE until the transaction ends
+            reservations = db.session.query(cls.current_reservations).filter(
+                cls.available_date_id == available_date_id
+            ).scalar()
+        else:
+            reservations = None
+        
+        # Core UPDATEs bypass the identity map; drop a stale loaded counter
+        loaded = db.session.identity_map.get(identity_key(cls, available_date_id))
+        if loaded is not None and reservations is not None:
+            db.session.expire(loaded, ['current_reservations'])
+        
+        return reservations
+    
     def to_dict(self):
         return {
             'available_date_id': self.available_date_id,
@@ -0,0 +1,49 @@
+# app/models/communication.py
+from app import db
+from datetime import datetime
+
+
+class Communication(db.Model):
+    """An in-app notification or message, also sent by email once delivered_at is set"""
+    __tablename__ = 'communications'
+
+    communication_id = db.Column(db.Integer, primary_key=True)
+    sender_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    recipient_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.team_id'))
+    activity_id = db.Column(db.Integer, db.ForeignKey('activities.activity_id'))
+    expedition_id = db.Column(db.Integer, db.ForeignKey('expeditions.expedition_id'))
+    message_type = db.Column(db.String(50))
+    subject = db.Column(db.String(255))
+    message_content = db.Column(db.Text, nullable=False)
+    is_read = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    delivered_at = db.Column(db.DateTime)  # When the email was sent; NULL while pending
+    delivery_attempts = db.Column(db.Integer, nullable=False, default=0)  # Emails refused by the mail server
+    delivery_error = db.Column(db.Text)  # Last refusal; no more attempts after NOTIFICATION_MAX_DELIVERY_ATTEMPTS
+
+    __table_args__ = (
+        db.Index('idx_communications_recipient_created', 'recipient_id', 'created_at'),
+        # Delivery scans only undelivered rows
+        db.Index(
+            'idx_communications_undelivered', 'communication_id',
+            postgresql_where=db.text('delivered_at IS NULL'),
+            sqlite_where=db.text('delivered_at IS NULL')
+        ),
+    )
+
+    def to_dict(self):
+        return {
+            'communication_id': self.communication_id,
+            'sender_id': self.sender_id,
+            'recipient_id': self.recipient_id,
+            'team_id': self.team_id,
+            'activity_id': self.activity_id,
+            'expedition_id': self.expedition_id,
+            'message_type': self.message_type,
+            'subject': self.subject,
+            'message_content': self.message_content,
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None
+        }
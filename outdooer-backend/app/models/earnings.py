@@ -0,0 +1,106 @@
+# app/models/earnings.py
+from app import db
+from datetime import datetime
+
+
+class GuideEarning(db.Model):
+    __tablename__ = 'guideearnings'
+
+    earning_id = db.Column(db.Integer, primary_key=True)
+    guide_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.team_id'))
+    payment_id = db.Column(db.Integer, db.ForeignKey('payments.payment_id'))
+    reservation_id = db.Column(db.Integer, db.ForeignKey('reservations.reservation_id'))
+    activity_id = db.Column(db.Integer, db.ForeignKey('activities.activity_id'))
+    expedition_id = db.Column(db.Integer, db.ForeignKey('expeditions.expedition_id'))
+    amount = db.Column(db.Numeric(10, 2), nullable=False)  # Guide's share
+    team_share_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    commission_amount = db.Column(db.Numeric(10, 2), nullable=False)  # Platform commission
+    earnings_status = db.Column(db.String(20), default='pending')  # pending, paid
+    payment_date = db.Column(db.DateTime)  # When the earning was paid out
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # One earning per payment; payouts scan pending earnings per guide
+    __table_args__ = (
+        db.Index('idx_guideearnings_payment_id', 'payment_id', unique=True),
+        db.Index('idx_guideearnings_status_guide', 'earnings_status', 'guide_id'),
+        db.Index('idx_guideearnings_team_id', 'team_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'earning_id': self.earning_id,
+            'guide_id': self.guide_id,
+            'team_id': self.team_id,
+            'payment_id': self.payment_id,
+            'reservation_id': self.reservation_id,
+            'activity_id': self.activity_id,
+            'expedition_id': self.expedition_id,
+            'amount': str(self.amount),
+            'team_share_amount': str(self.team_share_amount),
+            'commission_amount': str(self.commission_amount),
+            'earnings_status': self.earnings_status,
+            'payment_date': self.payment_date.isoformat() if self.payment_date else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class GuidePayout(db.Model):
+    __tablename__ = 'guidepayouts'
+
+    payout_id = db.Column(db.Integer, primary_key=True)
+    guide_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    payment_method = db.Column(db.String(50), nullable=False)
+    reference_number = db.Column(db.String(255))
+    status = db.Column(db.String(20), default='processing')  # processing, completed, failed
+    notes = db.Column(db.Text)
+    payout_date = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_guidepayouts_guide_id', 'guide_id'),
+    )
+
+    # Relationships
+    details = db.relationship('GuidePayoutDetail', backref='payout', cascade='all, delete-orphan')
+
+    def to_dict(self):
+        return {
+            'payout_id': self.payout_id,
+            'guide_id': self.guide_id,
+            'amount': str(self.amount),
+            'payment_method': self.payment_method,
+            'reference_number': self.reference_number,
+            'status': self.status,
+            'notes': self.notes,
+            'payout_date': self.payout_date.isoformat() if self.payout_date else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class GuidePayoutDetail(db.Model):
+    __tablename__ = 'guidepayoutdetails'
+
+    detail_id = db.Column(db.Integer, primary_key=True)
+    payout_id = db.Column(db.Integer, db.ForeignKey('guidepayouts.payout_id'))
+    earning_id = db.Column(db.Integer, db.ForeignKey('guideearnings.earning_id'))
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_guidepayoutdetails_payout_id', 'payout_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'detail_id': self.detail_id,
+            'payout_id': self.payout_id,
+            'earning_id': self.earning_id,
+            'amount': str(self.amount),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
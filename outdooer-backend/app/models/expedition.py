@@ -20,6 +20,11 @@ class Expedition(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     expedition_status = db.Column(db.String(20), default='active')  # draft, active, canceled, completed
 
+    # Backs leader schedule conflict checks
+    __table_args__ = (
+        db.Index('idx_expeditions_leader_start', 'leader_id', 'start_date'),
+    )
+
     # Relationships
     team = db.relationship('Team', back_populates='expeditions')
     creator = db.relationship('User', foreign_keys=[created_by], back_populates='created_expeditions')
@@ -181,10 +186,12 @@ class ExpeditionRoute(db.Model):
     expedition_id = db.Column(db.Integer, db.ForeignKey('expeditions.expedition_id'), unique=True)
     total_distance_km = db.Column(db.Numeric(8, 2))
     total_travel_time_hours = db.Column(db.Numeric(6, 2))
-    route_points = db.Column(db.Text)  # JSON array of ordered [lat, lng] coordinates
+    route_points = db.Column(db.Text)  # Encoded polyline (precision 6) of the ordered [lat, lng] points; legacy rows hold a JSON array
+    point_count = db.Column(db.Integer)
+    route_levels = db.Column(db.Text)  # JSON list of simplified encoded polylines, one per zoom level (see RouteService)
     route_summary = db.Column(db.Text)  # Textual summary of the route
     map_image_url = db.Column(db.String(255))
-    last_calculated = db.Column(db.DateTime, default=datetime.utcnow)
+    last_calculated = db.Column(db.DateTime)  # When the metrics were computed from route_points; empty while pending
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -198,6 +205,7 @@ class ExpeditionRoute(db.Model):
             "expedition_id": self.expedition_id,
             "total_distance_km": float(self.total_distance_km) if self.total_distance_km else None,
             "total_travel_time_hours": float(self.total_travel_time_hours) if self.total_travel_time_hours else None,
+            "point_count": self.point_count,
             "route_summary": self.route_summary,
             "map_image_url": self.map_image_url,
             "last_calculated": self.last_calculated.isoformat() if self.last_calculated else None,
@@ -0,0 +1,73 @@
+# app/models/job.py
+from app import db
+from datetime import datetime
+import json
+
+
+class BackgroundJob(db.Model):
+    """
+    A unit of work queued for the background worker
+
+    Workers claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so the
+    table itself is the queue and no external broker is needed. Finished
+    jobs are kept with their timing for the per-job statistics.
+    """
+    __tablename__ = 'background_jobs'
+
+    job_id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text)  # JSON keyword arguments
+    dedupe_key = db.Column(db.String(255))  # At most one queued job per key
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Not claimed before this time
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Integer)
+
+    __table_args__ = (
+        # Claiming scans due queued jobs in order
+        db.Index(
+            'idx_background_jobs_due', 'run_at', 'job_id',
+            postgresql_where=db.text("status = 'queued'"),
+            sqlite_where=db.text("status = 'queued'")
+        ),
+        # Recovering jobs of crashed workers
+        db.Index(
+            'idx_background_jobs_running', 'locked_at',
+            postgresql_where=db.text("status = 'running'"),
+            sqlite_where=db.text("status = 'running'")
+        ),
+        db.Index(
+            'idx_background_jobs_dedupe', 'dedupe_key', unique=True,
+            postgresql_where=db.text("status = 'queued'"),
+            sqlite_where=db.text("status = 'queued'")
+        ),
+        db.Index('idx_background_jobs_name_status', 'job_name', 'status'),
+    )
+
+    def get_payload(self):
+        """Decode the JSON payload"""
+        return json.loads(self.payload) if self.payload else {}
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'job_name': self.job_name,
+            'payload': self.get_payload(),
+            'dedupe_key': self.dedupe_key,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_ms': self.duration_ms
+        }
@@ -22,6 +22,11 @@ class Location(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Bounding-box prefilter of nearby searches
+    __table_args__ = (
+        db.Index('idx_locations_lat_lng', 'latitude', 'longitude'),
+    )
+    
     # Define relationships
     aliases = db.relationship('LocationAlias', backref='location', lazy='dynamic')
     child_locations = db.relationship('Location', backref=db.backref('parent_location', remote_side=[location_id]))
@@ -42,5 +47,10 @@ class LocationAlias(db.Model):
     is_primary = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Reloading the autocomplete entries of changed locations
+    __table_args__ = (
+        db.Index('idx_location_aliases_location', 'location_id'),
+    )
+    
     def __repr__(self):
         return f'<LocationAlias {self.alias_name}>'
\ No newline at end of file
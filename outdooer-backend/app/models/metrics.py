@@ -0,0 +1,46 @@
+# app/models/metrics.py
+from app import db
+from datetime import datetime
+
+
+class GuideMetrics(db.Model):
+    __tablename__ = 'guidemetrics'
+
+    metric_id = db.Column(db.Integer, primary_key=True)
+    guide_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), unique=True)
+    total_activities_led = db.Column(db.Integer, default=0)
+    total_expeditions_led = db.Column(db.Integer, default=0)
+    total_participants_led = db.Column(db.Integer, default=0)
+    activities_completed = db.Column(db.Integer, default=0)
+    activities_canceled = db.Column(db.Integer, default=0)
+    expeditions_completed = db.Column(db.Integer, default=0)
+    expeditions_canceled = db.Column(db.Integer, default=0)
+    total_rating_sum = db.Column(db.Integer, default=0)
+    total_ratings_count = db.Column(db.Integer, default=0)
+    avg_rating = db.Column(db.Numeric(3, 2), db.Computed(
+        'CASE WHEN total_ratings_count > 0 '
+        'THEN CAST(total_rating_sum AS NUMERIC) / total_ratings_count ELSE 0 END',
+        persisted=True
+    ))
+    safety_incidents_count = db.Column(db.Integer, default=0)
+    last_activity_date = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'metric_id': self.metric_id,
+            'guide_id': self.guide_id,
+            'total_activities_led': self.total_activities_led,
+            'total_expeditions_led': self.total_expeditions_led,
+            'total_participants_led': self.total_participants_led,
+            'activities_completed': self.activities_completed,
+            'activities_canceled': self.activities_canceled,
+            'expeditions_completed': self.expeditions_completed,
+            'expeditions_canceled': self.expeditions_canceled,
+            'total_ratings_count': self.total_ratings_count,
+            'avg_rating': float(self.avg_rating) if self.avg_rating is not None else None,
+            'safety_incidents_count': self.safety_incidents_count,
+            'last_activity_date': self.last_activity_date.isoformat() if self.last_activity_date else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,103 @@
+# app/models/payment.py
+from app import db
+from datetime import datetime
+import json
+
+
+class Payment(db.Model):
+    __tablename__ = 'payments'
+
+    payment_id = db.Column(db.Integer, primary_key=True)
+    reservation_id = db.Column(db.Integer, db.ForeignKey('reservations.reservation_id'))
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    payment_method = db.Column(db.String(50), nullable=False)
+    transaction_id = db.Column(db.String(255), unique=True)  # Gateway idempotency key
+    payment_date = db.Column(db.DateTime, default=datetime.utcnow)
+    payment_status = db.Column(db.String(20), nullable=False)  # pending, completed, failed, refunded
+    gateway_response = db.Column(db.Text)
+    refund_amount = db.Column(db.Numeric(10, 2), default=0)
+    refund_reason = db.Column(db.Text)
+    refund_date = db.Column(db.DateTime)
+    refund_transaction_id = db.Column(db.String(255))
+    refund_status = db.Column(db.String(20))
+    refund_initiated_by = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    refund_method = db.Column(db.String(50))
+    billing_address = db.Column(db.Text)
+    billing_city = db.Column(db.String(100))
+    billing_country = db.Column(db.String(100))
+    billing_postal_code = db.Column(db.String(20))
+    eligible_for_auto_refund = db.Column(db.Boolean, default=True)
+    is_test_payment = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_payments_reservation_id', 'reservation_id'),
+    )
+
+    # Relationships
+    reservation = db.relationship('Reservation', backref='payments')
+
+    def to_dict(self):
+        return {
+            'payment_id': self.payment_id,
+            'reservation_id': self.reservation_id,
+            'amount': str(self.amount),
+            'payment_method': self.payment_method,
+            'transaction_id': self.transaction_id,
+            'payment_date': self.payment_date.isoformat() if self.payment_date else None,
+            'payment_status': self.payment_status,
+            'refund_amount': str(self.refund_amount) if self.refund_amount is not None else None,
+            'refund_status': self.refund_status,
+            'refund_date': self.refund_date.isoformat() if self.refund_date else None,
+            'billing_city': self.billing_city,
+            'billing_country': self.billing_country,
+            'is_test_payment': self.is_test_payment,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class PaymentOutbox(db.Model):
+    """
+    Downstream effects of recorded payments, written in the payment's transaction
+
+    A row exists if and only if its payment was committed, so workers draining
+    this table never miss or invent an effect. Rows are marked processed
+    instead of deleted, which keeps the table auditable.
+    """
+    __tablename__ = 'payment_outbox'
+
+    outbox_id = db.Column(db.Integer, primary_key=True)
+    payment_id = db.Column(db.Integer, db.ForeignKey('payments.payment_id'), nullable=False)
+    event_type = db.Column(db.String(50), nullable=False)  # payment_completed, payment_refunded
+    payload = db.Column(db.Text)  # JSON
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+
+    # Workers only ever scan the unprocessed tail in insertion order
+    __table_args__ = (
+        db.Index(
+            'idx_payment_outbox_pending', 'event_type', 'outbox_id',
+            postgresql_where=db.text('processed_at IS NULL'),
+            sqlite_where=db.text('processed_at IS NULL')
+        ),
+    )
+
+    def get_payload(self):
+        """Decode the JSON payload"""
+        return json.loads(self.payload) if self.payload else {}
+
+    def to_dict(self):
+        return {
+            'outbox_id': self.outbox_id,
+            'payment_id': self.payment_id,
+            'event_type': self.event_type,
+            'payload': self.get_payload(),
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+        }
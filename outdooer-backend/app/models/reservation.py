@@ -0,0 +1,96 @@
+# app/models/reservation.py
+from app import db
+from datetime import datetime
+
+
+class Reservation(db.Model):
+    __tablename__ = 'reservations'
+
+    reservation_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    activity_id = db.Column(db.Integer, db.ForeignKey('activities.activity_id'))
+    expedition_id = db.Column(db.Integer, db.ForeignKey('expeditions.expedition_id'))
+    available_date_id = db.Column(db.Integer, db.ForeignKey('activity_available_date.available_date_id'))
+    reservation_date = db.Column(db.DateTime, default=datetime.utcnow)
+    participant_count = db.Column(db.Integer, default=1)
+    total_price = db.Column(db.Numeric(10, 2), nullable=False)
+    commission_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, confirmed, canceled, completed
+    denial_reason = db.Column(db.String(100))
+    payment_status = db.Column(db.String(20), default='unpaid')  # unpaid, paid, refunded
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Keyset pagination key, so never NULL
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    activity_start_datetime = db.Column(db.DateTime)
+    activity_end_datetime = db.Column(db.DateTime)
+
+    # Keyset listing per user, filtering per activity and status, seat lookups per date
+    __table_args__ = (
+        db.Index('idx_reservations_user_created', 'user_id', 'created_at', 'reservation_id'),
+        db.Index('idx_reservations_activity_status', 'activity_id', 'status'),
+        db.Index('idx_reservations_status', 'status'),
+        db.Index('idx_reservations_expedition_id', 'expedition_id'),
+        db.Index('idx_reservations_available_date_id', 'available_date_id'),
+    )
+
+    # Relationships
+    user = db.relationship('User', backref='reservations')
+    activity = db.relationship('Activity', backref='reservations')
+    participants = db.relationship('ReservationParticipant', back_populates='reservation', cascade='all, delete-orphan')
+
+    def to_dict(self, include_participants=True):
+        """Convert reservation to dictionary for JSON serialization"""
+        result = {
+            'reservation_id': self.reservation_id,
+            'user_id': self.user_id,
+            'activity_id': self.activity_id,
+            'expedition_id': self.expedition_id,
+            'available_date_id': self.available_date_id,
+            'reservation_date': self.reservation_date.isoformat() if self.reservation_date else None,
+            'participant_count': self.participant_count,
+            'total_price': str(self.total_price),  # Convert to string for JSON
+            'commission_amount': str(self.commission_amount),
+            'status': self.status,
+            'denial_reason': self.denial_reason,
+            'payment_status': self.payment_status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'activity_start_datetime': self.activity_start_datetime.isoformat() if self.activity_start_datetime else None,
+            'activity_end_datetime': self.activity_end_datetime.isoformat() if self.activity_end_datetime else None
+        }
+
+        if include_participants:
+            result['participants'] = [participant.to_dict() for participant in self.participants]
+
+        return result
+
+
+class ReservationParticipant(db.Model):
+    __tablename__ = 'reservationparticipants'
+
+    participant_id = db.Column(db.Integer, primary_key=True)
+    reservation_id = db.Column(db.Integer, db.ForeignKey('reservations.reservation_id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    first_name = db.Column(db.String(100), nullable=False)
+    last_name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(255), nullable=False)
+    emergency_contact_name = db.Column(db.String(255))
+    emergency_contact_phone = db.Column(db.String(50))
+
+    __table_args__ = (
+        db.Index('idx_reservationparticipants_reservation_id', 'reservation_id'),
+    )
+
+    # Relationships
+    reservation = db.relationship('Reservation', back_populates='participants')
+
+    def to_dict(self):
+        return {
+            'participant_id': self.participant_id,
+            'reservation_id': self.reservation_id,
+            'user_id': self.user_id,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'email': self.email,
+            'emergency_contact_name': self.emergency_contact_name,
+            'emergency_contact_phone': self.emergency_contact_phone
+        }
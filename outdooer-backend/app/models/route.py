@@ -0,0 +1,55 @@
+# app/models/route.py
+from app import db
+from datetime import datetime
+
+
+class Route(db.Model):
+    """
+    A reusable trail or track that activities follow
+
+    The geometry is a GeoJSON LineString or MultiLineString whose positions
+    may carry an elevation as a third coordinate. Distance, elevation gain
+    and loss and estimated duration are computed from it in the background
+    whenever it is written (see app/tasks/route_jobs.py).
+    """
+    __tablename__ = 'routes'
+
+    route_id = db.Column(db.Integer, primary_key=True)
+    route_name = db.Column(db.String(255), nullable=False)
+    route_type = db.Column(db.String(50), nullable=False)
+    total_distance_km = db.Column(db.Numeric(8, 2))
+    elevation_gain_m = db.Column(db.Numeric(8, 2))
+    elevation_loss_m = db.Column(db.Numeric(8, 2))
+    difficulty_level = db.Column(db.String(20))
+    estimated_duration_minutes = db.Column(db.Integer)
+    start_location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'))
+    end_location_id = db.Column(db.Integer, db.ForeignKey('locations.location_id'))
+    geojson = db.Column(db.Text)
+    is_loop = db.Column(db.Boolean, default=False)
+    is_verified = db.Column(db.Boolean, default=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            "route_id": self.route_id,
+            "route_name": self.route_name,
+            "route_type": self.route_type,
+            "total_distance_km": float(self.total_distance_km) if self.total_distance_km is not None else None,
+            "elevation_gain_m": float(self.elevation_gain_m) if self.elevation_gain_m is not None else None,
+            "elevation_loss_m": float(self.elevation_loss_m) if self.elevation_loss_m is not None else None,
+            "difficulty_level": self.difficulty_level,
+            "estimated_duration_minutes": self.estimated_duration_minutes,
+            "start_location_id": self.start_location_id,
+            "end_location_id": self.end_location_id,
+            "is_loop": self.is_loop,
+            "is_verified": self.is_verified,
+            "created_by": self.created_by,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def __repr__(self):
+        return f'<Route {self.route_name}>'
@@ -53,6 +53,21 @@ class TeamRevenueSharing(db.Model):
         db.UniqueConstraint('team_id', 'role_level', name='teamrevenuesharing_team_id_role_level_key'),
     )
     
+    @classmethod
+    def percentages_for_team(cls, team_id):
+        """
+        Load a team's revenue sharing percentages with a single query.
+        
+        Returns:
+            dict: {'level_<n>_percentage': float} for each configured role level
+        """
+        rows = db.session.query(cls.role_level, cls.percentage).filter(
+            cls.team_id == team_id,
+            cls.role_level.between(1, 4)
+        ).order_by(cls.role_level).all()
+        
+        return {f'level_{role_level}_percentage': float(percentage) for role_level, percentage in rows}
+    
     def to_dict(self):
         return {
             'sharing_id': self.sharing_id,
@@ -22,3 +22,18 @@ class TeamMember(db.Model):
     user = db.relationship('User', back_populates='team_memberships')
     team = db.relationship('Team', back_populates='members')
     
+    @classmethod
+    def role_level_counts(cls, team_id):
+        """
+        Count a team's members per role level with a single GROUP BY query.
+        
+        Returns:
+            dict: {'level_1_count': n, ..., 'level_4_count': n}
+        """
+        rows = db.session.query(
+            cls.role_level, db.func.count(cls.team_member_id)
+        ).filter(cls.team_id == team_id).group_by(cls.role_level).all()
+        
+        counts = dict(rows)
+        return {f'level_{level}_count': counts.get(level, 0) for level in range(1, 5)}
+    
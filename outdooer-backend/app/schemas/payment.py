@@ -0,0 +1,19 @@
+from marshmallow import validate
+from app import ma
+
+
+class PaymentCreateSchema(ma.Schema):
+    """A payment reported by the client or the gateway webhook"""
+    reservation_id = ma.Integer(required=True)
+    amount = ma.Decimal(required=True, places=2, validate=validate.Range(min=0, min_inclusive=False))
+    payment_method = ma.String(required=True, validate=validate.Length(min=1, max=50))
+    transaction_id = ma.String(required=True, validate=validate.Length(min=1, max=255))
+    payment_status = ma.String(required=True, validate=validate.OneOf(
+        ['pending', 'completed', 'succeeded', 'paid', 'failed']
+    ))
+    gateway_response = ma.Raw(allow_none=True)
+    billing_address = ma.String(allow_none=True)
+    billing_city = ma.String(allow_none=True, validate=validate.Length(max=100))
+    billing_country = ma.String(allow_none=True, validate=validate.Length(max=100))
+    billing_postal_code = ma.String(allow_none=True, validate=validate.Length(max=20))
+    is_test_payment = ma.Boolean()
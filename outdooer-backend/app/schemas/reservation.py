@@ -0,0 +1,18 @@
+from marshmallow import validate
+from app import ma
+
+
+class ParticipantSchema(ma.Schema):
+    """A participant of a reservation"""
+    user_id = ma.Integer(allow_none=True)
+    first_name = ma.String(required=True, validate=validate.Length(min=1, max=100))
+    last_name = ma.String(required=True, validate=validate.Length(min=1, max=100))
+    email = ma.Email(required=True, validate=validate.Length(max=255))
+    emergency_contact_name = ma.String(allow_none=True, validate=validate.Length(max=255))
+    emergency_contact_phone = ma.String(allow_none=True, validate=validate.Length(max=50))
+
+
+class ReservationCreateSchema(ma.Schema):
+    """Request body for booking seats on an activity date"""
+    available_date_id = ma.Integer(required=True)
+    participants = ma.List(ma.Nested(ParticipantSchema), required=True, validate=validate.Length(min=1))
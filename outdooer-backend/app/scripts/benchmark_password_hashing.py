@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark password verification throughput for several hashing costs
+
+For each PASSWORD_HASH_METHOD candidate this reports:
+- the latency of a single verification
+- logins/second on one core (sequential verification)
+- logins/second through the bounded verification pool, using
+  PASSWORD_HASH_WORKERS threads (defaults to the number of cores)
+
+Use it to pick a per-environment PASSWORD_HASH_METHOD that keeps a single
+login well under the request budget.
+
+Usage:
+    python -m app.scripts.benchmark_password_hashing
+    python -m app.scripts.benchmark_password_hashing --seconds 5 pbkdf2:sha256:100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path to import application modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHODS = [
+    'pbkdf2:sha256:1000',
+    'pbkdf2:sha256:50000',
+    'pbkdf2:sha256:150000',
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+]
+
+
+def measure_sequential(password_hash, password, seconds):
+    """Verify repeatedly on the current thread, return verifications per second"""
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        check_password_hash(password_hash, password)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def measure_pool(password_hash, password, seconds, workers):
+    """Verify through a bounded pool, return verifications per second"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            batch = [pool.submit(check_password_hash, password_hash, password) for _ in range(workers * 4)]
+            for future in batch:
+                future.result()
+            count += len(batch)
+        return count / (time.perf_counter() - started)
+
+
+def run_benchmark(methods, seconds, workers):
+    """Print a throughput table for each hash method"""
+    password = 'correct horse battery staple'
+
+    print(f"Cores: {os.cpu_count()}, pool workers: {workers}, {seconds}s per measurement")
+    print(f"{'method':<26}{'latency ms':>12}{'logins/s/core':>16}{'logins/s pool':>16}")
+
+    for method in methods:
+        password_hash = generate_password_hash(password, method=method)
+        per_core = measure_sequential(password_hash, password, seconds)
+        pooled = measure_pool(password_hash, password, seconds, workers)
+        print(f"{method:<26}{1000 / per_core:>12.2f}{per_core:>16.1f}{pooled:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark password hashing costs')
+    parser.add_argument('methods', nargs='*', default=DEFAULT_METHODS,
+                        help='werkzeug hash methods to measure')
+    parser.add_argument('--seconds', type=float, default=2.0,
+                        help='duration of each measurement')
+    parser.add_argument('--workers', type=int,
+                        default=int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2)),
+                        help='size of the verification pool')
+    args = parser.parse_args()
+
+    run_benchmark(args.methods, args.seconds, args.workers)
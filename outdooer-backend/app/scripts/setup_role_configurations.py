@@ -1,5 +1,7 @@
 # app/scripts/setup_role_configurations.py
 from app.models.team_role_permissions import TeamRolePermissions
+from app.services.permission_cache import PermissionCache
+from app.services.permission_matrix import reload_global_matrix
 from app.database import db
 
 def setup_role_configurations():
@@ -90,6 +92,9 @@ def setup_role_configurations():
             print(f"Added permission: Role {config['role_level']} - {config['permission_key']} -> {config['is_enabled']}")
     
     db.session.commit()
+    
+    # Swap in a freshly compiled global matrix
+    reload_global_matrix()
     print(f"Role permissions configuration completed.")
 
 def setup_team_role_permissions(team_id, creator_id):
@@ -121,4 +126,5 @@ def setup_team_role_permissions(team_id, creator_id):
             db.session.add(team_perm)
     
     db.session.commit()
+    PermissionCache.invalidate(team_id)
     print(f"Team-specific permissions created for team {team_id}")
\ No newline at end of file
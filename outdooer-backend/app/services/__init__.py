@@ -6,5 +6,11 @@ from app.services.permission_service import PermissionService
 from app.services.auth_service import AuthService
 from app.services.activity_service import ActivityService
 from app.services.activity_date_service import ActivityDateService
-
-
+from app.services.reservation_service import ReservationService
+from app.services.payment_service import PaymentService
+from app.services.earnings_service import EarningsService
+from app.services.metrics_service import MetricsService
+from app.services.notification_service import NotificationService
+from app.services.location_service import LocationService
+from app.services.tile_service import TileService
+from app.services.route_service import RouteService
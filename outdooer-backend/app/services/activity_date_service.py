@@ -1,9 +1,13 @@
 # app/services/activity_date_service.py
+from flask import current_app
 from app import db
 from datetime import datetime, date, time
 from app.models.activity import Activity
 from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
 from app.models.team_member import TeamMember
+from app.models.user import User
+from app.services.schedule_service import ScheduleService
+from app.utils.recurrence import expand_recurrence
 
 class ActivityDateService:
     """Service for activity date related operations"""
@@ -62,6 +66,48 @@ class ActivityDateService:
             db.session.rollback()
             return None, f"Error creating guide instance: {str(e)}"
     
+    @staticmethod
+    def _check_add_date_permission(guide_id, activity):
+        """Return an error message if the guide may not add dates to the activity"""
+        if not activity.team_id:
+            return None
+        
+        team_member = TeamMember.query.filter_by(
+            user_id=guide_id,
+            team_id=activity.team_id
+        ).first()
+        
+        if not team_member:
+            return "You are not a member of this team"
+        
+        # Check role-based permissions
+        if team_member.role_level > 3:
+            if activity.created_by != guide_id and activity.leader_id != guide_id:
+                return "You do not have permission to add dates to this activity"
+        
+        return None
+    
+    @staticmethod
+    def _get_or_create_instance(guide_id, activity):
+        """Find the guide's active instance of an activity, creating it if needed"""
+        instance = GuideActivityInstance.query.filter_by(
+            guide_id=guide_id,
+            activity_id=activity.activity_id,
+            is_active=True
+        ).first()
+        
+        if not instance:
+            instance = GuideActivityInstance(
+                guide_id=guide_id,
+                activity_id=activity.activity_id,
+                team_id=activity.team_id,
+                is_active=True
+            )
+            db.session.add(instance)
+            db.session.flush()
+        
+        return instance
+    
     @staticmethod
     def add_activity_date(guide_id, activity_id, date_str, start_time_str, end_time_str, 
                          max_reservations=10, location=None, status="open"):
@@ -73,19 +119,9 @@ class ActivityDateService:
                 return None, "Activity not found"
             
             # Verify permissions for team activities
-            if activity.team_id:
-                team_member = TeamMember.query.filter_by(
-                    user_id=guide_id,
-                    team_id=activity.team_id
-                ).first()
-                
-                if not team_member:
-                    return None, "You are not a member of this team"
-                
-                # Check role-based permissions
-                if team_member.role_level > 3:
-                    if activity.created_by != guide_id and activity.leader_id != guide_id:
-                        return None, "You do not have permission to add dates to this activity"
+            error = ActivityDateService._check_add_date_permission(guide_id, activity)
+            if error:
+                return None, error
             
             # Parse date and time
             try:
@@ -95,22 +131,15 @@ class ActivityDateService:
             except ValueError:
                 return None, "Invalid date or time format"
             
-            # Find or create activity instance
-            instance = GuideActivityInstance.query.filter_by(
-                guide_id=guide_id,
-                activity_id=activity_id,
-                is_active=True
-            ).first()
+            # Reject dates that double-book the guide
+            if status not in ScheduleService.INACTIVE_DATE_STATUSES:
+                start, end = ScheduleService.slot_interval(date_value, start_time_value, end_time_value)
+                conflicts = ScheduleService.check_interval(guide_id, start, end)
+                if conflicts:
+                    return None, ScheduleService.conflict_message(conflicts)
             
-            if not instance:
-                instance = GuideActivityInstance(
-                    guide_id=guide_id,
-                    activity_id=activity_id,
-                    team_id=activity.team_id,
-                    is_active=True
-                )
-                db.session.add(instance)
-                db.session.flush()
+            # Find or create activity instance
+            instance = ActivityDateService._get_or_create_instance(guide_id, activity)
             
             # Create the date
             activity_date = ActivityAvailableDate(
@@ -137,6 +166,104 @@ class ActivityDateService:
             db.session.rollback()
             return None, f"Error adding activity date: {str(e)}"
     
+    @staticmethod
+    def add_recurring_dates(guide_id, activity_id, start_date_str, recurrence, start_time_str,
+                            end_time_str, exceptions=None, max_reservations=10, location=None,
+                            status="open"):
+        """
+        Expand a recurrence rule and insert all of its dates in one transaction
+        
+        Permissions and the guide's instance are resolved once, dates the
+        instance already has at the same start time are skipped, and the
+        remaining rows are written with a single executemany INSERT.
+        
+        Returns:
+            tuple: ({'created', 'skipped', 'dates', 'instance_id'}, error)
+        """
+        try:
+            activity = Activity.query.get(activity_id)
+            if not activity:
+                return None, "Activity not found"
+            
+            error = ActivityDateService._check_add_date_permission(guide_id, activity)
+            if error:
+                return None, error
+            
+            try:
+                start_time_value = time.fromisoformat(start_time_str)
+                end_time_value = time.fromisoformat(end_time_str)
+            except (ValueError, TypeError):
+                return None, "Invalid time format"
+            
+            if end_time_value <= start_time_value:
+                return None, "End time must be after start time"
+            
+            try:
+                occurrences = expand_recurrence(
+                    start_date_str,
+                    recurrence,
+                    exceptions=exceptions,
+                    max_occurrences=current_app.config.get('RECURRENCE_MAX_OCCURRENCES', 500)
+                )
+            except (ValueError, TypeError) as e:
+                return None, f"Invalid recurrence: {str(e)}"
+            
+            if not occurrences:
+                return None, "Recurrence does not produce any dates"
+            
+            instance = ActivityDateService._get_or_create_instance(guide_id, activity)
+            instance_id = instance.instance_id
+            
+            # Skip dates this instance already has at the same start time
+            existing = {
+                existing_date for existing_date, in db.session.query(ActivityAvailableDate.date).filter(
+                    ActivityAvailableDate.activity_instance_id == instance_id,
+                    ActivityAvailableDate.date >= occurrences[0],
+                    ActivityAvailableDate.date <= occurrences[-1],
+                    ActivityAvailableDate.start_time == start_time_value
+                )
+            }
+            new_dates = [occurrence for occurrence in occurrences if occurrence not in existing]
+            
+            # Check the whole series against the guide's schedule in one pass
+            if new_dates and status not in ScheduleService.INACTIVE_DATE_STATUSES:
+                results = ScheduleService.find_conflicts(guide_id, [
+                    ScheduleService.slot_interval(occurrence, start_time_value, end_time_value)
+                    for occurrence in new_dates
+                ])
+                conflicts = [conflict for result in results for conflict in result]
+                if conflicts:
+                    db.session.rollback()
+                    return None, ScheduleService.conflict_message(conflicts)
+            
+            if new_dates:
+                db.session.execute(
+                    ActivityAvailableDate.__table__.insert(),
+                    [{
+                        'activity_instance_id': instance_id,
+                        'date': occurrence,
+                        'start_time': start_time_value,
+                        'end_time': end_time_value,
+                        'max_reservations': max_reservations,
+                        'current_reservations': 0,
+                        'location': location,
+                        'status': status
+                    } for occurrence in new_dates]
+                )
+            
+            db.session.commit()
+            
+            return {
+                'instance_id': instance_id,
+                'activity_id': activity_id,
+                'created': len(new_dates),
+                'skipped': len(occurrences) - len(new_dates),
+                'dates': [occurrence.isoformat() for occurrence in new_dates]
+            }, None
+        except Exception as e:
+            db.session.rollback()
+            return None, f"Error adding recurring dates: {str(e)}"
+    
     @staticmethod
     def update_activity_date(date_id, current_user_id, data):
         """Update an existing activity date"""
@@ -192,6 +319,19 @@ class ActivityDateService:
             if 'status' in data:
                 activity_date.status = data['status']
             
+            # Re-check the guide's schedule when the slot moves or is reopened
+            if {'date', 'start_time', 'end_time', 'status'} & set(data) and \
+                    activity_date.status not in ScheduleService.INACTIVE_DATE_STATUSES:
+                start, end = ScheduleService.slot_interval(
+                    activity_date.date, activity_date.start_time, activity_date.end_time
+                )
+                conflicts = ScheduleService.check_interval(
+                    instance.guide_id, start, end, exclude_date_ids=(date_id,)
+                )
+                if conflicts:
+                    db.session.rollback()
+                    return None, ScheduleService.conflict_message(conflicts)
+            
             db.session.commit()
             
             # Prepare response
@@ -245,6 +385,34 @@ class ActivityDateService:
             db.session.rollback()
             return None, f"Error deleting activity date: {str(e)}"
     
+    @staticmethod
+    def _dates_query():
+        """
+        Query available dates joined with their instance, guide and activity
+        
+        Rows are (ActivityAvailableDate, guide_id, activity_id, team_id,
+        guide_first_name, guide_last_name, activity_title), so callers never
+        need a query per instance or a lazy load per date.
+        """
+        return db.session.query(
+            ActivityAvailableDate,
+            GuideActivityInstance.guide_id,
+            GuideActivityInstance.activity_id,
+            GuideActivityInstance.team_id,
+            User.first_name,
+            User.last_name,
+            Activity.title
+        ).join(
+            GuideActivityInstance,
+            GuideActivityInstance.instance_id == ActivityAvailableDate.activity_instance_id
+        ).outerjoin(
+            User, User.user_id == GuideActivityInstance.guide_id
+        ).outerjoin(
+            Activity, Activity.activity_id == GuideActivityInstance.activity_id
+        ).filter(
+            GuideActivityInstance.is_active.is_(True)
+        )
+    
     @staticmethod
     def get_activity_dates(activity_id):
         """Get all available dates for an activity"""
@@ -254,20 +422,20 @@ class ActivityDateService:
             if not activity:
                 return None, "Activity not found"
             
-            # Get all instances for this activity
-            instances = GuideActivityInstance.query.filter_by(activity_id=activity_id, is_active=True).all()
+            rows = ActivityDateService._dates_query().filter(
+                GuideActivityInstance.activity_id == activity_id
+            ).order_by(
+                ActivityAvailableDate.activity_instance_id,
+                ActivityAvailableDate.available_date_id
+            ).all()
             
-            # Get all dates from all instances
             all_dates = []
-            for instance in instances:
-                dates = ActivityAvailableDate.query.filter_by(activity_instance_id=instance.instance_id).all()
-                
-                for date_obj in dates:
-                    date_dict = date_obj.to_dict()
-                    date_dict['guide_id'] = instance.guide_id
-                    date_dict['guide_name'] = f"{instance.guide.first_name} {instance.guide.last_name}" if instance.guide else "Unknown"
-                    date_dict['activity_id'] = activity_id
-                    all_dates.append(date_dict)
+            for date_obj, guide_id, _, _, first_name, last_name, _ in rows:
+                date_dict = date_obj.to_dict()
+                date_dict['guide_id'] = guide_id
+                date_dict['guide_name'] = f"{first_name} {last_name}" if first_name is not None else "Unknown"
+                date_dict['activity_id'] = activity_id
+                all_dates.append(date_dict)
             
             return all_dates, None
         except Exception as e:
@@ -277,21 +445,84 @@ class ActivityDateService:
     def get_guide_activity_dates(guide_id):
         """Get all available dates for activities led by a specific guide"""
         try:
-            # Get instances for this guide
-            instances = GuideActivityInstance.query.filter_by(guide_id=guide_id, is_active=True).all()
+            rows = ActivityDateService._dates_query().filter(
+                GuideActivityInstance.guide_id == guide_id
+            ).order_by(
+                ActivityAvailableDate.activity_instance_id,
+                ActivityAvailableDate.available_date_id
+            ).all()
             
-            # Get all dates for all instances
             all_dates = []
-            for instance in instances:
-                dates = ActivityAvailableDate.query.filter_by(activity_instance_id=instance.instance_id).all()
-                
-                for date_obj in dates:
-                    date_dict = date_obj.to_dict()
-                    date_dict['guide_id'] = instance.guide_id
-                    date_dict['activity_id'] = instance.activity_id
-                    date_dict['activity_title'] = instance.activity.title if instance.activity else "Unknown"
-                    all_dates.append(date_dict)
+            for date_obj, row_guide_id, activity_id, _, _, _, activity_title in rows:
+                date_dict = date_obj.to_dict()
+                date_dict['guide_id'] = row_guide_id
+                date_dict['activity_id'] = activity_id
+                date_dict['activity_title'] = activity_title if activity_title is not None else "Unknown"
+                all_dates.append(date_dict)
             
             return all_dates, None
         except Exception as e:
-            return None, f"Error fetching guide activity dates: {str(e)}"
\ No newline at end of file
+            return None, f"Error fetching guide activity dates: {str(e)}"
+    
+    @staticmethod
+    def get_calendar(date_from, date_to, activity_id=None, team_id=None, guide_id=None,
+                     status=None, group_by_day=False):
+        """
+        Get the available dates within a [date_from, date_to] window
+        
+        Args:
+            date_from: First day of the window (inclusive)
+            date_to: Last day of the window (inclusive)
+            activity_id: Restrict to one activity
+            team_id: Restrict to one team
+            guide_id: Restrict to one guide
+            status: Restrict to one date status (e.g. 'open')
+            group_by_day: Return a list of days, each with its dates
+            
+        Returns:
+            tuple: (list of dates, or list of {'date', 'dates'} days, error)
+        """
+        try:
+            query = ActivityDateService._dates_query().filter(
+                ActivityAvailableDate.date >= date_from,
+                ActivityAvailableDate.date <= date_to
+            )
+            
+            if activity_id is not None:
+                query = query.filter(GuideActivityInstance.activity_id == activity_id)
+            if team_id is not None:
+                query = query.filter(GuideActivityInstance.team_id == team_id)
+            if guide_id is not None:
+                query = query.filter(GuideActivityInstance.guide_id == guide_id)
+            if status:
+                query = query.filter(ActivityAvailableDate.status == status)
+            
+            rows = query.order_by(
+                ActivityAvailableDate.date,
+                ActivityAvailableDate.start_time,
+                ActivityAvailableDate.available_date_id
+            ).all()
+            
+            dates = []
+            for date_obj, row_guide_id, row_activity_id, row_team_id, first_name, last_name, activity_title in rows:
+                date_dict = date_obj.to_dict()
+                date_dict['guide_id'] = row_guide_id
+                date_dict['guide_name'] = f"{first_name} {last_name}" if first_name is not None else "Unknown"
+                date_dict['activity_id'] = row_activity_id
+                date_dict['activity_title'] = activity_title if activity_title is not None else "Unknown"
+                date_dict['team_id'] = row_team_id
+                dates.append(date_dict)
+            
+            if not group_by_day:
+                return dates, None
+            
+            # Rows are ordered by date, so consecutive rows share a day
+            days = []
+            for date_dict in dates:
+                if not days or days[-1]['date'] != date_dict['date']:
+                    days.append({'date': date_dict['date'], 'dates': []})
+                days[-1]['dates'].append(date_dict)
+            
+            return days, None
+        except Exception as e:
+            return None, f"Error fetching calendar: {str(e)}"
@@ -5,17 +5,90 @@ from app.models.location import Location
 from app.models.activity_type import ActivityType
 from app.models.team import Team
 from app.models.team_member import TeamMember
+from app.utils.pagination import encode_cursor
 from datetime import datetime
 
 class ActivityService:
     """Service for activity-related operations"""
     
     @staticmethod
-    def get_all_activities():
-        """Get all activities"""
+    def _get_page(query, after, limit):
+        """
+        Apply keyset pagination to an activity query and serialize the page
+        
+        Activities are ordered newest first by (created_at, activity_id), so a
+        page is always an index range scan starting right after the cursor.
+        """
+        if after:
+            after_created_at, after_id = after
+            query = query.filter(
+                db.tuple_(Activity.created_at, Activity.activity_id) < (after_created_at, after_id)
+            )
+        
+        # Fetch one extra row to know whether another page exists
+        activities = query.order_by(
+            Activity.created_at.desc(),
+            Activity.activity_id.desc()
+        ).limit(limit + 1).all()
+        
+        has_more = len(activities) > limit
+        activities = activities[:limit]
+        
+        next_cursor = None
+        if has_more:
+            last = activities[-1]
+            next_cursor = encode_cursor(last.created_at, last.activity_id)
+        
+        return {
+            'activities': Activity.serialize_list(activities),
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+    
+    @staticmethod
+    def get_all_activities(filters=None, after=None, limit=20):
+        """
+        Get one page of the activity catalog using keyset pagination
+        
+        Args:
+            filters: Optional dict with activity_type_id, location_id,
+                     difficulty_level (any case), min_price, max_price,
+                     activity_status and search, matched against the
+                     title, description and location name
+            after: Optional (created_at, activity_id) tuple of the last row
+                   of the previous page
+            limit: Maximum number of activities to return
+            
+        Returns:
+            tuple: (page dict with activities and next_cursor, error message)
+        """
         try:
-            activities = Activity.query.all()
-            return [activity.to_dict() for activity in activities], None
+            filters = filters or {}
+            query = Activity.query_with_relations()
+            
+            if filters.get('activity_type_id') is not None:
+                query = query.filter(Activity.activity_type_id == filters['activity_type_id'])
+            if filters.get('location_id') is not None:
+                query = query.filter(Activity.location_id == filters['location_id'])
+            if filters.get('difficulty_level'):
+                query = query.filter(db.func.lower(Activity.difficulty_level) == filters['difficulty_level'].lower())
+            if filters.get('activity_status'):
+                query = query.filter(Activity.activity_status == filters['activity_status'])
+            if filters.get('min_price') is not None:
+                query = query.filter(Activity.price >= filters['min_price'])
+            if filters.get('max_price') is not None:
+                query = query.filter(Activity.price <= filters['max_price'])
+            if filters.get('search'):
+                pattern = f"%{filters['search']}%"
+                query = query.filter(db.or_(
+                    Activity.title.ilike(pattern),
+                    Activity.description.ilike(pattern),
+                    Activity.location_id.in_(
+                        db.session.query(Location.location_id).filter(Location.location_name.ilike(pattern))
+                    )
+                ))
+            
+            return ActivityService._get_page(query, after, limit), None
         except Exception as e:
             return None, f"Error fetching activities: {str(e)}"
     
@@ -31,56 +104,60 @@ class ActivityService:
             return None, f"Error fetching activity: {str(e)}"
     
     @staticmethod
-    def get_user_activities(user_id):
-        """Get activities based on user's role in the team"""
-        try:
-            # Find all teams where the user is a member
-            team_memberships = TeamMember.query.filter_by(user_id=user_id).all()
-            
-            if not team_memberships:
-                # User is not part of any team, only show activities they created
-                activities = Activity.query.filter_by(created_by=user_id).all()
-                return [activity.to_dict() for activity in activities], None
-            
-            # Process each team membership based on role level
-            all_activities = []
-            
-            for membership in team_memberships:
-                team_id = membership.team_id
-                role_level = membership.role_level
-                
-                # Level 1 (Master Guide) and Level 2 (Tactical Guide): Can see all team activities
-                if role_level <= 2:  
-                    team_activities = Activity.query.filter_by(team_id=team_id).all()
-                    all_activities.extend(team_activities)
-                
-                # Level 3 (Technical Guide): Can see activities they created or are leading
-                elif role_level == 3:
-                    team_activities = Activity.query.filter(
-                        Activity.team_id == team_id,
-                        (Activity.created_by == user_id) | (Activity.leader_id == user_id)
-                    ).all()
-                    all_activities.extend(team_activities)
-                
-                # Level 4 (Base Guide): Can only see activities they created
-                elif role_level == 4:
-                    team_activities = Activity.query.filter(
-                        Activity.team_id == team_id,
-                        Activity.created_by == user_id
-                    ).all()
-                    all_activities.extend(team_activities)
-            
-            # Remove duplicates
-            unique_activities = []
-            activity_ids = set()
-            
-            for activity in all_activities:
-                if activity.activity_id not in activity_ids:
-                    activity_ids.add(activity.activity_id)
-                    unique_activities.append(activity)
-            
-            return [activity.to_dict() for activity in unique_activities], None
+    def visible_activities_query(user_id):
+        """
+        Build a single query for the activities a user can see across all their teams
+        
+        Visibility rules per membership:
+        - Level 1-2 (Master/Tactical Guide): every activity of the team
+        - Level 3 (Technical Guide): activities they created or lead
+        - Level 4 (Base Guide): activities they created
+        Users without any team membership only see activities they created.
+        
+        The rules are evaluated with an EXISTS semi-join against team_members,
+        so each activity appears once no matter how many rules it matches.
+        """
+        membership_grants_access = db.session.query(TeamMember.team_member_id).filter(
+            TeamMember.user_id == user_id,
+            TeamMember.team_id == Activity.team_id,
+            db.or_(
+                TeamMember.role_level <= 2,
+                db.and_(
+                    TeamMember.role_level == 3,
+                    db.or_(Activity.created_by == user_id, Activity.leader_id == user_id)
+                ),
+                db.and_(TeamMember.role_level == 4, Activity.created_by == user_id)
+            )
+        ).exists()
+        
+        has_any_membership = db.session.query(TeamMember.team_member_id).filter(
+            TeamMember.user_id == user_id
+        ).exists()
+        
+        return Activity.query_with_relations().filter(
+            db.or_(
+                membership_grants_access,
+                db.and_(Activity.created_by == user_id, ~has_any_membership)
+            )
+        )
+    
+    @staticmethod
+    def get_user_activities(user_id, after=None, limit=20):
+        """
+        Get one page of the activities visible to a user based on their team roles
+        
+        Args:
+            user_id: The ID of the user
+            after: Optional (created_at, activity_id) tuple of the last row
+                   of the previous page
+            limit: Maximum number of activities to return
             
+        Returns:
+            tuple: (page dict with activities and next_cursor, error message)
+        """
+        try:
+            query = ActivityService.visible_activities_query(user_id)
+            return ActivityService._get_page(query, after, limit), None
         except Exception as e:
             return None, f"Error fetching user activities: {str(e)}"
     
@@ -99,19 +176,19 @@ class ActivityService:
             
             # Filter activities based on role level
             if membership.role_level <= 2:  # Master Guide and Tactical Guide
-                activities = Activity.query.filter_by(team_id=team_id).all()
+                activities = Activity.query_with_relations().filter_by(team_id=team_id).all()
             elif membership.role_level == 3:  # Technical Guide
-                activities = Activity.query.filter(
+                activities = Activity.query_with_relations().filter(
                     Activity.team_id == team_id,
                     (Activity.created_by == user_id) | (Activity.leader_id == user_id)
                 ).all()
             else:  # Base Guide
-                activities = Activity.query.filter(
+                activities = Activity.query_with_relations().filter(
                     Activity.team_id == team_id,
                     Activity.created_by == user_id
                 ).all()
             
-            return [activity.to_dict() for activity in activities], None
+            return Activity.serialize_list(activities), None
         except Exception as e:
             return None, f"Error fetching team activities: {str(e)}"
     
@@ -5,7 +5,9 @@ from app.models.team import Team
 from app.models.team_member import TeamMember
 from app.models.team_role_configuration import TeamRoleConfiguration
 from app.models.invitation import InvitationCode, InvitationUsage
-from app.utils.security import generate_password_hash, check_password_hash
+from app.services.notification_service import NotificationService
+from app.services.profile_cache import ProfileCache
+from app.utils.security import generate_password_hash, check_password_hash, needs_rehash
 from flask_jwt_extended import create_access_token, create_refresh_token
 from datetime import datetime, timedelta
 
@@ -13,52 +15,125 @@ from datetime import datetime, timedelta
 class AuthService:
     """Service for authentication-related operations"""
     
+    ROLE_NAMES = {
+        1: "Master Guide",
+        2: "Tactical Guide",
+        3: "Technical Guide",
+        4: "Base Guide"
+    }
+    
+    @staticmethod
+    def load_session_profile(*criteria):
+        """
+        Load a user with their roles, memberships and teams in one joined query
+        
+        Args:
+            criteria: Filter expressions selecting a single user
+            
+        Returns:
+            tuple: (user, profile) or (None, None) if no user matches. The
+                   profile is the payload served by /api/auth/me.
+        """
+        rows = db.session.query(
+            User,
+            UserRole.role_type,
+            TeamMember.role_level,
+            Team.team_id,
+            Team.team_name,
+            Team.master_guide_id,
+            Team.team_status
+        ).outerjoin(
+            UserRole, UserRole.user_id == User.user_id
+        ).outerjoin(
+            TeamMember, TeamMember.user_id == User.user_id
+        ).outerjoin(
+            Team, Team.team_id == TeamMember.team_id
+        ).filter(
+            *criteria
+        ).order_by(UserRole.user_role_id, TeamMember.team_member_id).all()
+        
+        if not rows:
+            return None, None
+        
+        user = rows[0][0]
+        
+        # The join yields one row per (role, membership) pair; fold them back
+        roles = []
+        teams = {}
+        for _, role_type, role_level, team_id, team_name, master_guide_id, team_status in rows:
+            if role_type is not None and role_type not in roles:
+                roles.append(role_type)
+            
+            if team_id is not None and team_id not in teams:
+                teams[team_id] = {
+                    'team_id': team_id,
+                    'team_name': team_name,
+                    'role_level': role_level,
+                    'role_name': AuthService.ROLE_NAMES.get(role_level, "Unknown"),
+                    'is_master_guide': master_guide_id == user.user_id,
+                    'team_status': team_status
+                }
+        
+        profile = {
+            "user_id": user.user_id,
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "profile_image_url": user.profile_image_url,
+            "account_status": user.account_status,
+            "roles": roles,
+            "teams": list(teams.values())
+        }
+        
+        return user, profile
+    
+    @staticmethod
+    def get_session_profile(user_id):
+        """
+        Get the session profile of a user, served from the profile cache when possible
+        
+        Args:
+            user_id: The ID of the user
+            
+        Returns:
+            dict or None: The profile, or None if the user does not exist
+        """
+        profile = ProfileCache.get(user_id)
+        if profile is not None:
+            return profile
+        
+        generation = ProfileCache.generation()
+        _, profile = AuthService.load_session_profile(User.user_id == user_id)
+        
+        if profile is not None:
+            ProfileCache.set(user_id, profile, generation)
+        
+        return profile
+    
     @staticmethod
     def login(email, password):
         """Authenticate a user and generate access tokens"""
-        user = User.query.filter_by(email=email).first()
+        generation = ProfileCache.generation()
+        user, profile = AuthService.load_session_profile(User.email == email)
         
         if not user or not check_password_hash(user.password_hash, password):
             return None, "Invalid email or password"
         
-        # Get user roles
-        user_roles = UserRole.query.filter_by(user_id=user.user_id).all()
-        roles = [role.role_type for role in user_roles]
-        
-        # Get team memberships and role levels
-        team_memberships = []
-        memberships = TeamMember.query.filter_by(user_id=user.user_id).all()
-        
-        for membership in memberships:
-            team = Team.query.get(membership.team_id)
-            if team:
-                role_name = "Unknown"
-                if membership.role_level == 1:
-                    role_name = "Master Guide"
-                elif membership.role_level == 2:
-                    role_name = "Tactical Guide"
-                elif membership.role_level == 3:
-                    role_name = "Technical Guide"
-                elif membership.role_level == 4:
-                    role_name = "Base Guide"
-                
-                team_memberships.append({
-                    'team_id': team.team_id,
-                    'team_name': team.team_name,
-                    'role_level': membership.role_level,
-                    'role_name': role_name,
-                    'is_master_guide': team.master_guide_id == user.user_id,
-                    'team_status': team.team_status
-                })
-        
         # Create tokens
         access_token = create_access_token(identity=user.user_id)
         refresh_token = create_refresh_token(identity=user.user_id)
         
+        # Upgrade hashes made with an outdated method or cost
+        if needs_rehash(user.password_hash):
+            user.password_hash = generate_password_hash(password)
+        
         # Update last login timestamp
         user.last_login = datetime.utcnow()
         db.session.commit()
         
+        # Warm the cache for the /me call that follows a login
+        ProfileCache.set(user.user_id, profile, generation)
+        
         return {
             "access_token": access_token,
             "refresh_token": refresh_token,
@@ -66,8 +141,8 @@ class AuthService:
             "first_name": user.first_name,
             "last_name": user.last_name,
             "email": user.email,
-            "roles": roles,
-            "teams": team_memberships
+            "roles": profile["roles"],
+            "teams": profile["teams"]
         }, None
     
     @staticmethod
@@ -205,6 +280,12 @@ class AuthService:
                         )
                         db.session.add(team_member)
                         
+                        # One job notifies the whole team, however large
+                        NotificationService.notify('team_member_joined', {
+                            'member_name': f"{new_user.first_name} {new_user.last_name}",
+                            'team_name': team.team_name
+                        }, team_id=team.team_id, sender_id=new_user.user_id)
+                        
                         # Save team data for response
                         team_data = {
                             'team_id': team.team_id,
@@ -0,0 +1,265 @@
+# app/services/earnings_service.py
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from app import db
+from app.models.activity import Activity
+from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
+from app.models.earnings import GuideEarning, GuidePayout, GuidePayoutDetail
+from app.models.payment import Payment
+from app.models.reservation import Reservation
+from app.models.team import TeamRevenueSharing
+from app.models.team_member import TeamMember
+
+CENTS = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+def _cents(value):
+    return value.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+class EarningsService:
+    """
+    Set-based earnings and payout computation
+
+    Each payment is split three ways: the platform commission (the
+    reservation's commission rate applied to the amount paid), the team's
+    share of the rest (the TeamRevenueSharing percentage for the guide's role
+    level, 0 when unset) and the guide's earning. The three parts always add
+    up to the amount paid.
+    """
+
+    @staticmethod
+    def split_amount(amount, total_price, commission_amount, team_percentage):
+        """
+        Split a payment into (guide amount, team share, commission)
+
+        Args:
+            amount: Amount paid
+            total_price: Total price of the reservation
+            commission_amount: Commission of the whole reservation
+            team_percentage: Team's share in percent of the amount after commission
+
+        Returns:
+            tuple: Three Decimals rounded to cents that add up to amount
+        """
+        amount = _cents(Decimal(str(amount)))
+        total_price = Decimal(str(total_price or 0))
+        commission = ZERO
+        if total_price > 0:
+            commission = _cents(amount * Decimal(str(commission_amount or 0)) / total_price)
+
+        net = amount - commission
+        team_share = _cents(net * Decimal(str(team_percentage or 0)) / 100)
+        return net - team_share, team_share, commission
+
+    @staticmethod
+    def calculate_earnings(payment_ids):
+        """
+        Create the guide earnings of a batch of payments
+
+        Every input of the split (payment, reservation, guide, team, role level
+        and revenue sharing percentage) is read with one joined query, the
+        amounts are computed in Python with Decimal, and the earnings are
+        written with one executemany. Payments that already have an earning,
+        or that cannot be attributed to a guide, are skipped. Does not commit.
+
+        Args:
+            payment_ids: IDs of completed payments
+
+        Returns:
+            int: Number of earnings created
+        """
+        if not payment_ids:
+            return 0
+
+        guide_id = db.func.coalesce(
+            GuideActivityInstance.guide_id, Activity.leader_id, Activity.created_by
+        ).label('guide_id')
+
+        already_earned = db.session.query(GuideEarning.earning_id).filter(
+            GuideEarning.payment_id == Payment.payment_id
+        ).exists()
+
+        # Resolve the guide first so the role level and percentage can join on it
+        inputs = db.session.query(
+            Payment.payment_id,
+            Payment.amount,
+            Reservation.reservation_id,
+            Reservation.expedition_id,
+            Reservation.total_price,
+            Reservation.commission_amount,
+            Activity.activity_id,
+            Activity.team_id,
+            guide_id
+        ).join(
+            Reservation, Reservation.reservation_id == Payment.reservation_id
+        ).join(
+            Activity, Activity.activity_id == Reservation.activity_id
+        ).outerjoin(
+            ActivityAvailableDate, ActivityAvailableDate.available_date_id == Reservation.available_date_id
+        ).outerjoin(
+            GuideActivityInstance, GuideActivityInstance.instance_id == ActivityAvailableDate.activity_instance_id
+        ).filter(
+            Payment.payment_id.in_(payment_ids),
+            ~already_earned
+        ).subquery()
+
+        rows = db.session.query(inputs, TeamRevenueSharing.percentage).outerjoin(
+            TeamMember, db.and_(
+                TeamMember.team_id == inputs.c.team_id,
+                TeamMember.user_id == inputs.c.guide_id
+            )
+        ).outerjoin(
+            TeamRevenueSharing, db.and_(
+                TeamRevenueSharing.team_id == inputs.c.team_id,
+                TeamRevenueSharing.role_level == TeamMember.role_level
+            )
+        ).all()
+
+        now = datetime.utcnow()
+        earnings = []
+        for row in rows:
+            if row.guide_id is None:
+                continue
+            amount, team_share, commission = EarningsService.split_amount(
+                row.amount, row.total_price, row.commission_amount, row.percentage
+            )
+            earnings.append({
+                'guide_id': row.guide_id,
+                'team_id': row.team_id,
+                'payment_id': row.payment_id,
+                'reservation_id': row.reservation_id,
+                'activity_id': row.activity_id,
+                'expedition_id': row.expedition_id,
+                'amount': amount,
+                'team_share_amount': team_share,
+                'commission_amount': commission,
+                'earnings_status': 'pending',
+                'created_at': now,
+                'updated_at': now
+            })
+
+        if earnings:
+            db.session.execute(GuideEarning.__table__.insert(), earnings)
+
+        return len(earnings)
+
+    @staticmethod
+    def create_payouts(team_id=None, guide_id=None, created_before=None,
+                       payment_method='bank_transfer', min_amount=None, notes=None):
+        """
+        Roll pending earnings into one payout per guide
+
+        Pending earnings are locked and read in one query, summed per guide,
+        and written as payouts (one batched INSERT), payout details (one
+        executemany) and a single UPDATE marking the earnings paid.
+
+        Args:
+            team_id: Only earnings from this team
+            guide_id: Only earnings of this guide
+            created_before: Only earnings created before this datetime
+            payment_method: Payout method recorded on each payout
+            min_amount: Skip guides whose pending total is below this amount
+            notes: Optional notes recorded on each payout
+
+        Returns:
+            tuple: (summary dict with payouts, error message)
+        """
+        try:
+            query = db.session.query(
+                GuideEarning.earning_id, GuideEarning.guide_id, GuideEarning.amount
+            ).filter(GuideEarning.earnings_status == 'pending')
+
+            if team_id is not None:
+                query = query.filter(GuideEarning.team_id == team_id)
+            if guide_id is not None:
+                query = query.filter(GuideEarning.guide_id == guide_id)
+            if created_before is not None:
+                query = query.filter(GuideEarning.created_at < created_before)
+
+            pending = query.order_by(GuideEarning.guide_id, GuideEarning.earning_id).with_for_update().all()
+
+            by_guide = defaultdict(list)
+            for earning in pending:
+                by_guide[earning.guide_id].append(earning)
+
+            totals = {guide: sum((e.amount for e in earnings), ZERO) for guide, earnings in by_guide.items()}
+            if min_amount is not None:
+                threshold = Decimal(str(min_amount))
+                totals = {guide: total for guide, total in totals.items() if total >= threshold}
+
+            if not totals:
+                db.session.rollback()
+                return {'payouts': [], 'earnings_paid': 0, 'total_amount': '0.00'}, None
+
+            payouts = [GuidePayout(
+                guide_id=guide,
+                amount=total,
+                payment_method=payment_method,
+                status='processing',
+                notes=notes
+            ) for guide, total in totals.items()]
+            db.session.add_all(payouts)
+            db.session.flush()  # Get IDs without commit
+
+            now = datetime.utcnow()
+            details = [{
+                'payout_id': payout.payout_id,
+                'earning_id': earning.earning_id,
+                'amount': earning.amount,
+                'created_at': now
+            } for payout in payouts for earning in by_guide[payout.guide_id]]
+            db.session.execute(GuidePayoutDetail.__table__.insert(), details)
+
+            paid_ids = db.session.query(GuidePayoutDetail.earning_id).filter(
+                GuidePayoutDetail.payout_id.in_([payout.payout_id for payout in payouts])
+            )
+            table = GuideEarning.__table__
+            db.session.execute(table.update().where(
+                table.c.earning_id.in_(paid_ids.scalar_subquery())
+            ).values(earnings_status='paid', payment_date=now, updated_at=now))
+
+            result = {
+                'payouts': [payout.to_dict() for payout in payouts],
+                'earnings_paid': len(details),
+                'total_amount': str(sum(totals.values(), ZERO))
+            }
+            db.session.commit()
+            return result, None
+        except Exception as e:
+            db.session.rollback()
+            return None, f"Error creating payouts: {str(e)}"
+
+    @staticmethod
+    def get_guide_summary(guide_id):
+        """
+        Get a guide's earnings totals per status with one grouped query
+
+        Returns:
+            tuple: (summary dict, error message)
+        """
+        try:
+            rows = db.session.query(
+                GuideEarning.earnings_status,
+                db.func.count(GuideEarning.earning_id),
+                db.func.coalesce(db.func.sum(GuideEarning.amount), 0)
+            ).filter(GuideEarning.guide_id == guide_id).group_by(GuideEarning.earnings_status).all()
+
+            return {
+                'guide_id': guide_id,
+                'by_status': {
+                    status: {'count': count, 'amount': str(_cents(Decimal(str(amount))))}
+                    for status, count, amount in rows
+                }
+            }, None
+        except Exception as e:
+            return None, f"Error fetching earnings summary: {str(e)}"
+
+    @staticmethod
+    def get_guide_payouts(guide_id):
+        """Get a guide's payouts, newest first"""
+        try:
+            payouts = GuidePayout.query.filter_by(guide_id=guide_id).order_by(GuidePayout.payout_id.desc()).all()
+            return [payout.to_dict() for payout in payouts], None
+        except Exception as e:
+            return None, f"Error fetching payouts: {str(e)}"
@@ -0,0 +1,333 @@
+# app/services/location_service.py
+"""
+Nearby and nearest-location search, and location name autocomplete.
+
+Each process keeps a GridIndex of every location's coordinates in
+current_app.extensions, built with one query on first use. Location writes
+made through the ORM are applied to it incrementally when their transaction
+commits (see register_location_listeners); the index is also rebuilt every
+LOCATION_INDEX_TTL seconds to pick up writes made by other processes. A
+query measures only the points of the grid cells around it and then loads
+the matching rows by primary key.
+
+Queries filtered by location type, or made with LOCATION_INDEX_ENABLED off,
+run against the database instead: a latitude/longitude bounding box
+(indexed) preselects the rows and exact distances are computed in Python.
+
+Autocomplete works the same way over a PrefixIndex of every location's
+name, aliases (all languages) and formatted address, verified locations
+ranking higher. Committed writes to locations or their aliases mark those
+locations stale; they are reloaded, with one query each for locations and
+aliases, by the next search in the process.
+"""
+
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.location import Location, LocationAlias
+from app.utils.geo_utils import MAX_DISTANCE_KM, bounding_box, haversine_many
+from app.utils.spatial_index import GridIndex
+from app.utils.text_index import PrefixIndex
+
+# Autocomplete field weights, and the boost of verified locations
+NAME_WEIGHT = 1.0
+ALIAS_WEIGHT = 0.9
+ADDRESS_WEIGHT = 0.5
+VERIFIED_BOOST = 0.15
+
+
+def _after_flush(session, flush_context):
+    """Remember the locations written in this transaction"""
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, Location):
+            changes = session.info.setdefault('location_changes', {})
+            changes[obj.location_id] = (float(obj.latitude), float(obj.longitude))
+            session.info.setdefault('location_search_changes', set()).add(obj.location_id)
+        elif isinstance(obj, LocationAlias):
+            # An alias moved to another location also changes its old one
+            touched = session.info.setdefault('location_search_changes', set())
+            touched.update(inspect(obj).attrs.location_id.history.deleted)
+            touched.add(obj.location_id)
+    for obj in session.deleted:
+        if isinstance(obj, Location):
+            changes = session.info.setdefault('location_changes', {})
+            changes[obj.location_id] = None
+            session.info.setdefault('location_search_changes', set()).add(obj.location_id)
+        elif isinstance(obj, LocationAlias):
+            session.info.setdefault('location_search_changes', set()).add(obj.location_id)
+
+
+def _after_commit(session):
+    changes = session.info.pop('location_changes', None)
+    touched = session.info.pop('location_search_changes', None)
+    if not has_app_context():
+        return
+    if changes:
+        LocationService.apply_changes(changes)
+    if touched:
+        LocationService.mark_stale(touched - {None})
+
+
+def _after_rollback(session):
+    session.info.pop('location_changes', None)
+    session.info.pop('location_search_changes', None)
+
+
+def register_location_listeners():
+    """Install the session listeners once per process"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
+
+
+class LocationService:
+    """Service for spatial location queries"""
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _store():
+        """Return the index store of the current application"""
+        return current_app.extensions.setdefault(
+            'location_index', {'index': None, 'expires': 0, 'generation': 0}
+        )
+
+    @staticmethod
+    def get_index():
+        """
+        Return the process's location index, building it if missing or expired
+
+        A build that overlapped an incremental update is used but expires
+        immediately, so the update is never lost for longer than one query.
+        """
+        store = LocationService._store()
+        if store['index'] is not None and store['expires'] > time.monotonic():
+            return store['index']
+
+        generation = store['generation']
+        rows = db.session.query(Location.location_id, Location.latitude, Location.longitude).all()
+        index = GridIndex(
+            ((location_id, float(lat), float(lng)) for location_id, lat, lng in rows),
+            cell_deg=current_app.config.get('LOCATION_INDEX_CELL_DEGREES', 0.5)
+        )
+
+        with LocationService._lock:
+            fresh = store['generation'] == generation
+            store['index'] = index
+            store['expires'] = time.monotonic() + current_app.config.get('LOCATION_INDEX_TTL', 300) if fresh else 0
+        return index
+
+    @staticmethod
+    def apply_changes(changes):
+        """
+        Apply committed location writes to the index
+
+        Args:
+            changes: {location_id: (lat, lng) or None when deleted}
+        """
+        store = LocationService._store()
+        with LocationService._lock:
+            store['generation'] += 1
+            index = store['index']
+            if index is None:
+                return
+            for location_id, point in changes.items():
+                if point is None:
+                    index.remove(location_id)
+                else:
+                    index.insert(location_id, *point)
+
+    @staticmethod
+    def _search_store():
+        """Return the autocomplete index store of the current application"""
+        return current_app.extensions.setdefault(
+            'location_search', {'index': None, 'expires': 0, 'generation': 0, 'stale': set()}
+        )
+
+    @staticmethod
+    def _search_documents(location_ids=None):
+        """PrefixIndex documents of all locations, or of the given ones"""
+        locations = db.session.query(
+            Location.location_id, Location.location_name, Location.formatted_address, Location.is_verified
+        )
+        aliases = db.session.query(LocationAlias.location_id, LocationAlias.alias_name)
+        if location_ids is not None:
+            locations = locations.filter(Location.location_id.in_(location_ids))
+            aliases = aliases.filter(LocationAlias.location_id.in_(location_ids))
+
+        names = {}
+        for location_id, alias_name in aliases:
+            names.setdefault(location_id, []).append((alias_name, ALIAS_WEIGHT))
+
+        return [
+            (
+                location_id,
+                [(name, NAME_WEIGHT)] + names.get(location_id, []) + [(address, ADDRESS_WEIGHT)],
+                VERIFIED_BOOST if verified else 0.0
+            )
+            for location_id, name, address, verified in locations
+        ]
+
+    @staticmethod
+    def get_search_index():
+        """
+        Return the process's autocomplete index, building it if missing or
+        expired and reloading the locations marked stale since the last call
+        """
+        store = LocationService._search_store()
+        if store['index'] is None or store['expires'] <= time.monotonic():
+            generation = store['generation']
+            index = PrefixIndex(LocationService._search_documents())
+
+            with LocationService._lock:
+                fresh = store['generation'] == generation
+                store['index'] = index
+                store['expires'] = time.monotonic() + current_app.config.get('LOCATION_INDEX_TTL', 300) if fresh else 0
+                if fresh:
+                    store['stale'] = set()
+            return index
+
+        with LocationService._lock:
+            stale, store['stale'] = store['stale'], set()
+        if stale:
+            documents = LocationService._search_documents(stale)
+            with LocationService._lock:
+                index = store['index']
+                for location_id in stale:
+                    index.remove(location_id)
+                for location_id, fields, boost in documents:
+                    index.add(location_id, fields, boost)
+        return store['index']
+
+    @staticmethod
+    def mark_stale(location_ids):
+        """Have the autocomplete index reload committed locations on its next search"""
+        store = LocationService._search_store()
+        with LocationService._lock:
+            store['generation'] += 1
+            store['stale'].update(location_ids)
+
+    @staticmethod
+    def autocomplete(query, limit=10):
+        """
+        Find locations whose name, alias or address words start with the query words
+
+        Results are ranked by how well the query matches (a whole name, the
+        start of one, words inside it), names above aliases above addresses,
+        and verified locations first among equal matches.
+
+        Returns:
+            tuple: (list of location dicts with matched_name and score, error message)
+        """
+        try:
+            index = LocationService.get_search_index()
+            with LocationService._lock:
+                hits = index.search(query, limit)
+
+            if not hits:
+                return [], None
+
+            locations = {
+                location.location_id: location
+                for location in Location.query.filter(Location.location_id.in_([key for _, key, _ in hits]))
+            }
+            results = []
+            for score, key, matched in hits:
+                if key in locations:
+                    result = LocationService.serialize(locations[key])
+                    result['matched_name'] = matched
+                    result['score'] = round(score, 3)
+                    results.append(result)
+            return results, None
+        except Exception as e:
+            return None, f"Error searching locations: {str(e)}"
+
+    @staticmethod
+    def _search_index(lat, lng, radius_km, limit):
+        index = LocationService.get_index()
+        with LocationService._lock:
+            if radius_km is None:
+                return index.nearest(lat, lng, limit)
+            return index.within(lat, lng, radius_km, limit)
+
+    @staticmethod
+    def _search_database(lat, lng, radius_km, limit, location_type):
+        """Bounding-box prefilter in SQL, exact distances in Python"""
+        radius = radius_km if radius_km is not None else 25.0
+
+        while True:
+            min_lat, max_lat, lng_ranges = bounding_box(lat, lng, radius)
+            query = db.session.query(Location.location_id, Location.latitude, Location.longitude).filter(
+                Location.latitude.between(min_lat, max_lat),
+                db.or_(*[Location.longitude.between(lo, hi) for lo, hi in lng_ranges])
+            )
+            if location_type:
+                query = query.filter(Location.location_type == location_type)
+            rows = query.all()
+
+            distances = haversine_many(lat, lng, [float(row.latitude) for row in rows],
+                                       [float(row.longitude) for row in rows])
+            hits = sorted(
+                (distance, row.location_id) for distance, row in zip(distances, rows) if distance <= radius
+            )[:limit]
+
+            # Nearest queries widen the box until it holds enough locations
+            if radius_km is not None or len(hits) >= limit or radius >= MAX_DISTANCE_KM:
+                return hits
+            radius = min(radius * 2, MAX_DISTANCE_KM)
+
+    @staticmethod
+    def nearby(lat, lng, radius_km=None, limit=20, location_type=None):
+        """
+        Find locations near a point, nearest first
+
+        Args:
+            lat, lng: The point, in degrees
+            radius_km: Only locations within this distance; None returns the
+                       `limit` nearest locations whatever their distance
+            limit: Maximum number of locations
+            location_type: Only locations of this type
+
+        Returns:
+            tuple: (list of location dicts with distance_km, error message)
+        """
+        try:
+            if location_type or not current_app.config.get('LOCATION_INDEX_ENABLED', True):
+                hits = LocationService._search_database(lat, lng, radius_km, limit, location_type)
+            else:
+                hits = LocationService._search_index(lat, lng, radius_km, limit)
+
+            if not hits:
+                return [], None
+
+            locations = {
+                location.location_id: location
+                for location in Location.query.filter(Location.location_id.in_([key for _, key in hits]))
+            }
+            return [
+                LocationService.serialize(locations[key], distance)
+                for distance, key in hits if key in locations
+            ], None
+        except Exception as e:
+            return None, f"Error searching nearby locations: {str(e)}"
+
+    @staticmethod
+    def serialize(location, distance_km=None):
+        """Location dict as returned by the location endpoints"""
+        result = {
+            'location_id': location.location_id,
+            'location_name': location.location_name,
+            'location_type': location.location_type,
+            'country_code': location.country_code,
+            'region_code': location.region_code,
+            'formatted_address': location.formatted_address,
+            'latitude': float(location.latitude) if location.latitude is not None else None,
+            'longitude': float(location.longitude) if location.longitude is not None else None
+        }
+        if distance_km is not None:
+            result['distance_km'] = round(distance_km, 3)
+        return result
@@ -0,0 +1,432 @@
+# app/services/metrics_service.py
+"""
+Incremental maintenance of TeamMetrics and GuideMetrics counters
+
+Counters are kept current with deltas instead of being recounted on read:
+
+- ORM writes of activities, expeditions and reservations are tracked by
+  session events. before_flush turns every insert, delete and relevant
+  change (team, leader, status, participants) into signed deltas, and
+  after_flush applies them with one multi-row upsert per metrics table,
+  inside the same transaction as the write.
+- Core statements bypass those events, so the code issuing them reports
+  its changes explicitly (see apply_reservation_changes).
+- Payments are added to team revenue by the payment outbox worker.
+
+reconcile() recomputes every counter from the source tables in bulk and is
+run periodically by app/tasks/metrics_calculation.py to repair any drift.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.activity import Activity
+from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
+from app.models.expedition import Expedition
+from app.models.metrics import GuideMetrics
+from app.models.payment import Payment
+from app.models.reservation import Reservation
+from app.models.team import TeamMetrics
+from app.services.earnings_service import EarningsService
+
+TEAM_COUNTERS = (
+    'total_activities_count', 'total_expeditions_count', 'current_reservation_count',
+    'total_revenue', 'total_commission_paid'
+)
+GUIDE_COUNTERS = ('total_activities_led', 'total_expeditions_led', 'total_participants_led')
+
+# Reservations in these states count as current
+ACTIVE_RESERVATION_STATUSES = ('pending', 'confirmed')
+# Payment statuses that count as revenue
+REVENUE_PAYMENT_STATUSES = ('completed', 'succeeded', 'paid')
+
+CENTS = Decimal('0.01')
+
+
+class MetricDeltas:
+    """Signed counter changes per team and per guide"""
+
+    def __init__(self):
+        self.team = defaultdict(lambda: defaultdict(int))
+        self.guide = defaultdict(lambda: defaultdict(int))
+        self.reservations = []
+
+    def add_team(self, team_id, column, delta):
+        if team_id is not None and delta:
+            self.team[team_id][column] += delta
+
+    def add_guide(self, guide_id, column, delta):
+        if guide_id is not None and delta:
+            self.guide[guide_id][column] += delta
+
+    def add_reservation(self, activity_id, available_date_id, sign, participants):
+        """Queue a reservation change whose team and guide are resolved at flush time"""
+        if activity_id is not None:
+            self.reservations.append((activity_id, available_date_id, sign, sign * (participants or 1)))
+
+    def __bool__(self):
+        return bool(self.team or self.guide or self.reservations)
+
+
+def _track_activity(deltas, values, sign):
+    deltas.add_team(values['team_id'], 'total_activities_count', sign)
+    deltas.add_guide(values['leader_id'], 'total_activities_led', sign)
+
+
+def _track_expedition(deltas, values, sign):
+    deltas.add_team(values['team_id'], 'total_expeditions_count', sign)
+    deltas.add_guide(values['leader_id'], 'total_expeditions_led', sign)
+
+
+def _track_reservation(deltas, values, sign):
+    if (values['status'] or 'pending') in ACTIVE_RESERVATION_STATUSES:
+        deltas.add_reservation(values['activity_id'], values['available_date_id'], sign, values['participant_count'])
+
+
+# model -> (attributes the counters depend on, function applying one row's contribution)
+TRACKED_MODELS = {
+    Activity: (('team_id', 'leader_id'), _track_activity),
+    Expedition: (('team_id', 'leader_id'), _track_expedition),
+    Reservation: (('activity_id', 'available_date_id', 'status', 'participant_count'), _track_reservation),
+}
+
+
+def _current_values(obj, attributes):
+    return {name: getattr(obj, name) for name in attributes}
+
+
+def _previous_values(obj, attributes):
+    """
+    Attribute values as of the last flush
+
+    Attributes expired by a commit are loaded from the database; see
+    _keep_previous_value for attributes assigned after they expired.
+    """
+    values = {}
+    state = inspect(obj)
+    for name in attributes:
+        history = state.attrs[name].load_history()
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        else:
+            values[name] = None
+    return values
+
+
+def _before_flush(session, flush_context, instances):
+    deltas = MetricDeltas()
+
+    for obj in session.new:
+        tracked = TRACKED_MODELS.get(type(obj))
+        if tracked:
+            attributes, track = tracked
+            track(deltas, _current_values(obj, attributes), 1)
+
+    for obj in session.deleted:
+        tracked = TRACKED_MODELS.get(type(obj))
+        if tracked:
+            attributes, track = tracked
+            track(deltas, _previous_values(obj, attributes), -1)
+
+    for obj in session.dirty:
+        tracked = TRACKED_MODELS.get(type(obj))
+        if not tracked or not session.is_modified(obj, include_collections=False):
+            continue
+        attributes, track = tracked
+        previous = _previous_values(obj, attributes)
+        current = _current_values(obj, attributes)
+        if previous != current:
+            track(deltas, previous, -1)
+            track(deltas, current, 1)
+
+    if deltas:
+        session.info['metric_deltas'] = deltas
+
+
+def _after_flush(session, flush_context):
+    deltas = session.info.pop('metric_deltas', None)
+    if deltas:
+        MetricsService.apply_deltas(session.connection(), deltas)
+
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    """No-op set listener, installed with active_history to load the old value first"""
+
+
+def register_metric_listeners():
+    """Install the flush listeners once per process"""
+    if not event.contains(Session, 'before_flush', _before_flush):
+        event.listen(Session, 'before_flush', _before_flush)
+        event.listen(Session, 'after_flush', _after_flush)
+        # An attribute expired by a commit loses its old value when assigned,
+        # unless the assignment loads it first
+        for model, (attributes, _) in TRACKED_MODELS.items():
+            for name in attributes:
+                event.listen(getattr(model, name), 'set', _keep_previous_value, active_history=True)
+
+
+def _upsert(connection, table, key_column, rows, set_values):
+    """
+    INSERT rows into a metrics table, or update the existing row of their key
+
+    Args:
+        rows: Parameter dicts, one per key
+        set_values: Function of the excluded (proposed) row returning the
+                    column values to set on conflict
+    """
+    dialect = connection.dialect
+    if dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Metrics upserts are not supported on {dialect.name}")
+
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(index_elements=[key_column], set_=set_values(statement.excluded))
+    connection.execute(statement, rows)
+
+
+def _add_to_rows(connection, table, key_column, counters, changes, stamp_column):
+    """Add per-key deltas to the counters of a metrics table with one upsert"""
+    if not changes:
+        return
+
+    now = datetime.utcnow()
+    rows = [dict(
+        {column: deltas.get(column, 0) for column in counters},
+        **{key_column: key, stamp_column: now}
+    ) for key, deltas in changes.items()]
+
+    def add(excluded):
+        values = {column: db.func.coalesce(table.c[column], 0) + excluded[column] for column in counters}
+        values[stamp_column] = excluded[stamp_column]
+        return values
+
+    _upsert(connection, table, key_column, rows, add)
+
+
+def _set_rows(connection, table, key_column, counters, totals, stamp_column, keys=None):
+    """Overwrite counters with recomputed totals; rows missing from totals are zeroed"""
+    now = datetime.utcnow()
+
+    # Rows with no remaining source data go back to zero
+    reset = table.update().values(dict({column: 0 for column in counters}, **{stamp_column: now}))
+    if keys is not None:
+        reset = reset.where(table.c[key_column].in_(keys))
+    connection.execute(reset)
+
+    if not totals:
+        return
+
+    rows = [dict(
+        {column: values.get(column, 0) for column in counters},
+        **{key_column: key, stamp_column: now}
+    ) for key, values in totals.items()]
+
+    _upsert(connection, table, key_column, rows, lambda excluded: {
+        column: excluded[column] for column in list(counters) + [stamp_column]
+    })
+
+
+class MetricsService:
+    """Service for reading and maintaining team and guide metrics"""
+
+    @staticmethod
+    def apply_deltas(connection, deltas):
+        """
+        Apply accumulated deltas to TeamMetrics and GuideMetrics
+
+        Reservation changes are first attributed to their team and guide
+        with two lookups (activities, then dates to guide instances).
+        """
+        if deltas.reservations:
+            MetricsService._resolve_reservations(connection, deltas)
+
+        _add_to_rows(connection, TeamMetrics.__table__, 'team_id', TEAM_COUNTERS, deltas.team, 'last_updated')
+        _add_to_rows(connection, GuideMetrics.__table__, 'guide_id', GUIDE_COUNTERS, deltas.guide, 'updated_at')
+
+    @staticmethod
+    def _resolve_reservations(connection, deltas):
+        """Attribute queued reservation changes to teams and guides with one lookup"""
+        activity_ids = {activity_id for activity_id, _, _, _ in deltas.reservations}
+        date_ids = {date_id for _, date_id, _, _ in deltas.reservations if date_id is not None}
+
+        # Each activity row, plus one row per requested date with the date's guide
+        dates = db.select([
+            GuideActivityInstance.activity_id,
+            GuideActivityInstance.guide_id,
+            ActivityAvailableDate.available_date_id
+        ]).select_from(GuideActivityInstance.__table__.join(
+            ActivityAvailableDate.__table__,
+            ActivityAvailableDate.activity_instance_id == GuideActivityInstance.instance_id
+        )).where(ActivityAvailableDate.available_date_id.in_(date_ids)).subquery('dates')
+
+        rows = connection.execute(db.select([
+            Activity.activity_id, Activity.team_id, Activity.leader_id, Activity.created_by,
+            dates.c.available_date_id, dates.c.guide_id
+        ]).select_from(Activity.__table__.outerjoin(
+            dates, dates.c.activity_id == Activity.activity_id
+        )).where(Activity.activity_id.in_(activity_ids))).fetchall()
+
+        activities = {row.activity_id: row for row in rows}
+        date_guides = {row.available_date_id: row.guide_id for row in rows if row.available_date_id is not None}
+
+        for activity_id, date_id, sign, participants in deltas.reservations:
+            activity = activities.get(activity_id)
+            if activity is None:
+                continue
+            guide_id = date_guides.get(date_id) or activity.leader_id or activity.created_by
+            deltas.add_team(activity.team_id, 'current_reservation_count', sign)
+            deltas.add_guide(guide_id, 'total_participants_led', participants)
+
+        deltas.reservations = []
+
+    @staticmethod
+    def apply_reservation_changes(changes):
+        """
+        Apply reservation changes made with Core statements
+
+        Args:
+            changes: Iterable of (activity_id, available_date_id, sign, participants)
+                     where sign is +1 when a reservation becomes active and -1
+                     when it stops being active
+        """
+        deltas = MetricDeltas()
+        for activity_id, available_date_id, sign, participants in changes:
+            deltas.add_reservation(activity_id, available_date_id, sign, participants)
+        if deltas:
+            MetricsService.apply_deltas(db.session.connection(), deltas)
+
+    @staticmethod
+    def apply_payments(payment_ids):
+        """
+        Add a batch of completed payments to their teams' revenue and commission
+
+        One query reads the payments with their reservation and team; the
+        commission uses the same rounding as the earnings split. Does not commit.
+        """
+        if not payment_ids:
+            return
+
+        rows = db.session.query(
+            Activity.team_id,
+            Payment.amount,
+            Reservation.total_price,
+            Reservation.commission_amount
+        ).join(
+            Reservation, Reservation.reservation_id == Payment.reservation_id
+        ).join(
+            Activity, Activity.activity_id == Reservation.activity_id
+        ).filter(Payment.payment_id.in_(payment_ids)).all()
+
+        deltas = MetricDeltas()
+        for row in rows:
+            _, _, commission = EarningsService.split_amount(row.amount, row.total_price, row.commission_amount, 0)
+            deltas.add_team(row.team_id, 'total_revenue', Decimal(str(row.amount)))
+            deltas.add_team(row.team_id, 'total_commission_paid', commission)
+
+        if deltas:
+            MetricsService.apply_deltas(db.session.connection(), deltas)
+
+    @staticmethod
+    def reconcile(team_ids=None):
+        """
+        Recompute every maintained counter from the source tables
+
+        Each counter is one grouped query over its source table, and the
+        results are written with one executemany per metrics table. Guide
+        counters are recomputed for all guides. Does not commit.
+
+        Args:
+            team_ids: Optional list of teams to limit the team recomputation to
+
+        Returns:
+            dict: Number of team and guide rows written
+        """
+        team_totals = defaultdict(dict)
+
+        def team_query(*columns):
+            query = db.session.query(Activity.team_id, *columns).filter(Activity.team_id.isnot(None))
+            if team_ids is not None:
+                query = query.filter(Activity.team_id.in_(team_ids))
+            return query
+
+        for team_id, count in team_query(db.func.count(Activity.activity_id)).group_by(Activity.team_id):
+            team_totals[team_id]['total_activities_count'] = count
+
+        expeditions = db.session.query(Expedition.team_id, db.func.count(Expedition.expedition_id)).filter(
+            Expedition.team_id.isnot(None)
+        )
+        if team_ids is not None:
+            expeditions = expeditions.filter(Expedition.team_id.in_(team_ids))
+        for team_id, count in expeditions.group_by(Expedition.team_id):
+            team_totals[team_id]['total_expeditions_count'] = count
+
+        reservations = team_query(db.func.count(Reservation.reservation_id)).join(
+            Reservation, Reservation.activity_id == Activity.activity_id
+        ).filter(Reservation.status.in_(ACTIVE_RESERVATION_STATUSES)).group_by(Activity.team_id)
+        for team_id, count in reservations:
+            team_totals[team_id]['current_reservation_count'] = count
+
+        commission = db.func.round(
+            Payment.amount * Reservation.commission_amount / db.func.nullif(Reservation.total_price, 0), 2
+        )
+        revenue = team_query(
+            db.func.sum(Payment.amount), db.func.sum(db.func.coalesce(commission, 0))
+        ).join(
+            Reservation, Reservation.activity_id == Activity.activity_id
+        ).join(
+            Payment, Payment.reservation_id == Reservation.reservation_id
+        ).filter(Payment.payment_status.in_(REVENUE_PAYMENT_STATUSES)).group_by(Activity.team_id)
+        for team_id, amount, commission_total in revenue:
+            team_totals[team_id]['total_revenue'] = Decimal(str(amount or 0)).quantize(CENTS, rounding=ROUND_HALF_UP)
+            team_totals[team_id]['total_commission_paid'] = \
+                Decimal(str(commission_total or 0)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+        guide_totals = defaultdict(dict)
+
+        led_activities = db.session.query(Activity.leader_id, db.func.count(Activity.activity_id)).filter(
+            Activity.leader_id.isnot(None)
+        ).group_by(Activity.leader_id)
+        for guide_id, count in led_activities:
+            guide_totals[guide_id]['total_activities_led'] = count
+
+        led_expeditions = db.session.query(Expedition.leader_id, db.func.count(Expedition.expedition_id)).filter(
+            Expedition.leader_id.isnot(None)
+        ).group_by(Expedition.leader_id)
+        for guide_id, count in led_expeditions:
+            guide_totals[guide_id]['total_expeditions_led'] = count
+
+        guide_id = db.func.coalesce(GuideActivityInstance.guide_id, Activity.leader_id, Activity.created_by)
+        participants = db.session.query(
+            guide_id, db.func.sum(db.func.coalesce(Reservation.participant_count, 1))
+        ).join(
+            Activity, Activity.activity_id == Reservation.activity_id
+        ).outerjoin(
+            ActivityAvailableDate, ActivityAvailableDate.available_date_id == Reservation.available_date_id
+        ).outerjoin(
+            GuideActivityInstance, GuideActivityInstance.instance_id == ActivityAvailableDate.activity_instance_id
+        ).filter(Reservation.status.in_(ACTIVE_RESERVATION_STATUSES)).group_by(guide_id)
+        for guide, count in participants:
+            if guide is not None:
+                guide_totals[guide]['total_participants_led'] = int(count)
+
+        connection = db.session.connection()
+        _set_rows(connection, TeamMetrics.__table__, 'team_id', TEAM_COUNTERS, team_totals, 'last_updated', team_ids)
+        _set_rows(connection, GuideMetrics.__table__, 'guide_id', GUIDE_COUNTERS, guide_totals, 'updated_at')
+
+        return {'teams': len(team_totals), 'guides': len(guide_totals)}
+
+    @staticmethod
+    def get_team_metrics(team_id):
+        """Read a team's metrics row; a team without one has all counters at zero"""
+        metrics = TeamMetrics.query.filter_by(team_id=team_id).first()
+        if metrics:
+            return metrics.to_dict()
+        return TeamMetrics(team_id=team_id, **{column: 0 for column in TEAM_COUNTERS}).to_dict()
@@ -0,0 +1,152 @@
+# app/services/notification_service.py
+from string import Template
+from flask import current_app
+from app.tasks.jobs import enqueue
+
+# event type -> locale -> (subject, content); $names are filled from the event context
+TEMPLATES = {
+    'team_member_joined': {
+        'en': ('$member_name joined $team_name',
+               '$member_name has joined $team_name as a guide.'),
+        'es': ('$member_name se unió a $team_name',
+               '$member_name se ha unido a $team_name como guía.'),
+    },
+    'reservation_created': {
+        'en': ('New reservation for $activity_title',
+               'Reservation #$reservation_id for $activity_title on $date was created '
+               'for $participant_count participants.'),
+        'es': ('Nueva reserva para $activity_title',
+               'Se creó la reserva #$reservation_id para $activity_title el $date '
+               'con $participant_count participantes.'),
+    },
+    'reservation_canceled': {
+        'en': ('Reservation canceled for $activity_title',
+               'Reservation #$reservation_id for $activity_title on $date was canceled.'),
+        'es': ('Reserva cancelada para $activity_title',
+               'La reserva #$reservation_id para $activity_title el $date fue cancelada.'),
+    },
+}
+
+# Email wrapping of one or several pending communications of a recipient
+EMAIL_TEMPLATES = {
+    'en': {
+        'greeting': Template('Hi $first_name,'),
+        'digest_subject': Template('You have $count new notifications'),
+        'signature': 'The Outdooer team',
+    },
+    'es': {
+        'greeting': Template('Hola $first_name,'),
+        'digest_subject': Template('Tienes $count notificaciones nuevas'),
+        'signature': 'El equipo de Outdooer',
+    },
+}
+
+_compiled = {}
+
+
+def _template(event_type, locale):
+    """Return the compiled (subject, content) templates of an event, falling back to English"""
+    key = (event_type, locale)
+    if key not in _compiled:
+        variants = TEMPLATES[event_type]
+        subject, content = variants.get(locale) or variants['en']
+        _compiled[key] = (Template(subject), Template(content))
+    return _compiled[key]
+
+
+class NotificationService:
+    """
+    Notification pipeline entry points
+
+    notify() only enqueues a notifications.fan_out job, so request handlers
+    pay for one INSERT whatever the number of recipients. The job (see
+    app/tasks/notification_jobs.py) resolves the recipients, renders the
+    event once per locale and bulk-inserts the communications rows; a
+    coalescing notifications.deliver job then emails each recipient one
+    message for everything that reached them in the window.
+    """
+
+    @staticmethod
+    def get_locale(locale=None):
+        """Return a supported locale, defaulting to NOTIFICATION_DEFAULT_LOCALE"""
+        locale = locale or current_app.config.get('NOTIFICATION_DEFAULT_LOCALE', 'en')
+        return locale if locale in EMAIL_TEMPLATES else 'en'
+
+    @staticmethod
+    def render(event_type, locale, context):
+        """
+        Render the subject and content of an event
+
+        Placeholders missing from the context are left as they are, and line
+        breaks a value brings into the subject are collapsed into spaces.
+
+        Returns:
+            tuple: (subject, content)
+        """
+        subject, content = _template(event_type, NotificationService.get_locale(locale))
+        values = {key: '' if value is None else value for key, value in context.items()}
+        return ' '.join(subject.safe_substitute(values).split()), content.safe_substitute(values)
+
+    @staticmethod
+    def compose_email(first_name, items, locale=None):
+        """
+        Wrap a recipient's pending communications into one email
+
+        Args:
+            first_name: Recipient's first name
+            items: List of (subject, content) tuples, oldest first
+            locale: Locale of the greeting and digest subject
+
+        Returns:
+            tuple: (subject, body)
+        """
+        strings = EMAIL_TEMPLATES[NotificationService.get_locale(locale)]
+        greeting = strings['greeting'].safe_substitute(first_name=first_name)
+
+        if len(items) == 1:
+            subject, content = items[0]
+            return subject, f"{greeting}\n\n{content}\n\n{strings['signature']}"
+
+        sections = '\n\n'.join(f"{subject}\n{content}" for subject, content in items)
+        subject = strings['digest_subject'].safe_substitute(count=len(items))
+        return subject, f"{greeting}\n\n{sections}\n\n{strings['signature']}"
+
+    @staticmethod
+    def notify(event_type, context, recipient_ids=None, team_id=None, max_role_level=None,
+               sender_id=None, activity_id=None, expedition_id=None, locale=None):
+        """
+        Queue a notification for fan-out without committing
+
+        Recipients are the union of recipient_ids and the members of team_id
+        (only those at or above max_role_level when it is set). With
+        max_role_level and no team_id, the team of activity_id is used. The
+        sender is never notified.
+
+        Args:
+            event_type: Key of TEMPLATES
+            context: JSON-serializable values for the template placeholders
+            recipient_ids: Users to notify
+            team_id: Team whose members to notify
+            max_role_level: Highest role level number of the team members to notify
+            sender_id: User who caused the event
+            activity_id: Related activity; its title fills $activity_title if missing
+            expedition_id: Related expedition
+            locale: Locale to render in (defaults to NOTIFICATION_DEFAULT_LOCALE)
+
+        Returns:
+            int: ID of the queued fan-out job
+        """
+        if event_type not in TEMPLATES:
+            raise ValueError(f"Unknown notification type: {event_type}")
+
+        return enqueue('notifications.fan_out', {
+            'event_type': event_type,
+            'context': context,
+            'recipient_ids': list(recipient_ids or []),
+            'team_id': team_id,
+            'max_role_level': max_role_level,
+            'sender_id': sender_id,
+            'activity_id': activity_id,
+            'expedition_id': expedition_id,
+            'locale': locale
+        })
@@ -0,0 +1,215 @@
+# app/services/payment_service.py
+import hashlib
+import hmac
+import json
+from datetime import datetime
+from decimal import Decimal
+from app import db
+from app.models.payment import Payment, PaymentOutbox
+from app.models.reservation import Reservation
+from app.services.reservation_service import ReservationService
+from app.tasks.jobs import enqueue
+
+class PaymentService:
+    """Service for recording payments and queueing their downstream effects"""
+
+    # Gateway statuses that settle a reservation
+    COMPLETED_STATUSES = ('completed', 'succeeded', 'paid')
+
+    FIELDS = (
+        'reservation_id', 'amount', 'payment_method', 'transaction_id', 'payment_status',
+        'gateway_response', 'billing_address', 'billing_city', 'billing_country',
+        'billing_postal_code', 'is_test_payment'
+    )
+
+    @staticmethod
+    def verify_signature(secret, body, signature):
+        """
+        Check a webhook body against its hex HMAC-SHA256 signature
+
+        Args:
+            secret: Shared webhook secret
+            body: Raw request body (bytes)
+            signature: Signature sent by the gateway
+
+        Returns:
+            bool: True if the signature matches
+        """
+        if not secret or not signature:
+            return False
+        expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    @staticmethod
+    def _insert_payment(values):
+        """
+        Insert a payment unless its transaction_id is already recorded
+
+        Uses INSERT ... ON CONFLICT (transaction_id) DO NOTHING, so concurrent
+        deliveries of the same gateway event insert at most one row.
+
+        Returns:
+            int or None: The new payment_id, or None if the transaction exists
+        """
+        dialect = db.engine.dialect
+        if dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise RuntimeError(f"Idempotent payment inserts are not supported on {dialect.name}")
+
+        statement = insert(Payment.__table__).values(**values).on_conflict_do_nothing(
+            index_elements=['transaction_id']
+        )
+
+        if dialect.full_returning:
+            row = db.session.execute(statement.returning(Payment.__table__.c.payment_id)).first()
+            return row[0] if row else None
+
+        result = db.session.execute(statement)
+        return result.inserted_primary_key[0] if result.rowcount == 1 else None
+
+    @staticmethod
+    def _settle(reservation, payment_id, amount):
+        """
+        Mark a reservation paid and queue the payment_completed event, without committing
+
+        Returns:
+            str or None: Error message if the amount does not cover the reservation
+        """
+        amount = Decimal(str(amount))
+        if amount < reservation.total_price:
+            return f"Cannot settle a reservation of {reservation.total_price} with a payment of {amount}"
+
+        table = Reservation.__table__
+        db.session.execute(table.update().where(
+            table.c.reservation_id == reservation.reservation_id
+        ).values(
+            payment_status='paid',
+            status=db.case((table.c.status == 'pending', 'confirmed'), else_=table.c.status)
+        ))
+
+        db.session.add(PaymentOutbox(
+            payment_id=payment_id,
+            event_type='payment_completed',
+            payload=json.dumps({
+                'reservation_id': reservation.reservation_id,
+                'amount': str(amount)
+            })
+        ))
+        # One pending drain covers every event written before it runs
+        enqueue('payments.drain_outbox', dedupe_key='payments.drain_outbox')
+        return None
+
+    @staticmethod
+    def record_payment(data, user_id=None):
+        """
+        Record a gateway payment exactly once
+
+        A retry of a known transaction costs one lookup on the unique
+        transaction_id index and changes nothing, unless it completes a
+        payment stored as pending (or failed): the payment then moves to the
+        completed status once, guarded by its current status. A payment that
+        completes, new or not, marks its reservation paid and writes a
+        payment_completed outbox event in the same transaction; earnings and
+        metrics are computed later by the outbox worker. A completing payment
+        must cover the reservation's total price.
+
+        Only the gateway completes payments: a client, identified by user_id,
+        may only report them as pending.
+
+        Args:
+            data: Payment fields validated by PaymentCreateSchema
+            user_id: When set, the reservation must belong to this user and
+                     the payment must be pending
+
+        Returns:
+            tuple: (result dict with payment and created flag, error message)
+        """
+        try:
+            if user_id is not None and data['payment_status'] != 'pending':
+                return None, "You can only report a pending payment; the gateway confirms it"
+
+            transaction_id = data['transaction_id']
+            completes = data['payment_status'] in PaymentService.COMPLETED_STATUSES
+
+            existing = Payment.query.filter_by(transaction_id=transaction_id).first()
+            if existing and (existing.payment_status in PaymentService.COMPLETED_STATUSES or not completes):
+                return {'payment': existing.to_dict(), 'created': False}, None
+
+            reservation_id = existing.reservation_id if existing else data['reservation_id']
+            reservation = db.session.query(
+                Reservation.reservation_id, Reservation.user_id, Reservation.status, Reservation.total_price
+            ).filter(Reservation.reservation_id == reservation_id).first()
+
+            if not reservation:
+                return None, "Reservation not found"
+            if user_id is not None and reservation.user_id != user_id:
+                return None, "You do not have permission to pay for this reservation"
+            if reservation.status == 'canceled':
+                return None, "Cannot pay for a canceled reservation"
+
+            values = {field: data[field] for field in PaymentService.FIELDS if data.get(field) is not None}
+            if isinstance(values.get('gateway_response'), (dict, list)):
+                values['gateway_response'] = json.dumps(values['gateway_response'])
+
+            if existing:
+                # Only the delivery that moves the payment out of its incomplete status settles it
+                table = Payment.__table__
+                result = db.session.execute(table.update().where(
+                    table.c.payment_id == existing.payment_id,
+                    table.c.payment_status.notin_(PaymentService.COMPLETED_STATUSES)
+                ).values(
+                    payment_status=values['payment_status'],
+                    amount=values['amount'],
+                    gateway_response=values.get('gateway_response', table.c.gateway_response),
+                    updated_at=datetime.utcnow()
+                ))
+                if result.rowcount != 1:
+                    db.session.rollback()
+                    return {'payment': Payment.query.get(existing.payment_id).to_dict(), 'created': False}, None
+
+                error = PaymentService._settle(reservation, existing.payment_id, data['amount'])
+                if error:
+                    db.session.rollback()
+                    return None, error
+                db.session.commit()
+
+                db.session.refresh(existing)
+                return {'payment': existing.to_dict(), 'created': False}, None
+
+            payment_id = PaymentService._insert_payment(values)
+            if payment_id is None:
+                # Lost a race with a concurrent delivery of the same transaction
+                db.session.rollback()
+                return PaymentService.record_payment(data, user_id)
+
+            if completes:
+                error = PaymentService._settle(reservation, payment_id, data['amount'])
+                if error:
+                    db.session.rollback()
+                    return None, error
+
+            db.session.commit()
+
+            payment = Payment.query.get(payment_id)
+            return {'payment': payment.to_dict(), 'created': True}, None
+        except Exception as e:
+            db.session.rollback()
+            return None, f"Error recording payment: {str(e)}"
+
+    @staticmethod
+    def get_reservation_payments(reservation_id, user_id):
+        """Get the payments of a reservation for its owner or the managers of its team"""
+        try:
+            reservation = Reservation.query.get(reservation_id)
+            if not reservation:
+                return None, "Reservation not found"
+            if reservation.user_id != user_id and not ReservationService.can_manage_activity(user_id, reservation.activity_id):
+                return None, "You do not have permission to view these payments"
+
+            payments = Payment.query.filter_by(reservation_id=reservation_id).order_by(Payment.payment_id).all()
+            return [payment.to_dict() for payment in payments], None
+        except Exception as e:
+            return None, f"Error fetching payments: {str(e)}"
@@ -0,0 +1,144 @@
+# app/services/permission_cache.py
+"""
+Caches used by the permission checks.
+
+Two layers keep the hot path free of database round-trips:
+
+- A process-level cache of team-specific permission overrides per team
+  ({role_level: {permission_key: is_enabled}}). Global defaults live in the
+  precompiled matrix in app.services.permission_matrix. Entries expire after
+  PERMISSION_CACHE_TTL seconds and are dropped explicitly whenever team
+  permissions are written.
+- A request-level memo of each user's team memberships ({team_id: role_level}),
+  stored on flask.g so it never outlives the request that loaded it.
+"""
+
+import threading
+import time
+from flask import current_app, g, has_app_context
+from app.models.team_member import TeamMember
+from app.models.team_role_permissions import TeamRolePermissions
+
+
+class PermissionCache:
+    """Process-level team override cache with a per-request membership memo"""
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _store():
+        """Return the matrix store of the current application"""
+        return current_app.extensions.setdefault('permission_cache', {'generation': 0, 'matrices': {}})
+
+    @staticmethod
+    def _load_team_matrix(team_id):
+        """Load the team-specific permission rows of a team with a single query"""
+        rows = TeamRolePermissions.query.with_entities(
+            TeamRolePermissions.role_level,
+            TeamRolePermissions.permission_key,
+            TeamRolePermissions.is_enabled
+        ).filter(TeamRolePermissions.team_id == team_id).all()
+
+        matrix = {1: {}, 2: {}, 3: {}, 4: {}}
+
+        for role_level, permission_key, is_enabled in rows:
+            matrix.setdefault(role_level, {})[permission_key] = bool(is_enabled)
+
+        return matrix
+
+    @staticmethod
+    def get_team_matrix(team_id):
+        """
+        Get the team-specific permission overrides of a team
+
+        Args:
+            team_id: The ID of the team
+
+        Returns:
+            dict: {role_level: {permission_key: is_enabled}}
+        """
+        team_id = normalize_id(team_id)
+        store = PermissionCache._store()
+        now = time.monotonic()
+
+        entry = store['matrices'].get(team_id)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        generation = store['generation']
+        matrix = PermissionCache._load_team_matrix(team_id)
+        ttl = current_app.config.get('PERMISSION_CACHE_TTL', 300)
+
+        with PermissionCache._lock:
+            # Skip caching if permissions were invalidated while loading
+            if store['generation'] == generation:
+                store['matrices'][team_id] = (now + ttl, matrix)
+
+        return matrix
+
+    @staticmethod
+    def invalidate(team_id=None):
+        """
+        Drop cached permission matrices
+
+        Args:
+            team_id: The team whose permissions changed. When None every
+                     cached matrix is dropped.
+        """
+        if not has_app_context():
+            return
+
+        store = PermissionCache._store()
+        with PermissionCache._lock:
+            store['generation'] += 1
+            if team_id is None:
+                store['matrices'].clear()
+            else:
+                store['matrices'].pop(normalize_id(team_id), None)
+
+    @staticmethod
+    def get_user_memberships(user_id):
+        """
+        Get a user's team memberships, loaded once per request
+
+        Args:
+            user_id: The ID of the user
+
+        Returns:
+            dict: {team_id: role_level}
+        """
+        user_id = normalize_id(user_id)
+        memo = g.setdefault('_permission_memberships', {})
+
+        if user_id not in memo:
+            memo[user_id] = {
+                team_id: role_level
+                for team_id, role_level in TeamMember.query.with_entities(
+                    TeamMember.team_id, TeamMember.role_level
+                ).filter_by(user_id=user_id).all()
+            }
+
+        return memo[user_id]
+
+    @staticmethod
+    def forget_memberships(user_id=None):
+        """Drop the request memo after memberships change mid-request"""
+        if not has_app_context():
+            return
+
+        memo = g.get('_permission_memberships')
+        if memo is None:
+            return
+
+        if user_id is None:
+            memo.clear()
+        else:
+            memo.pop(normalize_id(user_id), None)
+
+
+def normalize_id(value):
+    """Normalize an ID received from JSON or query strings to an int"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
@@ -0,0 +1,174 @@
+# app/services/permission_matrix.py
+"""
+Precompiled global permission matrix.
+
+Global permissions (team_role_permissions rows with team_id IS NULL) and the
+global role names only change through setup_role_configurations, so they are
+compiled once at startup into an immutable snapshot:
+
+- every permission key gets a bit position
+- every role level gets an "enabled" mask and a "defined" mask
+
+A check is then a dict lookup for the key's bit plus an integer AND. When the
+global permissions are synced, a new snapshot is built and swapped in with a
+single reference assignment, so readers never see a half-built matrix. Only
+the process that handled the sync rebuilds at once; every snapshot expires
+after PERMISSION_MATRIX_TTL seconds, so the other workers pick up the change
+within that time.
+"""
+
+import time
+from flask import current_app
+from app.models.team_role_configuration import TeamRoleConfiguration
+from app.models.team_role_permissions import TeamRolePermissions
+
+ROLE_LEVELS = (1, 2, 3, 4)
+
+DEFAULT_ROLE_NAMES = {
+    1: 'Master Guide',
+    2: 'Tactical Guide',
+    3: 'Technical Guide',
+    4: 'Base Guide'
+}
+
+
+class GlobalPermissionMatrix:
+    """Immutable role level x permission key matrix encoded as bitmasks"""
+
+    __slots__ = ('_key_bits', '_enabled_masks', '_defined_masks', '_role_names')
+
+    def __init__(self, key_bits, enabled_masks, defined_masks, role_names):
+        object.__setattr__(self, '_key_bits', dict(key_bits))
+        object.__setattr__(self, '_enabled_masks', dict(enabled_masks))
+        object.__setattr__(self, '_defined_masks', dict(defined_masks))
+        object.__setattr__(self, '_role_names', dict(role_names))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('GlobalPermissionMatrix is immutable')
+
+    @classmethod
+    def from_rows(cls, permissions, role_names=None):
+        """
+        Compile a matrix from (role_level, permission_key, is_enabled) tuples
+
+        Args:
+            permissions: Iterable of (role_level, permission_key, is_enabled)
+            role_names: Optional {role_level: name} overriding the defaults
+
+        Returns:
+            GlobalPermissionMatrix
+        """
+        key_bits = {}
+        enabled_masks = {level: 0 for level in ROLE_LEVELS}
+        defined_masks = {level: 0 for level in ROLE_LEVELS}
+
+        for role_level, permission_key, is_enabled in permissions:
+            if permission_key not in key_bits:
+                key_bits[permission_key] = 1 << len(key_bits)
+            bit = key_bits[permission_key]
+
+            defined_masks[role_level] = defined_masks.get(role_level, 0) | bit
+            if is_enabled:
+                enabled_masks[role_level] = enabled_masks.get(role_level, 0) | bit
+
+        names = dict(DEFAULT_ROLE_NAMES)
+        names.update(role_names or {})
+
+        return cls(key_bits, enabled_masks, defined_masks, names)
+
+    def bit(self, permission_key):
+        """Return the bit assigned to a permission key, or 0 if unknown"""
+        return self._key_bits.get(permission_key, 0)
+
+    def mask(self, permission_keys):
+        """Return the combined bitmask of several permission keys"""
+        mask = 0
+        for permission_key in permission_keys:
+            mask |= self.bit(permission_key)
+        return mask
+
+    def is_enabled(self, role_level, permission_key):
+        """
+        Check a global permission
+
+        Returns:
+            bool or None: Whether the permission is enabled for the role level,
+                          or None if it is not defined globally
+        """
+        bit = self._key_bits.get(permission_key, 0)
+        if not self._defined_masks.get(role_level, 0) & bit:
+            return None
+        return bool(self._enabled_masks.get(role_level, 0) & bit)
+
+    def has_all(self, role_level, mask):
+        """Check that a role level has every permission in a bitmask enabled"""
+        return mask != 0 and self._enabled_masks.get(role_level, 0) & mask == mask
+
+    def enabled_keys(self, role_level):
+        """Return the permission keys enabled for a role level"""
+        enabled = self._enabled_masks.get(role_level, 0)
+        return [key for key, bit in self._key_bits.items() if enabled & bit]
+
+    def role_name(self, role_level):
+        """Return the global display name of a role level"""
+        return self._role_names.get(role_level, f'Level {role_level}')
+
+    def to_dict(self):
+        """Expand the matrix to {role_level: {permission_key: is_enabled}}"""
+        result = {}
+        for role_level in sorted(set(self._defined_masks) | set(self._enabled_masks)):
+            defined = self._defined_masks.get(role_level, 0)
+            enabled = self._enabled_masks.get(role_level, 0)
+            result[role_level] = {
+                key: bool(enabled & bit)
+                for key, bit in self._key_bits.items() if defined & bit
+            }
+        return result
+
+
+def build_global_matrix():
+    """Compile the global permission matrix from the database"""
+    permissions = TeamRolePermissions.query.with_entities(
+        TeamRolePermissions.role_level,
+        TeamRolePermissions.permission_key,
+        TeamRolePermissions.is_enabled
+    ).filter(
+        TeamRolePermissions.team_id.is_(None)
+    ).order_by(TeamRolePermissions.permission_id).all()
+
+    role_names = {}
+    global_config = TeamRoleConfiguration.query.filter(
+        TeamRoleConfiguration.team_id.is_(None)
+    ).first()
+    if global_config:
+        for role_level in ROLE_LEVELS:
+            name = getattr(global_config, f'level_{role_level}_name')
+            if name:
+                role_names[role_level] = name
+
+    return GlobalPermissionMatrix.from_rows(permissions, role_names)
+
+
+def reload_global_matrix(app=None):
+    """
+    Rebuild the global matrix and atomically swap it in
+
+    Args:
+        app: Flask application (defaults to current_app)
+
+    Returns:
+        GlobalPermissionMatrix: The new matrix
+    """
+    app = app or current_app._get_current_object()
+    matrix = build_global_matrix()
+    expires_at = time.monotonic() + app.config.get('PERMISSION_MATRIX_TTL', 60)
+    app.extensions['global_permission_matrix'] = (expires_at, matrix)
+    return matrix
+
+
+def get_global_matrix():
+    """Return the current global matrix, compiling it on first use and once expired"""
+    entry = current_app.extensions.get('global_permission_matrix')
+    if entry is None or entry[0] <= time.monotonic():
+        return reload_global_matrix()
+    return entry[1]
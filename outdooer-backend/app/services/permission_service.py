@@ -1,7 +1,10 @@
 # app/services/permission_service.py - Updated to use the new models
+from app.models.activity import Activity
+from app.models.expedition import Expedition
 from app.models.team_member import TeamMember
 from app.models.team_role_permissions import TeamRolePermissions
-from app.models.team_role_permissions import TeamRolePermissions
+from app.services.permission_cache import PermissionCache, normalize_id
+from app.services.permission_matrix import get_global_matrix
 from app.database import db
 
 class PermissionService:
@@ -22,12 +25,31 @@ class PermissionService:
         Returns:
             int or None: The user's role level, or None if not a team member
         """
-        team_membership = TeamMember.query.filter_by(
-            user_id=user_id,
-            team_id=team_id
-        ).first()
+        memberships = PermissionCache.get_user_memberships(user_id)
+        return memberships.get(normalize_id(team_id))
+    
+    @staticmethod
+    def is_permission_enabled(team_id, role_level, permission_key):
+        """
+        Look up a permission: cached team overrides first, then the
+        precompiled global matrix
+        
+        Args:
+            team_id: The ID of the team
+            role_level: The role level to check
+            permission_key: The operation to check (e.g., 'create_expedition')
+            
+        Returns:
+            bool or None: Whether the permission is enabled, or None if it is
+                          defined neither for the team nor globally
+        """
+        overrides = PermissionCache.get_team_matrix(team_id)
+        is_enabled = overrides.get(role_level, {}).get(permission_key)
         
-        return team_membership.role_level if team_membership else None
+        if is_enabled is not None:
+            return is_enabled
+        
+        return get_global_matrix().is_enabled(role_level, permission_key)
     
     @staticmethod
     def check_permission(user_id, team_id, permission_key):
@@ -48,30 +70,12 @@ class PermissionService:
         if role_level is None:
             return False, None, "You are not a member of this team"
         
-        # Check if this role level has the permission enabled for this team
-        team_permission = TeamRolePermissions.query.filter_by(
-            team_id=team_id,
-            role_level=role_level,
-            permission_key=permission_key
-        ).first()
-        
-        # If team-specific permission exists, use it
-        if team_permission:
-            has_permission = team_permission.is_enabled
-        else:
-            # Fall back to global role permission
-            global_permission = TeamRolePermissions.query.filter_by(
-                team_id=None,
-                role_level=role_level,
-                permission_key=permission_key
-            ).first()
-            
-            has_permission = global_permission.is_enabled if global_permission else False
+        # Team-specific permissions take precedence over the global ones
+        has_permission = bool(PermissionService.is_permission_enabled(team_id, role_level, permission_key))
         
         if not has_permission:
             # Get role name for better error message
-            role_names = {1: 'Master Guide', 2: 'Tactical Guide', 3: 'Technical Guide', 4: 'Base Guide'}
-            role_name = role_names.get(role_level, f'Level {role_level}')
+            role_name = get_global_matrix().role_name(role_level)
             
             return False, role_level, f"{role_name}s do not have permission to {permission_key.replace('_', ' ')}"
         
@@ -139,6 +143,119 @@ class PermissionService:
         )
         return has_permission
     
+    @staticmethod
+    def check_permissions_bulk(user_id, checks):
+        """
+        Evaluate many permission checks at once
+        
+        Resource to team mappings are resolved with one query per resource
+        type, and memberships and permission matrices come from the caches,
+        so the number of queries does not grow with the number of checks.
+        
+        Args:
+            user_id: The ID of the user
+            checks: List of dicts with 'operation' and optional 'resource_id'
+                    and 'team_id', with the same semantics as a single check;
+                    an expedition or activity is always checked against
+                    its own team
+            
+        Returns:
+            list: One dict per check, in order, with operation, resource_id,
+                  team_id, has_permission and error
+        """
+        user_id = normalize_id(user_id)
+        
+        # Collect the resources whose team (or ownership) must be loaded
+        expedition_ids = set()
+        activity_ids = set()
+        for check in checks:
+            operation = check.get('operation') or ''
+            resource_id = normalize_id(check.get('resource_id'))
+            if not resource_id:
+                continue
+            if 'expedition' in operation:
+                expedition_ids.add(resource_id)
+            elif 'activity' in operation:
+                activity_ids.add(resource_id)
+        
+        expeditions = {}
+        if expedition_ids:
+            expeditions = {
+                row.expedition_id: row
+                for row in Expedition.query.with_entities(
+                    Expedition.expedition_id,
+                    Expedition.team_id,
+                    Expedition.created_by,
+                    Expedition.leader_id
+                ).filter(Expedition.expedition_id.in_(expedition_ids)).all()
+            }
+        
+        activity_teams = {}
+        if activity_ids:
+            activity_teams = dict(
+                Activity.query.with_entities(
+                    Activity.activity_id, Activity.team_id
+                ).filter(Activity.activity_id.in_(activity_ids)).all()
+            )
+        
+        results = []
+        
+        for check in checks:
+            operation = check.get('operation')
+            resource_id = normalize_id(check.get('resource_id'))
+            team_id = normalize_id(check.get('team_id'))
+            result = {
+                'operation': operation,
+                'resource_id': resource_id,
+                'team_id': team_id,
+                'has_permission': False,
+                'error': None
+            }
+            results.append(result)
+            
+            if not operation:
+                result['error'] = 'Operation is required'
+                continue
+            
+            expedition = None
+            if resource_id and 'expedition' in operation:
+                expedition = expeditions.get(resource_id)
+                if expedition is None:
+                    result['error'] = 'Resource not found'
+                    continue
+            elif resource_id and 'activity' in operation:
+                if resource_id not in activity_teams:
+                    result['error'] = 'Resource not found'
+                    continue
+            
+            # A resource is checked against its own team, whatever team_id was sent
+            if expedition is not None:
+                team_id = expedition.team_id
+            elif resource_id and 'activity' in operation:
+                team_id = activity_teams[resource_id]
+            elif resource_id and not team_id:
+                result['error'] = 'Cannot determine team_id from resource'
+                continue
+            result['team_id'] = team_id
+            
+            if not team_id:
+                result['error'] = 'Team ID is required'
+                continue
+            
+            has_permission, role_level, error = PermissionService.check_permission(user_id, team_id, operation)
+            
+            # Technical Guides can only update expeditions they created or lead
+            if operation == 'update_expedition' and expedition is not None and role_level == 3:
+                has_permission = has_permission and (
+                    expedition.created_by == user_id or
+                    expedition.leader_id == user_id
+                )
+            
+            result['has_permission'] = has_permission
+            result['error'] = error
+        
+        return results
+    
     @staticmethod
     def setup_default_permissions(team_id, creator_id):
         """
@@ -217,6 +334,7 @@ class PermissionService:
                 db.session.add(permission)
         
         db.session.commit()
+        PermissionCache.invalidate(team_id)
     
     @staticmethod
     def get_team_permissions(team_id):
@@ -249,17 +367,7 @@ class PermissionService:
         Returns:
             dict: Permissions organized by role level
         """
-        permissions = TeamRolePermissions.query.filter_by(team_id=None).all()
-        
-        result = {1: {}, 2: {}, 3: {}, 4: {}}
-        
-        for permission in permissions:
-            if permission.role_level not in result:
-                result[permission.role_level] = {}
-            
-            result[permission.role_level][permission.permission_key] = permission.is_enabled
-        
-        return result
+        return get_global_matrix().to_dict()
     
     @staticmethod
     def get_user_permissions(user_id):
@@ -273,39 +381,18 @@ class PermissionService:
             dict: Permissions by team
         """
         # Get all teams the user is a member of
-        team_memberships = TeamMember.query.filter_by(user_id=user_id).all()
+        team_memberships = PermissionCache.get_user_memberships(user_id)
         
         if not team_memberships:
             return {}
         
+        global_matrix = get_global_matrix()
         result = {}
         
-        for membership in team_memberships:
-            team_id = membership.team_id
-            role_level = membership.role_level
-            
-            # Get permissions for this role level in this team
-            permissions = TeamRolePermissions.query.filter_by(
-                team_id=team_id,
-                role_level=role_level,
-                is_enabled=True
-            ).all()
-            
-            if team_id not in result:
-                result[team_id] = []
-            
-            for permission in permissions:
-                result[team_id].append(permission.permission_key)
-            
-            # Add fallback to global permissions if no team-specific permission exists
-            global_permissions = TeamRolePermissions.query.filter_by(
-                team_id=None,
-                role_level=role_level,
-                is_enabled=True
-            ).all()
-            
-            for permission in global_permissions:
-                if permission.permission_key not in result[team_id]:
-                    result[team_id].append(permission.permission_key)
+        for team_id, role_level in team_memberships.items():
+            # Team-specific permissions override the global ones
+            role_permissions = dict.fromkeys(global_matrix.enabled_keys(role_level), True)
+            role_permissions.update(PermissionCache.get_team_matrix(team_id).get(role_level, {}))
+            result[team_id] = [key for key, is_enabled in role_permissions.items() if is_enabled]
         
         return result
\ No newline at end of file
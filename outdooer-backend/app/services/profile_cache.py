@@ -0,0 +1,118 @@
+# app/services/profile_cache.py
+"""
+Short-lived cache of session profiles.
+
+A session profile is the user, role and team membership payload served by
+/api/auth/me, which the frontend requests on every navigation. Profiles are
+kept per process for PROFILE_CACHE_TTL seconds and dropped explicitly when a
+user's roles or memberships change, or when one of their teams is updated.
+Writes to the user's own profile fields and roles are picked up by a session
+listener, which drops the profile when the transaction commits, wherever the
+write was made.
+"""
+
+import itertools
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.user import User, UserRole
+from app.services.permission_cache import normalize_id
+
+# User columns that appear in a session profile
+PROFILE_FIELDS = ('email', 'first_name', 'last_name', 'profile_image_url', 'account_status')
+
+
+def _after_flush(session, flush_context):
+    """Remember the users whose profile fields or roles changed in this transaction"""
+    changed = session.info.setdefault('changed_profiles', set())
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, UserRole):
+            changed.add(obj.user_id)
+        elif isinstance(obj, User) and (obj in session.deleted or any(
+            inspect(obj).attrs[field].history.has_changes() for field in PROFILE_FIELDS
+        )):
+            changed.add(obj.user_id)
+
+
+def _after_commit(session):
+    changed = session.info.pop('changed_profiles', None)
+    if changed and has_app_context():
+        ProfileCache.invalidate(*changed)
+
+
+def _after_rollback(session):
+    session.info.pop('changed_profiles', None)
+
+
+def register_profile_listeners():
+    """Install the session listeners once per process"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
+
+
+class ProfileCache:
+    """Process-level cache of session profiles keyed by user ID"""
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _store():
+        """Return the profile store of the current application"""
+        return current_app.extensions.setdefault('profile_cache', {'generation': 0, 'profiles': {}})
+
+    @staticmethod
+    def get(user_id):
+        """Return the cached profile of a user, or None if missing or expired"""
+        entry = ProfileCache._store()['profiles'].get(normalize_id(user_id))
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    @staticmethod
+    def generation():
+        """Return the invalidation counter, read before loading a profile"""
+        return ProfileCache._store()['generation']
+
+    @staticmethod
+    def set(user_id, profile, generation):
+        """
+        Cache a profile loaded after reading generation()
+
+        The profile is skipped if anything was invalidated while it was loading.
+        """
+        store = ProfileCache._store()
+        ttl = current_app.config.get('PROFILE_CACHE_TTL', 60)
+
+        with ProfileCache._lock:
+            if store['generation'] == generation:
+                store['profiles'][normalize_id(user_id)] = (time.monotonic() + ttl, profile)
+
+    @staticmethod
+    def invalidate(*user_ids):
+        """Drop the cached profiles of the given users"""
+        if not has_app_context():
+            return
+
+        store = ProfileCache._store()
+        with ProfileCache._lock:
+            store['generation'] += 1
+            for user_id in user_ids:
+                store['profiles'].pop(normalize_id(user_id), None)
+
+    @staticmethod
+    def invalidate_team(team_id):
+        """Drop the cached profiles of every user whose profile lists a team"""
+        if not has_app_context():
+            return
+
+        team_id = normalize_id(team_id)
+        store = ProfileCache._store()
+        with ProfileCache._lock:
+            store['generation'] += 1
+            for user_id, (_, profile) in list(store['profiles'].items()):
+                if any(team['team_id'] == team_id for team in profile['teams']):
+                    del store['profiles'][user_id]
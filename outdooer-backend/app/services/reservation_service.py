@@ -0,0 +1,314 @@
+# app/services/reservation_service.py
+from decimal import Decimal, ROUND_HALF_UP
+from flask import current_app
+from sqlalchemy.orm import selectinload
+from app import db
+from app.models.activity import Activity
+from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
+from app.models.reservation import Reservation, ReservationParticipant
+from app.models.team import TeamMetrics
+from app.services.metrics_service import MetricsService
+from app.services.notification_service import NotificationService
+from app.services.permission_service import PermissionService
+from app.services.schedule_service import ScheduleService
+from app.utils.pagination import encode_cursor
+
+CENTS = Decimal('0.01')
+
+class ReservationService:
+    """Service for reservation related operations"""
+
+    # Reservations in these states still hold their seats
+    ACTIVE_STATUSES = ('pending', 'confirmed')
+
+    @staticmethod
+    def _get_page(query, after, limit):
+        """
+        Apply keyset pagination to a reservation query and serialize the page
+
+        Reservations are ordered newest first by (created_at, reservation_id).
+        Participants of the whole page are loaded with one extra IN query.
+        """
+        if after:
+            after_created_at, after_id = after
+            query = query.filter(
+                db.tuple_(Reservation.created_at, Reservation.reservation_id) < (after_created_at, after_id)
+            )
+
+        # Fetch one extra row to know whether another page exists
+        reservations = query.options(selectinload(Reservation.participants)).order_by(
+            Reservation.created_at.desc(),
+            Reservation.reservation_id.desc()
+        ).limit(limit + 1).all()
+
+        has_more = len(reservations) > limit
+        reservations = reservations[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = reservations[-1]
+            next_cursor = encode_cursor(last.created_at, last.reservation_id)
+
+        return {
+            'reservations': [reservation.to_dict() for reservation in reservations],
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+
+    @staticmethod
+    def _apply_filters(query, filters):
+        """Narrow a reservation query by the optional status and activity filters"""
+        filters = filters or {}
+        if filters.get('status'):
+            query = query.filter(Reservation.status == filters['status'])
+        if filters.get('activity_id') is not None:
+            query = query.filter(Reservation.activity_id == filters['activity_id'])
+        return query
+
+    @staticmethod
+    def calculate_amounts(unit_price, participant_count, commission_rate):
+        """
+        Compute the total price and the platform commission of a booking
+
+        Args:
+            unit_price: Price per participant
+            participant_count: Number of participants
+            commission_rate: Commission in percent of the total price
+
+        Returns:
+            tuple: (total_price, commission_amount) as Decimals rounded to cents
+        """
+        total_price = (Decimal(str(unit_price)) * participant_count).quantize(CENTS, rounding=ROUND_HALF_UP)
+        commission_amount = (total_price * Decimal(str(commission_rate)) / 100).quantize(CENTS, rounding=ROUND_HALF_UP)
+        return total_price, commission_amount
+
+    @staticmethod
+    def create_reservation(user_id, available_date_id, participants):
+        """
+        Book seats on an activity date for a list of participants
+
+        The date, its activity and the team's negotiated commission rate are
+        read with one joined query. Seats are taken with the date's conditional
+        UPDATE, then the reservation and all of its participants are inserted
+        (participants as a single executemany) and committed together, so a
+        failure at any step leaves neither seats nor rows behind.
+
+        Args:
+            user_id: ID of the booking user
+            available_date_id: ID of the activity date
+            participants: List of participant dicts validated by ParticipantSchema
+
+        Returns:
+            tuple: (reservation dict, error message)
+        """
+        try:
+            if not participants:
+                return None, "At least one participant is required"
+
+            max_participants = current_app.config.get('MAX_PARTICIPANTS_PER_RESERVATION', 50)
+            if len(participants) > max_participants:
+                return None, f"Cannot book more than {max_participants} participants at once"
+
+            slot = db.session.query(
+                ActivityAvailableDate.date,
+                ActivityAvailableDate.start_time,
+                ActivityAvailableDate.end_time,
+                ActivityAvailableDate.status,
+                Activity.activity_id,
+                Activity.title,
+                Activity.team_id,
+                Activity.price,
+                TeamMetrics.custom_commission_rate
+            ).join(
+                GuideActivityInstance,
+                GuideActivityInstance.instance_id == ActivityAvailableDate.activity_instance_id
+            ).join(
+                Activity, Activity.activity_id == GuideActivityInstance.activity_id
+            ).outerjoin(
+                TeamMetrics, TeamMetrics.team_id == Activity.team_id
+            ).filter(
+                ActivityAvailableDate.available_date_id == available_date_id
+            ).first()
+
+            if not slot:
+                return None, "Activity date not found"
+            if slot.status != 'open':
+                return None, "This date is not open for reservations"
+
+            seats = len(participants)
+            if ActivityAvailableDate.reserve_seats(available_date_id, seats) is None:
+                db.session.rollback()
+                return None, "Not enough seats available on this date"
+
+            commission_rate = slot.custom_commission_rate
+            if commission_rate is None:
+                commission_rate = current_app.config.get('DEFAULT_COMMISSION_RATE', 10)
+            total_price, commission_amount = ReservationService.calculate_amounts(slot.price, seats, commission_rate)
+            start, end = ScheduleService.slot_interval(slot.date, slot.start_time, slot.end_time)
+
+            reservation = Reservation(
+                user_id=user_id,
+                activity_id=slot.activity_id,
+                available_date_id=available_date_id,
+                participant_count=seats,
+                total_price=total_price,
+                commission_amount=commission_amount,
+                status='pending',
+                payment_status='unpaid',
+                activity_start_datetime=start,
+                activity_end_datetime=end
+            )
+            db.session.add(reservation)
+            db.session.flush()  # Get ID without commit
+
+            rows = [{
+                'reservation_id': reservation.reservation_id,
+                'user_id': participant.get('user_id'),
+                'first_name': participant['first_name'],
+                'last_name': participant['last_name'],
+                'email': participant['email'],
+                'emergency_contact_name': participant.get('emergency_contact_name'),
+                'emergency_contact_phone': participant.get('emergency_contact_phone')
+            } for participant in participants]
+            db.session.execute(ReservationParticipant.__table__.insert(), rows)
+
+            # The reserving user and the team's managers are emailed by the job worker
+            NotificationService.notify('reservation_created', {
+                'reservation_id': reservation.reservation_id,
+                'activity_title': slot.title,
+                'date': slot.date.isoformat(),
+                'participant_count': seats
+            }, recipient_ids=[user_id], team_id=slot.team_id, max_role_level=2, activity_id=slot.activity_id)
+
+            # Serialize before committing so the response needs no reload
+            result = reservation.to_dict(include_participants=False)
+            result['participants'] = rows
+
+            db.session.commit()
+            return result, None
+        except Exception as e:
+            db.session.rollback()
+            return None, f"Error creating reservation: {str(e)}"
+
+    @staticmethod
+    def cancel_reservation(reservation_id, user_id, reason=None):
+        """
+        Cancel an active reservation and give its seats back to the date
+
+        The status change is a conditional UPDATE, so a reservation canceled
+        twice concurrently releases its seats only once.
+
+        Returns:
+            tuple: (reservation dict, error message)
+        """
+        try:
+            reservation = Reservation.query.get(reservation_id)
+            if not reservation:
+                return None, "Reservation not found"
+
+            if reservation.user_id != user_id and not ReservationService.can_manage_activity(user_id, reservation.activity_id):
+                return None, "You do not have permission to cancel this reservation"
+
+            table = Reservation.__table__
+            canceled = db.session.execute(table.update().where(
+                table.c.reservation_id == reservation_id,
+                table.c.status.in_(ReservationService.ACTIVE_STATUSES)
+            ).values(status='canceled', denial_reason=reason[:100] if reason else None)).rowcount
+
+            if canceled != 1:
+                db.session.rollback()
+                return None, "Only pending or confirmed reservations can be canceled"
+
+            if reservation.available_date_id:
+                ActivityAvailableDate.release_seats(reservation.available_date_id, reservation.participant_count or 1)
+
+            # The status UPDATE bypasses the flush listeners that maintain metrics
+            MetricsService.apply_reservation_changes([
+                (reservation.activity_id, reservation.available_date_id, -1, reservation.participant_count)
+            ])
+
+            NotificationService.notify('reservation_canceled', {
+                'reservation_id': reservation_id,
+                'date': reservation.activity_start_datetime.date().isoformat() if reservation.activity_start_datetime else ''
+            }, recipient_ids=[reservation.user_id], max_role_level=2, activity_id=reservation.activity_id)
+
+            db.session.commit()
+
+            db.session.refresh(reservation)
+            return reservation.to_dict(), None
+        except Exception as e:
+            db.session.rollback()
+            return None, f"Error canceling reservation: {str(e)}"
+
+    @staticmethod
+    def can_manage_activity(user_id, activity_id):
+        """Master and Tactical Guides manage the reservations of their team's activities"""
+        team_id = db.session.query(Activity.team_id).filter(Activity.activity_id == activity_id).scalar()
+        if team_id is None:
+            return False
+        role_level = PermissionService.get_role_level(user_id, team_id)
+        return role_level is not None and role_level <= 2
+
+    @staticmethod
+    def get_reservation(reservation_id, user_id):
+        """Get a reservation visible to its owner or the managers of its team"""
+        try:
+            reservation = Reservation.query.options(
+                selectinload(Reservation.participants)
+            ).get(reservation_id)
+            if not reservation:
+                return None, "Reservation not found"
+
+            if reservation.user_id != user_id and not ReservationService.can_manage_activity(user_id, reservation.activity_id):
+                return None, "You do not have permission to view this reservation"
+
+            return reservation.to_dict(), None
+        except Exception as e:
+            return None, f"Error fetching reservation: {str(e)}"
+
+    @staticmethod
+    def get_user_reservations(user_id, filters=None, after=None, limit=20):
+        """
+        Get one page of a user's reservations, newest first
+
+        Args:
+            user_id: The ID of the user
+            filters: Optional dict with status and activity_id
+            after: Optional (created_at, reservation_id) tuple of the last row
+                   of the previous page
+            limit: Maximum number of reservations to return
+
+        Returns:
+            tuple: (page dict with reservations and next_cursor, error message)
+        """
+        try:
+            query = Reservation.query.filter(Reservation.user_id == user_id)
+            query = ReservationService._apply_filters(query, filters)
+            return ReservationService._get_page(query, after, limit), None
+        except Exception as e:
+            return None, f"Error fetching reservations: {str(e)}"
+
+    @staticmethod
+    def get_team_reservations(team_id, user_id, filters=None, after=None, limit=20):
+        """
+        Get one page of the reservations on a team's activities, newest first
+
+        Only Master and Tactical Guides of the team can list its reservations.
+
+        Returns:
+            tuple: (page dict with reservations and next_cursor, error message)
+        """
+        try:
+            role_level = PermissionService.get_role_level(user_id, team_id)
+            if role_level is None:
+                return None, "You are not a member of this team"
+            if role_level > 2:
+                return None, "You do not have permission to view this team's reservations"
+
+            query = Reservation.query.join(
+                Activity, Activity.activity_id == Reservation.activity_id
+            ).filter(Activity.team_id == team_id)
+            query = ReservationService._apply_filters(query, filters)
+            return ReservationService._get_page(query, after, limit), None
+        except Exception as e:
+            return None, f"Error fetching team reservations: {str(e)}"
@@ -0,0 +1,335 @@
+# app/services/route_service.py
+"""
+Expedition route geometry.
+
+ExpeditionRoute.route_points holds the route as an encoded polyline at
+precision 6 (about 0.1 m), a fraction of the size of the JSON array it
+replaces. When the points are saved, the route is also simplified once per
+zoom level in ROUTE_DETAIL_ZOOMS, with a tolerance of ROUTE_SIMPLIFY_PIXELS
+screen pixels at that zoom, and the simplified polylines are stored next to
+it in route_levels. A map asking for the route at some zoom gets the
+coarsest stored level still finer than a pixel at that zoom, or the full
+route past the last level, so a long track costs a few hundred points at
+overview zooms.
+
+Distance, elevation gain and loss and travel time are never entered by
+hand. Whenever the geometry of an expedition route or of a route in the
+routes table is flushed, a routes.recalculate_metrics job is queued in the
+same transaction (see app/tasks/route_jobs.py); it measures the geometry
+with app/utils/route_metrics.py and stamps last_calculated, which stays
+empty while new geometry is waiting to be measured.
+"""
+
+import json
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.expedition import ExpeditionRoute
+from app.models.route import Route
+from app.tasks.jobs import enqueue
+from app.utils.polyline import decode_polyline, encode_polyline
+from app.utils.route_metrics import route_metrics
+from app.utils.simplify import simplification_ranks
+from app.utils.vector_tiles import meters_per_pixel
+
+STORAGE_PRECISION = 6
+WIRE_PRECISION = 5
+
+METRICS_JOB = 'routes.recalculate_metrics'
+
+# model -> (geometry attribute, key passed to the metrics job)
+GEOMETRY_FIELDS = {
+    ExpeditionRoute: ('route_points', 'expedition_route_id'),
+    Route: ('geojson', 'route_id'),
+}
+
+
+def _after_flush(session, flush_context):
+    """Queue a metrics recalculation for every route whose geometry was written"""
+    changed = set()
+    for obj in session.new.union(session.dirty):
+        fields = GEOMETRY_FIELDS.get(type(obj))
+        if fields is None:
+            continue
+        attribute, key = fields
+        if getattr(obj, attribute) and inspect(obj).attrs[attribute].history.has_changes():
+            changed.add((key, getattr(obj, key)))
+
+    if changed and has_app_context():
+        connection = session.connection()
+        for key, value in sorted(changed):
+            enqueue(METRICS_JOB, {key: value}, dedupe_key=f'{METRICS_JOB}:{key}:{value}', connection=connection)
+
+
+def register_route_listeners():
+    """Install the flush listener once per process"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+class RouteService:
+    """Service for storing and serving expedition route geometry and measuring routes"""
+
+    @staticmethod
+    def get_points(route):
+        """Return the [lat, lng] points of a route, reading legacy JSON rows too"""
+        if not route.route_points:
+            return []
+        if route.route_points.lstrip().startswith('['):
+            return [[float(lat), float(lng)] for lat, lng in json.loads(route.route_points)]
+        return decode_polyline(route.route_points, STORAGE_PRECISION)
+
+    @staticmethod
+    def parse_points(data):
+        """
+        Read route points from a request body
+
+        Accepts either "route_points", a list of [lat, lng] pairs, or
+        "polyline", an encoded polyline with an optional "precision" (default 5).
+
+        Returns:
+            tuple: (list of [lat, lng], error message)
+        """
+        try:
+            if data.get('polyline') is not None:
+                precision = int(data.get('precision', WIRE_PRECISION))
+                if not 0 <= precision <= 7:
+                    return None, "precision must be between 0 and 7"
+                points = decode_polyline(str(data['polyline']), precision)
+            else:
+                points = [[float(lat), float(lng)] for lat, lng in data.get('route_points') or []]
+        except (TypeError, ValueError) as e:
+            return None, f"Invalid route points: {str(e)}"
+
+        if len(points) < 2:
+            return None, "A route needs at least 2 points"
+        max_points = current_app.config.get('ROUTE_MAX_POINTS', 100000)
+        if len(points) > max_points:
+            return None, f"A route can have at most {max_points} points"
+        if any(not (-90 <= lat <= 90 and -180 <= lng <= 180) for lat, lng in points):
+            return None, "Route points must be valid [lat, lng] coordinates"
+        return points, None
+
+    @staticmethod
+    def build_levels(points):
+        """
+        Simplify a route for every detail zoom, from one Douglas-Peucker ranking
+
+        Returns:
+            list: {zoom, tolerance_m, point_count, polyline} dicts by increasing
+                  zoom, polylines at WIRE_PRECISION
+        """
+        config = current_app.config
+        ranks = simplification_ranks(points)
+        mid_lat = (min(lat for lat, _ in points) + max(lat for lat, _ in points)) / 2
+
+        levels = []
+        for zoom in sorted(config.get('ROUTE_DETAIL_ZOOMS', (6, 9, 12, 15))):
+            tolerance = config.get('ROUTE_SIMPLIFY_PIXELS', 1.0) * meters_per_pixel(zoom, mid_lat)
+            kept = [point for point, rank in zip(points, ranks) if rank > tolerance]
+            levels.append({
+                'zoom': zoom,
+                'tolerance_m': round(tolerance, 2),
+                'point_count': len(kept),
+                'polyline': encode_polyline(kept, WIRE_PRECISION)
+            })
+        return levels
+
+    @staticmethod
+    def apply_points(route, points):
+        """Store points and their simplified levels on a route, without committing"""
+        encoded = encode_polyline(points, STORAGE_PRECISION)
+        if encoded == route.route_points:
+            return
+        route.route_points = encoded
+        route.point_count = len(points)
+        route.route_levels = json.dumps(RouteService.build_levels(points), separators=(',', ':'))
+        # Measured again by the metrics job queued on flush
+        route.last_calculated = None
+
+    @staticmethod
+    def save_route(expedition_id, data):
+        """
+        Create or replace the route of an expedition
+
+        Returns:
+            tuple: (ExpeditionRoute, error message)
+        """
+        points, error = RouteService.parse_points(data)
+        if error:
+            return None, error
+
+        try:
+            route = ExpeditionRoute.query.filter_by(expedition_id=expedition_id).first()
+            if route is None:
+                route = ExpeditionRoute(expedition_id=expedition_id)
+                db.session.add(route)
+
+            RouteService.apply_points(route, points)
+            for field in ('route_summary', 'map_image_url'):
+                if field in data:
+                    setattr(route, field, data[field])
+
+            db.session.commit()
+            return route, None
+        except Exception as e:
+            db.session.rollback()
+            return None, f"Error saving route: {str(e)}"
+
+    @staticmethod
+    def get_geometry(expedition_id, zoom=None):
+        """
+        Return an expedition's route at the level of detail of a map zoom
+
+        Args:
+            zoom: Map zoom the route is drawn at; None returns every point
+
+        Returns:
+            tuple: (route dict with polyline, precision, zoom and point
+                   counts, or None if the expedition has no route; error message)
+        """
+        try:
+            route = ExpeditionRoute.query.filter_by(expedition_id=expedition_id).first()
+            if route is None or not route.route_points:
+                return None, None
+
+            result = route.to_dict()
+            level = None
+            if zoom is not None and route.route_levels:
+                level = next((item for item in json.loads(route.route_levels) if item['zoom'] >= zoom), None)
+
+            if level is not None:
+                result.update({
+                    'polyline': level['polyline'],
+                    'precision': WIRE_PRECISION,
+                    'detail_zoom': level['zoom'],
+                    'tolerance_m': level['tolerance_m'],
+                    'level_point_count': level['point_count']
+                })
+            else:
+                if route.route_points.lstrip().startswith('['):
+                    # Not converted yet (see migrations.encode_expedition_routes)
+                    polyline = encode_polyline(RouteService.get_points(route), STORAGE_PRECISION)
+                else:
+                    polyline = route.route_points
+                result.update({
+                    'polyline': polyline,
+                    'precision': STORAGE_PRECISION,
+                    'detail_zoom': None,
+                    'tolerance_m': 0,
+                    'level_point_count': route.point_count
+                })
+            return result, None
+        except Exception as e:
+            return None, f"Error fetching route: {str(e)}"
+
+    @staticmethod
+    def geojson_lines(text):
+        """
+        Read the lines of a GeoJSON LineString or MultiLineString
+
+        The geometry may be bare or wrapped in a Feature or FeatureCollection;
+        other geometry types are skipped.
+
+        Returns:
+            list: Lines of [lat, lng] or [lat, lng, elevation] points
+
+        Raises:
+            ValueError: If the text is not valid GeoJSON
+        """
+        document = json.loads(text)
+        if document.get('type') == 'FeatureCollection':
+            geometries = [feature.get('geometry') for feature in document.get('features') or []]
+        elif document.get('type') == 'Feature':
+            geometries = [document.get('geometry')]
+        else:
+            geometries = [document]
+
+        lines = []
+        for geometry in geometries:
+            if not geometry:
+                continue
+            if geometry.get('type') == 'LineString':
+                parts = [geometry['coordinates']]
+            elif geometry.get('type') == 'MultiLineString':
+                parts = geometry['coordinates']
+            else:
+                continue
+            # GeoJSON positions are [lng, lat, elevation]
+            lines.extend(
+                [[position[1], position[0]] + list(position[2:3]) for position in part]
+                for part in parts
+            )
+        return lines
+
+    @staticmethod
+    def travel_speed(route_type=None):
+        """Speed on the flat, in km/h, used to estimate durations of a route type"""
+        config = current_app.config
+        speeds = config.get('ROUTE_TYPE_SPEEDS_KMH') or {}
+        return speeds.get(route_type, config.get('ROUTE_TRAVEL_SPEED_KMH', 4.0))
+
+    @staticmethod
+    def measure(lines, route_type=None):
+        """route_metrics of some lines at the configured speeds"""
+        return route_metrics(
+            lines,
+            speed_kmh=RouteService.travel_speed(route_type),
+            climb_m_per_hour=current_app.config.get('ROUTE_CLIMB_M_PER_HOUR', 600)
+        )
+
+    @staticmethod
+    def recalculate_expedition_route(expedition_route_id):
+        """
+        Measure an expedition route and store its distance and travel time
+
+        Returns:
+            tuple: (metrics dict, or None if the route no longer exists; error message)
+        """
+        try:
+            route = ExpeditionRoute.query.get(expedition_route_id)
+            if route is None:
+                return None, None
+
+            metrics = RouteService.measure([RouteService.get_points(route)])
+            route.total_distance_km = round(metrics['distance_km'], 2)
+            route.total_travel_time_hours = round(metrics['duration_hours'], 2)
+            route.last_calculated = datetime.utcnow()
+
+            db.session.commit()
+            return metrics, None
+        except Exception as e:
+            db.session.rollback()
+            return None, f"Error calculating route metrics: {str(e)}"
+
+    @staticmethod
+    def recalculate_route(route_id):
+        """
+        Measure a route of the routes table from its GeoJSON geometry
+
+        Stores the distance, elevation gain and loss (left empty when the
+        geometry has no elevations) and the estimated duration at the speed
+        of the route's type.
+
+        Returns:
+            tuple: (metrics dict, or None if the route no longer exists; error message)
+        """
+        try:
+            route = Route.query.get(route_id)
+            if route is None:
+                return None, None
+
+            metrics = RouteService.measure(RouteService.geojson_lines(route.geojson or '{}'), route.route_type)
+            route.total_distance_km = round(metrics['distance_km'], 2)
+            gain, loss = metrics['elevation_gain_m'], metrics['elevation_loss_m']
+            route.elevation_gain_m = round(gain, 2) if gain is not None else None
+            route.elevation_loss_m = round(loss, 2) if loss is not None else None
+            route.estimated_duration_minutes = int(round(metrics['duration_hours'] * 60))
+
+            db.session.commit()
+            return metrics, None
+        except Exception as e:
+            db.session.rollback()
+            return None, f"Error calculating route metrics: {str(e)}"
@@ -0,0 +1,250 @@
+# app/services/schedule_service.py
+"""
+Guide double-booking detection.
+
+A guide is busy during the available dates of their active activity
+instances and during the expeditions they lead. Conflict checks load only
+the guide's commitments that intersect the window being checked (two
+indexed range queries, independent of how much history the guide has) into
+an IntervalIndex and answer each overlap query with two bisections.
+"""
+
+from datetime import datetime, time, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.activity import Activity
+from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
+from app.models.expedition import Expedition
+from app.models.team_member import TeamMember
+from app.utils.intervals import IntervalIndex
+
+
+class ScheduleService:
+    """Service for guide schedule conflict checks"""
+
+    # Commitments in these states do not block the guide
+    INACTIVE_DATE_STATUSES = ('canceled',)
+    INACTIVE_EXPEDITION_STATUSES = ('canceled',)
+
+    # Number of conflicts spelled out in error messages
+    MESSAGE_CONFLICT_LIMIT = 3
+
+    @staticmethod
+    def slot_interval(date_value, start_time, end_time):
+        """
+        Return the [start, end) datetimes of an activity date
+
+        An end time at or before the start time ends on the next day.
+        """
+        start = datetime.combine(date_value, start_time)
+        end = datetime.combine(date_value, end_time)
+        if end <= start:
+            end += timedelta(days=1)
+        return start, end
+
+    @staticmethod
+    def expedition_interval(start_date, end_date):
+        """
+        Return the [start, end) datetimes of an expedition
+
+        Expeditions are usually entered as whole days, so an end date at
+        midnight covers that entire day.
+        """
+        if end_date.time() == time.min:
+            end_date += timedelta(days=1)
+        return start_date, end_date
+
+    @staticmethod
+    def _date_commitments(guide_id, window_start, window_end, exclude_date_ids):
+        """Available dates of the guide's active instances intersecting the window"""
+        query = db.session.query(
+            ActivityAvailableDate.available_date_id,
+            ActivityAvailableDate.date,
+            ActivityAvailableDate.start_time,
+            ActivityAvailableDate.end_time,
+            GuideActivityInstance.activity_id,
+            Activity.title
+        ).join(
+            GuideActivityInstance,
+            ActivityAvailableDate.activity_instance_id == GuideActivityInstance.instance_id
+        ).join(
+            Activity, GuideActivityInstance.activity_id == Activity.activity_id
+        ).filter(
+            GuideActivityInstance.guide_id == guide_id,
+            GuideActivityInstance.is_active == True,
+            # Overnight slots start the day before they end
+            ActivityAvailableDate.date >= window_start.date() - timedelta(days=1),
+            ActivityAvailableDate.date <= window_end.date(),
+            or_(
+                ActivityAvailableDate.status.is_(None),
+                ActivityAvailableDate.status.notin_(ScheduleService.INACTIVE_DATE_STATUSES)
+            )
+        )
+
+        if exclude_date_ids:
+            query = query.filter(ActivityAvailableDate.available_date_id.notin_(exclude_date_ids))
+
+        for date_id, date_value, start_time, end_time, activity_id, title in query:
+            start, end = ScheduleService.slot_interval(date_value, start_time, end_time)
+            yield start, end, {
+                'type': 'activity_date',
+                'available_date_id': date_id,
+                'activity_id': activity_id,
+                'title': title
+            }
+
+    @staticmethod
+    def _expedition_commitments(guide_id, window_start, window_end, exclude_expedition_ids):
+        """Expeditions led by the guide intersecting the window"""
+        query = db.session.query(
+            Expedition.expedition_id,
+            Expedition.title,
+            Expedition.start_date,
+            Expedition.end_date
+        ).filter(
+            Expedition.leader_id == guide_id,
+            Expedition.start_date < window_end,
+            # Whole-day expeditions extend to the end of their last day
+            Expedition.end_date >= window_start - timedelta(days=1),
+            or_(
+                Expedition.expedition_status.is_(None),
+                Expedition.expedition_status.notin_(ScheduleService.INACTIVE_EXPEDITION_STATUSES)
+            )
+        )
+
+        if exclude_expedition_ids:
+            query = query.filter(Expedition.expedition_id.notin_(exclude_expedition_ids))
+
+        for expedition_id, title, start_date, end_date in query:
+            start, end = ScheduleService.expedition_interval(start_date, end_date)
+            yield start, end, {
+                'type': 'expedition',
+                'expedition_id': expedition_id,
+                'title': title
+            }
+
+    @staticmethod
+    def load_guide_index(guide_id, window_start, window_end, exclude_date_ids=(), exclude_expedition_ids=()):
+        """
+        Build the interval index of a guide's commitments within a window
+
+        Args:
+            guide_id: ID of the guide
+            window_start: Start of the window (datetime)
+            window_end: End of the window (datetime)
+            exclude_date_ids: Available dates to leave out (e.g. the one being updated)
+            exclude_expedition_ids: Expeditions to leave out
+
+        Returns:
+            IntervalIndex: Intervals with conflict payloads
+        """
+        intervals = list(ScheduleService._date_commitments(
+            guide_id, window_start, window_end, exclude_date_ids
+        ))
+        intervals.extend(ScheduleService._expedition_commitments(
+            guide_id, window_start, window_end, exclude_expedition_ids
+        ))
+        return IntervalIndex(intervals)
+
+    @staticmethod
+    def _conflict_dict(start, end, payload):
+        conflict = dict(payload)
+        conflict['start'] = start.isoformat()
+        conflict['end'] = end.isoformat()
+        return conflict
+
+    @staticmethod
+    def find_conflicts(guide_id, intervals, exclude_date_ids=(), exclude_expedition_ids=(),
+                       check_each_other=False):
+        """
+        Find the commitments each candidate interval overlaps
+
+        Args:
+            guide_id: ID of the guide
+            intervals: List of (start, end) datetimes
+            exclude_date_ids: Available dates to ignore
+            exclude_expedition_ids: Expeditions to ignore
+            check_each_other: Also report candidates that overlap each other
+
+        Returns:
+            list: One list of conflict dicts per candidate, in input order
+        """
+        if not intervals:
+            return []
+
+        index = ScheduleService.load_guide_index(
+            guide_id,
+            min(start for start, _ in intervals),
+            max(end for _, end in intervals),
+            exclude_date_ids=exclude_date_ids,
+            exclude_expedition_ids=exclude_expedition_ids
+        )
+
+        candidates = None
+        if check_each_other:
+            candidates = IntervalIndex(
+                (start, end, {'type': 'candidate', 'index': position})
+                for position, (start, end) in enumerate(intervals)
+            )
+
+        results = []
+        for position, (start, end) in enumerate(intervals):
+            conflicts = [
+                ScheduleService._conflict_dict(*overlap)
+                for overlap in index.overlapping(start, end)
+            ]
+            if candidates is not None:
+                conflicts.extend(
+                    ScheduleService._conflict_dict(*overlap)
+                    for overlap in candidates.overlapping(start, end)
+                    if overlap[2]['index'] != position
+                )
+            results.append(conflicts)
+
+        return results
+
+    @staticmethod
+    def check_interval(guide_id, start, end, exclude_date_ids=(), exclude_expedition_ids=()):
+        """Return the commitments a single interval overlaps"""
+        return ScheduleService.find_conflicts(
+            guide_id,
+            [(start, end)],
+            exclude_date_ids=exclude_date_ids,
+            exclude_expedition_ids=exclude_expedition_ids
+        )[0]
+
+    @staticmethod
+    def conflict_message(conflicts):
+        """Describe conflicts as a 'Schedule conflict: ...' error message"""
+        described = []
+        for conflict in conflicts[:ScheduleService.MESSAGE_CONFLICT_LIMIT]:
+            start = datetime.fromisoformat(conflict['start'])
+            end = datetime.fromisoformat(conflict['end'])
+            kind = 'expedition' if conflict['type'] == 'expedition' else 'activity'
+            described.append(
+                f"{kind} '{conflict['title']}' from {start:%Y-%m-%d %H:%M} to {end:%Y-%m-%d %H:%M}"
+            )
+
+        message = "Schedule conflict: the guide is already booked for " + ", ".join(described)
+        remaining = len(conflicts) - len(described)
+        if remaining > 0:
+            message += f" and {remaining} more"
+        return message
+
+    @staticmethod
+    def can_view_schedule(user_id, guide_id):
+        """A user may check their own schedule, or a guide's in a team they manage"""
+        if str(user_id) == str(guide_id):
+            return True
+
+        guide_membership = aliased(TeamMember)
+        shared = db.session.query(TeamMember.team_member_id).join(
+            guide_membership, guide_membership.team_id == TeamMember.team_id
+        ).filter(
+            TeamMember.user_id == user_id,
+            TeamMember.role_level <= 2,  # Master Guide and Tactical Guide
+            guide_membership.user_id == guide_id
+        ).first()
+
+        return shared is not None
@@ -0,0 +1,205 @@
+# app/services/tile_service.py
+"""
+Vector tiles of locations for the web map.
+
+A tile holds one "locations" layer. Below LOCATION_TILE_CLUSTER_MAX_ZOOM,
+the locations of each cell of a LOCATION_TILE_CLUSTER_GRID x
+LOCATION_TILE_CLUSTER_GRID grid over the tile are merged into one cluster
+feature at their centroid, so a tile holds a bounded number of features
+however many locations it covers; clusters never straddle tiles because the
+grid is aligned with them. Every feature carries the number of active
+activities at its locations.
+
+Points come from the in-process location index (see LocationService), so
+building a tile costs at most one query, for the names of the individual
+locations it shows. Tiles are kept gzipped in a per-process LRU cache of
+LOCATION_TILE_CACHE_SIZE entries for LOCATION_TILE_TTL seconds, and the
+whole cache is dropped when a location or an activity is committed.
+"""
+
+import gzip
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from app import db
+from app.models.activity import Activity
+from app.models.location import Location
+from app.services.location_service import LocationService
+from app.utils.vector_tiles import DEFAULT_EXTENT, encode_layer, encode_tile, tile_bounds, tile_projector
+
+LAYER_NAME = 'locations'
+
+
+def _after_flush(session, flush_context):
+    """Remember that the map's locations or activities changed in this transaction"""
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (Location, Activity)):
+            session.info['location_tiles_changed'] = True
+            return
+
+
+def _after_commit(session):
+    if session.info.pop('location_tiles_changed', None) and has_app_context():
+        TileService.invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop('location_tiles_changed', None)
+
+
+def register_tile_listeners():
+    """Install the session listeners once per process"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
+
+
+class Tile:
+    """An encoded tile, gzipped, with its entity tag"""
+
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, data):
+        self.body = gzip.compress(data, mtime=0) if data else b''
+        self.etag = hashlib.sha1(data).hexdigest()
+
+    def decompressed(self):
+        return gzip.decompress(self.body) if self.body else b''
+
+
+class TileService:
+    """Service building and caching location vector tiles"""
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _store():
+        """Return the tile store of the current application"""
+        return current_app.extensions.setdefault(
+            'location_tiles', {'generation': 0, 'tiles': OrderedDict(), 'activity_counts': None}
+        )
+
+    @staticmethod
+    def invalidate():
+        """Drop every cached tile"""
+        store = TileService._store()
+        with TileService._lock:
+            store['generation'] += 1
+            store['tiles'].clear()
+            store['activity_counts'] = None
+
+    @staticmethod
+    def _activity_counts():
+        """Number of active activities of every location that has any, loaded once per generation"""
+        store = TileService._store()
+        counts = store['activity_counts']
+        if counts is None:
+            generation = store['generation']
+            counts = dict(
+                db.session.query(Activity.location_id, func.count(Activity.activity_id))
+                .filter(Activity.activity_status == 'active', Activity.location_id.isnot(None))
+                .group_by(Activity.location_id)
+            )
+            with TileService._lock:
+                if store['generation'] == generation:
+                    store['activity_counts'] = counts
+        return counts
+
+    @staticmethod
+    def build(z, x, y):
+        """
+        Encode the locations layer of a tile
+
+        Returns:
+            Tile: The encoded tile; an empty body when no location falls in it
+        """
+        config = current_app.config
+        extent = DEFAULT_EXTENT
+        index = LocationService.get_index()
+        with LocationService._lock:
+            points = index.within_box(*tile_bounds(z, x, y))
+
+        project = tile_projector(z, x, y, extent)
+        counts = TileService._activity_counts()
+
+        if z < config.get('LOCATION_TILE_CLUSTER_MAX_ZOOM', 14):
+            cell = extent // config.get('LOCATION_TILE_CLUSTER_GRID', 16)
+        else:
+            cell = None
+
+        # Group the points by cluster cell; past the clustering zoom every point is its own group
+        groups = {}
+        for key, lat, lng in points:
+            px, py = project(lat, lng)
+            if 0 <= px < extent and 0 <= py < extent:
+                group = (px // cell, py // cell) if cell else key
+                groups.setdefault(group, []).append((key, px, py))
+
+        singles = [members[0][0] for members in groups.values() if len(members) == 1]
+        names = {}
+        if singles:
+            names = {
+                location_id: (name, location_type)
+                for location_id, name, location_type in db.session.query(
+                    Location.location_id, Location.location_name, Location.location_type
+                ).filter(Location.location_id.in_(singles))
+            }
+
+        features = []
+        for members in groups.values():
+            if len(members) == 1:
+                key, px, py = members[0]
+                if key not in names:
+                    continue  # Deleted since the index was loaded
+                name, location_type = names[key]
+                features.append((key, (px, py), {
+                    'name': name,
+                    'location_type': location_type,
+                    'activity_count': counts.get(key, 0)
+                }))
+            else:
+                features.append((None, (
+                    sum(px for _, px, _ in members) // len(members),
+                    sum(py for _, _, py in members) // len(members)
+                ), {
+                    'cluster': True,
+                    'point_count': len(members),
+                    'activity_count': sum(counts.get(key, 0) for key, _, _ in members)
+                }))
+
+        if not features:
+            return Tile(b'')
+        return Tile(encode_tile([encode_layer(LAYER_NAME, features, extent)]))
+
+    @staticmethod
+    def get_tile(z, x, y):
+        """Return the tile at z/x/y, from the cache when possible"""
+        store = TileService._store()
+        key = (z, x, y)
+        now = time.monotonic()
+
+        with TileService._lock:
+            entry = store['tiles'].get(key)
+            if entry is not None and entry[0] > now:
+                store['tiles'].move_to_end(key)
+                return entry[1]
+
+        generation = store['generation']
+        tile = TileService.build(z, x, y)
+
+        config = current_app.config
+        with TileService._lock:
+            # Skipped if a write was committed while the tile was building
+            if store['generation'] == generation:
+                tiles = store['tiles']
+                tiles[key] = (now + config.get('LOCATION_TILE_TTL', 60), tile)
+                tiles.move_to_end(key)
+                while len(tiles) > config.get('LOCATION_TILE_CACHE_SIZE', 2048):
+                    tiles.popitem(last=False)
+        return tile
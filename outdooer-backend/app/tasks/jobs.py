@@ -0,0 +1,434 @@
+# app/tasks/jobs.py
+"""
+Background job queue backed by the background_jobs table
+
+Request handlers enqueue work with enqueue(), in the same transaction as
+the writes that caused it, and return. Workers claim due jobs one at a time
+with SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker threads and
+processes can share the queue without a broker and without running a job
+twice. A failed job is retried with exponential backoff until it runs out
+of attempts; a job whose worker died is requeued once its lock times out.
+While a job runs, its worker refreshes the lock every JOB_HEARTBEAT_INTERVAL
+seconds, so a long job is not mistaken for an abandoned one, and records the
+outcome only if it still holds the lock.
+
+Tasks are plain functions registered under a name with @task. The job
+payload is passed to them as keyword arguments. A task may commit; anything
+it leaves uncommitted is committed together with the job's success mark.
+Every finished attempt records its duration, summarized by job_stats().
+
+Usage:
+    python -m app.tasks.jobs
+    python -m app.tasks.jobs --concurrency 8
+    python -m app.tasks.jobs --once --job payments.drain_outbox
+    python -m app.tasks.jobs --stats
+"""
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from app import db
+from app.models.job import BackgroundJob
+
+# Modules whose @task functions the worker loads before claiming jobs
+TASK_MODULES = (
+    'app.tasks.payment_processing',
+    'app.tasks.metrics_calculation',
+    'app.tasks.payout_jobs',
+    'app.tasks.notification_jobs',
+    'app.tasks.route_jobs',
+)
+
+# job name -> task function
+_tasks = {}
+
+
+def task(name):
+    """Register a function as the task run for jobs named `name`"""
+    def decorator(func):
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+def load_tasks():
+    """Import every module in TASK_MODULES so their tasks are registered"""
+    for module in TASK_MODULES:
+        importlib.import_module(module)
+
+
+def enqueue(name, payload=None, run_at=None, dedupe_key=None, max_attempts=None, connection=None):
+    """
+    Add a job to the queue without committing
+
+    The job becomes visible to workers when the caller commits, so it is
+    never run for writes that were rolled back.
+
+    Args:
+        name: Registered task name
+        payload: JSON-serializable dict passed to the task as keyword arguments
+        run_at: Earliest time to run the job (defaults to now)
+        dedupe_key: Skip the insert if a queued job already has this key
+        max_attempts: Attempts before the job fails (defaults to JOB_MAX_ATTEMPTS)
+        connection: Connection to insert with, for session listeners that
+                    cannot use the session while it flushes
+
+    Returns:
+        int or None: The new job_id, or None if a queued job has the dedupe key
+    """
+    now = datetime.utcnow()
+    values = {
+        'job_name': name,
+        'payload': json.dumps(payload or {}),
+        'dedupe_key': dedupe_key,
+        'status': 'queued',
+        'attempts': 0,
+        'max_attempts': max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 5),
+        'run_at': run_at or now,
+        'created_at': now
+    }
+
+    executor = connection if connection is not None else db.session
+    dialect = connection.dialect if connection is not None else db.engine.dialect
+    if dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"The job queue is not supported on {dialect.name}")
+
+    statement = insert(BackgroundJob.__table__).values(**values)
+    if dedupe_key is not None:
+        statement = statement.on_conflict_do_nothing(
+            index_elements=['dedupe_key'],
+            index_where=db.text("status = 'queued'")
+        )
+
+    if dialect.full_returning:
+        row = executor.execute(statement.returning(BackgroundJob.__table__.c.job_id)).first()
+        return row[0] if row else None
+
+    result = executor.execute(statement)
+    return result.inserted_primary_key[0] if result.rowcount == 1 else None
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying a job that has failed `attempts` times"""
+    base = current_app.config.get('JOB_RETRY_BASE_DELAY', 10)
+    ceiling = current_app.config.get('JOB_RETRY_MAX_DELAY', 3600)
+    return min(ceiling, base * 2 ** (attempts - 1))
+
+
+def claim_job(worker_id, names=None):
+    """
+    Lock the next due job, mark it running and commit
+
+    Args:
+        worker_id: Identifier recorded on the job while it runs
+        names: Optional list of job names to limit the claim to
+
+    Returns:
+        tuple or None: (job_id, job_name, payload, attempts, max_attempts)
+    """
+    now = datetime.utcnow()
+    query = BackgroundJob.query.filter(
+        BackgroundJob.status == 'queued',
+        BackgroundJob.run_at <= now
+    )
+    if names:
+        query = query.filter(BackgroundJob.job_name.in_(names))
+
+    job = query.order_by(
+        BackgroundJob.run_at, BackgroundJob.job_id
+    ).with_for_update(skip_locked=True).first()
+
+    if job is None:
+        db.session.rollback()
+        return None
+
+    job.status = 'running'
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_at = now
+    job.started_at = now
+    claimed = (job.job_id, job.job_name, job.get_payload(), job.attempts, job.max_attempts)
+    db.session.commit()
+    return claimed
+
+
+def heartbeat(job_id, worker_id):
+    """
+    Refresh the lock of a running job, on a connection of its own
+
+    Returns:
+        bool: False if the worker no longer holds the job
+    """
+    table = BackgroundJob.__table__
+    with db.engine.begin() as connection:
+        result = connection.execute(table.update().where(
+            table.c.job_id == job_id,
+            table.c.locked_by == worker_id,
+            table.c.status == 'running'
+        ).values(locked_at=datetime.utcnow()))
+    return result.rowcount == 1
+
+
+def _keep_lock(app, job_id, worker_id, stop):
+    """Send heartbeats for a job until `stop` is set or the lock is lost"""
+    interval = app.config.get('JOB_HEARTBEAT_INTERVAL', 60)
+    with app.app_context():
+        while not stop.wait(interval):
+            try:
+                if not heartbeat(job_id, worker_id):
+                    return
+            except Exception as e:
+                app.logger.warning(f"Heartbeat of job {job_id} failed: {str(e)}")
+
+
+def execute_job(job_id, name, payload, attempts, max_attempts, worker_id=None):
+    """
+    Run a claimed job and record its outcome and duration
+
+    A retried job gives up its dedupe key, so enqueuing the same key while
+    the job is backing off adds a fresh job instead of waiting for it.
+
+    With a worker_id, the job's lock is refreshed while the task runs, and
+    the outcome is recorded only if the worker still holds the lock; a job
+    requeued and claimed again meanwhile belongs to its new worker.
+
+    Returns:
+        str: The job's new status (succeeded, queued or failed), or lost if
+             the worker no longer held the job
+    """
+    table = BackgroundJob.__table__
+    func = _tasks.get(name)
+    started = time.perf_counter()
+    held = table.c.job_id == job_id
+    if worker_id is not None:
+        held = db.and_(held, table.c.locked_by == worker_id)
+
+    try:
+        if func is None:
+            raise LookupError(f"No task is registered as {name}")
+
+        stop = threading.Event()
+        if worker_id is not None:
+            threading.Thread(
+                target=_keep_lock,
+                args=(current_app._get_current_object(), job_id, worker_id, stop),
+                daemon=True
+            ).start()
+        try:
+            func(**payload)
+        finally:
+            stop.set()
+
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        status = 'succeeded'
+        result = db.session.execute(table.update().where(held).values(
+            status=status,
+            finished_at=datetime.utcnow(),
+            duration_ms=duration_ms,
+            last_error=None,
+            locked_by=None,
+            locked_at=None
+        ))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        now = datetime.utcnow()
+        values = {
+            'duration_ms': duration_ms,
+            'last_error': str(e)[:1000],
+            'locked_by': None,
+            'locked_at': None
+        }
+
+        if func is not None and attempts < max_attempts:
+            status = 'queued'
+            values.update(run_at=now + timedelta(seconds=retry_delay(attempts)), dedupe_key=None)
+        else:
+            status = 'failed'
+            values.update(finished_at=now)
+
+        result = db.session.execute(table.update().where(held).values(status=status, **values))
+        db.session.commit()
+        current_app.logger.error(f"Job {job_id} ({name}) attempt {attempts}/{max_attempts} failed: {str(e)}")
+
+    if result.rowcount != 1:
+        current_app.logger.warning(f"Job {job_id} ({name}) lost its lock to another worker; outcome not recorded")
+        return 'lost'
+
+    current_app.logger.info(f"Job {job_id} ({name}) {status} in {duration_ms} ms")
+    return status
+
+
+def requeue_stale_jobs():
+    """
+    Release jobs whose worker stopped before finishing them
+
+    Running jobs locked for longer than JOB_LOCK_TIMEOUT are queued again,
+    or failed if they have used all their attempts.
+
+    Returns:
+        int: Number of jobs released
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=current_app.config.get('JOB_LOCK_TIMEOUT', 900))
+    table = BackgroundJob.__table__
+    exhausted = table.c.attempts >= table.c.max_attempts
+
+    result = db.session.execute(table.update().where(
+        table.c.status == 'running',
+        table.c.locked_at < cutoff
+    ).values(
+        status=db.case((exhausted, 'failed'), else_='queued'),
+        finished_at=db.case((exhausted, now), else_=None),
+        last_error='Worker lock timed out',
+        dedupe_key=None,
+        locked_by=None,
+        locked_at=None
+    ))
+    db.session.commit()
+    return result.rowcount
+
+
+def work(worker_id, names=None, once=False, stop=None):
+    """
+    Claim and run jobs until stopped
+
+    Args:
+        worker_id: Identifier recorded on claimed jobs
+        names: Optional list of job names to limit the worker to
+        once: Return as soon as no job is due instead of polling
+        stop: Optional threading.Event that ends the loop when set
+
+    Returns:
+        int: Number of jobs run
+    """
+    interval = current_app.config.get('JOB_POLL_INTERVAL', 1)
+    stop = stop or threading.Event()
+    count = 0
+
+    while not stop.is_set():
+        claimed = claim_job(worker_id, names)
+        if claimed is None:
+            if once:
+                break
+            stop.wait(interval)
+            continue
+        execute_job(*claimed, worker_id=worker_id)
+        count += 1
+
+    return count
+
+
+def run_worker(concurrency=None, names=None, once=False):
+    """
+    Run `concurrency` worker threads, each with its own database session
+
+    The calling thread releases stale jobs every half lock timeout until
+    the workers exit (with `once`) or the process is interrupted.
+
+    Returns:
+        int: Number of jobs run
+    """
+    app = current_app._get_current_object()
+    concurrency = concurrency or app.config.get('JOB_WORKER_CONCURRENCY', 4)
+    sweep_interval = app.config.get('JOB_LOCK_TIMEOUT', 900) / 2
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    stop = threading.Event()
+    counts = []
+
+    def _thread_main(index):
+        with app.app_context():
+            try:
+                counts.append(work(f"{prefix}:{index}", names, once, stop))
+            finally:
+                db.session.remove()
+
+    load_tasks()
+    requeue_stale_jobs()
+
+    threads = [threading.Thread(target=_thread_main, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            alive = [thread for thread in threads if thread.is_alive()]
+            if not alive:
+                break
+            alive[0].join(sweep_interval)
+            if not once and alive[0].is_alive():
+                requeue_stale_jobs()
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return sum(counts)
+
+
+def job_stats(since=None):
+    """
+    Summarize job attempts per job name and status
+
+    Args:
+        since: Only jobs created at or after this datetime
+
+    Returns:
+        list: Dicts with count, attempts and average / maximum duration in ms
+    """
+    query = db.session.query(
+        BackgroundJob.job_name,
+        BackgroundJob.status,
+        db.func.count(BackgroundJob.job_id),
+        db.func.coalesce(db.func.sum(BackgroundJob.attempts), 0),
+        db.func.avg(BackgroundJob.duration_ms),
+        db.func.max(BackgroundJob.duration_ms)
+    )
+    if since is not None:
+        query = query.filter(BackgroundJob.created_at >= since)
+
+    rows = query.group_by(BackgroundJob.job_name, BackgroundJob.status).order_by(
+        BackgroundJob.job_name, BackgroundJob.status
+    ).all()
+
+    return [{
+        'job_name': name,
+        'status': status,
+        'count': count,
+        'attempts': int(attempts),
+        'avg_ms': round(float(avg_ms), 1) if avg_ms is not None else None,
+        'max_ms': max_ms
+    } for name, status, count, attempts, avg_ms, max_ms in rows]
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Run background jobs from the background_jobs table')
+    parser.add_argument('--concurrency', type=int, default=None, help='Worker threads (defaults to JOB_WORKER_CONCURRENCY)')
+    parser.add_argument('--job', action='append', dest='names', help='Only run jobs with this name (repeatable)')
+    parser.add_argument('--once', action='store_true', help='Run the due jobs and exit instead of polling')
+    parser.add_argument('--stats', action='store_true', help='Print per-job timing statistics and exit')
+    args = parser.parse_args()
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        if args.stats:
+            for row in job_stats():
+                print(f"{row['job_name']:<32} {row['status']:<10} {row['count']:>8} jobs "
+                      f"{row['attempts']:>8} attempts  avg {row['avg_ms']} ms  max {row['max_ms']} ms")
+        else:
+            ran = run_worker(args.concurrency, args.names, args.once)
+            print(f"Ran {ran} jobs")
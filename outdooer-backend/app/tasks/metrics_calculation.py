@@ -0,0 +1,58 @@
+# app/tasks/metrics_calculation.py
+"""
+Periodic reconciliation of TeamMetrics and GuideMetrics
+
+Counters are maintained incrementally on every write (see
+app/services/metrics_service.py). This job recomputes them from the source
+tables in bulk, repairing drift from writes made outside the application
+or before the counters existed. Run it from cron, e.g. nightly, or enqueue a
+metrics.reconcile background job.
+
+Usage:
+    python -m app.tasks.metrics_calculation
+    python -m app.tasks.metrics_calculation --team-id 3 --team-id 7
+"""
+
+import argparse
+import os
+import time
+
+from app import db
+from app.services.metrics_service import MetricsService
+from app.tasks.jobs import task
+
+
+@task('metrics.reconcile')
+def reconcile_metrics(team_ids=None):
+    """
+    Recompute all maintained counters in one transaction
+
+    Args:
+        team_ids: Optional list of teams to limit the team recomputation to
+
+    Returns:
+        dict: Number of team and guide rows written and the elapsed seconds
+    """
+    started = time.perf_counter()
+    try:
+        result = MetricsService.reconcile(team_ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Recompute team and guide metrics from source tables')
+    parser.add_argument('--team-id', type=int, action='append', dest='team_ids', help='Limit to this team (repeatable)')
+    args = parser.parse_args()
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        result = reconcile_metrics(args.team_ids)
+        print(f"Reconciled {result['teams']} teams and {result['guides']} guides in {result['seconds']}s")
@@ -0,0 +1,183 @@
+# app/tasks/notification_jobs.py
+"""
+Notification fan-out and email delivery jobs
+
+notifications.fan_out turns one event into communications rows: the
+recipients are resolved with one query, the event is rendered once, and the
+rows are written with one executemany. Notifying a 200-guide team is one
+job and one INSERT batch, not 200 of each.
+
+notifications.deliver emails the undelivered communications. It is enqueued
+with a dedupe key NOTIFICATION_COALESCE_SECONDS after the first pending
+event, so every event that reaches a recipient in that window goes out as a
+single email. Each batch is sent through one transport connection and
+marked delivered in one UPDATE. A message the mail server refuses, or that
+cannot be built (an address with a line break, say), does not hold up the
+others: its communications record the error and are tried again
+by later runs, up to NOTIFICATION_MAX_DELIVERY_ATTEMPTS times. The messages
+sent before a lost connection are marked before the job fails, so retries
+do not email them twice; delivery is at-least-once only when the marking
+commit itself fails.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from app import db
+from app.models.activity import Activity
+from app.models.communication import Communication
+from app.models.team_member import TeamMember
+from app.models.user import User
+from app.services.notification_service import NotificationService
+from app.tasks.jobs import enqueue, task
+from app.utils.mail import build_message, get_transport
+
+
+def _recipients(recipient_ids, team_id, max_role_level, sender_id):
+    """Resolve the active users to notify with one query"""
+    conditions = []
+    if recipient_ids:
+        conditions.append(User.user_id.in_(recipient_ids))
+    if team_id is not None:
+        members = db.session.query(TeamMember.user_id).filter(TeamMember.team_id == team_id)
+        if max_role_level is not None:
+            members = members.filter(TeamMember.role_level <= max_role_level)
+        conditions.append(User.user_id.in_(members.scalar_subquery()))
+
+    if not conditions:
+        return []
+
+    query = db.session.query(User.user_id).filter(
+        db.or_(*conditions),
+        User.account_status == 'active'
+    )
+    if sender_id is not None:
+        query = query.filter(User.user_id != sender_id)
+
+    return [row.user_id for row in query.order_by(User.user_id)]
+
+
+@task('notifications.fan_out')
+def fan_out(event_type, context, recipient_ids=None, team_id=None, max_role_level=None,
+            sender_id=None, activity_id=None, expedition_id=None, locale=None):
+    """
+    Write one communication per recipient of an event and schedule delivery
+
+    Returns:
+        int: Number of communications written
+    """
+    context = dict(context or {})
+    if activity_id is not None:
+        activity = db.session.query(Activity.title, Activity.team_id).filter(
+            Activity.activity_id == activity_id
+        ).first()
+        if activity:
+            context.setdefault('activity_title', activity.title)
+            if team_id is None and max_role_level is not None:
+                team_id = activity.team_id
+
+    recipients = _recipients(recipient_ids, team_id, max_role_level, sender_id)
+    if not recipients:
+        return 0
+
+    subject, content = NotificationService.render(event_type, locale, context)
+    now = datetime.utcnow()
+    db.session.execute(Communication.__table__.insert(), [{
+        'sender_id': sender_id,
+        'recipient_id': recipient_id,
+        'team_id': team_id,
+        'activity_id': activity_id,
+        'expedition_id': expedition_id,
+        'message_type': event_type,
+        'subject': subject[:255],
+        'message_content': content,
+        'is_read': False,
+        'created_at': now
+    } for recipient_id in recipients])
+
+    window = current_app.config.get('NOTIFICATION_COALESCE_SECONDS', 60)
+    enqueue('notifications.deliver', run_at=now + timedelta(seconds=window), dedupe_key='notifications.deliver')
+    return len(recipients)
+
+
+@task('notifications.deliver')
+def deliver_pending(batch_size=None, locale=None):
+    """
+    Email every undelivered communication, one email per recipient per batch
+
+    Returns:
+        int: Number of emails sent
+    """
+    config = current_app.config
+    batch_size = batch_size or config.get('NOTIFICATION_BATCH_SIZE', 500)
+    max_attempts = config.get('NOTIFICATION_MAX_DELIVERY_ATTEMPTS', 3)
+    transport = get_transport()
+    table = Communication.__table__
+    sent = 0
+    last_id = 0
+
+    while True:
+        # Keyset over the run, so refused rows are not picked up again by the same run
+        rows = db.session.query(
+            Communication.communication_id,
+            Communication.subject,
+            Communication.message_content,
+            User.email,
+            User.first_name
+        ).join(
+            User, User.user_id == Communication.recipient_id
+        ).filter(
+            Communication.delivered_at.is_(None),
+            Communication.delivery_attempts < max_attempts,
+            Communication.communication_id > last_id
+        ).order_by(
+            Communication.communication_id
+        ).limit(batch_size).with_for_update(of=Communication, skip_locked=True).all()
+
+        if not rows:
+            db.session.rollback()
+            break
+        last_id = rows[-1].communication_id
+
+        by_recipient = OrderedDict()
+        for row in rows:
+            entry = by_recipient.setdefault(row.email, {'first_name': row.first_name, 'items': [], 'ids': []})
+            entry['items'].append((row.subject, row.message_content))
+            entry['ids'].append(row.communication_id)
+
+        messages, recipients, errors = [], [], []
+        for email, entry in by_recipient.items():
+            subject, body = NotificationService.compose_email(entry['first_name'], entry['items'], locale)
+            try:
+                messages.append(build_message(email, subject, body))
+            except ValueError as e:
+                # An address that cannot be a header fails like a refused one
+                errors.append((entry['ids'], str(e)))
+                continue
+            recipients.append(entry)
+
+        delivered, failed = [], {}
+        try:
+            sent += transport.send_messages(messages, delivered=delivered, failed=failed)
+        finally:
+            # Also when the connection dropped midway, so a retry skips what went out
+            delivered_ids = [key for index in delivered for key in recipients[index]['ids']]
+            if delivered_ids:
+                db.session.execute(table.update().where(
+                    table.c.communication_id.in_(delivered_ids)
+                ).values(delivered_at=datetime.utcnow()))
+            errors.extend((recipients[index]['ids'], error) for index, error in failed.items())
+            for ids, error in errors:
+                db.session.execute(table.update().where(
+                    table.c.communication_id.in_(ids)
+                ).values(
+                    delivery_attempts=table.c.delivery_attempts + 1,
+                    delivery_error=error
+                ))
+            db.session.commit()
+
+        if len(rows) < batch_size:
+            break
+
+    return sent
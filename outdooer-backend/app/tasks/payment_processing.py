@@ -0,0 +1,206 @@
+# app/tasks/payment_processing.py
+"""
+Batch worker for the payment outbox
+
+Recording a payment writes its downstream effects (earnings, metrics) as
+rows of payment_outbox in the same transaction. This worker drains those
+rows in chunks: each chunk is claimed with SELECT ... FOR UPDATE SKIP
+LOCKED, handed to every handler registered for its event type in one call,
+and marked processed in the same transaction as the handlers' writes. Several
+workers can run side by side without processing an event twice.
+
+Recording a payment also enqueues a deduplicated payments.drain_outbox
+background job, so a running job worker (app/tasks/jobs.py) applies new
+events promptly without this poller.
+
+Events whose type has no registered handler stay pending until one is
+registered. A chunk whose handler fails is rolled back and applied again in
+halves until the failing events are isolated; the rest are processed, and
+each failing event is retried on a later drain, up to OUTBOX_MAX_ATTEMPTS
+times.
+
+Usage:
+    python -m app.tasks.payment_processing
+    python -m app.tasks.payment_processing --once --batch-size 1000
+"""
+
+import argparse
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app
+from app import db
+from app.models.payment import PaymentOutbox
+from app.services.earnings_service import EarningsService
+from app.services.metrics_service import MetricsService
+from app.tasks.jobs import task
+
+# event_type -> handlers called with a list of PaymentOutbox rows
+_handlers = defaultdict(list)
+
+
+def outbox_handler(event_type):
+    """
+    Register a function that applies a chunk of outbox events
+
+    The handler receives every claimed event of the type at once and should
+    apply them with set-based statements. It must not commit; the worker
+    commits its writes together with the processed marks.
+    """
+    def decorator(func):
+        _handlers[event_type].append(func)
+        return func
+    return decorator
+
+
+@outbox_handler('payment_completed')
+def apply_earnings(events):
+    """Split a chunk of completed payments into guide, team and commission amounts"""
+    EarningsService.calculate_earnings([event.payment_id for event in events])
+
+
+@outbox_handler('payment_completed')
+def apply_team_revenue(events):
+    """Add a chunk of completed payments to their teams' revenue counters"""
+    MetricsService.apply_payments([event.payment_id for event in events])
+
+
+def _claim_chunk(event_type, batch_size, max_attempts):
+    """Lock the oldest pending events of a type that no other worker holds"""
+    return PaymentOutbox.query.filter(
+        PaymentOutbox.event_type == event_type,
+        PaymentOutbox.processed_at.is_(None),
+        PaymentOutbox.attempts < max_attempts
+    ).order_by(
+        PaymentOutbox.outbox_id
+    ).limit(batch_size).with_for_update(skip_locked=True).all()
+
+
+def _lock_events(outbox_ids):
+    """Lock the given events again, skipping any processed or held elsewhere meanwhile"""
+    return PaymentOutbox.query.filter(
+        PaymentOutbox.outbox_id.in_(outbox_ids),
+        PaymentOutbox.processed_at.is_(None)
+    ).order_by(
+        PaymentOutbox.outbox_id
+    ).with_for_update(skip_locked=True).all()
+
+
+def _apply_events(event_type, events):
+    """
+    Apply locked events and mark them processed in one transaction
+
+    If a handler fails, the events are rolled back and applied again in two
+    halves, down to single events, so only the events that fail by
+    themselves are charged an attempt.
+
+    Returns:
+        tuple: (events processed, events failed)
+    """
+    outbox_ids = [event.outbox_id for event in events]
+    table = PaymentOutbox.__table__
+
+    try:
+        for handler in _handlers[event_type]:
+            handler(events)
+
+        db.session.execute(table.update().where(
+            table.c.outbox_id.in_(outbox_ids)
+        ).values(processed_at=datetime.utcnow(), last_error=None))
+        db.session.commit()
+        return len(outbox_ids), 0
+    except Exception as e:
+        db.session.rollback()
+        if len(outbox_ids) == 1:
+            db.session.execute(table.update().where(
+                table.c.outbox_id == outbox_ids[0]
+            ).values(attempts=table.c.attempts + 1, last_error=str(e)[:1000]))
+            db.session.commit()
+            current_app.logger.error(f"Outbox {event_type} event {outbox_ids[0]} failed: {str(e)}")
+            return 0, 1
+
+    processed = failed = 0
+    middle = len(outbox_ids) // 2
+    for half in (outbox_ids[:middle], outbox_ids[middle:]):
+        events = _lock_events(half)
+        if not events:
+            db.session.rollback()
+            continue
+        half_processed, half_failed = _apply_events(event_type, events)
+        processed += half_processed
+        failed += half_failed
+    return processed, failed
+
+
+def process_chunk(event_type, batch_size=None):
+    """
+    Claim and apply one chunk of events of a type
+
+    Returns:
+        tuple: (events processed, events failed)
+    """
+    batch_size = batch_size or current_app.config.get('OUTBOX_BATCH_SIZE', 500)
+    max_attempts = current_app.config.get('OUTBOX_MAX_ATTEMPTS', 5)
+
+    events = _claim_chunk(event_type, batch_size, max_attempts)
+    if not events:
+        db.session.rollback()
+        return 0, 0
+    return _apply_events(event_type, events)
+
+
+@task('payments.drain_outbox')
+def drain_outbox(batch_size=None, max_chunks=None):
+    """
+    Process pending events until the outbox is empty
+
+    Args:
+        batch_size: Events per chunk (defaults to OUTBOX_BATCH_SIZE)
+        max_chunks: Optional cap on the number of chunks per event type
+
+    Returns:
+        dict: {'processed': n, 'failed': n}
+    """
+    totals = {'processed': 0, 'failed': 0}
+
+    for event_type in list(_handlers):
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            processed, failed = process_chunk(event_type, batch_size)
+            totals['processed'] += processed
+            totals['failed'] += failed
+            chunks += 1
+            # A failed chunk is retried on the next drain, not in a tight loop
+            if failed or not processed:
+                break
+
+    return totals
+
+
+def run_worker(batch_size=None, once=False):
+    """Drain the outbox, then keep polling it every OUTBOX_POLL_INTERVAL seconds"""
+    interval = current_app.config.get('OUTBOX_POLL_INTERVAL', 5)
+
+    while True:
+        totals = drain_outbox(batch_size)
+        if totals['processed'] or totals['failed']:
+            print(f"Outbox: {totals['processed']} processed, {totals['failed']} failed")
+        if once:
+            return totals
+        if not totals['processed']:
+            time.sleep(interval)
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Drain the payment outbox')
+    parser.add_argument('--batch-size', type=int, default=None, help='Events per chunk')
+    parser.add_argument('--once', action='store_true', help='Drain once and exit instead of polling')
+    args = parser.parse_args()
+
+    app = create_app(os.getenv('FLASK_ENV', 'development'))
+    with app.app_context():
+        run_worker(args.batch_size, args.once)
@@ -0,0 +1,40 @@
+# app/tasks/payout_jobs.py
+"""
+Background payout computation
+
+POST /api/earnings/team/{team_id}/payouts with "async": true enqueues an
+earnings.create_payouts job instead of rolling up the team's pending
+earnings on the request thread.
+"""
+
+from datetime import datetime
+
+from app.services.earnings_service import EarningsService
+from app.tasks.jobs import task
+
+
+@task('earnings.create_payouts')
+def create_payouts(team_id=None, guide_id=None, created_before=None,
+                   payment_method='bank_transfer', min_amount=None, notes=None):
+    """
+    Roll pending earnings into payouts
+
+    Takes the arguments of EarningsService.create_payouts, with
+    created_before as an ISO 8601 string. Raises on failure so the job is
+    retried.
+    """
+    if created_before is not None:
+        created_before = datetime.fromisoformat(created_before)
+
+    result, error = EarningsService.create_payouts(
+        team_id=team_id,
+        guide_id=guide_id,
+        created_before=created_before,
+        payment_method=payment_method,
+        min_amount=min_amount,
+        notes=notes
+    )
+    if error:
+        raise RuntimeError(error)
+
+    return result
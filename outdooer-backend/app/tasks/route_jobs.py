@@ -0,0 +1,124 @@
+# app/tasks/route_jobs.py
+"""
+Route metrics recalculation
+
+Writing the geometry of an expedition route or of a route in the routes
+table queues a routes.recalculate_metrics job (see RouteService), which
+measures the new geometry and stores the distance, elevation gain and loss
+and estimated duration. Run this module directly to measure every existing
+route, e.g. once to replace values entered by hand, or to time the metrics
+engine.
+
+Usage:
+    python -m app.tasks.route_jobs
+    python -m app.tasks.route_jobs --benchmark --points 2000000
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+
+from app import db
+from app.models.expedition import ExpeditionRoute
+from app.models.route import Route
+from app.services.route_service import RouteService
+from app.tasks.jobs import task
+from app.utils import route_metrics
+
+
+@task('routes.recalculate_metrics')
+def recalculate_metrics(expedition_route_id=None, route_id=None):
+    """
+    Measure one expedition route or route
+
+    Raises on failure so the job is retried.
+    """
+    results = {}
+    if expedition_route_id is not None:
+        metrics, error = RouteService.recalculate_expedition_route(expedition_route_id)
+        if error:
+            raise RuntimeError(error)
+        results['expedition_route'] = metrics
+    if route_id is not None:
+        metrics, error = RouteService.recalculate_route(route_id)
+        if error:
+            raise RuntimeError(error)
+        results['route'] = metrics
+    return results
+
+
+def recalculate_all():
+    """
+    Measure every expedition route and route in the foreground
+
+    Returns:
+        dict: Number of expedition routes and routes measured, and errors
+    """
+    counts = {'expedition_routes': 0, 'routes': 0, 'errors': 0}
+    for kind, column, geometry, recalculate in (
+        ('expedition_routes', ExpeditionRoute.expedition_route_id, ExpeditionRoute.route_points,
+         RouteService.recalculate_expedition_route),
+        ('routes', Route.route_id, Route.geojson, RouteService.recalculate_route),
+    ):
+        for (key,) in db.session.query(column).filter(geometry.isnot(None)).order_by(column).all():
+            _, error = recalculate(key)
+            if error:
+                counts['errors'] += 1
+                print(f"{kind} {key}: {error}")
+            else:
+                counts[kind] += 1
+    return counts
+
+
+def benchmark(point_count, seed=1):
+    """
+    Time the metrics engine on a synthetic track with elevations
+
+    Returns:
+        dict: points, seconds, points_per_second and whether NumPy was used
+    """
+    rng = random.Random(seed)
+    lat, lng, elevation, heading = 46.5, 7.9, 1200.0, 0.0
+    points = []
+    for _ in range(point_count):
+        heading += rng.gauss(0, 0.3)
+        lat += math.cos(heading) * 0.0001
+        lng += math.sin(heading) * 0.0001
+        elevation += rng.gauss(0, 1.5)
+        points.append((lat, lng, elevation))
+    if route_metrics.np is not None:
+        # As the geometry would be held once it is decoded for measuring
+        points = route_metrics.np.asarray(points)
+
+    started = time.perf_counter()
+    route_metrics.route_metrics([points])
+    seconds = time.perf_counter() - started
+    return {
+        'points': point_count,
+        'seconds': round(seconds, 4),
+        'points_per_second': int(point_count / seconds) if seconds else None,
+        'numpy': route_metrics.np is not None
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recalculate route metrics from their geometry')
+    parser.add_argument('--benchmark', action='store_true', help='Time the metrics engine instead')
+    parser.add_argument('--points', type=int, default=1000000, help='Track length for --benchmark')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark(args.points)
+        engine = 'NumPy' if result['numpy'] else 'pure Python (install NumPy to vectorize)'
+        print(f"{result['points']} points in {result['seconds']}s: "
+              f"{result['points_per_second']} points/s with {engine}")
+    else:
+        from app import create_app
+
+        app = create_app(os.getenv('FLASK_ENV', 'development'))
+        with app.app_context():
+            result = recalculate_all()
+            print(f"Measured {result['expedition_routes']} expedition routes and "
+                  f"{result['routes']} routes ({result['errors']} errors)")
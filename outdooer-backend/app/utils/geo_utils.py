@@ -0,0 +1,101 @@
+# app/utils/geo_utils.py
+"""
+Great-circle distance helpers.
+
+Distances use the haversine formula on a spherical Earth (mean radius), which
+is within 0.5% of the ellipsoidal distance, far below the precision a
+"near me" search needs. haversine_many computes the distances from one point
+to many in one call: with NumPy installed it is vectorized, otherwise it
+falls back to a plain loop over precomputed radians.
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the loop fallback gives the same results
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Half the Earth's circumference: no two points are further apart
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+# Below this many points the NumPy call overhead outweighs the vectorization
+VECTORIZE_THRESHOLD = 64
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km between two points given in degrees"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_many_radians(lat, lng, lats, lngs, cos_lats):
+    """
+    Distances in km from one point to many, all given in radians
+
+    Args:
+        lat, lng: The origin
+        lats, lngs: Sequences of latitudes and longitudes
+        cos_lats: Precomputed cosines of lats
+
+    Returns:
+        list: Distances in the order of the points
+    """
+    cos_lat = math.cos(lat)
+
+    if np is not None and len(lats) >= VECTORIZE_THRESHOLD:
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+        a = np.sin((lats - lat) / 2) ** 2 + cos_lat * np.asarray(cos_lats, dtype=float) * np.sin((lngs - lng) / 2) ** 2
+        return (2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))).tolist()
+
+    sin, asin, sqrt = math.sin, math.asin, math.sqrt
+    return [
+        2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(sin((phi - lat) / 2) ** 2 + cos_lat * cos_phi * sin((lam - lng) / 2) ** 2)))
+        for phi, lam, cos_phi in zip(lats, lngs, cos_lats)
+    ]
+
+
+def haversine_many(lat, lng, lats, lngs):
+    """Distances in km from one point to many, all given in degrees"""
+    phis = [math.radians(value) for value in lats]
+    lams = [math.radians(value) for value in lngs]
+    return haversine_many_radians(
+        math.radians(lat), math.radians(lng), phis, lams, [math.cos(phi) for phi in phis]
+    )
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Latitude/longitude box containing every point within radius_km
+
+    Boxes that cross the antimeridian are split, and boxes that reach a pole
+    span every longitude.
+
+    Returns:
+        tuple: (min_lat, max_lat, [(min_lng, max_lng), ...]) in degrees
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    min_lat = lat - math.degrees(angle)
+    max_lat = lat + math.degrees(angle)
+
+    if angle >= math.pi / 2 or min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    # Widest longitude offset of the circle, reached north/south of the center
+    delta = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+    min_lng = lng - delta
+    max_lng = lng + delta
+
+    if max_lng - min_lng >= 360:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+    if min_lng < -180:
+        return min_lat, max_lat, [(min_lng + 360, 180.0), (-180.0, max_lng)]
+    if max_lng > 180:
+        return min_lat, max_lat, [(min_lng, 180.0), (-180.0, max_lng - 360)]
+    return min_lat, max_lat, [(min_lng, max_lng)]
@@ -0,0 +1,72 @@
+# app/utils/intervals.py
+"""
+Static interval index for overlap queries.
+
+Intervals are half-open [start, end) and kept sorted by start, together with
+a running maximum of their ends. An overlap query bisects twice:
+
+- intervals starting at or after the query end cannot overlap
+- the running maximum of ends is non-decreasing, so the first interval that
+  could reach past the query start is found by bisecting it
+
+Only the slice between those two positions is scanned, so a query costs
+O(log n + k) for k candidates. Schedules are mostly non-overlapping, so k
+is close to the number of actual conflicts.
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+class IntervalIndex:
+    """Sorted, immutable collection of [start, end) intervals with payloads"""
+
+    __slots__ = ('_starts', '_ends', '_max_ends', '_payloads')
+
+    def __init__(self, intervals=()):
+        """
+        Args:
+            intervals: Iterable of (start, end, payload) tuples
+        """
+        ordered = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+
+        self._starts = [start for start, _, _ in ordered]
+        self._ends = [end for _, end, _ in ordered]
+        self._payloads = [payload for _, _, payload in ordered]
+
+        self._max_ends = []
+        running = None
+        for end in self._ends:
+            running = end if running is None or end > running else running
+            self._max_ends.append(running)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def overlapping(self, start, end):
+        """
+        Find the intervals overlapping [start, end)
+
+        Returns:
+            list: (start, end, payload) tuples ordered by start
+        """
+        if start >= end or not self._starts:
+            return []
+
+        upper = bisect_left(self._starts, end)
+        lower = bisect_right(self._max_ends, start, 0, upper)
+
+        return [
+            (self._starts[i], self._ends[i], self._payloads[i])
+            for i in range(lower, upper)
+            if self._ends[i] > start
+        ]
+
+    def overlaps(self, start, end):
+        """Check whether any interval overlaps [start, end)"""
+        if start >= end or not self._starts:
+            return False
+
+        upper = bisect_left(self._starts, end)
+        lower = bisect_right(self._max_ends, start, 0, upper)
+
+        return any(self._ends[i] > start for i in range(lower, upper))
@@ -0,0 +1,141 @@
+# app/utils/mail.py
+"""
+Email transports.
+
+A transport sends a whole batch of messages at once, so it can reuse one
+connection for the batch instead of opening one per message. A message the
+server refuses (an unknown recipient, say) is recorded and skipped rather
+than failing the rest of the batch, and the caller is told which messages
+went out, so a connection lost halfway does not resend them on retry. The
+transport is chosen with NOTIFICATION_TRANSPORT:
+
+- 'smtp' sends through MAIL_SERVER, opening one connection per
+  MAIL_MAX_MESSAGES_PER_CONNECTION messages. Point MAIL_SERVER/MAIL_PORT at a
+  local debugging SMTP server to inspect mail in development.
+- 'file' writes each message as an .eml file under NOTIFICATION_FILE_DIR,
+  for development and tests.
+"""
+
+import os
+import smtplib
+from datetime import datetime
+from email.message import EmailMessage
+from flask import current_app
+
+
+def build_message(recipient, subject, body, sender=None):
+    """
+    Build a plain-text email
+
+    Line breaks in the subject, e.g. from a title it was rendered with, are
+    collapsed into spaces.
+
+    Raises:
+        ValueError: If the recipient or sender is not a valid header value
+    """
+    message = EmailMessage()
+    message['From'] = sender or current_app.config.get('MAIL_DEFAULT_SENDER')
+    message['To'] = recipient
+    message['Subject'] = ' '.join(subject.split())
+    message.set_content(body)
+    return message
+
+
+class SMTPTransport:
+    """Send batches over as few SMTP connections as the server allows"""
+
+    def __init__(self, host, port, use_tls=False, username=None, password=None,
+                 max_per_connection=100, timeout=30):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.max_per_connection = max_per_connection
+        self.timeout = timeout
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def send_messages(self, messages, delivered=None, failed=None):
+        """
+        Send every message, reconnecting after max_per_connection messages
+
+        Args:
+            messages: EmailMessage objects
+            delivered: Optional list the indexes of sent messages are appended to
+            failed: Optional dict filled with index -> error for refused messages
+
+        Returns:
+            int: Number of messages sent
+
+        Raises:
+            smtplib.SMTPException, OSError: If the server cannot be reached
+                or drops the connection; the messages already sent are in
+                delivered
+        """
+        delivered = [] if delivered is None else delivered
+        failed = {} if failed is None else failed
+        sent = 0
+        for start in range(0, len(messages), self.max_per_connection):
+            with self._connect() as smtp:
+                for index in range(start, min(start + self.max_per_connection, len(messages))):
+                    try:
+                        smtp.send_message(messages[index])
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                        failed[index] = str(e)
+                        continue
+                    delivered.append(index)
+                    sent += 1
+        return sent
+
+
+class FileTransport:
+    """Write each message to an .eml file instead of sending it"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def send_messages(self, messages, delivered=None, failed=None):
+        """
+        Write every message under the transport's directory
+
+        Takes the same arguments as SMTPTransport.send_messages.
+
+        Returns:
+            int: Number of messages written
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+        for index, message in enumerate(messages):
+            path = os.path.join(self.directory, f'{stamp}-{index:05d}.eml')
+            with open(path, 'wb') as handle:
+                handle.write(message.as_bytes())
+            if delivered is not None:
+                delivered.append(index)
+        return len(messages)
+
+
+def get_transport():
+    """Return the transport configured with NOTIFICATION_TRANSPORT"""
+    config = current_app.config
+    name = config.get('NOTIFICATION_TRANSPORT', 'smtp')
+
+    if name == 'smtp':
+        return SMTPTransport(
+            config.get('MAIL_SERVER'),
+            config.get('MAIL_PORT'),
+            use_tls=config.get('MAIL_USE_TLS', False),
+            username=config.get('MAIL_USERNAME'),
+            password=config.get('MAIL_PASSWORD'),
+            max_per_connection=config.get('MAIL_MAX_MESSAGES_PER_CONNECTION', 100)
+        )
+    if name == 'file':
+        return FileTransport(config.get('NOTIFICATION_FILE_DIR', 'mail_outbox'))
+
+    raise ValueError(f"Unknown notification transport: {name}")
@@ -0,0 +1,75 @@
+# app/utils/pagination.py
+"""
+Keyset (cursor) pagination helpers.
+
+Cursors are opaque, URL-safe tokens that encode the sort key of the last row
+of a page, so the next page can be fetched with an indexed range condition
+instead of an OFFSET that gets slower the deeper a client pages.
+"""
+
+import base64
+import json
+from datetime import datetime
+from flask import current_app
+
+
+def get_page_size(requested=None):
+    """
+    Clamp a requested page size to the configured bounds
+
+    Args:
+        requested: Page size requested by the client (may be None)
+
+    Returns:
+        int: DEFAULT_PAGE_SIZE when nothing valid was requested, otherwise
+             the requested size capped at MAX_PAGE_SIZE
+    """
+    default_size = current_app.config.get('DEFAULT_PAGE_SIZE', 20)
+    max_size = current_app.config.get('MAX_PAGE_SIZE', 100)
+
+    if not requested or requested < 1:
+        return default_size
+
+    return min(requested, max_size)
+
+
+def encode_cursor(created_at, record_id):
+    """
+    Encode a (created_at, id) sort key into an opaque cursor string
+
+    Args:
+        created_at: Timestamp of the last row in the page
+        record_id: Primary key of the last row in the page
+
+    Returns:
+        str: URL-safe cursor token
+    """
+    payload = json.dumps({
+        'c': created_at.isoformat() if created_at else None,
+        'i': record_id
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor token received from the client
+
+    Returns:
+        tuple: (created_at, record_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        created_at = datetime.fromisoformat(payload['c']) if payload.get('c') else None
+        record_id = int(payload['i'])
+    except (AttributeError, TypeError, KeyError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+
+    return created_at, record_id
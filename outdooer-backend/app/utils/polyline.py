@@ -0,0 +1,73 @@
+# app/utils/polyline.py
+"""
+Encoded polyline format (Google's polyline algorithm).
+
+Coordinates are rounded to `precision` decimals, each one is replaced by its
+difference from the previous point, and the differences are written as
+variable-length groups of 5 bits in printable ASCII. Consecutive GPS fixes
+differ little, so most coordinates take 2 to 4 characters instead of the 10
+or more of a JSON number. Precision 5 (about 1 m) is what map clients read by
+default (OpenLayers' Polyline format, Google Maps); precision 6 keeps GPS
+tracks at full resolution.
+"""
+
+
+def encode_polyline(points, precision=5):
+    """
+    Encode (lat, lng) pairs
+
+    Returns:
+        str: The encoded polyline
+    """
+    factor = 10 ** precision
+    out = []
+    previous_lat = previous_lng = 0
+
+    for lat, lng in points:
+        lat = int(round(lat * factor))
+        lng = int(round(lng * factor))
+        for delta in (lat - previous_lat, lng - previous_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        previous_lat, previous_lng = lat, lng
+
+    return ''.join(out)
+
+
+def decode_polyline(encoded, precision=5):
+    """
+    Decode an encoded polyline
+
+    Returns:
+        list: [lat, lng] pairs
+
+    Raises:
+        ValueError: If the text is not a valid encoded polyline
+    """
+    factor = 10 ** precision
+    points = []
+    coordinates = [0, 0]
+    index = 0
+    length = len(encoded)
+
+    while index < length:
+        for axis in (0, 1):
+            result = shift = 0
+            while True:
+                if index >= length:
+                    raise ValueError('Truncated encoded polyline')
+                byte = ord(encoded[index]) - 63
+                index += 1
+                if not 0 <= byte < 64:
+                    raise ValueError('Invalid character in encoded polyline')
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            coordinates[axis] += ~(result >> 1) if result & 1 else result >> 1
+        points.append([coordinates[0] / factor, coordinates[1] / factor])
+
+    return points
@@ -0,0 +1,147 @@
+# app/utils/recurrence.py
+"""
+Recurrence rule expansion for activity schedules.
+
+Supports the subset of RFC 5545 RRULE that guides need to load a season:
+DAILY or WEEKLY frequency, INTERVAL, BYDAY (weekly only), and UNTIL or
+COUNT, plus a list of excluded dates. Rules can be given as an RRULE
+string ("FREQ=WEEKLY;BYDAY=TU,TH;UNTIL=20250831") or as a dict with the
+same fields in lower case.
+"""
+
+import itertools
+from datetime import date, timedelta
+
+WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+FREQUENCIES = ('DAILY', 'WEEKLY')
+
+
+def _parse_date(value):
+    """Parse YYYY-MM-DD or the RRULE YYYYMMDD form"""
+    if isinstance(value, date):
+        return value
+    value = str(value).strip()
+    if len(value) == 8 and value.isdigit():
+        value = f'{value[:4]}-{value[4:6]}-{value[6:]}'
+    return date.fromisoformat(value[:10])
+
+
+def parse_rrule(rule):
+    """
+    Parse an RRULE string into a recurrence dict
+
+    Args:
+        rule: e.g. "FREQ=WEEKLY;INTERVAL=1;BYDAY=TU,TH;UNTIL=20250831"
+
+    Returns:
+        dict: {'freq', 'interval', 'by_weekday', 'until', 'count'}
+
+    Raises:
+        ValueError: If the rule is malformed or uses unsupported parts
+    """
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[6:]
+
+    parts = {}
+    for part in filter(None, rule.split(';')):
+        if '=' not in part:
+            raise ValueError(f"Invalid RRULE part: {part}")
+        key, value = part.split('=', 1)
+        parts[key.strip().upper()] = value.strip()
+
+    unsupported = set(parts) - {'FREQ', 'INTERVAL', 'BYDAY', 'UNTIL', 'COUNT'}
+    if unsupported:
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(unsupported))}")
+
+    return {
+        'freq': parts.get('FREQ'),
+        'interval': parts.get('INTERVAL', 1),
+        'by_weekday': parts['BYDAY'].split(',') if parts.get('BYDAY') else None,
+        'until': parts.get('UNTIL'),
+        'count': parts.get('COUNT')
+    }
+
+
+def expand_recurrence(start_date, recurrence, exceptions=None, max_occurrences=500):
+    """
+    Expand a recurrence into concrete dates
+
+    Args:
+        start_date: First date of the series (YYYY-MM-DD or date)
+        recurrence: RRULE string or dict with freq, interval, by_weekday,
+                    until and count
+        exceptions: Dates to skip (they still count towards COUNT, as in RFC 5545)
+        max_occurrences: Upper bound on the number of generated dates
+
+    Returns:
+        list: Sorted dates of the series
+
+    Raises:
+        ValueError: If the rule is invalid or expands past max_occurrences
+    """
+    if isinstance(recurrence, str):
+        recurrence = parse_rrule(recurrence)
+    if not isinstance(recurrence, dict):
+        raise ValueError("Recurrence must be an RRULE string or an object")
+
+    start = _parse_date(start_date)
+
+    freq = str(recurrence.get('freq') or '').upper()
+    if freq not in FREQUENCIES:
+        raise ValueError(f"freq must be one of {', '.join(FREQUENCIES)}")
+
+    interval = int(recurrence.get('interval') or 1)
+    if interval < 1:
+        raise ValueError("interval must be at least 1")
+
+    until = _parse_date(recurrence['until']) if recurrence.get('until') else None
+    count = int(recurrence['count']) if recurrence.get('count') else None
+    if until is None and count is None:
+        raise ValueError("Either until or count is required")
+    if until is not None and until < start:
+        raise ValueError("until must not be before the start date")
+    if count is not None and count < 1:
+        raise ValueError("count must be at least 1")
+
+    by_weekday = recurrence.get('by_weekday')
+    if by_weekday:
+        if freq != 'WEEKLY':
+            raise ValueError("by_weekday is only supported for weekly rules")
+        try:
+            weekdays = sorted({WEEKDAYS[day.strip().upper()] for day in by_weekday})
+        except (KeyError, AttributeError):
+            raise ValueError(f"by_weekday values must be among {', '.join(WEEKDAYS)}")
+    else:
+        weekdays = [start.weekday()]
+
+    excluded = {_parse_date(value) for value in (exceptions or [])}
+
+    occurrences = []
+    generated = 0
+
+    if freq == 'DAILY':
+        candidates = (start + timedelta(days=offset * interval) for offset in itertools.count())
+    else:
+        week_start = start - timedelta(days=start.weekday())
+        candidates = (
+            week_start + timedelta(weeks=week * interval, days=weekday)
+            for week in itertools.count()
+            for weekday in weekdays
+        )
+
+    for candidate in candidates:
+        if candidate < start:
+            continue
+        if until is not None and candidate > until:
+            break
+        if count is not None and generated >= count:
+            break
+
+        generated += 1
+        if candidate not in excluded:
+            occurrences.append(candidate)
+            if len(occurrences) > max_occurrences:
+                raise ValueError(f"Recurrence expands to more than {max_occurrences} dates")
+
+    return occurrences
+
@@ -1,11 +1,82 @@
 # app/utils/security.py
+"""
+Password hashing.
+
+The hash method and cost come from PASSWORD_HASH_METHOD (any method string
+accepted by werkzeug, e.g. 'pbkdf2:sha256:260000'), so each environment can
+pick its own cost. Verification runs on a bounded thread pool of
+PASSWORD_HASH_WORKERS threads: hashlib releases the GIL while hashing, so the
+pool uses real cores while capping how much CPU a burst of logins can take
+from other requests.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from flask import current_app, has_app_context
 from werkzeug.security import generate_password_hash as werkzeug_generator
-from werkzeug.security import check_password_hash
+from werkzeug.security import check_password_hash as werkzeug_checker
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+
+DEFAULT_HASH_METHOD = f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'
+
+_pool_lock = threading.Lock()
+
+
+def get_hash_method():
+    """Return the configured hash method with its cost made explicit"""
+    method = DEFAULT_HASH_METHOD
+    if has_app_context():
+        method = current_app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_HASH_METHOD
+
+    # werkzeug stores the iteration count in the hash; compare like with like
+    if method.startswith('pbkdf2:') and method.count(':') == 1:
+        method = f'{method}:{DEFAULT_PBKDF2_ITERATIONS}'
+
+    return method
+
+
+def _get_pool():
+    """Return the verification pool of the current application"""
+    pool = current_app.extensions.get('password_hash_pool')
+    if pool is None:
+        with _pool_lock:
+            pool = current_app.extensions.get('password_hash_pool')
+            if pool is None:
+                pool = ThreadPoolExecutor(
+                    max_workers=current_app.config.get('PASSWORD_HASH_WORKERS', 2),
+                    thread_name_prefix='password-hash'
+                )
+                current_app.extensions['password_hash_pool'] = pool
+    return pool
+
 
 def generate_password_hash(password):
     """Generate a secure hash of the password"""
-    return werkzeug_generator(password)
+    return werkzeug_generator(password, method=get_hash_method())
+
+
+def check_password_hash(password_hash, password):
+    """
+    Verify a password against a hash on the bounded verification pool
+
+    Falls back to verifying inline outside an application context (scripts).
+    """
+    if not password_hash:
+        return False
+
+    if not has_app_context():
+        return werkzeug_checker(password_hash, password)
+
+    return _get_pool().submit(werkzeug_checker, password_hash, password).result()
+
 
 def verify_password(password_hash, password):
     """Verify that the password matches the hash"""
-    return check_password_hash(password_hash, password)
\ No newline at end of file
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """Check whether a stored hash was made with a different method or cost"""
+    if not password_hash or '$' not in password_hash:
+        return True
+    return password_hash.split('$', 1)[0] != get_hash_method()
@@ -0,0 +1,116 @@
+# app/utils/simplify.py
+"""
+Douglas-Peucker line simplification at every tolerance at once.
+
+Douglas-Peucker keeps the point furthest from the segment joining the ends of
+a line when it is further than the tolerance, then recurses on both halves.
+Running it once with no tolerance and recording, for every point, the
+distance that made it split its segment (capped by the distance of the
+point that created that segment) gives each point a rank: the line
+simplified at tolerance t is exactly the points ranked above t. Any number
+of levels of detail then cost one filtering pass each instead of a new
+simplification.
+
+Distances are measured in meters on an equirectangular projection centered
+on the line, accurate to well under a percent over the extent of a route.
+With NumPy installed, the furthest point of long segments is found with one
+vectorized pass.
+"""
+
+import math
+from app.utils.geo_utils import EARTH_RADIUS_KM, VECTORIZE_THRESHOLD
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the loop fallback gives the same results
+    np = None
+
+
+def _project(points):
+    """Planar (x, y) coordinates in meters of (lat, lng) points"""
+    radius = EARTH_RADIUS_KM * 1000
+    mid_lat = math.radians((min(lat for lat, _ in points) + max(lat for lat, _ in points)) / 2)
+    scale_x = radius * math.cos(mid_lat) * math.pi / 180
+    scale_y = radius * math.pi / 180
+    return [lng * scale_x for _, lng in points], [lat * scale_y for lat, _ in points]
+
+
+def _furthest(xs, ys, first, last):
+    """(index, distance) of the point between first and last furthest from their segment"""
+    ax, ay = xs[first], ys[first]
+    dx, dy = xs[last] - ax, ys[last] - ay
+    length_sq = dx * dx + dy * dy
+
+    if np is not None and last - first > VECTORIZE_THRESHOLD:
+        px = xs[first + 1:last] - ax
+        py = ys[first + 1:last] - ay
+        if length_sq > 0:
+            t = np.clip((px * dx + py * dy) / length_sq, 0.0, 1.0)
+            px = px - t * dx
+            py = py - t * dy
+        distances = np.hypot(px, py)
+        offset = int(np.argmax(distances))
+        return first + 1 + offset, float(distances[offset])
+
+    best, best_distance = first + 1, -1.0
+    for index in range(first + 1, last):
+        px, py = xs[index] - ax, ys[index] - ay
+        if length_sq > 0:
+            t = min(1.0, max(0.0, (px * dx + py * dy) / length_sq))
+            px -= t * dx
+            py -= t * dy
+        distance = math.hypot(px, py)
+        if distance > best_distance:
+            best, best_distance = index, distance
+    return best, best_distance
+
+
+def simplification_ranks(points):
+    """
+    Rank every point of a line by the largest tolerance that keeps it
+
+    Args:
+        points: Sequence of (lat, lng) pairs in degrees
+
+    Returns:
+        list: Tolerance in meters per point; the two ends rank infinite
+    """
+    count = len(points)
+    ranks = [math.inf] * count
+    if count <= 2:
+        return ranks
+
+    xs, ys = _project(points)
+    if np is not None and count > VECTORIZE_THRESHOLD:
+        xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+
+    # Iterative, so tracks of any length stay clear of the recursion limit
+    stack = [(0, count - 1, math.inf)]
+    while stack:
+        first, last, parent = stack.pop()
+        if last - first < 2:
+            continue
+        index, distance = _furthest(xs, ys, first, last)
+        rank = min(distance, parent)
+        ranks[index] = rank
+        stack.append((first, index, rank))
+        stack.append((index, last, rank))
+
+    return ranks
+
+
+def simplify(points, tolerance, ranks=None):
+    """
+    Douglas-Peucker simplification of a line
+
+    Args:
+        points: Sequence of (lat, lng) pairs in degrees
+        tolerance: Maximum distance in meters between the line and its simplification
+        ranks: simplification_ranks(points), when already computed
+
+    Returns:
+        list: The kept points, in order
+    """
+    if ranks is None:
+        ranks = simplification_ranks(points)
+    return [point for point, rank in zip(points, ranks) if rank > tolerance]
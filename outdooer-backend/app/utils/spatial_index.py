@@ -0,0 +1,157 @@
+# app/utils/spatial_index.py
+"""
+Geographic grid index for radius, box and nearest-neighbour queries.
+
+Points are bucketed into cells of cell_deg x cell_deg degrees. A radius
+query turns its circle into a latitude/longitude bounding box (split at the
+antimeridian), collects the points of the cells overlapping the box and
+computes their exact distances in one haversine_many call, so only a few
+cells' worth of points are measured however large the index is. A
+k-nearest query doubles its radius until it holds k points.
+
+Points can be inserted, moved and removed one at a time, so the index is
+kept current without rebuilding it. The index is not thread-safe; callers
+sharing one serialize access.
+"""
+
+import math
+from app.utils.geo_utils import MAX_DISTANCE_KM, bounding_box, haversine_many_radians
+
+
+class GridIndex:
+    """Mutable mapping of keys to (lat, lng) points, queryable by distance"""
+
+    __slots__ = ('cell_deg', '_rows', '_cols', '_cells', '_points')
+
+    def __init__(self, points=(), cell_deg=0.5):
+        """
+        Args:
+            points: Iterable of (key, lat, lng) tuples in degrees
+            cell_deg: Cell size in degrees
+        """
+        self.cell_deg = cell_deg
+        self._rows = int(math.ceil(180 / cell_deg))
+        self._cols = int(math.ceil(360 / cell_deg))
+        self._cells = {}   # (row, col) -> {key: (lat_rad, lng_rad, cos_lat)}
+        self._points = {}  # key -> (row, col)
+
+        for key, lat, lng in points:
+            self.insert(key, lat, lng)
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def _row(self, lat):
+        return min(self._rows - 1, max(0, int((lat + 90) // self.cell_deg)))
+
+    def _col(self, lng):
+        return min(self._cols - 1, max(0, int((lng + 180) // self.cell_deg)))
+
+    def insert(self, key, lat, lng):
+        """Add a point, or move it if the key is already indexed"""
+        self.remove(key)
+        cell = (self._row(lat), self._col(lng))
+        phi = math.radians(lat)
+        self._cells.setdefault(cell, {})[key] = (phi, math.radians(lng), math.cos(phi))
+        self._points[key] = cell
+
+    def remove(self, key):
+        """Remove a point; unknown keys are ignored"""
+        cell = self._points.pop(key, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self._cells[cell]
+
+    def _candidate_cells(self, min_lat, max_lat, lng_ranges):
+        """Occupied cells overlapping a bounding box"""
+        first_row, last_row = self._row(min_lat), self._row(max_lat)
+        col_ranges = [(self._col(lo), self._col(hi)) for lo, hi in lng_ranges]
+        box_cells = (last_row - first_row + 1) * sum(hi - lo + 1 for lo, hi in col_ranges)
+
+        # Large boxes over a sparse index: filter the occupied cells instead
+        if box_cells > len(self._cells):
+            return [
+                bucket for (row, col), bucket in self._cells.items()
+                if first_row <= row <= last_row and any(lo <= col <= hi for lo, hi in col_ranges)
+            ]
+
+        cells = self._cells
+        return [
+            cells[(row, col)]
+            for row in range(first_row, last_row + 1)
+            for lo, hi in col_ranges
+            for col in range(lo, hi + 1)
+            if (row, col) in cells
+        ]
+
+    def within(self, lat, lng, radius_km, limit=None):
+        """
+        Find the points within radius_km of (lat, lng), nearest first
+
+        Returns:
+            list: (distance_km, key) tuples
+        """
+        if not self._points:
+            return []
+
+        keys, lats, lngs, cos_lats = [], [], [], []
+        for bucket in self._candidate_cells(*bounding_box(lat, lng, radius_km)):
+            for key, (phi, lam, cos_phi) in bucket.items():
+                keys.append(key)
+                lats.append(phi)
+                lngs.append(lam)
+                cos_lats.append(cos_phi)
+
+        if not keys:
+            return []
+
+        distances = haversine_many_radians(math.radians(lat), math.radians(lng), lats, lngs, cos_lats)
+        hits = sorted(
+            (distance, key) for distance, key in zip(distances, keys) if distance <= radius_km
+        )
+        return hits[:limit] if limit is not None else hits
+
+    def within_box(self, min_lat, max_lat, min_lng, max_lng):
+        """
+        Find the points inside a latitude/longitude box that does not cross
+        the antimeridian, edges included
+
+        Returns:
+            list: (key, lat, lng) tuples in degrees, in no particular order
+        """
+        south, north = math.radians(min_lat), math.radians(max_lat)
+        west, east = math.radians(min_lng), math.radians(max_lng)
+        degrees = math.degrees
+        return [
+            (key, degrees(phi), degrees(lam))
+            for bucket in self._candidate_cells(min_lat, max_lat, [(min_lng, max_lng)])
+            for key, (phi, lam, _) in bucket.items()
+            if south <= phi <= north and west <= lam <= east
+        ]
+
+    def nearest(self, lat, lng, k, start_km=None):
+        """
+        Find the k points nearest to (lat, lng), nearest first
+
+        The search radius starts at about one cell and doubles until it
+        holds k points; every point inside the final radius is measured, so
+        the result is exact.
+
+        Returns:
+            list: Up to k (distance_km, key) tuples
+        """
+        if k < 1 or not self._points:
+            return []
+
+        radius = start_km or self.cell_deg * 111.2
+        while True:
+            hits = self.within(lat, lng, radius, limit=k)
+            if len(hits) >= k or radius >= MAX_DISTANCE_KM:
+                return hits
+            radius = min(radius * 2, MAX_DISTANCE_KM)
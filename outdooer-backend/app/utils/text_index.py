@@ -0,0 +1,333 @@
+# app/utils/text_index.py
+"""
+Word-prefix index for autocomplete.
+
+Texts are normalized (case-folded, accents removed, punctuation collapsed
+to spaces) and split into words. Every distinct word is kept in one sorted
+list, which acts as a flattened prefix trie: the words starting with a
+prefix are a contiguous slice found with one bisect. Each word maps to the
+set of documents containing it.
+
+A query matches a document when every query word is a prefix of one of the
+document's words. Matches are ranked by how well the query fits the best
+single field of the document (the whole field, the start of the field, a
+run of words inside it, or scattered words), weighted per field, plus a
+per-document boost.
+
+Most keystrokes are a single word. For those, each word also keeps its
+documents sorted by the rank the word earns them, once for queries that are
+a prefix of the word and once for the whole word, so a one-word query merges
+the sorted lists of its matching words lazily and stops after `limit`
+distinct documents, without scoring any field.
+
+A multi-word query scores its candidates field by field. When one of its
+words matches at most DIRECT_LIMIT documents, those are the candidates.
+When every word is common, documents are read in the sorted order of the
+first word instead: no document scores more than its first word's rank
+(whole-field matches aside, which are looked up directly), so the scan
+stops as soon as `limit` scored documents beat the next rank. A scan that
+reads more than SCAN_LIMIT documents without stopping falls back to scoring
+the documents of the rarest word.
+
+Results of queries that reach more than CACHE_MIN_CANDIDATES candidates or
+matching words (mostly single letters) are memoized until the next write,
+so the keystrokes that match most of the index are only ranked once.
+"""
+
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+# Match quality of the query against a single field
+EXACT = 1.0
+FIELD_PREFIX = 0.8
+PHRASE = 0.6
+WORDS = 0.4
+# Query words spread over several fields
+SCATTERED = 0.2
+
+CACHE_MIN_CANDIDATES = 500
+DIRECT_LIMIT = 500
+SCAN_LIMIT = 5000
+
+
+def normalize_text(text):
+    """Case-fold, strip accents and collapse everything but letters and digits to single spaces"""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _SEPARATORS.sub(' ', stripped).strip()
+
+
+class PrefixIndex:
+    """Mutable autocomplete index of documents made of weighted text fields"""
+
+    __slots__ = ('_words', '_postings', '_ranked', '_fields', '_documents', '_max_boost', '_cache')
+
+    def __init__(self, documents=()):
+        """
+        Args:
+            documents: Iterable of (key, fields, boost) with distinct keys,
+                       where fields is a list of (text, weight) tuples
+        """
+        self._words = []      # Sorted distinct words
+        self._postings = {}   # word -> {key: (entry as a prefix, entry as the whole query)}
+        self._ranked = {}     # word -> (sorted entries as a prefix, sorted entries as the whole query)
+        self._fields = {}     # normalized field -> keys, for whole-field matches
+        self._documents = {}  # key -> ([(normalized, padded, original, weight)], boost, words)
+        self._max_boost = 0.0 # Largest boost ever indexed
+        self._cache = {}      # (phrase, limit) -> results of broad queries
+
+        # Bulk load: append to the rank lists and sort each once at the end
+        for key, fields, boost in documents:
+            self._insert(key, fields, boost, list.append)
+        for ranked in self._ranked.values():
+            for entries in ranked:
+                entries.sort()
+        self._words.sort()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, key):
+        return key in self._documents
+
+    def add(self, key, fields, boost=0.0):
+        """Index a document, replacing any previous version of it"""
+        self.remove(key)
+        self._cache.clear()
+        self._insert(key, fields, boost, insort)
+
+    def _insert(self, key, fields, boost, place):
+        """Index a new document, putting its entries in the rank lists with place(list, entry)"""
+        normalized = []
+        for text, weight in fields:
+            if text:
+                folded = normalize_text(text)
+                if folded:
+                    # Padded so a phrase at a word start is a plain substring test
+                    normalized.append((folded, ' ' + folded, text, weight))
+
+        # Best entry of each word, as a prefix and as the whole query. Entries
+        # sort best first: (-score, matched text length, key, matched text)
+        entries = {}
+        for folded, _, original, weight in normalized:
+            for index, word in enumerate(folded.split()):
+                as_prefix = (-((FIELD_PREFIX if index == 0 else PHRASE) * weight + boost), len(original), key, original)
+                as_whole = (-(EXACT * weight + boost), len(original), key, original) if folded == word else as_prefix
+                current = entries.get(word)
+                if current is not None:
+                    as_prefix, as_whole = min(current[0], as_prefix), min(current[1], as_whole)
+                entries[word] = (as_prefix, as_whole)
+
+        self._documents[key] = (normalized, boost, set(entries))
+        self._max_boost = max(self._max_boost, boost)
+        for folded, *_ in normalized:
+            self._fields.setdefault(folded, set()).add(key)
+
+        for word, entry in entries.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                self._ranked[word] = ([], [])
+                place(self._words, word)
+            postings[key] = entry
+            as_prefix, as_whole = self._ranked[word]
+            place(as_prefix, entry[0])
+            place(as_whole, entry[1])
+
+    def remove(self, key):
+        """Remove a document; unknown keys are ignored"""
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        self._cache.clear()
+
+        for folded, *_ in document[0]:
+            keys = self._fields[folded]
+            keys.discard(key)
+            if not keys:
+                del self._fields[folded]
+
+        for word in document[2]:
+            postings = self._postings[word]
+            entry = postings.pop(key)
+            if not postings:
+                del self._postings[word]
+                del self._ranked[word]
+                del self._words[bisect_left(self._words, word)]
+                continue
+            for ranked, item in zip(self._ranked[word], entry):
+                del ranked[bisect_left(ranked, item)]
+
+    def _prefixed_words(self, prefix):
+        """Indexed words starting with prefix"""
+        words = self._words
+        for position in range(bisect_left(words, prefix), len(words)):
+            word = words[position]
+            if not word.startswith(prefix):
+                break
+            yield word
+
+    def _rank_word(self, prefix, limit):
+        """Best entries for a one-word query, merged from the sorted postings"""
+        streams = [
+            self._ranked[word][1 if word == prefix else 0]
+            for word in self._prefixed_words(prefix)
+        ]
+        seen = set()
+        ranked = []
+        for entry in heapq.merge(*streams):
+            # A document's first entry in the merge is its best one
+            if entry[2] not in seen:
+                seen.add(entry[2])
+                ranked.append(entry)
+                if len(ranked) == limit:
+                    break
+        return ranked, len(streams)
+
+    def _count(self, matches, cap=None):
+        """Number of postings of some words, counted up to just past cap"""
+        total = 0
+        for word in matches:
+            total += len(self._postings[word])
+            if cap is not None and total > cap:
+                break
+        return total
+
+    def _rank_phrase(self, words, phrase, limit):
+        """
+        Best entries for a multi-word query
+
+        Returns:
+            tuple: (entries, number of candidates read)
+        """
+        matching = {word: list(self._prefixed_words(word)) for word in set(words)}
+        if not all(matching.values()):
+            return [], 0
+
+        sizes = {word: self._count(matches, DIRECT_LIMIT) for word, matches in matching.items()}
+        rarest = min(sizes, key=sizes.get)
+        if sizes[rarest] > DIRECT_LIMIT:
+            found = self._scan(words, phrase, limit, matching[words[0]])
+            if found is not None:
+                return found
+            sizes = {word: self._count(matches) for word, matches in matching.items()}
+            rarest = min(sizes, key=sizes.get)
+
+        documents = self._documents
+        others = [word for word in matching if word != rarest]
+        candidates = [
+            key for key in set().union(*(self._postings[match] for match in matching[rarest]))
+            if all(any(word.startswith(prefix) for word in documents[key][2]) for prefix in others)
+        ]
+        score = self._score
+        ranked = heapq.nsmallest(limit, (
+            (-total, len(matched), key, matched)
+            for key in candidates
+            for total, matched in (score(key, words, phrase),)
+        ))
+        return ranked, sizes[rarest]
+
+    def _scan(self, words, phrase, limit, first_words):
+        """
+        Read documents best first by the rank of the query's first word
+
+        Returns:
+            tuple: (entries, documents read), or None past SCAN_LIMIT documents
+        """
+        documents = self._documents
+        score = self._score
+        found = []  # Entries of the matching documents
+        top = []    # Min-heap of the `limit` best scores so far
+
+        def keep(key):
+            total, matched = score(key, words, phrase)
+            found.append((-total, len(matched), key, matched))
+            if len(top) < limit:
+                heapq.heappush(top, total)
+            else:
+                heapq.heappushpop(top, total)
+
+        seen = set(self._fields.get(phrase, ()))
+        for key in seen:
+            keep(key)
+
+        # Documents matching no field as a whole still score SCATTERED
+        floor = SCATTERED + self._max_boost
+        rest = words[1:]
+        read = 0
+        for entry in heapq.merge(*(self._ranked[word][0] for word in first_words)):
+            if len(top) == limit and top[0] > max(-entry[0], floor):
+                break
+            key = entry[2]
+            if key in seen:
+                continue
+            seen.add(key)
+            read += 1
+            if read > SCAN_LIMIT:
+                return None
+            document_words = documents[key][2]
+            if all(any(word.startswith(prefix) for word in document_words) for prefix in rest):
+                keep(key)
+
+        return heapq.nsmallest(limit, found), read
+
+    def _score(self, key, words, phrase):
+        """Return (score, matched original text) of a candidate document"""
+        fields, boost, _ = self._documents[key]
+        padded_phrase = ' ' + phrase
+        best, matched = 0.0, None
+
+        for folded, padded, original, weight in fields:
+            if folded == phrase:
+                quality = EXACT
+            elif folded.startswith(phrase):
+                quality = FIELD_PREFIX
+            elif padded_phrase in padded:
+                quality = PHRASE
+            else:
+                field_words = folded.split()
+                if all(any(field_word.startswith(word) for field_word in field_words) for word in words):
+                    quality = WORDS
+                else:
+                    continue
+
+            score = quality * weight
+            if matched is None or score > best or (score == best and len(original) < len(matched)):
+                best, matched = score, original
+
+        if matched is None:
+            best, matched = SCATTERED, fields[0][2]
+
+        return best + boost, matched
+
+    def search(self, query, limit=10):
+        """
+        Find the best documents for a query
+
+        Returns:
+            list: (score, key, matched text) tuples, best first; ties prefer
+                  shorter matched texts, then smaller keys
+        """
+        words = normalize_text(query).split()
+        if not words or limit < 1:
+            return []
+
+        phrase = ' '.join(words)
+        cached = self._cache.get((phrase, limit))
+        if cached is not None:
+            return list(cached)
+
+        if len(words) == 1:
+            ranked, breadth = self._rank_word(phrase, limit)
+        else:
+            ranked, breadth = self._rank_phrase(words, phrase, limit)
+
+        results = [(-negative, key, matched) for negative, _, key, matched in ranked]
+
+        if breadth > CACHE_MIN_CANDIDATES:
+            self._cache[(phrase, limit)] = results
+        return list(results)
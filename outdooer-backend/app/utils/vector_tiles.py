@@ -0,0 +1,188 @@
+# app/utils/vector_tiles.py
+"""
+Web Mercator tile math and Mapbox Vector Tile (MVT 2.1) encoding.
+
+Tiles follow the XYZ scheme used by OpenLayers and most web maps: tile
+(0, 0) of every zoom level is the north-west corner and each level splits
+every tile in four. Inside a tile, features are placed on an integer grid of
+`extent` units per side with y growing downwards.
+
+Only point features are needed, so the encoder writes the protobuf wire
+format directly instead of depending on a protobuf or MVT library: a tile is
+a list of layers, each with its features, the table of property keys and the
+table of property values the features' tags point into.
+"""
+
+import math
+import struct
+
+# Latitudes beyond this are outside the square Web Mercator world
+MAX_LATITUDE = 85.0511287798066
+
+DEFAULT_EXTENT = 4096
+
+# Ground size of one pixel of a 256-pixel tile at zoom 0 on the equator
+METERS_PER_PIXEL_ZOOM_0 = 156543.03392804097
+
+# Geometry command of a single MoveTo: command id 1, count 1
+_MOVE_TO_ONE = (1 & 0x7) | (1 << 3)
+_POINT = 1
+
+
+def tile_bounds(z, x, y):
+    """
+    Latitude/longitude box of a tile
+
+    Returns:
+        tuple: (min_lat, max_lat, min_lng, max_lng) in degrees
+    """
+    n = 2 ** z
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return latitude(y + 1), latitude(y), x / n * 360 - 180, (x + 1) / n * 360 - 180
+
+
+def meters_per_pixel(z, lat=0.0):
+    """Ground resolution of a 256-pixel tile map at zoom z and a latitude"""
+    return METERS_PER_PIXEL_ZOOM_0 * math.cos(math.radians(lat)) / 2 ** z
+
+
+def tile_for(lat, lng, z):
+    """Return the (x, y) of the tile containing a point at zoom z"""
+    n = 2 ** z
+    project = tile_projector(0, 0, 0, n)
+    px, py = project(lat, lng)
+    return min(px, n - 1), min(py, n - 1)
+
+
+def tile_projector(z, x, y, extent=DEFAULT_EXTENT):
+    """
+    Return a function mapping (lat, lng) in degrees to tile units
+
+    Points outside the tile map outside [0, extent).
+    """
+    scale = 2 ** z * extent
+    left = x * extent
+    top = y * extent
+
+    def project(lat, lng):
+        phi = math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, lat)))
+        world_x = (lng + 180) / 360
+        world_y = (1 - math.log(math.tan(phi) + 1 / math.cos(phi)) / math.pi) / 2
+        return int(world_x * scale - left), int(world_y * scale - top)
+
+    return project
+
+
+def _varint(value, out):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number, payload, out):
+    """Append a length-delimited field"""
+    _varint((number << 3) | 2, out)
+    _varint(len(payload), out)
+    out += payload
+
+
+def _packed(number, values, out):
+    """Append a packed repeated varint field"""
+    payload = bytearray()
+    for value in values:
+        _varint(value, payload)
+    _field(number, payload, out)
+
+
+def _value(value):
+    """Encode a property value as a Tile.Value message"""
+    out = bytearray()
+    if isinstance(value, bool):
+        out.append((7 << 3) | 0)
+        out.append(1 if value else 0)
+    elif isinstance(value, int):
+        if value >= 0:
+            out.append((5 << 3) | 0)
+            _varint(value, out)
+        else:
+            out.append((6 << 3) | 0)
+            _varint(_zigzag(value), out)
+    elif isinstance(value, float):
+        out.append((3 << 3) | 1)
+        out += struct.pack('<d', value)
+    else:
+        _field(1, str(value).encode('utf-8'), out)
+    return bytes(out)
+
+
+def encode_layer(name, features, extent=DEFAULT_EXTENT):
+    """
+    Encode one layer of point features
+
+    Args:
+        name: Layer name
+        features: Iterable of (id or None, (x, y) in tile units, properties dict);
+                  properties whose value is None are left out
+
+    Returns:
+        bytes: The Tile.Layer message
+    """
+    keys, key_index = [], {}
+    values, value_index = [], {}
+    encoded_features = bytearray()
+
+    for feature_id, (px, py), properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            if key not in key_index:
+                key_index[key] = len(keys)
+                keys.append(key)
+            # Keyed by type too, so True and 1 get separate values
+            marker = (type(value), value)
+            if marker not in value_index:
+                value_index[marker] = len(values)
+                values.append(_value(value))
+            tags += (key_index[key], value_index[marker])
+
+        feature = bytearray()
+        if feature_id is not None:
+            feature.append((1 << 3) | 0)
+            _varint(feature_id, feature)
+        if tags:
+            _packed(2, tags, feature)
+        feature.append((3 << 3) | 0)
+        feature.append(_POINT)
+        _packed(4, (_MOVE_TO_ONE, _zigzag(px), _zigzag(py)), feature)
+        _field(2, feature, encoded_features)
+
+    layer = bytearray()
+    layer.append((15 << 3) | 0)
+    layer.append(2)
+    _field(1, name.encode('utf-8'), layer)
+    layer += encoded_features
+    for key in keys:
+        _field(3, key.encode('utf-8'), layer)
+    for value in values:
+        _field(4, value, layer)
+    layer.append((5 << 3) | 0)
+    _varint(extent, layer)
+    return bytes(layer)
+
+
+def encode_tile(layers):
+    """Encode Tile.Layer messages into a tile, skipping None"""
+    out = bytearray()
+    for layer in layers:
+        if layer is not None:
+            _field(3, layer, out)
+    return bytes(out)
@@ -50,6 +50,47 @@ class Config:
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
     
+    # Availability Calendar Settings
+    CALENDAR_DEFAULT_DAYS = 31
+    CALENDAR_MAX_DAYS = 366
+    RECURRENCE_MAX_OCCURRENCES = 500
+    SCHEDULE_CHECK_MAX_SLOTS = 500
+    
+    # Location Search Settings
+    LOCATION_INDEX_ENABLED = True  # in-process grid index; off queries the database with a bounding box
+    LOCATION_INDEX_CELL_DEGREES = 0.5
+    LOCATION_INDEX_TTL = 300  # seconds before rebuilding, to pick up other processes' writes
+    LOCATION_MAX_RADIUS_KM = 500
+    LOCATION_TILE_MAX_ZOOM = 20
+    LOCATION_TILE_CLUSTER_MAX_ZOOM = 14  # from this zoom on, every location is its own feature
+    LOCATION_TILE_CLUSTER_GRID = 16  # cluster cells per tile side
+    LOCATION_TILE_CACHE_SIZE = 2048  # gzipped tiles kept per process
+    LOCATION_TILE_TTL = 60  # seconds, also sent as max-age
+    
+    # Expedition Route Settings
+    ROUTE_MAX_POINTS = 100000
+    ROUTE_DETAIL_ZOOMS = (6, 9, 12, 15)  # zoom levels with a stored simplified polyline; closer zooms get every point
+    ROUTE_SIMPLIFY_PIXELS = 1.0  # simplification tolerance, in screen pixels at the level's zoom
+    ROUTE_TRAVEL_SPEED_KMH = 4.0  # pace on the flat for estimated durations (Naismith's rule)
+    ROUTE_TYPE_SPEEDS_KMH = {'trail_running': 8.0, 'mountain_biking': 10.0, 'cycling': 15.0}  # by routes.route_type
+    ROUTE_CLIMB_M_PER_HOUR = 600  # meters of ascent that add one hour
+    
+    # Reservation Settings
+    DEFAULT_COMMISSION_RATE = float(os.getenv('DEFAULT_COMMISSION_RATE', 10))  # percent of the total price
+    MAX_PARTICIPANTS_PER_RESERVATION = 50
+    
+    # Permission Cache Settings
+    PERMISSION_CACHE_TTL = int(os.getenv('PERMISSION_CACHE_TTL', 300))  # seconds
+    PERMISSION_MATRIX_TTL = int(os.getenv('PERMISSION_MATRIX_TTL', 60))  # seconds; other workers see role changes within this
+    MAX_BULK_PERMISSION_CHECKS = 200
+    
+    # Session Profile Cache Settings
+    PROFILE_CACHE_TTL = int(os.getenv('PROFILE_CACHE_TTL', 60))  # seconds
+    
+    # Password Hashing Settings (stored hashes are upgraded on login when these change)
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    
     # CORS Settings
     CORS_ORIGIN = os.getenv('CORS_ORIGIN', '*')
     
@@ -60,12 +101,36 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME', None)
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD', None)
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', 'noreply@outdooer.com')
+    MAIL_MAX_MESSAGES_PER_CONNECTION = 100
+    
+    # Notification Settings
+    NOTIFICATION_TRANSPORT = os.getenv('NOTIFICATION_TRANSPORT', 'smtp')  # Options: smtp, file
+    NOTIFICATION_FILE_DIR = os.getenv('NOTIFICATION_FILE_DIR', 'mail_outbox')  # .eml files of the file transport
+    NOTIFICATION_DEFAULT_LOCALE = os.getenv('NOTIFICATION_DEFAULT_LOCALE', 'en')  # Options: en, es
+    NOTIFICATION_COALESCE_SECONDS = 60  # events reaching a recipient within this window share one email
+    NOTIFICATION_BATCH_SIZE = 500
+    NOTIFICATION_MAX_DELIVERY_ATTEMPTS = 3  # refusals before a communication is no longer emailed
     
     # Payment Gateway Settings
     PAYMENT_GATEWAY = os.getenv('PAYMENT_GATEWAY', 'stripe')  # Options: stripe, paypal
     STRIPE_PUBLIC_KEY = os.getenv('STRIPE_PUBLIC_KEY', None)
     STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', None)
     STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', None)
+    PAYMENT_WEBHOOK_SECRET = os.getenv('PAYMENT_WEBHOOK_SECRET', None)  # HMAC-SHA256 key for /api/payments/webhook
+    
+    # Payment Outbox Settings
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 500))
+    OUTBOX_MAX_ATTEMPTS = 5
+    OUTBOX_POLL_INTERVAL = 5  # seconds between drains when the outbox is empty
+    
+    # Background Job Settings
+    JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', 4))
+    JOB_MAX_ATTEMPTS = 5
+    JOB_RETRY_BASE_DELAY = 10  # seconds before the first retry, doubled for each further one
+    JOB_RETRY_MAX_DELAY = 3600
+    JOB_POLL_INTERVAL = 1  # seconds between claims when no job is due
+    JOB_LOCK_TIMEOUT = 900  # seconds after which a running job is presumed abandoned
+    JOB_HEARTBEAT_INTERVAL = 60  # seconds between lock refreshes of a running job, well under JOB_LOCK_TIMEOUT
     
     # Rate Limiting
     RATELIMIT_DEFAULT = "200 per day, 50 per hour"
@@ -86,6 +151,9 @@ class DevelopmentConfig(Config):
     
     # Shorter token expiration for easier testing
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=30)
+    
+    # Write emails to files instead of sending them
+    NOTIFICATION_TRANSPORT = os.getenv('NOTIFICATION_TRANSPORT', 'file')
 
 
 class TestingConfig(Config):
@@ -98,6 +166,12 @@ class TestingConfig(Config):
     
     # Disable CSRF protection in tests
     WTF_CSRF_ENABLED = False
+    
+    # Cheap password hashes keep auth tests fast
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    
+    # Never send email from tests
+    NOTIFICATION_TRANSPORT = 'file'
 
 
 class ProductionConfig(Config):
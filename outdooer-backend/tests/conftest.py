@@ -0,0 +1,56 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Make the application package importable when running pytest from any directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    """Application configured for testing, backed by an in-memory SQLite database"""
+    app = create_app('testing')
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Test client for the application"""
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    Return a context manager that records every SQL statement executed inside it
+
+    Usage:
+        with count_queries() as queries:
+            ...
+        assert len(queries) == 1
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    @contextmanager
+    def _count():
+        statements = []
+
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _before_cursor_execute)
+
+    return _count
@@ -0,0 +1,234 @@
+# tests/test_activities.py
+import base64
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.activity import Activity
+from app.models.activity_type import ActivityType
+from app.models.location import Location
+from app.models.team import Team
+from app.models.team_member import TeamMember
+from app.models.user import User
+from app.services.activity_service import ActivityService
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def _seed_activities(count, distinct_related=50):
+    """Create `count` activities spread over `distinct_related` users, teams, locations and types"""
+    users, teams, locations, types = [], [], [], []
+    for i in range(distinct_related):
+        user = User(
+            email=f'guide{i}@example.com',
+            password_hash='x',
+            first_name=f'Guide{i}',
+            last_name='Test',
+            date_of_birth=date(1990, 1, 1)
+        )
+        users.append(user)
+        teams.append(Team(team_name=f'Team {i}'))
+        locations.append(Location(location_name=f'Location {i}', location_type='peak', latitude=i, longitude=i))
+        types.append(ActivityType(activity_type_name=f'Type {i}'))
+    db.session.add_all(users + teams + locations + types)
+    db.session.flush()
+
+    created_at = datetime(2025, 1, 1)
+    for i in range(count):
+        related = i % distinct_related
+        db.session.add(Activity(
+            title=f'Activity {i}',
+            description='Test activity',
+            max_participants=10,
+            price=50,
+            team_id=teams[related].team_id,
+            location_id=locations[related].location_id,
+            activity_type_id=types[related].activity_type_id,
+            created_by=users[related].user_id,
+            leader_id=users[(related + 1) % distinct_related].user_id,
+            created_at=created_at + timedelta(minutes=i)
+        ))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def test_serialize_list_query_count_is_constant(app, count_queries):
+    _seed_activities(500)
+
+    with count_queries() as queries:
+        serialized = Activity.serialize_list(Activity.query_with_relations().all())
+
+    assert len(serialized) == 500
+    assert len(queries) == 1
+
+
+def test_serialize_list_matches_to_dict(app):
+    _seed_activities(60, distinct_related=7)
+
+    eager = Activity.serialize_list(
+        Activity.query_with_relations().order_by(Activity.activity_id).all()
+    )
+    db.session.expunge_all()
+    lazy = [activity.to_dict() for activity in Activity.query.order_by(Activity.activity_id).all()]
+
+    assert eager == lazy
+    assert eager[0]['leader_name'] == 'Guide1 Test'
+    assert eager[0]['team_name'] == 'Team 0'
+
+
+def test_cursor_round_trip_and_tampering():
+    created_at = datetime(2025, 3, 4, 5, 6, 7, 891011)
+    cursor = encode_cursor(created_at, 42)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+    forged = base64.urlsafe_b64encode(b'{"c":"2025-01-01T00:00:00"}').decode('ascii')
+    for tampered in ('not a cursor!', cursor[:-3], base64.urlsafe_b64encode(b'[1, 2]').decode('ascii'), forged,
+                     base64.urlsafe_b64encode(b'{"c":"yesterday","i":1}').decode('ascii')):
+        with pytest.raises(ValueError):
+            decode_cursor(tampered)
+
+
+def test_catalog_pages_through_every_activity(app, client):
+    _seed_activities(45, distinct_related=5)
+    # Rows sharing a created_at are still split by activity_id
+    db.session.execute(Activity.__table__.update().where(Activity.activity_id <= 10).values(
+        created_at=datetime(2025, 1, 1)
+    ))
+    db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        response = client.get('/api/activities/', query_string={'limit': 20, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.get_json()
+        seen.extend(activity['activity_id'] for activity in page['activities'])
+        if not page['has_more']:
+            break
+        cursor = page['next_cursor']
+
+    assert len(seen) == len(set(seen)) == 45
+    assert seen[-10:] == list(range(10, 0, -1))
+
+    assert client.get('/api/activities/', query_string={'cursor': 'garbage'}).status_code == 400
+    # A cursor without a created_at cannot address a catalog position
+    assert client.get('/api/activities/', query_string={'cursor': encode_cursor(None, 5)}).status_code == 400
+
+
+def test_catalog_search_and_difficulty_filters(app, client):
+    _seed_activities(30, distinct_related=5)
+    db.session.execute(Activity.__table__.update().where(Activity.activity_id % 3 == 0).values(
+        difficulty_level='Moderate'
+    ))
+    db.session.commit()
+
+    def ids(**params):
+        page = client.get('/api/activities/', query_string={'limit': 100, **params}).get_json()
+        return sorted(activity['activity_id'] for activity in page['activities'])
+
+    assert ids(search='activity 2') == [3, 21, 22, 23, 24, 25, 26, 27, 28, 29, 30]
+    assert ids(search='LOCATION 4') == list(range(5, 31, 5))
+    assert ids(difficulty_level='moderate') == list(range(3, 31, 3))
+    assert ids(search='location 4', difficulty_level='moderate') == [15, 30]
+
+
+def _seed_visibility():
+    """
+    Create two teams, users in every role and activities spread over them
+
+    Returns:
+        dict: user IDs by name
+    """
+    names = ('master', 'tactical', 'technical', 'base', 'loner', 'outsider')
+    users = {name: User(
+        email=f'{name}@example.com',
+        password_hash='x',
+        first_name=name.title(),
+        last_name='Test',
+        date_of_birth=date(1990, 1, 1)
+    ) for name in names}
+    db.session.add_all(users.values())
+    db.session.flush()
+    ids = {name: user.user_id for name, user in users.items()}
+
+    andes, alps = Team(team_name='Andes'), Team(team_name='Alps')
+    db.session.add_all([andes, alps])
+    db.session.flush()
+    db.session.add_all([
+        TeamMember(team_id=andes.team_id, user_id=ids['master'], role_level=1),
+        TeamMember(team_id=alps.team_id, user_id=ids['tactical'], role_level=2),
+        TeamMember(team_id=andes.team_id, user_id=ids['technical'], role_level=3),
+        TeamMember(team_id=alps.team_id, user_id=ids['technical'], role_level=4),
+        TeamMember(team_id=andes.team_id, user_id=ids['base'], role_level=4),
+    ])
+
+    teams = (andes.team_id, alps.team_id, None)
+    people = [ids[name] for name in names[:5]]
+    created_at = datetime(2025, 1, 1)
+    for i in range(60):
+        db.session.add(Activity(
+            title=f'Activity {i}',
+            description='Test activity',
+            max_participants=10,
+            price=50,
+            team_id=teams[i % 3],
+            created_by=people[i % 5],
+            leader_id=people[(i // 2) % 5],
+            created_at=created_at + timedelta(minutes=i // 4)
+        ))
+    db.session.commit()
+    return ids
+
+
+def _old_visible_ids(user_id):
+    """The visibility rules as evaluated before the single query: one pass per membership"""
+    memberships = TeamMember.query.filter_by(user_id=user_id).all()
+    activities = Activity.query.all()
+    if not memberships:
+        return {a.activity_id for a in activities if a.created_by == user_id}
+
+    visible = set()
+    for membership in memberships:
+        for a in activities:
+            if a.team_id != membership.team_id:
+                continue
+            if membership.role_level <= 2 \
+                    or membership.role_level == 3 and user_id in (a.created_by, a.leader_id) \
+                    or membership.role_level == 4 and a.created_by == user_id:
+                visible.add(a.activity_id)
+    return visible
+
+
+def test_visible_activities_match_the_per_membership_rules(app):
+    ids = _seed_visibility()
+
+    for name, user_id in ids.items():
+        rows = ActivityService.visible_activities_query(user_id).all()
+        assert len(rows) == len({a.activity_id for a in rows}), name
+        assert {a.activity_id for a in rows} == _old_visible_ids(user_id), name
+
+    assert ActivityService.visible_activities_query(ids['outsider']).count() == 0
+    # A member sees only what their teams grant, never their team-less activities
+    assert all(a.team_id is not None for a in ActivityService.visible_activities_query(ids['technical']))
+
+
+def test_my_activities_pages_through_every_visible_activity(app, client):
+    from flask_jwt_extended import create_access_token
+
+    ids = _seed_visibility()
+    for name in ('master', 'technical', 'loner'):
+        headers = {'Authorization': f'Bearer {create_access_token(identity=ids[name])}'}
+        seen, cursor = [], None
+        while True:
+            response = client.get('/api/activities/my-activities', headers=headers,
+                                  query_string={'limit': 4, **({'cursor': cursor} if cursor else {})})
+            assert response.status_code == 200
+            page = response.get_json()
+            seen.extend(activity['activity_id'] for activity in page['activities'])
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+
+        assert len(seen) == len(set(seen)), name
+        assert set(seen) == _old_visible_ids(ids[name]), name
@@ -0,0 +1,116 @@
+# tests/test_auth.py
+from datetime import date
+
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models.user import User, UserRole
+from app.services.auth_service import AuthService
+from app.utils.security import generate_password_hash
+
+
+def _seed_user(password_hash='x'):
+    user = User(
+        email='ana@example.com',
+        password_hash=password_hash,
+        first_name='Ana',
+        last_name='Test',
+        date_of_birth=date(1990, 1, 1)
+    )
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserRole(user_id=user.user_id, role_type='explorer'))
+    db.session.commit()
+    return user.user_id
+
+
+def _me(client, user_id):
+    response = client.get('/api/auth/me', headers={'Authorization': f'Bearer {create_access_token(identity=user_id)}'})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_me_is_served_from_the_profile_cache(app, client, count_queries):
+    user_id = _seed_user()
+    assert _me(client, user_id)['first_name'] == 'Ana'
+
+    with count_queries() as queries:
+        assert _me(client, user_id)['first_name'] == 'Ana'
+    assert queries == []
+
+
+def test_profile_writes_drop_the_cached_profile(app, client):
+    user_id = _seed_user()
+    _me(client, user_id)
+
+    user = User.query.get(user_id)
+    user.first_name = 'Ana Maria'
+    user.account_status = 'suspended'
+    db.session.commit()
+    profile = _me(client, user_id)
+    assert (profile['first_name'], profile['account_status']) == ('Ana Maria', 'suspended')
+
+    db.session.add(UserRole(user_id=user_id, role_type='guide'))
+    db.session.commit()
+    assert _me(client, user_id)['roles'] == ['explorer', 'guide']
+
+    # A write that is rolled back leaves the cached profile in place
+    User.query.get(user_id).email = 'other@example.com'
+    db.session.flush()
+    db.session.rollback()
+    assert _me(client, user_id)['email'] == 'ana@example.com'
+
+
+def test_login_keeps_the_profile_warm(app, count_queries):
+    user_id = _seed_user(generate_password_hash('secret'))
+
+    result, error = AuthService.login('ana@example.com', 'secret')
+    assert error is None and result['user_id'] == user_id
+
+    # Writing last_login is not a profile change
+    with count_queries() as queries:
+        assert AuthService.get_session_profile(user_id)['email'] == 'ana@example.com'
+    assert queries == []
+
+
+def test_login_upgrades_outdated_hashes_only_on_success(app, client):
+    from werkzeug.security import generate_password_hash as werkzeug_generator
+    from app.utils.security import get_hash_method, needs_rehash
+
+    outdated = werkzeug_generator('secret', method='pbkdf2:sha256:500')
+    user_id = _seed_user(outdated)
+    assert needs_rehash(outdated)
+
+    response = client.post('/api/auth/login', json={'email': 'ana@example.com', 'password': 'wrong'})
+    assert response.status_code == 401
+    assert User.query.get(user_id).password_hash == outdated
+
+    response = client.post('/api/auth/login', json={'email': 'ana@example.com', 'password': 'secret'})
+    assert response.status_code == 200
+    upgraded = User.query.get(user_id).password_hash
+    assert upgraded.startswith(get_hash_method() + '$') and not needs_rehash(upgraded)
+
+    # The upgraded hash still verifies, and is not rewritten again
+    assert client.post('/api/auth/login', json={'email': 'ana@example.com', 'password': 'secret'}).status_code == 200
+    assert User.query.get(user_id).password_hash == upgraded
+
+
+def test_password_checks_run_on_the_pool(app, monkeypatch):
+    import threading
+    from app.utils import security
+
+    password_hash = generate_password_hash('secret')
+    assert security.check_password_hash(password_hash, 'secret') is True
+    assert security.check_password_hash(password_hash, 'wrong') is False
+    assert security.check_password_hash(None, 'secret') is False
+
+    threads = []
+    checker = security.werkzeug_checker
+
+    def recording_checker(stored, password):
+        threads.append(threading.current_thread().name)
+        return checker(stored, password)
+
+    monkeypatch.setattr(security, 'werkzeug_checker', recording_checker)
+    assert security.check_password_hash(password_hash, 'secret') is True
+    assert len(threads) == 1 and threads[0].startswith('password-hash')
@@ -0,0 +1,144 @@
+# tests/test_earnings.py
+from datetime import date, time
+from decimal import Decimal
+
+from app import db
+from app.models.activity import Activity
+from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
+from app.models.earnings import GuideEarning, GuidePayout, GuidePayoutDetail
+from app.models.team import Team, TeamRevenueSharing
+from app.models.team_member import TeamMember
+from app.models.user import User
+from app.services.earnings_service import EarningsService
+from app.services.payment_service import PaymentService
+from app.services.reservation_service import ReservationService
+from app.tasks.payment_processing import drain_outbox
+
+
+def _seed_paid_reservations(count, team_percentage=20):
+    """Create a team activity with `count` reservations of two seats, each paid in full"""
+    guide = User(
+        email='guide@example.com',
+        password_hash='x',
+        first_name='Guide',
+        last_name='Test',
+        date_of_birth=date(1990, 1, 1)
+    )
+    db.session.add(guide)
+    db.session.flush()
+
+    team = Team(team_name='Andes', master_guide_id=guide.user_id)
+    db.session.add(team)
+    db.session.flush()
+
+    db.session.add(TeamMember(team_id=team.team_id, user_id=guide.user_id, role_level=3))
+    db.session.add(TeamRevenueSharing(team_id=team.team_id, role_level=3, percentage=team_percentage))
+
+    activity = Activity(title='Summit', description='Test activity', max_participants=50, price=50,
+                        created_by=guide.user_id, team_id=team.team_id)
+    db.session.add(activity)
+    db.session.flush()
+
+    instance = GuideActivityInstance(guide_id=guide.user_id, activity_id=activity.activity_id, team_id=team.team_id)
+    db.session.add(instance)
+    db.session.flush()
+
+    activity_date = ActivityAvailableDate(
+        activity_instance_id=instance.instance_id,
+        date=date(2025, 7, 1),
+        start_time=time(9),
+        end_time=time(17),
+        max_reservations=2 * count,
+        current_reservations=0
+    )
+    db.session.add(activity_date)
+    db.session.commit()
+
+    participants = [{'first_name': f'P{i}', 'last_name': 'Test', 'email': f'p{i}@example.com'} for i in range(2)]
+    for i in range(count):
+        reservation, _ = ReservationService.create_reservation(guide.user_id, activity_date.available_date_id, participants)
+        PaymentService.record_payment({
+            'reservation_id': reservation['reservation_id'],
+            'amount': Decimal('100.00'),
+            'payment_method': 'card',
+            'transaction_id': f'txn_{i}',
+            'payment_status': 'completed'
+        })
+
+    return guide.user_id, team.team_id
+
+
+def test_split_amount_adds_up_to_the_payment():
+    assert EarningsService.split_amount('100.00', '100.00', '10.00', 20) == \
+        (Decimal('72.00'), Decimal('18.00'), Decimal('10.00'))
+
+    # Rounding leftovers always stay with the guide
+    guide, team, commission = EarningsService.split_amount('33.33', '99.99', '10.00', Decimal('12.5'))
+    assert guide + team + commission == Decimal('33.33')
+
+
+def test_outbox_worker_creates_one_earning_per_payment(app):
+    guide_id, team_id = _seed_paid_reservations(3)
+
+    assert drain_outbox()['processed'] == 3
+    # Re-running the engine on the same payments creates nothing new
+    payment_ids = [earning.payment_id for earning in GuideEarning.query.all()]
+    assert EarningsService.calculate_earnings(payment_ids) == 0
+
+    earnings = GuideEarning.query.all()
+    assert len(earnings) == 3
+    for earning in earnings:
+        assert (earning.guide_id, earning.team_id) == (guide_id, team_id)
+        assert (earning.amount, earning.team_share_amount, earning.commission_amount) == \
+            (Decimal('72.00'), Decimal('18.00'), Decimal('10.00'))
+
+
+def test_create_payouts_rolls_up_pending_earnings(app, count_queries):
+    guide_id, team_id = _seed_paid_reservations(4)
+    drain_outbox()
+
+    with count_queries() as queries:
+        result, error = EarningsService.create_payouts(team_id=team_id)
+
+    assert error is None
+    assert result['earnings_paid'] == 4
+    assert result['total_amount'] == '288.00'
+    # Lock and read, payout insert, detail executemany, status update
+    assert len(queries) <= 4
+
+    payout = GuidePayout.query.one()
+    assert (payout.guide_id, payout.amount) == (guide_id, Decimal('288.00'))
+    assert GuidePayoutDetail.query.count() == 4
+    assert GuideEarning.query.filter_by(earnings_status='paid').count() == 4
+
+    # Nothing is left to pay out
+    result, error = EarningsService.create_payouts(team_id=team_id)
+    assert result['payouts'] == []
+
+
+def test_create_payouts_rejects_invalid_input(app, client):
+    from flask_jwt_extended import create_access_token
+
+    _, team_id = _seed_paid_reservations(2)
+    drain_outbox()
+    master = User(email='master@example.com', password_hash='x', first_name='Master', last_name='Test',
+                  date_of_birth=date(1990, 1, 1))
+    db.session.add(master)
+    db.session.flush()
+    db.session.add(TeamMember(team_id=team_id, user_id=master.user_id, role_level=1))
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=master.user_id)}'}
+    url = f'/api/earnings/team/{team_id}/payouts'
+
+    for body in ({'min_amount': 'lots'}, {'min_amount': 'NaN'}, {'min_amount': -5}, {'min_amount': True},
+                 {'min_amount': [1]}, {'payment_method': 7}, {'payment_method': ''}, {'notes': {'a': 1}},
+                 {'min_amount': 'lots', 'async': True}):
+        response = client.post(url, json=body, headers=headers)
+        assert response.status_code == 400, body
+    assert GuidePayout.query.count() == 0
+
+    response = client.post(url, json={'min_amount': '1000.00'}, headers=headers)
+    assert response.status_code == 201 and response.get_json()['payouts'] == []
+    response = client.post(url, json={'min_amount': 10, 'payment_method': 'paypal'}, headers=headers)
+    assert response.status_code == 201
+    assert GuidePayout.query.one().payment_method == 'paypal'
@@ -0,0 +1,194 @@
+# tests/test_expedition_routes.py
+import json
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.expedition import Expedition, ExpeditionRoute
+from app.models.job import BackgroundJob
+from app.models.route import Route
+from app.services.route_service import RouteService
+from app.tasks import jobs, route_jobs  # noqa: F401 (registers routes.recalculate_metrics)
+from app.utils import route_metrics
+from app.utils.geo_utils import haversine_km
+from app.utils.polyline import decode_polyline, encode_polyline
+from app.utils.simplify import _furthest, _project, np, simplification_ranks, simplify
+
+
+def _track(count, seed=5):
+    """A wandering GPS track of about 11 m steps"""
+    rng = random.Random(seed)
+    lat, lng, heading = -33.4, -70.6, 0.0
+    points = []
+    for _ in range(count):
+        heading += rng.gauss(0, 0.3)
+        lat += math.cos(heading) * 0.0001
+        lng += math.sin(heading) * 0.0001
+        points.append([round(lat, 6), round(lng, 6)])
+    return points
+
+
+def _expedition():
+    start = datetime(2030, 1, 10)
+    expedition = Expedition(title='Traverse', description='Test expedition', start_date=start,
+                            end_date=start + timedelta(days=3), max_participants=10, price=100)
+    db.session.add(expedition)
+    db.session.commit()
+    return expedition
+
+
+def test_polyline_round_trip():
+    points = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+    assert encode_polyline(points) == '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+    assert decode_polyline('_p~iF~ps|U_ulLnnqC_mqNvxq`@') == [list(point) for point in points]
+
+    track = _track(500)
+    assert decode_polyline(encode_polyline(track, 6), 6) == track
+
+
+def test_simplification_ranks_match_douglas_peucker():
+    track = _track(600)
+    xs, ys = _project(track)
+    if np is not None:
+        # As simplification_ranks hands them to _furthest
+        xs, ys = np.asarray(xs), np.asarray(ys)
+
+    def douglas_peucker(tolerance):
+        keep = {0, len(track) - 1}
+
+        def split(first, last):
+            if last - first < 2:
+                return
+            index, distance = _furthest(xs, ys, first, last)
+            if distance > tolerance:
+                keep.add(index)
+                split(first, index)
+                split(index, last)
+
+        split(0, len(track) - 1)
+        return [point for i, point in enumerate(track) if i in keep]
+
+    ranks = simplification_ranks(track)
+    for tolerance in (0.5, 2, 10, 50):
+        assert simplify(track, tolerance, ranks) == douglas_peucker(tolerance)
+    assert simplify(track, 1e9) == [track[0], track[-1]]
+
+
+def test_route_levels_by_zoom(app):
+    expedition = _expedition()
+    track = _track(5000)
+
+    route, error = RouteService.save_route(expedition.expedition_id, {'route_points': track, 'route_summary': 'Loop'})
+    assert error is None and route.point_count == 5000
+
+    full, _ = RouteService.get_geometry(expedition.expedition_id)
+    assert full['precision'] == 6 and full['level_point_count'] == 5000
+    assert decode_polyline(full['polyline'], 6) == track
+
+    overview, _ = RouteService.get_geometry(expedition.expedition_id, zoom=5)
+    closer, _ = RouteService.get_geometry(expedition.expedition_id, zoom=11)
+    assert overview['detail_zoom'] == 6 and closer['detail_zoom'] == 12
+    assert 2 <= overview['level_point_count'] < closer['level_point_count'] < 5000
+    assert len(decode_polyline(closer['polyline'], closer['precision'])) == closer['level_point_count']
+
+    # An order of magnitude smaller than the JSON array over the wire
+    assert len(json.dumps(track)) > 10 * len(closer['polyline'])
+    assert RouteService.get_geometry(expedition.expedition_id, zoom=18)[0]['precision'] == 6
+
+
+def test_route_input_and_legacy_rows(app):
+    expedition = _expedition()
+    _, error = RouteService.save_route(expedition.expedition_id, {'route_points': [[10, 10]]})
+    assert error == 'A route needs at least 2 points'
+    _, error = RouteService.save_route(expedition.expedition_id, {'route_points': [[10, 10], [95, 10]]})
+    assert error == 'Route points must be valid [lat, lng] coordinates'
+
+    route, error = RouteService.save_route(expedition.expedition_id, {'polyline': '_p~iF~ps|U_ulLnnqC', 'precision': 5})
+    assert error is None and RouteService.get_points(route) == [[38.5, -120.2], [40.7, -120.95]]
+
+    # Rows written before the polyline encoding still read
+    legacy = ExpeditionRoute(expedition_id=_expedition().expedition_id, route_points='[[1.5, 2.5], [1.6, 2.4]]')
+    db.session.add(legacy)
+    db.session.commit()
+    assert RouteService.get_points(legacy) == [[1.5, 2.5], [1.6, 2.4]]
+    assert decode_polyline(RouteService.get_geometry(legacy.expedition_id, zoom=3)[0]['polyline'], 6) == \
+        [[1.5, 2.5], [1.6, 2.4]]
+
+
+def test_route_metrics_in_one_pass(monkeypatch):
+    # One degree of longitude along the equator, out and back up a 300 m hill
+    line = [(0.0, lng / 100, 100 + 3 * min(lng, 100 - lng)) for lng in range(101)]
+    distance, gain, loss = route_metrics.line_metrics(line)
+    assert distance == pytest.approx(haversine_km(0, 0, 0, 1))
+    assert gain == pytest.approx(150) and loss == pytest.approx(150)
+
+    metrics = route_metrics.route_metrics([line, [(10.0, 10.0, 0.0), (10.0, 10.01, 0.0)]],
+                                          speed_kmh=4.0, climb_m_per_hour=600)
+    # The gap between the two lines does not count
+    assert metrics['distance_km'] == pytest.approx(distance + haversine_km(10, 10, 10, 10.01))
+    assert metrics['duration_hours'] == pytest.approx(metrics['distance_km'] / 4 + 150 / 600)
+    assert metrics['point_count'] == 103
+
+    flat = route_metrics.route_metrics([[(lat, lng) for lat, lng, _ in line]])
+    assert flat['elevation_gain_m'] is None and flat['distance_km'] == pytest.approx(distance)
+
+    # The loop fallback agrees with the vectorized pass, also when an elevation is missing
+    track = [point + [1000 + i % 7] for i, point in enumerate(_track(3000))]
+    gappy = [point + [None if i == 50 else 1000.0] for i, point in enumerate(_track(100))]
+    expected = route_metrics.line_metrics(track)
+    expected_gappy = route_metrics.line_metrics(gappy)
+    assert expected_gappy[1:] == (None, None)
+    monkeypatch.setattr(route_metrics, 'np', None)
+    assert route_metrics.line_metrics(track) == pytest.approx(expected)
+    assert route_metrics.line_metrics(gappy) == (pytest.approx(expected_gappy[0]), None, None)
+
+
+def test_saving_geometry_queues_metrics_recalculation(app):
+    expedition = _expedition()
+    track = _track(2000)
+    route, _ = RouteService.save_route(expedition.expedition_id, {'route_points': track})
+    assert route.last_calculated is None
+    assert BackgroundJob.query.filter_by(job_name='routes.recalculate_metrics').count() == 1
+
+    # Metadata alone does not queue another one
+    RouteService.save_route(expedition.expedition_id, {'route_points': track, 'route_summary': 'Ridge'})
+    route.map_image_url = 'https://example.com/map.png'
+    db.session.commit()
+    assert jobs.work('test-worker', once=True) == 1
+
+    db.session.refresh(route)
+    distance = sum(haversine_km(*a, *b) for a, b in zip(track, track[1:]))
+    assert float(route.total_distance_km) == pytest.approx(distance, abs=0.01)
+    assert float(route.total_travel_time_hours) == pytest.approx(distance / app.config['ROUTE_TRAVEL_SPEED_KMH'], abs=0.01)
+    assert route.last_calculated is not None
+
+    RouteService.save_route(expedition.expedition_id, {'route_points': track[:500]})
+    assert route.last_calculated is None
+    assert jobs.work('test-worker', once=True) == 1
+    db.session.refresh(route)
+    assert float(route.total_distance_km) < distance and route.last_calculated is not None
+
+
+def test_route_table_metrics_from_geojson(app):
+    coordinates = [[-70.6, -33.4, 800], [-70.6, -33.41, 950], [-70.6, -33.42, 900]]
+    route = Route(route_name='Cerro Pochoco', route_type='cycling', geojson=json.dumps({
+        'type': 'Feature',
+        'geometry': {'type': 'LineString', 'coordinates': coordinates}
+    }))
+    db.session.add(route)
+    db.session.commit()
+    assert jobs.work('test-worker', once=True) == 1
+
+    db.session.refresh(route)
+    distance = 2 * haversine_km(-33.4, -70.6, -33.41, -70.6)
+    assert float(route.total_distance_km) == pytest.approx(distance, abs=0.01)
+    assert float(route.elevation_gain_m) == 150 and float(route.elevation_loss_m) == 50
+    speed = app.config['ROUTE_TYPE_SPEEDS_KMH']['cycling']
+    assert route.estimated_duration_minutes == round((distance / speed + 150 / 600) * 60)
+
+    assert RouteService.geojson_lines(json.dumps({
+        'type': 'MultiLineString', 'coordinates': [coordinates[:2], coordinates[1:]]
+    })) == [[[-33.4, -70.6, 800], [-33.41, -70.6, 950]], [[-33.41, -70.6, 950], [-33.42, -70.6, 900]]]
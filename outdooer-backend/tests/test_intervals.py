@@ -0,0 +1,51 @@
+# tests/test_intervals.py
+import random
+
+from app.utils.intervals import IntervalIndex
+
+
+def test_half_open_boundaries():
+    index = IntervalIndex([(10, 20, 'a'), (20, 30, 'b'), (40, 50, 'c')])
+
+    # Touching ends do not overlap
+    assert index.overlapping(0, 10) == []
+    assert index.overlapping(30, 40) == []
+    assert index.overlapping(50, 60) == []
+    assert not index.overlaps(30, 40)
+
+    assert index.overlapping(19, 21) == [(10, 20, 'a'), (20, 30, 'b')]
+    assert index.overlapping(20, 21) == [(20, 30, 'b')]
+    assert index.overlapping(49, 50) == [(40, 50, 'c')]
+    assert index.overlaps(0, 11)
+
+    # Empty and inverted queries match nothing
+    assert index.overlapping(15, 15) == [] and not index.overlaps(25, 15)
+    assert IntervalIndex().overlapping(0, 100) == []
+
+
+def test_long_interval_is_found_past_later_starts():
+    # The running maximum of ends keeps the long first interval in range
+    index = IntervalIndex([(0, 100, 'long'), (10, 11, 'x'), (20, 21, 'y'), (30, 31, 'z')])
+    assert index.overlapping(50, 60) == [(0, 100, 'long')]
+    assert [payload for _, _, payload in index.overlapping(20, 31)] == ['long', 'y', 'z']
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    intervals = []
+    for i in range(300):
+        start = rng.randrange(0, 1000)
+        intervals.append((start, start + rng.randrange(1, 60), i))
+    index = IntervalIndex(intervals)
+    assert len(index) == 300
+
+    for _ in range(500):
+        start = rng.randrange(-20, 1050)
+        end = start + rng.randrange(1, 80)
+        expected = sorted(
+            (interval for interval in intervals if interval[0] < end and interval[1] > start),
+            key=lambda interval: (interval[0], interval[1])
+        )
+        found = index.overlapping(start, end)
+        assert sorted(found, key=lambda interval: interval[2]) == sorted(expected, key=lambda interval: interval[2])
+        assert index.overlaps(start, end) == bool(expected)
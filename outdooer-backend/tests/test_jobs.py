@@ -0,0 +1,152 @@
+# tests/test_jobs.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.job import BackgroundJob
+from app.models.payment import PaymentOutbox
+from app.services.payment_service import PaymentService
+from app.tasks import jobs
+from tests.test_payments import _seed_reservation, _payment
+
+
+@pytest.fixture
+def tasks(monkeypatch):
+    """Isolate the task registry for a test"""
+    registry = {}
+    monkeypatch.setattr(jobs, '_tasks', registry)
+    return registry
+
+
+def test_enqueue_skips_a_queued_dedupe_key(app):
+    first = jobs.enqueue('reports.rollup', {'team_id': 1}, dedupe_key='rollup:1')
+    second = jobs.enqueue('reports.rollup', {'team_id': 1}, dedupe_key='rollup:1')
+    db.session.commit()
+
+    assert first is not None
+    assert second is None
+    assert BackgroundJob.query.count() == 1
+
+
+def test_worker_runs_due_jobs_and_records_timing(app, tasks):
+    seen = []
+    jobs.task('echo')(lambda value: seen.append(value))
+
+    for value in range(3):
+        jobs.enqueue('echo', {'value': value})
+    # Not due yet
+    jobs.enqueue('echo', {'value': 99}, run_at=datetime.utcnow() + timedelta(hours=1))
+    db.session.commit()
+
+    assert jobs.work('test-worker', once=True) == 3
+    assert seen == [0, 1, 2]
+
+    done = BackgroundJob.query.filter_by(status='succeeded').all()
+    assert len(done) == 3
+    assert all(job.duration_ms is not None and job.finished_at for job in done)
+
+    stats = {(row['job_name'], row['status']): row for row in jobs.job_stats()}
+    assert stats[('echo', 'succeeded')]['count'] == 3
+    assert stats[('echo', 'queued')]['count'] == 1
+
+
+def test_failed_job_is_retried_with_backoff_then_failed(app, tasks):
+    def flaky():
+        raise ValueError('gateway down')
+    jobs.task('flaky')(flaky)
+
+    job_id = jobs.enqueue('flaky', dedupe_key='flaky', max_attempts=2)
+    db.session.commit()
+
+    before = datetime.utcnow()
+    assert jobs.work('test-worker', once=True) == 1
+    job = BackgroundJob.query.get(job_id)
+    assert (job.status, job.attempts, job.dedupe_key) == ('queued', 1, None)
+    assert job.run_at >= before + timedelta(seconds=app.config['JOB_RETRY_BASE_DELAY'])
+    assert 'gateway down' in job.last_error
+
+    # Backing off: nothing is due
+    assert jobs.work('test-worker', once=True) == 0
+
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    assert jobs.work('test-worker', once=True) == 1
+    job = BackgroundJob.query.get(job_id)
+    assert (job.status, job.attempts) == ('failed', 2)
+    assert job.finished_at is not None
+
+
+def test_retry_delay_doubles_up_to_the_ceiling(app):
+    base = app.config['JOB_RETRY_BASE_DELAY']
+    assert [jobs.retry_delay(n) for n in (1, 2, 3)] == [base, 2 * base, 4 * base]
+    assert jobs.retry_delay(50) == app.config['JOB_RETRY_MAX_DELAY']
+
+
+def test_stale_running_job_is_requeued(app, tasks):
+    job_id = jobs.enqueue('echo')
+    db.session.commit()
+    assert jobs.claim_job('dead-worker') is not None
+
+    job = BackgroundJob.query.get(job_id)
+    job.locked_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_LOCK_TIMEOUT'] + 1)
+    db.session.commit()
+
+    assert jobs.requeue_stale_jobs() == 1
+    job = BackgroundJob.query.get(job_id)
+    assert (job.status, job.locked_by) == ('queued', None)
+
+
+def test_heartbeat_keeps_a_long_job_claimed(app, tasks):
+    job_id = jobs.enqueue('echo')
+    db.session.commit()
+    jobs.claim_job('worker-1')
+
+    job = BackgroundJob.query.get(job_id)
+    job.locked_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_LOCK_TIMEOUT'] + 1)
+    db.session.commit()
+
+    assert jobs.heartbeat(job_id, 'worker-2') is False
+    assert jobs.heartbeat(job_id, 'worker-1') is True
+    assert jobs.requeue_stale_jobs() == 0
+    db.session.refresh(job)
+    assert (job.status, job.locked_by) == ('running', 'worker-1')
+
+
+def test_requeued_job_is_not_overwritten_by_its_first_run(app, tasks):
+    job_id = jobs.enqueue('echo')
+    db.session.commit()
+    claimed = jobs.claim_job('worker-1')
+
+    # The first run looks abandoned and a second worker takes the job over
+    job = BackgroundJob.query.get(job_id)
+    job.locked_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_LOCK_TIMEOUT'] + 1)
+    db.session.commit()
+    assert jobs.requeue_stale_jobs() == 1
+    assert jobs.claim_job('worker-2') is not None
+
+    jobs.task('echo')(lambda: None)
+    assert jobs.execute_job(*claimed, worker_id='worker-1') == 'lost'
+    job = BackgroundJob.query.get(job_id)
+    assert (job.status, job.locked_by, job.attempts) == ('running', 'worker-2', 2)
+
+
+def test_payments_enqueue_one_outbox_drain(app, monkeypatch):
+    from collections import defaultdict
+    from app.tasks import payment_processing
+
+    applied = []
+    handlers = defaultdict(list)
+    handlers['payment_completed'].append(lambda events: applied.extend(e.payment_id for e in events))
+    monkeypatch.setattr(payment_processing, '_handlers', handlers)
+
+    _, reservation_id = _seed_reservation()
+    PaymentService.record_payment(_payment(reservation_id, 'txn_1'))
+    PaymentService.record_payment(_payment(reservation_id, 'txn_2'))
+
+    assert BackgroundJob.query.filter_by(job_name='payments.drain_outbox').count() == 1
+
+    jobs.load_tasks()
+    assert jobs.work('test-worker', names=['payments.drain_outbox'], once=True) == 1
+    assert len(applied) == 2
+    assert PaymentOutbox.query.filter(PaymentOutbox.processed_at.is_(None)).count() == 0
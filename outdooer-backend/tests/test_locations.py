@@ -0,0 +1,331 @@
+# tests/test_locations.py
+import gzip
+import random
+import struct
+
+from app import db
+from app.models.activity import Activity
+from app.models.location import Location, LocationAlias
+from app.services.location_service import LocationService
+from app.utils.geo_utils import bounding_box, haversine_km, haversine_many
+from app.utils.spatial_index import GridIndex
+from app.utils.text_index import PrefixIndex, normalize_text
+from app.utils.vector_tiles import encode_layer, encode_tile, tile_bounds, tile_for, tile_projector
+
+PLACES = [
+    ('Santiago', 'city', -33.4489, -70.6693),
+    ('Valparaiso', 'city', -33.0472, -71.6127),
+    ('Cajon del Maipo', 'park', -33.6420, -70.3530),
+    ('Mendoza', 'city', -32.8895, -68.8458),
+    ('Puerto Montt', 'city', -41.4693, -72.9424),
+]
+
+
+def _varint(data, position):
+    result = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return result, position
+
+
+def _messages(data):
+    """(field number, value) pairs of a protobuf message"""
+    position = 0
+    while position < len(data):
+        tag, position = _varint(data, position)
+        if tag & 7 == 0:
+            value, position = _varint(data, position)
+        elif tag & 7 == 1:
+            value, position = data[position:position + 8], position + 8
+        else:
+            size, position = _varint(data, position)
+            value, position = data[position:position + size], position + size
+        yield tag >> 3, value
+
+
+def _packed(data):
+    values, position = [], 0
+    while position < len(data):
+        value, position = _varint(data, position)
+        values.append(value)
+    return values
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _decode_tile(data):
+    """Decode an MVT of point features to {layer: [(id, (x, y), properties)]}"""
+    decoders = {1: bytes.decode, 3: lambda raw: struct.unpack('<d', raw)[0], 5: int, 6: _unzigzag, 7: bool}
+    layers = {}
+    for _, layer in _messages(data):
+        fields = list(_messages(layer))
+        assert dict(fields)[15] == 2 and dict(fields)[5] == 4096
+        keys = [value.decode() for number, value in fields if number == 3]
+        values = [decoders[kind](raw) for number, value in fields if number == 4 for kind, raw in _messages(value)]
+        features = []
+        for number, value in fields:
+            if number == 2:
+                feature = dict(_messages(value))
+                tags = _packed(feature.get(2, b''))
+                command, x, y = _packed(feature[4])
+                assert feature[3] == 1 and command == 9
+                features.append((feature.get(1), (_unzigzag(x), _unzigzag(y)),
+                                 {keys[tags[i]]: values[tags[i + 1]] for i in range(0, len(tags), 2)}))
+        layers[dict(fields)[1].decode()] = features
+    return layers
+
+
+def _seed_locations():
+    locations = [Location(location_name=name, location_type=kind, latitude=lat, longitude=lng)
+                 for name, kind, lat, lng in PLACES]
+    db.session.add_all(locations)
+    db.session.commit()
+    return {location.location_name: location.location_id for location in locations}
+
+
+def test_haversine():
+    assert abs(haversine_km(0, 0, 1, 0) - 111.195) < 0.01
+    assert haversine_km(10, 179.9, 10, -179.9) < 25
+    lats, lngs = [-33.0472, -32.8895, 51.5], [-71.6127, -68.8458, -0.12]
+    expected = [haversine_km(-33.4489, -70.6693, lat, lng) for lat, lng in zip(lats, lngs)]
+    assert all(abs(a - b) < 1e-9 for a, b in zip(haversine_many(-33.4489, -70.6693, lats, lngs), expected))
+
+
+def test_bounding_box_splits_at_the_antimeridian():
+    _, _, ranges = bounding_box(0, 179.5, 200)
+    assert len(ranges) == 2 and ranges[0][1] == 180.0 and ranges[1][0] == -180.0
+
+    _, max_lat, ranges = bounding_box(89.5, 0, 100)
+    assert max_lat == 90.0 and ranges == [(-180.0, 180.0)]
+
+
+def test_grid_index_matches_brute_force():
+    rng = random.Random(7)
+    points = [(i, rng.uniform(-89, 89), rng.uniform(-180, 180)) for i in range(3000)]
+    index = GridIndex(points, cell_deg=1.0)
+
+    for _ in range(50):
+        lat, lng = rng.uniform(-90, 90), rng.choice([rng.uniform(-180, 180), 179.9])
+        radius = rng.choice([50, 500, 3000])
+        brute = sorted((haversine_km(lat, lng, p_lat, p_lng), key) for key, p_lat, p_lng in points)
+
+        assert [key for _, key in index.within(lat, lng, radius)] == \
+            [key for distance, key in brute if distance <= radius]
+        assert [key for _, key in index.nearest(lat, lng, 5)] == [key for _, key in brute[:5]]
+
+    index.insert(1, 0.0, 0.0)
+    index.remove(2)
+    assert index.nearest(0.0, 0.0, 1)[0][1] == 1
+    assert 2 not in index and len(index) == 2999
+
+
+def test_nearby_endpoint(client):
+    ids = _seed_locations()
+
+    response = client.get('/api/locations/nearby?lat=-33.45&lng=-70.66&radius_km=120')
+    assert response.status_code == 200
+    names = [location['location_name'] for location in response.get_json()['locations']]
+    assert names == ['Santiago', 'Cajon del Maipo', 'Valparaiso']
+
+    response = client.get('/api/locations/nearby?lat=-41&lng=-72&limit=2')
+    locations = response.get_json()['locations']
+    assert [location['location_id'] for location in locations] == [ids['Puerto Montt'], ids['Cajon del Maipo']]
+    assert locations[0]['distance_km'] < locations[1]['distance_km']
+
+    # Type filters are answered from the database with a bounding box
+    response = client.get('/api/locations/nearby?lat=-33.45&lng=-70.66&radius_km=500&type=park')
+    assert [location['location_name'] for location in response.get_json()['locations']] == ['Cajon del Maipo']
+
+    assert client.get('/api/locations/nearby?lat=100&lng=0').status_code == 400
+    assert client.get('/api/locations/nearby?lat=0&lng=0&radius_km=100000').status_code == 400
+
+
+def test_index_follows_committed_writes(app):
+    ids = _seed_locations()
+    index = LocationService.get_index()
+    assert len(index) == len(PLACES)
+
+    location = Location(location_name='Refugio', location_type='hut', latitude=-33.4490, longitude=-70.6690)
+    db.session.add(location)
+    db.session.commit()
+
+    Location.query.get(ids['Santiago']).latitude = -10
+    db.session.delete(Location.query.get(ids['Valparaiso']))
+    db.session.commit()
+
+    # Rolled back writes never reach the index
+    db.session.add(Location(location_name='Ghost', location_type='hut', latitude=-33.4489, longitude=-70.6693))
+    db.session.flush()
+    db.session.rollback()
+
+    assert LocationService.get_index() is index
+    nearby, error = LocationService.nearby(-33.4489, -70.6693, radius_km=150)
+    assert error is None
+    assert [item['location_name'] for item in nearby] == ['Refugio', 'Cajon del Maipo']
+
+
+def test_prefix_index_ranking():
+    index = PrefixIndex([
+        (1, [('Cerro San Cristóbal', 1.0), ('San Cristobal Hill', 0.9)], 0.0),
+        (2, [('San Cristóbal', 1.0)], 0.0),
+        (3, [('Parque Metropolitano', 1.0), ('Pío Nono 450, Santiago', 0.5)], 0.15),
+        (4, [('Santa Lucía', 1.0)], 0.15),
+        (5, [('Santa Lucia Hill', 1.0)], 0.0),
+    ])
+    assert normalize_text('  Pío-Nono, 450 ') == 'pio nono 450'
+
+    # Whole names beat name prefixes, which beat words inside a name
+    assert [key for _, key, _ in index.search('san cristobal')] == [2, 1]
+    assert [key for _, key, _ in index.search('cristobal')] == [2, 1]  # Equal matches: shorter first
+    assert index.search('cristobal hill') == [(0.9 * 0.6, 1, 'San Cristobal Hill')]
+
+    # Verified locations go first among equal matches; addresses match too
+    assert [key for _, key, _ in index.search('santa luc')] == [4, 5]
+    assert [key for _, key, _ in index.search('sant')][:2] == [4, 5]
+    assert index.search('nono')[0][1:] == (3, 'Pío Nono 450, Santiago')
+    assert index.search('cristobal zz') == []
+
+    index.remove(2)
+    index.add(5, [('Cerro Santa Lucía', 1.0)])
+    assert [key for _, key, _ in index.search('san cristobal')] == [1]
+    assert [key for _, key, _ in index.search('cerro')] == [5, 1]
+
+
+def test_prefix_index_matches_full_scoring():
+    rng = random.Random(11)
+    syllables = ['ca', 'jon', 'mai', 'po', 'san', 'ta', 'lu', 'cia', 'ce', 'rro', 'la', 'go']
+    word = lambda: ''.join(rng.choice(syllables) for _ in range(rng.randint(1, 3)))
+    documents = [
+        (key, [(' '.join(word() for _ in range(rng.randint(1, 3))), weight) for weight in (1.0, 0.9, 0.5)],
+         rng.choice([0.0, 0.15]))
+        for key in range(800)
+    ]
+    index = PrefixIndex(documents)
+
+    for query in ['c', 'san', 'ta lu', 'cerro la', 'po ca', 'la la go', 'jonmai']:
+        words = normalize_text(query).split()
+        candidates = [
+            key for key, fields, _ in documents
+            if all(any(field_word.startswith(word) for text, _ in fields for field_word in normalize_text(text).split())
+                   for word in words)
+        ]
+        expected = sorted(
+            (-total, len(matched), key, matched)
+            for key in candidates
+            for total, matched in (index._score(key, words, ' '.join(words)),)
+        )[:10]
+        assert index.search(query, 10) == [(-score, key, matched) for score, _, key, matched in expected]
+
+
+def test_search_endpoint_matches_aliases(client):
+    ids = _seed_locations()
+    torres = Location(location_name='Torres del Paine', location_type='park', latitude=-50.94,
+                      longitude=-73.40, formatted_address='Magallanes, Chile', is_verified=True)
+    db.session.add(torres)
+    db.session.flush()
+    db.session.add_all([
+        LocationAlias(location_id=torres.location_id, alias_name='Paine Towers', language_code='en'),
+        LocationAlias(location_id=ids['Valparaiso'], alias_name='Valparaíso', language_code='es'),
+    ])
+    db.session.commit()
+
+    response = client.get('/api/locations/search', query_string={'q': 'paine tow'})
+    assert response.status_code == 200
+    locations = response.get_json()['locations']
+    assert [location['location_id'] for location in locations] == [torres.location_id]
+    assert locations[0]['matched_name'] == 'Paine Towers'
+
+    response = client.get('/api/locations/search', query_string={'q': 'VALPARAÍ'})
+    assert [location['location_name'] for location in response.get_json()['locations']] == ['Valparaiso']
+
+    response = client.get('/api/locations/search', query_string={'q': 'magallanes'})
+    assert response.get_json()['locations'][0]['matched_name'] == 'Magallanes, Chile'
+
+    assert client.get('/api/locations/search?q=a').status_code == 400
+
+
+def test_search_index_follows_committed_writes(app):
+    ids = _seed_locations()
+    index = LocationService.get_search_index()
+    assert len(index) == len(PLACES)
+
+    db.session.add(LocationAlias(location_id=ids['Mendoza'], alias_name='Ciudad del Vino', language_code='es'))
+    db.session.delete(Location.query.get(ids['Puerto Montt']))
+    db.session.commit()
+
+    # Rolled back writes never reach the index
+    db.session.add(LocationAlias(location_id=ids['Santiago'], alias_name='Ghost Town'))
+    db.session.flush()
+    db.session.rollback()
+
+    results, error = LocationService.autocomplete('ciudad del vi')
+    assert error is None
+    assert [(item['location_name'], item['matched_name']) for item in results] == [('Mendoza', 'Ciudad del Vino')]
+    assert LocationService.autocomplete('puerto')[0] == []
+    assert LocationService.autocomplete('ghost')[0] == []
+    assert LocationService.get_search_index() is index
+
+
+def test_vector_tile_encoding():
+    layer = encode_layer('locations', [
+        (7, (10, -3), {'name': 'Ñuñoa', 'cluster': True, 'count': 1, 'delta': -5, 'ratio': 1.5, 'skipped': None}),
+        (None, (4095, 0), {'count': 1}),
+    ])
+    assert _decode_tile(encode_tile([layer, None])) == {'locations': [
+        (7, (10, -3), {'name': 'Ñuñoa', 'cluster': True, 'count': 1, 'delta': -5, 'ratio': 1.5}),
+        (None, (4095, 0), {'count': 1}),
+    ]}
+
+    x, y = tile_for(-33.4489, -70.6693, 10)
+    min_lat, max_lat, min_lng, max_lng = tile_bounds(10, x, y)
+    assert min_lat <= -33.4489 <= max_lat and min_lng <= -70.6693 <= max_lng
+    assert all(0 <= value < 4096 for value in tile_projector(10, x, y)(-33.4489, -70.6693))
+
+
+def test_location_tiles_cluster_and_invalidate(client):
+    ids = _seed_locations()
+    for _ in range(2):
+        db.session.add(Activity(title='Trek', description='Test activity', max_participants=10, price=10,
+                                location_id=ids['Santiago'], activity_status='active'))
+    db.session.add(Activity(title='Closed', description='Test activity', max_participants=10, price=10,
+                            location_id=ids['Santiago'], activity_status='inactive'))
+    db.session.commit()
+
+    # Zoomed out, nearby locations merge into clusters
+    response = client.get('/api/locations/tiles/0/0/0.mvt', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/vnd.mapbox-vector-tile'
+    assert response.headers['Content-Encoding'] == 'gzip'
+    features = _decode_tile(gzip.decompress(response.data))['locations']
+    assert any(properties.get('cluster') for _, _, properties in features)
+    assert sum(properties.get('point_count', 1) for _, _, properties in features) == len(PLACES)
+    assert sum(properties['activity_count'] for _, _, properties in features) == 2
+
+    # Zoomed in, each location is its own feature
+    x, y = tile_for(-33.4489, -70.6693, 16)
+    url = f'/api/locations/tiles/16/{x}/{y}.mvt'
+    response = client.get(url)
+    assert 'Content-Encoding' not in response.headers
+    assert _decode_tile(response.data) == {'locations': [
+        (ids['Santiago'], tile_projector(16, x, y)(-33.4489, -70.6693),
+         {'name': 'Santiago', 'location_type': 'city', 'activity_count': 2})
+    ]}
+    etag = response.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    # Committed location writes drop the cached tiles
+    Location.query.get(ids['Santiago']).location_name = 'Santiago Centro'
+    db.session.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert _decode_tile(response.data)['locations'][0][2]['name'] == 'Santiago Centro'
+
+    ocean_x, ocean_y = tile_for(-40.0, -120.0, 6)
+    assert client.get(f'/api/locations/tiles/6/{ocean_x}/{ocean_y}.mvt').status_code == 204
+    assert client.get('/api/locations/tiles/2/4/0.mvt').status_code == 404
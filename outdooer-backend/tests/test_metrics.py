@@ -0,0 +1,125 @@
+# tests/test_metrics.py
+from datetime import date, time
+from decimal import Decimal
+
+from app import db
+from app.models.activity import Activity
+from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
+from app.models.metrics import GuideMetrics
+from app.models.team import Team, TeamMetrics
+from app.models.user import User
+from app.services.metrics_service import MetricsService
+from app.services.payment_service import PaymentService
+from app.services.reservation_service import ReservationService
+from app.tasks.metrics_calculation import reconcile_metrics
+from app.tasks.payment_processing import drain_outbox
+
+
+def _seed_team():
+    guide = User(
+        email='guide@example.com',
+        password_hash='x',
+        first_name='Guide',
+        last_name='Test',
+        date_of_birth=date(1990, 1, 1)
+    )
+    db.session.add(guide)
+    db.session.flush()
+
+    team = Team(team_name='Andes', master_guide_id=guide.user_id)
+    other = Team(team_name='Patagonia', master_guide_id=guide.user_id)
+    db.session.add_all([team, other])
+    db.session.commit()
+    return guide.user_id, team.team_id, other.team_id
+
+
+def _activity(guide_id, team_id, title):
+    return Activity(title=title, description='Test activity', max_participants=50, price=50,
+                    created_by=guide_id, leader_id=guide_id, team_id=team_id)
+
+
+def _team_counters(team_id):
+    metrics = TeamMetrics.query.filter_by(team_id=team_id).first()
+    db.session.refresh(metrics)
+    return metrics
+
+
+def test_activity_writes_maintain_counters(app):
+    guide_id, team_id, other_id = _seed_team()
+
+    activities = [_activity(guide_id, team_id, f'Summit {i}') for i in range(3)]
+    db.session.add_all(activities)
+    db.session.commit()
+    assert _team_counters(team_id).total_activities_count == 3
+    assert GuideMetrics.query.filter_by(guide_id=guide_id).one().total_activities_led == 3
+
+    activities[0].team_id = other_id
+    db.session.delete(activities[1])
+    db.session.commit()
+    assert _team_counters(team_id).total_activities_count == 1
+    assert _team_counters(other_id).total_activities_count == 1
+
+    # Rolled back writes leave the counters untouched
+    db.session.add(_activity(guide_id, team_id, 'Ridge'))
+    db.session.flush()
+    db.session.rollback()
+    assert _team_counters(team_id).total_activities_count == 1
+
+
+def test_reservations_and_payments_maintain_counters(app):
+    guide_id, team_id, _ = _seed_team()
+    activity = _activity(guide_id, team_id, 'Summit')
+    db.session.add(activity)
+    db.session.flush()
+    instance = GuideActivityInstance(guide_id=guide_id, activity_id=activity.activity_id, team_id=team_id)
+    db.session.add(instance)
+    db.session.flush()
+    activity_date = ActivityAvailableDate(activity_instance_id=instance.instance_id, date=date(2025, 7, 1),
+                                          start_time=time(9), end_time=time(17), max_reservations=10)
+    db.session.add(activity_date)
+    db.session.commit()
+
+    participants = [{'first_name': f'P{i}', 'last_name': 'Test', 'email': f'p{i}@example.com'} for i in range(3)]
+    first, _ = ReservationService.create_reservation(guide_id, activity_date.available_date_id, participants)
+    second, _ = ReservationService.create_reservation(guide_id, activity_date.available_date_id, participants[:1])
+    assert _team_counters(team_id).current_reservation_count == 2
+    assert GuideMetrics.query.filter_by(guide_id=guide_id).one().total_participants_led == 4
+
+    ReservationService.cancel_reservation(second['reservation_id'], guide_id)
+    assert _team_counters(team_id).current_reservation_count == 1
+    guide_metrics = GuideMetrics.query.filter_by(guide_id=guide_id).one()
+    db.session.refresh(guide_metrics)
+    assert guide_metrics.total_participants_led == 3
+
+    PaymentService.record_payment({
+        'reservation_id': first['reservation_id'],
+        'amount': Decimal('150.00'),
+        'payment_method': 'card',
+        'transaction_id': 'txn_1',
+        'payment_status': 'completed'
+    })
+    drain_outbox()
+    metrics = _team_counters(team_id)
+    assert (metrics.total_revenue, metrics.total_commission_paid) == (Decimal('150.00'), Decimal('15.00'))
+
+
+def test_reconcile_repairs_drift(app, count_queries):
+    guide_id, team_id, _ = _seed_team()
+    db.session.add_all([_activity(guide_id, team_id, f'Summit {i}') for i in range(4)])
+    db.session.commit()
+
+    TeamMetrics.query.filter_by(team_id=team_id).update({'total_activities_count': 99})
+    GuideMetrics.query.filter_by(guide_id=guide_id).update({'total_activities_led': 0})
+    db.session.commit()
+
+    result = reconcile_metrics()
+    assert result['teams'] == 1
+
+    assert _team_counters(team_id).total_activities_count == 4
+    assert MetricsService.get_team_metrics(team_id)['total_activities_count'] == 4
+    assert GuideMetrics.query.filter_by(guide_id=guide_id).one().total_activities_led == 4
+
+    # Dashboards read one row instead of counting
+    with count_queries() as queries:
+        MetricsService.get_team_metrics(team_id)
+    assert len(queries) == 1
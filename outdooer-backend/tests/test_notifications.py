@@ -0,0 +1,228 @@
+# tests/test_notifications.py
+from datetime import date
+from email import message_from_bytes, policy
+
+import pytest
+
+from app import db
+from app.models.communication import Communication
+from app.models.job import BackgroundJob
+from app.models.team import Team
+from app.models.team_member import TeamMember
+from app.models.user import User
+from app.services.notification_service import NotificationService
+from app.tasks import jobs
+from app.tasks.notification_jobs import deliver_pending
+from app.utils import mail
+
+
+@pytest.fixture
+def outbox(app, tmp_path):
+    """Directory the file transport writes emails to"""
+    app.config['NOTIFICATION_FILE_DIR'] = str(tmp_path)
+    return tmp_path
+
+
+def _emails(directory):
+    return [message_from_bytes(path.read_bytes(), policy=policy.default) for path in sorted(directory.glob('*.eml'))]
+
+
+def _seed_team(size):
+    """Create a team of `size` guides; the first one is the master guide"""
+    users = [User(
+        email=f'guide{i}@example.com',
+        password_hash='x',
+        first_name=f'Guide{i}',
+        last_name='Test',
+        date_of_birth=date(1990, 1, 1)
+    ) for i in range(size)]
+    db.session.add_all(users)
+    db.session.flush()
+
+    team = Team(team_name='Andes', master_guide_id=users[0].user_id)
+    db.session.add(team)
+    db.session.flush()
+
+    db.session.add_all([
+        TeamMember(team_id=team.team_id, user_id=user.user_id, role_level=1 if i == 0 else 4)
+        for i, user in enumerate(users)
+    ])
+    db.session.commit()
+    return team.team_id, [user.user_id for user in users]
+
+
+def _run(name):
+    jobs.load_tasks()
+    return jobs.work('test-worker', names=[name], once=True)
+
+
+def test_team_fan_out_is_one_job(app, outbox, count_queries):
+    team_id, user_ids = _seed_team(200)
+
+    NotificationService.notify('team_member_joined', {'member_name': 'Ana Test', 'team_name': 'Andes'},
+                               team_id=team_id, sender_id=user_ids[-1])
+    db.session.commit()
+    assert BackgroundJob.query.filter_by(job_name='notifications.fan_out').count() == 1
+
+    with count_queries() as queries:
+        assert _run('notifications.fan_out') == 1
+    # Claim and mark running, recipients, bulk insert, deliver enqueue, success mark
+    assert len(queries) <= 8
+
+    communications = Communication.query.all()
+    assert len(communications) == 199
+    assert all(c.subject == 'Ana Test joined Andes' for c in communications)
+    assert user_ids[-1] not in {c.recipient_id for c in communications}
+
+    # Delivery waits for the coalescing window
+    assert BackgroundJob.query.filter_by(job_name='notifications.deliver', status='queued').count() == 1
+    assert _run('notifications.deliver') == 0
+
+
+def test_delivery_coalesces_events_per_recipient(app, outbox):
+    team_id, user_ids = _seed_team(3)
+
+    NotificationService.notify('team_member_joined', {'member_name': 'Ana Test', 'team_name': 'Andes'},
+                               team_id=team_id)
+    NotificationService.notify('team_member_joined', {'member_name': 'Luis Test', 'team_name': 'Andes'},
+                               recipient_ids=[user_ids[0]])
+    db.session.commit()
+    _run('notifications.fan_out')
+
+    assert deliver_pending() == 3
+    emails = {email['To']: email for email in _emails(outbox)}
+    assert len(emails) == 3
+    assert emails['guide0@example.com']['Subject'] == 'You have 2 new notifications'
+    assert 'Luis Test' in emails['guide0@example.com'].get_content()
+    assert emails['guide1@example.com']['Subject'] == 'Ana Test joined Andes'
+
+    assert Communication.query.filter(Communication.delivered_at.is_(None)).count() == 0
+    assert deliver_pending() == 0
+
+
+def test_render_falls_back_to_english_and_keeps_unknown_placeholders(app):
+    assert NotificationService.render('team_member_joined', 'es', {'member_name': 'Ana', 'team_name': 'Andes'}) == \
+        ('Ana se unió a Andes', 'Ana se ha unido a Andes como guía.')
+    subject, _ = NotificationService.render('reservation_canceled', 'fr', {})
+    assert subject == 'Reservation canceled for $activity_title'
+
+    with pytest.raises(ValueError):
+        NotificationService.notify('unknown_event', {})
+
+
+def test_smtp_transport_reuses_connections(app, monkeypatch):
+    connections = []
+
+    class FakeSMTP:
+        def __init__(self, host, port, timeout=None):
+            self.sent = 0
+            connections.append(self)
+
+        def send_message(self, message):
+            self.sent += 1
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    monkeypatch.setattr(mail.smtplib, 'SMTP', FakeSMTP)
+    transport = mail.SMTPTransport('localhost', 1025, max_per_connection=100)
+    messages = [mail.build_message(f'user{i}@example.com', 'Hi', 'Body') for i in range(250)]
+
+    assert transport.send_messages(messages) == 250
+    assert [connection.sent for connection in connections] == [100, 100, 50]
+
+
+def _fake_smtp(monkeypatch, sent, refuse=(), disconnect_after=None):
+    """Patch smtplib.SMTP with a server recording the recipients it accepts"""
+    class FakeSMTP:
+        def __init__(self, host, port, timeout=None):
+            pass
+
+        def starttls(self):
+            pass
+
+        def login(self, username, password):
+            pass
+
+        def send_message(self, message):
+            if disconnect_after is not None and len(sent) >= disconnect_after:
+                raise mail.smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+            if message['To'] in refuse:
+                raise mail.smtplib.SMTPRecipientsRefused({message['To']: (550, b'No such user')})
+            sent.append(message['To'])
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+    monkeypatch.setattr(mail.smtplib, 'SMTP', FakeSMTP)
+
+
+def test_refused_address_does_not_block_delivery(app, monkeypatch):
+    app.config.update(NOTIFICATION_TRANSPORT='smtp', NOTIFICATION_MAX_DELIVERY_ATTEMPTS=2)
+    team_id, user_ids = _seed_team(3)
+    NotificationService.notify('team_member_joined', {'member_name': 'Ana Test', 'team_name': 'Andes'},
+                               team_id=team_id)
+    db.session.commit()
+    _run('notifications.fan_out')
+
+    sent = []
+    _fake_smtp(monkeypatch, sent, refuse={'guide1@example.com'})
+    assert deliver_pending() == 2
+    assert sorted(sent) == ['guide0@example.com', 'guide2@example.com']
+
+    refused = Communication.query.filter_by(recipient_id=user_ids[1]).one()
+    assert refused.delivered_at is None and refused.delivery_attempts == 1
+    assert 'No such user' in refused.delivery_error
+
+    # Tried again by later runs until it runs out of attempts, without resending the others
+    assert deliver_pending() == 0
+    assert deliver_pending() == 0
+    db.session.refresh(refused)
+    assert refused.delivery_attempts == 2 and len(sent) == 2
+
+
+def test_lost_connection_keeps_what_was_sent(app, monkeypatch):
+    app.config['NOTIFICATION_TRANSPORT'] = 'smtp'
+    team_id, _ = _seed_team(3)
+    NotificationService.notify('team_member_joined', {'member_name': 'Ana Test', 'team_name': 'Andes'},
+                               team_id=team_id)
+    db.session.commit()
+    _run('notifications.fan_out')
+
+    sent = []
+    _fake_smtp(monkeypatch, sent, disconnect_after=1)
+    with pytest.raises(mail.smtplib.SMTPServerDisconnected):
+        deliver_pending()
+    assert Communication.query.filter(Communication.delivered_at.isnot(None)).count() == 1
+
+    _fake_smtp(monkeypatch, sent)
+    assert deliver_pending() == 2
+    assert sorted(sent) == ['guide0@example.com', 'guide1@example.com', 'guide2@example.com']
+
+
+def test_line_breaks_do_not_block_delivery(app, outbox):
+    team_id, user_ids = _seed_team(3)
+    NotificationService.notify('team_member_joined', {'member_name': 'Ana\r\nTest', 'team_name': 'Andes'},
+                               team_id=team_id)
+    db.session.commit()
+    _run('notifications.fan_out')
+    assert Communication.query.first().subject == 'Ana Test joined Andes'
+
+    # Rows stored before subjects were cleaned, and an address no header can hold
+    Communication.query.filter_by(recipient_id=user_ids[0]).update({'subject': 'Ana\nTest joined Andes'})
+    User.query.filter_by(user_id=user_ids[1]).update({'email': 'guide1@example.com\nBcc: x@example.com'})
+    db.session.commit()
+
+    assert deliver_pending() == 2
+    emails = {email['To']: email for email in _emails(outbox)}
+    assert sorted(emails) == ['guide0@example.com', 'guide2@example.com']
+    assert emails['guide0@example.com']['Subject'] == 'Ana Test joined Andes'
+
+    failed = Communication.query.filter_by(recipient_id=user_ids[1]).one()
+    assert failed.delivered_at is None and failed.delivery_attempts == 1 and failed.delivery_error
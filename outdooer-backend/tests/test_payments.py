@@ -0,0 +1,243 @@
+# tests/test_payments.py
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models.activity import Activity
+from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
+from app.models.payment import Payment, PaymentOutbox
+from app.models.reservation import Reservation
+from app.models.user import User
+from app.services.payment_service import PaymentService
+from app.services.reservation_service import ReservationService
+from app.tasks import payment_processing
+
+
+def _seed_reservation():
+    """Create a pending reservation for two participants and return (user_id, reservation_id)"""
+    user = User(
+        email='guide@example.com',
+        password_hash='x',
+        first_name='Guide',
+        last_name='Test',
+        date_of_birth=date(1990, 1, 1)
+    )
+    db.session.add(user)
+    db.session.flush()
+
+    activity = Activity(title='Summit', description='Test activity', max_participants=50, price=50, created_by=user.user_id)
+    db.session.add(activity)
+    db.session.flush()
+
+    instance = GuideActivityInstance(guide_id=user.user_id, activity_id=activity.activity_id, is_active=True)
+    db.session.add(instance)
+    db.session.flush()
+
+    activity_date = ActivityAvailableDate(
+        activity_instance_id=instance.instance_id,
+        date=date(2025, 7, 1),
+        start_time=time(9),
+        end_time=time(17),
+        max_reservations=10,
+        current_reservations=0
+    )
+    db.session.add(activity_date)
+    db.session.commit()
+
+    participants = [{'first_name': f'P{i}', 'last_name': 'Test', 'email': f'p{i}@example.com'} for i in range(2)]
+    reservation, _ = ReservationService.create_reservation(user.user_id, activity_date.available_date_id, participants)
+    return user.user_id, reservation['reservation_id']
+
+
+def _payment(reservation_id, transaction_id='txn_1', status='completed'):
+    return {
+        'reservation_id': reservation_id,
+        'amount': Decimal('100.00'),
+        'payment_method': 'card',
+        'transaction_id': transaction_id,
+        'payment_status': status
+    }
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Isolate the outbox handler registry for a test"""
+    from collections import defaultdict
+    registry = defaultdict(list)
+    monkeypatch.setattr(payment_processing, '_handlers', registry)
+    return registry
+
+
+def test_record_payment_is_idempotent(app, count_queries):
+    _, reservation_id = _seed_reservation()
+
+    first, error = PaymentService.record_payment(_payment(reservation_id))
+    assert error is None
+    assert first['created'] is True
+
+    with count_queries() as queries:
+        replay, error = PaymentService.record_payment(_payment(reservation_id))
+
+    assert error is None
+    assert replay['created'] is False
+    assert replay['payment']['payment_id'] == first['payment']['payment_id']
+    assert len(queries) == 1
+
+    assert Payment.query.count() == 1
+    assert PaymentOutbox.query.count() == 1
+
+    reservation = Reservation.query.get(reservation_id)
+    assert (reservation.status, reservation.payment_status) == ('confirmed', 'paid')
+
+
+def test_insert_ignores_conflicting_transaction(app):
+    _, reservation_id = _seed_reservation()
+    PaymentService.record_payment(_payment(reservation_id))
+
+    values = _payment(reservation_id)
+    assert PaymentService._insert_payment(values) is None
+    db.session.rollback()
+    assert Payment.query.count() == 1
+
+
+def test_pending_payment_writes_no_outbox_event(app):
+    user_id, reservation_id = _seed_reservation()
+
+    result, error = PaymentService.record_payment(_payment(reservation_id, status='pending'), user_id)
+
+    assert error is None and result['created'] is True
+    assert PaymentOutbox.query.count() == 0
+    assert Reservation.query.get(reservation_id).payment_status == 'unpaid'
+
+
+def test_pending_payment_completes_once(app):
+    user_id, reservation_id = _seed_reservation()
+    pending, _ = PaymentService.record_payment(_payment(reservation_id, status='pending'), user_id)
+
+    completed, error = PaymentService.record_payment(_payment(reservation_id, status='completed'))
+    assert error is None and completed['created'] is False
+    assert completed['payment']['payment_id'] == pending['payment']['payment_id']
+    assert completed['payment']['payment_status'] == 'completed'
+    assert PaymentOutbox.query.count() == 1
+
+    reservation = Reservation.query.get(reservation_id)
+    assert (reservation.status, reservation.payment_status) == ('confirmed', 'paid')
+
+    # Later deliveries, completed or stale, change nothing
+    PaymentService.record_payment(_payment(reservation_id, status='completed'))
+    PaymentService.record_payment(_payment(reservation_id, status='pending'))
+    assert Payment.query.count() == 1 and PaymentOutbox.query.count() == 1
+    assert Payment.query.one().payment_status == 'completed'
+
+
+def test_client_cannot_complete_a_payment(app, client):
+    from flask_jwt_extended import create_access_token
+
+    user_id, reservation_id = _seed_reservation()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+    body = {**_payment(reservation_id), 'amount': '0.01'}
+
+    response = client.post('/api/payments/', json=body, headers=headers)
+    assert response.status_code == 403
+
+    # Nor complete a payment it reported as pending
+    assert client.post('/api/payments/', json={**body, 'payment_status': 'pending'}, headers=headers).status_code == 201
+    assert client.post('/api/payments/', json=body, headers=headers).status_code == 403
+
+    assert Payment.query.one().payment_status == 'pending'
+    assert PaymentOutbox.query.count() == 0
+    assert Reservation.query.get(reservation_id).payment_status == 'unpaid'
+
+
+def test_completion_must_cover_the_reservation(app):
+    _, reservation_id = _seed_reservation()
+    short = {**_payment(reservation_id), 'amount': Decimal('0.01')}
+
+    result, error = PaymentService.record_payment(short)
+    assert result is None and error.startswith("Cannot ")
+    assert Payment.query.count() == 0
+
+    PaymentService.record_payment({**short, 'payment_status': 'pending'})
+    result, error = PaymentService.record_payment(short)
+    assert result is None and error.startswith("Cannot ")
+    assert Payment.query.one().payment_status == 'pending'
+
+    assert PaymentOutbox.query.count() == 0
+    reservation = Reservation.query.get(reservation_id)
+    assert (reservation.status, reservation.payment_status) == ('pending', 'unpaid')
+
+
+def test_drain_outbox_processes_each_event_once(app, handlers):
+    _, reservation_id = _seed_reservation()
+    for i in range(5):
+        PaymentService.record_payment(_payment(reservation_id, transaction_id=f'txn_{i}'))
+
+    seen = []
+    payment_processing.outbox_handler('payment_completed')(lambda events: seen.extend(e.outbox_id for e in events))
+
+    assert payment_processing.drain_outbox(batch_size=2) == {'processed': 5, 'failed': 0}
+    assert payment_processing.drain_outbox(batch_size=2) == {'processed': 0, 'failed': 0}
+    assert sorted(seen) == sorted(set(seen)) and len(seen) == 5
+    assert PaymentOutbox.query.filter(PaymentOutbox.processed_at.is_(None)).count() == 0
+
+
+def test_failed_chunk_is_rolled_back_and_retried(app, handlers):
+    _, reservation_id = _seed_reservation()
+    PaymentService.record_payment(_payment(reservation_id))
+
+    def failing(events):
+        Reservation.query.filter_by(reservation_id=reservation_id).update({'denial_reason': 'partial write'})
+        raise RuntimeError('downstream unavailable')
+
+    payment_processing.outbox_handler('payment_completed')(failing)
+
+    assert payment_processing.drain_outbox() == {'processed': 0, 'failed': 1}
+    event = PaymentOutbox.query.one()
+    assert event.processed_at is None
+    assert event.attempts == 1
+    assert 'downstream unavailable' in event.last_error
+    assert Reservation.query.get(reservation_id).denial_reason is None
+
+
+def test_failing_event_does_not_hold_back_its_chunk(app, handlers):
+    _, reservation_id = _seed_reservation()
+    for i in range(5):
+        PaymentService.record_payment(_payment(reservation_id, transaction_id=f'txn_{i}'))
+    bad = Payment.query.filter_by(transaction_id='txn_2').one().payment_id
+
+    applied = []
+
+    def handler(events):
+        if any(event.payment_id == bad for event in events):
+            raise RuntimeError('bad event')
+        applied.extend(event.payment_id for event in events)
+
+    payment_processing.outbox_handler('payment_completed')(handler)
+
+    assert payment_processing.drain_outbox() == {'processed': 4, 'failed': 1}
+    assert len(applied) == 4 and bad not in applied
+
+    events = PaymentOutbox.query.all()
+    assert [(e.attempts, e.processed_at is None) for e in events if e.payment_id == bad] == [(1, True)]
+    assert all(e.attempts == 0 and e.processed_at for e in events if e.payment_id != bad)
+
+
+def test_webhook_requires_valid_signature(app, client):
+    import hashlib
+    import hmac
+    import json
+
+    _, reservation_id = _seed_reservation()
+    app.config['PAYMENT_WEBHOOK_SECRET'] = 'secret'
+    body = json.dumps({**_payment(reservation_id), 'amount': '100.00'}).encode('utf-8')
+
+    response = client.post('/api/payments/webhook', data=body, headers={'X-Webhook-Signature': 'bad'})
+    assert response.status_code == 401
+
+    signature = hmac.new(b'secret', body, hashlib.sha256).hexdigest()
+    headers = {'X-Webhook-Signature': signature, 'Content-Type': 'application/json'}
+    assert client.post('/api/payments/webhook', data=body, headers=headers).status_code == 201
+    assert client.post('/api/payments/webhook', data=body, headers=headers).status_code == 200
+    assert Payment.query.count() == 1
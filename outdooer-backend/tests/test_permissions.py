@@ -0,0 +1,166 @@
+# tests/test_permissions.py
+from datetime import date, datetime
+
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models.expedition import Expedition
+from app.models.team import Team
+from app.models.team_member import TeamMember
+from app.models.team_role_permissions import TeamRolePermissions
+from app.models.user import User
+from app.services import permission_matrix
+from app.services.permission_cache import PermissionCache
+from app.services.permission_service import PermissionService
+
+
+def _seed_team(name='Andes'):
+    """Create a team with a master guide and a base guide; return (master_id, team_id)"""
+    users = [User(
+        email=f'{name.lower()}{i}@example.com',
+        password_hash='x',
+        first_name=f'Guide{i}',
+        last_name='Test',
+        date_of_birth=date(1990, 1, 1)
+    ) for i in range(2)]
+    db.session.add_all(users)
+    db.session.flush()
+
+    team = Team(team_name=name, master_guide_id=users[0].user_id)
+    db.session.add(team)
+    db.session.flush()
+
+    db.session.add_all([
+        TeamMember(team_id=team.team_id, user_id=users[0].user_id, role_level=1),
+        TeamMember(team_id=team.team_id, user_id=users[1].user_id, role_level=4)
+    ])
+    db.session.commit()
+    return users[0].user_id, team.team_id
+
+
+def test_team_matrix_is_cached_until_permissions_are_updated(app, client, count_queries):
+    master_id, team_id = _seed_team()
+    before = PermissionService.is_permission_enabled(team_id, 4, 'create_expedition')
+
+    with count_queries() as queries:
+        assert PermissionService.is_permission_enabled(team_id, 4, 'create_expedition') == before
+    assert queries == []
+
+    response = client.post(
+        f'/api/permissions/team/{team_id}/permissions',
+        json={'permissions': {'4': {'create_expedition': not before}}},
+        headers={'Authorization': f'Bearer {create_access_token(identity=master_id)}'}
+    )
+    assert response.status_code == 200 and response.get_json()['updated_count'] == 1
+
+    # The write dropped the cached matrix, so the override is seen at once
+    assert PermissionService.is_permission_enabled(team_id, 4, 'create_expedition') is (not before)
+    assert PermissionCache.get_team_matrix(team_id)[4] == {'create_expedition': not before}
+
+
+def test_matrix_loaded_across_an_invalidation_is_not_cached(app, monkeypatch):
+    _, team_id = _seed_team()
+    load = PermissionCache._load_team_matrix
+
+    def load_while_written(team):
+        matrix = load(team)
+        PermissionCache.invalidate(team)  # a concurrent update_team_permissions
+        return matrix
+
+    monkeypatch.setattr(PermissionCache, '_load_team_matrix', staticmethod(load_while_written))
+    PermissionCache.get_team_matrix(team_id)
+    assert team_id not in PermissionCache._store()['matrices']
+
+    monkeypatch.setattr(PermissionCache, '_load_team_matrix', staticmethod(load))
+    PermissionCache.get_team_matrix(str(team_id))
+    assert team_id in PermissionCache._store()['matrices']
+
+    PermissionCache.invalidate()
+    assert PermissionCache._store()['matrices'] == {}
+
+
+def _expedition(team_id, creator_id):
+    expedition = Expedition(
+        team_id=team_id,
+        title='Traverse',
+        description='Test expedition',
+        start_date=datetime(2025, 7, 1),
+        end_date=datetime(2025, 7, 5),
+        max_participants=10,
+        price=500,
+        created_by=creator_id
+    )
+    db.session.add(expedition)
+    db.session.commit()
+    return expedition.expedition_id
+
+
+def test_bulk_check_uses_the_resource_team(app, client):
+    master_id, team_id = _seed_team()
+    other_master_id, other_team_id = _seed_team('Alps')
+    own = _expedition(team_id, master_id)
+    foreign = _expedition(other_team_id, other_master_id)
+
+    checks = [
+        {'operation': 'update_expedition', 'resource_id': own},
+        {'operation': 'update_expedition', 'resource_id': foreign, 'team_id': team_id},
+        {'operation': 'delete_expedition', 'resource_id': foreign, 'team_id': team_id},
+        {'operation': 'update_expedition', 'resource_id': 999999, 'team_id': team_id},
+    ]
+    response = client.post(
+        '/api/permissions/check-bulk',
+        json={'checks': checks},
+        headers={'Authorization': f'Bearer {create_access_token(identity=master_id)}'}
+    )
+    assert response.status_code == 200
+    results = response.get_json()['results']
+
+    assert [result['has_permission'] for result in results] == [True, False, False, False]
+    assert [result['team_id'] for result in results[:3]] == [team_id, other_team_id, other_team_id]
+    assert results[3]['error'] == 'Resource not found'
+    assert response.get_json()['decisions'][f'update_expedition_{foreign}_{team_id}'] is False
+
+
+def test_bulk_check_is_capped(app, client):
+    master_id, team_id = _seed_team()
+    app.config['MAX_BULK_PERMISSION_CHECKS'] = 3
+    headers = {'Authorization': f'Bearer {create_access_token(identity=master_id)}'}
+    checks = [{'operation': 'create_activity', 'team_id': team_id}] * 4
+
+    assert client.post('/api/permissions/check-bulk', json={'checks': checks}, headers=headers).status_code == 400
+    response = client.post('/api/permissions/check-bulk', json={'checks': checks[:3]}, headers=headers)
+    assert response.status_code == 200
+    assert [result['has_permission'] for result in response.get_json()['results']] == [True] * 3
+
+
+def test_global_matrix_expires(app, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(permission_matrix.time, 'monotonic', lambda: now[0])
+    app.config['PERMISSION_MATRIX_TTL'] = 60
+    permission_matrix.reload_global_matrix()
+    before = permission_matrix.get_global_matrix().is_enabled(4, 'export_reports')
+
+    # Written by another worker, which rebuilds only its own matrix
+    db.session.add(TeamRolePermissions(team_id=None, role_level=4, permission_key='export_reports', is_enabled=True))
+    db.session.commit()
+
+    now[0] += 59
+    assert permission_matrix.get_global_matrix().is_enabled(4, 'export_reports') == before
+    now[0] += 1
+    assert permission_matrix.get_global_matrix().is_enabled(4, 'export_reports') is True
+
+
+def test_member_changes_drop_the_memoized_memberships(app, client):
+    master_id, team_id = _seed_team()
+    base_id = master_id + 1
+    headers = {'Authorization': f'Bearer {create_access_token(identity=master_id)}'}
+
+    assert PermissionCache.get_user_memberships(base_id) == {team_id: 4}
+
+    response = client.put(f'/api/teams/{team_id}/members/{base_id}/role', json={'role_level': 3}, headers=headers)
+    assert response.status_code == 200
+    assert PermissionCache.get_user_memberships(base_id) == {team_id: 3}
+
+    response = client.delete(f'/api/teams/{team_id}/members/{base_id}', headers=headers)
+    assert response.status_code == 200
+    assert PermissionCache.get_user_memberships(base_id) == {}
@@ -0,0 +1,60 @@
+# tests/test_recurrence.py
+from datetime import date
+
+import pytest
+
+from app.utils.recurrence import expand_recurrence, parse_rrule
+
+
+def _july(*days):
+    return [date(2025, 7, day) for day in days]
+
+
+def test_parse_rrule():
+    assert parse_rrule('RRULE:FREQ=WEEKLY;BYDAY=TU,TH;UNTIL=20250831') == {
+        'freq': 'WEEKLY', 'interval': 1, 'by_weekday': ['TU', 'TH'], 'until': '20250831', 'count': None
+    }
+    with pytest.raises(ValueError):
+        parse_rrule('FREQ=MONTHLY;BYMONTHDAY=1')
+    with pytest.raises(ValueError):
+        parse_rrule('FREQ=WEEKLY;COUNT')
+
+
+def test_weekly_by_day_until_is_inclusive():
+    # 2025-07-01 is a Tuesday
+    assert expand_recurrence('2025-07-01', 'FREQ=WEEKLY;BYDAY=TU,TH;UNTIL=20250715') == _july(1, 3, 8, 10, 15)
+
+
+def test_by_day_skips_days_before_the_start():
+    # Starts on a Wednesday; the Monday of that week is not part of the series
+    assert expand_recurrence(date(2025, 7, 2), 'FREQ=WEEKLY;BYDAY=MO,WE;COUNT=3') == _july(2, 7, 9)
+
+
+def test_count_includes_excluded_dates():
+    assert expand_recurrence('2025-07-01', 'FREQ=WEEKLY;BYDAY=TU,TH;COUNT=4', exceptions=['2025-07-08']) == \
+        _july(1, 3, 10)
+
+
+def test_intervals_and_dict_rules():
+    assert expand_recurrence('2025-07-01', 'FREQ=DAILY;INTERVAL=2;COUNT=3') == _july(1, 3, 5)
+    assert expand_recurrence('2025-07-01', 'FREQ=WEEKLY;INTERVAL=2;UNTIL=2025-07-31') == _july(1, 15, 29)
+    assert expand_recurrence('2025-07-01', {'freq': 'weekly', 'by_weekday': ['sa'], 'count': 2}) == _july(5, 12)
+
+
+@pytest.mark.parametrize('rule', [
+    'FREQ=WEEKLY',  # neither UNTIL nor COUNT
+    'FREQ=DAILY;BYDAY=MO;COUNT=2',  # BYDAY on a daily rule
+    'FREQ=WEEKLY;BYDAY=XX;COUNT=2',
+    'FREQ=WEEKLY;UNTIL=20250601',  # before the start
+    'FREQ=WEEKLY;INTERVAL=0;COUNT=2',
+    'FREQ=YEARLY;COUNT=2',
+])
+def test_invalid_rules(rule):
+    with pytest.raises(ValueError):
+        expand_recurrence('2025-07-01', rule)
+
+
+def test_expansion_is_bounded():
+    assert len(expand_recurrence('2025-07-01', 'FREQ=DAILY;COUNT=500')) == 500
+    with pytest.raises(ValueError):
+        expand_recurrence('2025-07-01', 'FREQ=DAILY;COUNT=501')
@@ -0,0 +1,198 @@
+# tests/test_reservations.py
+import threading
+from datetime import date, time
+
+import pytest
+
+from app import create_app, db
+from app.models.activity import Activity
+from app.models.activity_date import GuideActivityInstance, ActivityAvailableDate
+from app.models.reservation import Reservation, ReservationParticipant
+from app.models.user import User
+from app.services.reservation_service import ReservationService
+from config import config
+
+
+def _participants(count):
+    return [{'first_name': f'P{i}', 'last_name': 'Test', 'email': f'p{i}@example.com'} for i in range(count)]
+
+
+def _seed_date(max_reservations=10, status='open'):
+    """Create an activity date and return its ID"""
+    guide = User(
+        email='guide@example.com',
+        password_hash='x',
+        first_name='Guide',
+        last_name='Test',
+        date_of_birth=date(1990, 1, 1)
+    )
+    db.session.add(guide)
+    db.session.flush()
+
+    activity = Activity(title='Summit', description='Test activity', max_participants=50, price=50, created_by=guide.user_id)
+    db.session.add(activity)
+    db.session.flush()
+
+    instance = GuideActivityInstance(guide_id=guide.user_id, activity_id=activity.activity_id, is_active=True)
+    db.session.add(instance)
+    db.session.flush()
+
+    activity_date = ActivityAvailableDate(
+        activity_instance_id=instance.instance_id,
+        date=date(2025, 7, 1),
+        start_time=time(9),
+        end_time=time(17),
+        max_reservations=max_reservations,
+        current_reservations=0,
+        status=status
+    )
+    db.session.add(activity_date)
+    db.session.commit()
+    return activity_date.available_date_id
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """Application backed by a SQLite file, so concurrent connections share one database"""
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'seats.db'}")
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_ENGINE_OPTIONS', {'connect_args': {'timeout': 30}}, raising=False)
+    app = create_app('testing')
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_reserve_and_release_seats(app):
+    date_id = _seed_date(max_reservations=3)
+
+    assert ActivityAvailableDate.reserve_seats(date_id, 2) == 2
+    assert ActivityAvailableDate.reserve_seats(date_id, 2) is None
+    assert ActivityAvailableDate.reserve_seats(date_id) == 3
+    assert ActivityAvailableDate.release_seats(date_id, 2) == 1
+    assert ActivityAvailableDate.release_seats(date_id, 2) is None
+    db.session.commit()
+
+    assert ActivityAvailableDate.query.get(date_id).current_reservations == 1
+
+
+def test_reserve_seats_is_undone_by_rollback(app):
+    date_id = _seed_date(max_reservations=3)
+    activity_date = ActivityAvailableDate.query.get(date_id)
+
+    assert ActivityAvailableDate.reserve_seats(date_id, 3) == 3
+    assert activity_date.current_reservations == 3
+    db.session.rollback()
+
+    assert ActivityAvailableDate.query.get(date_id).current_reservations == 0
+
+
+def test_reserve_seats_requires_open_date(app):
+    date_id = _seed_date(status='closed')
+
+    assert ActivityAvailableDate.reserve_seats(date_id) is None
+    with pytest.raises(ValueError):
+        ActivityAvailableDate.reserve_seats(date_id, 0)
+
+
+def test_concurrent_reservations_never_oversell(file_app):
+    capacity = 50
+    date_id = _seed_date(max_reservations=capacity)
+
+    threads_count = 16
+    attempts_per_thread = 10
+    barrier = threading.Barrier(threads_count)
+    granted = []
+    errors = []
+
+    def book(seats):
+        with file_app.app_context():
+            barrier.wait()
+            for _ in range(attempts_per_thread):
+                try:
+                    if ActivityAvailableDate.reserve_seats(date_id, seats) is not None:
+                        granted.append(seats)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(e)
+            db.session.remove()
+
+    # A mix of single seats and groups contending for the last seats
+    workers = [threading.Thread(target=book, args=(1 + i % 3,)) for i in range(threads_count)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    # Demand is several times the capacity; every granted seat is counted once
+    assert capacity - 2 <= sum(granted) <= capacity
+    assert ActivityAvailableDate.query.get(date_id).current_reservations == sum(granted)
+
+
+def test_create_reservation_books_seats_and_participants(app, count_queries):
+    date_id = _seed_date(max_reservations=5)
+    guide_id = User.query.first().user_id
+
+    with count_queries() as queries:
+        reservation, error = ReservationService.create_reservation(guide_id, date_id, _participants(3))
+
+    assert error is None
+    assert reservation['participant_count'] == 3
+    assert reservation['total_price'] == '150.00'
+    assert reservation['commission_amount'] == '15.00'
+    assert reservation['activity_start_datetime'] == '2025-07-01T09:00:00'
+    assert len(reservation['participants']) == 3
+    # Slot lookup, seat update (plus read-back on SQLite), reservation insert, participant executemany,
+    # the metrics lookup and upserts run by the flush listeners, and the notification job insert
+    assert len(queries) <= 9
+
+    assert ActivityAvailableDate.query.get(date_id).current_reservations == 3
+    assert ReservationParticipant.query.count() == 3
+
+
+def test_create_reservation_without_room_leaves_nothing_behind(app):
+    date_id = _seed_date(max_reservations=2)
+    guide_id = User.query.first().user_id
+
+    reservation, error = ReservationService.create_reservation(guide_id, date_id, _participants(3))
+
+    assert reservation is None
+    assert error.startswith("Not enough seats")
+    assert Reservation.query.count() == 0
+    assert ActivityAvailableDate.query.get(date_id).current_reservations == 0
+
+
+def test_cancel_reservation_releases_seats_once(app):
+    date_id = _seed_date(max_reservations=5)
+    guide_id = User.query.first().user_id
+    reservation, _ = ReservationService.create_reservation(guide_id, date_id, _participants(2))
+
+    canceled, error = ReservationService.cancel_reservation(reservation['reservation_id'], guide_id, 'Weather')
+    assert error is None
+    assert canceled['status'] == 'canceled'
+    assert ActivityAvailableDate.query.get(date_id).current_reservations == 0
+
+    _, error = ReservationService.cancel_reservation(reservation['reservation_id'], guide_id)
+    assert error.startswith("Only ")
+    assert ActivityAvailableDate.query.get(date_id).current_reservations == 0
+
+
+def test_user_reservations_are_keyset_paginated(app):
+    from app.utils.pagination import decode_cursor
+
+    date_id = _seed_date(max_reservations=10)
+    guide_id = User.query.first().user_id
+    for _ in range(5):
+        ReservationService.create_reservation(guide_id, date_id, _participants(1))
+
+    first, _ = ReservationService.get_user_reservations(guide_id, limit=3)
+    assert first['has_more'] is True
+    second, _ = ReservationService.get_user_reservations(guide_id, after=decode_cursor(first['next_cursor']), limit=3)
+    assert second['has_more'] is False
+
+    ids = [r['reservation_id'] for r in first['reservations'] + second['reservations']]
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 5
+    assert all(len(r['participants']) == 1 for r in first['reservations'])
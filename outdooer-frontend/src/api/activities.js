@@ -2,10 +2,10 @@
 import api from './index';
 
 export const activitiesApi = {
-  // Get all activities
-  getAllActivities: async () => {
+  // Get a page of activities (params: limit, cursor and optional filters)
+  getAllActivities: async (params = {}) => {
     try {
-      const response = await api.get('/activities');
+      const response = await api.get('/activities', { params });
       return response.data;
     } catch (error) {
       console.error('Error fetching activities:', error.response?.data || error.message);
@@ -35,10 +35,10 @@ export const activitiesApi = {
     }
   },
   
-  // Get activities based on user's role (my activities)
-  getMyActivities: async () => {
+  // Get a page of activities based on user's role (params: limit, cursor)
+  getMyActivities: async (params = {}) => {
     try {
-      const response = await api.get('/activities/my-activities');
+      const response = await api.get('/activities/my-activities', { params });
       return response.data;
     } catch (error) {
       console.error('Error fetching my activities:', error.response?.data || error.message);
@@ -24,6 +24,22 @@ export const permissionsApi = {
     }
   },
   
+  /**
+   * Check many operations in a single request
+   * 
+   * @param {Array<Object>} checks - List of { operation, resource_id, team_id }
+   * @returns {Promise<Object>} - Response with ordered results and a decisions map
+   */
+  checkPermissions: async (checks) => {
+    try {
+      const response = await api.post('/permissions/check-bulk', { checks });
+      return response.data;
+    } catch (err) {
+      console.error('Bulk permission check error:', err);
+      return { results: [], decisions: {} };
+    }
+  },
+  
   /**
    * Get all permissions available to the current user
    * 
@@ -59,12 +59,8 @@ const PermissionGate = ({
       }
       
       try {
-        const result = await permissionService.checkPermission({
-          permission,
-          resourceId,
-          teamId,
-        });
-        setHasPermission(result.allowed);
+        const allowed = await permissionService.checkPermission(permission, resourceId, teamId);
+        setHasPermission(allowed);
       } catch (error) {
         console.error('Permission check failed:', error);
         setHasPermission(false);
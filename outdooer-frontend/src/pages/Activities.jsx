@@ -1,73 +1,73 @@
 // src/pages/Activities.jsx
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { Container, Row, Col, Card, Badge, Button, Form, Spinner, Alert } from 'react-bootstrap';
 import { useNavigate } from 'react-router-dom';
+import { activitiesApi } from '../api/activities';
 import '../styles/Activities.css';
 
+const PAGE_SIZE = 20;
+const SEARCH_DELAY_MS = 300;
+
 const Activities = () => {
   const [activities, setActivities] = useState([]);
-  const [filteredActivities, setFilteredActivities] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [difficultyFilter, setDifficultyFilter] = useState('all');
+  const latestRequest = useRef(0);
   const navigate = useNavigate();
 
-  // Fetch activities from the database
+  // Fetch one page of the catalog; the filters are applied by the server
+  const fetchPage = useCallback(async (cursor = null) => {
+    const params = { limit: PAGE_SIZE };
+    if (cursor) params.cursor = cursor;
+    if (searchTerm.trim()) params.search = searchTerm.trim();
+    if (difficultyFilter !== 'all') params.difficulty_level = difficultyFilter;
+    return activitiesApi.getAllActivities(params);
+  }, [searchTerm, difficultyFilter]);
+
+  // Start again from the first page whenever the filters change
   useEffect(() => {
-    const fetchActivities = async () => {
-      setLoading(true);
+    const requestId = ++latestRequest.current;
+    setLoading(true);
+    setError(null);
+
+    const timer = setTimeout(async () => {
       try {
-        const response = await fetch('http://localhost:5000/api/activities');
-        
-        if (!response.ok) {
-          throw new Error(`Error ${response.status}: ${response.statusText}`);
-        }
-        
-        const data = await response.json();
-        console.log('Fetched activities:', data);
-        
-        if (Array.isArray(data.activities)) {
-          setActivities(data.activities);
-          setFilteredActivities(data.activities);
-        } else if (Array.isArray(data)) {
-          setActivities(data);
-          setFilteredActivities(data);
-        } else {
-          console.warn('Unexpected API response format:', data);
-          setActivities([]);
-          setFilteredActivities([]);
-        }
+        const data = await fetchPage();
+        if (requestId !== latestRequest.current) return;
+        setActivities(data.activities || []);
+        setNextCursor(data.has_more ? data.next_cursor : null);
       } catch (err) {
+        if (requestId !== latestRequest.current) return;
         console.error('Error fetching activities:', err);
         setError('Failed to load activities. Please try again later.');
       } finally {
-        setLoading(false);
+        if (requestId === latestRequest.current) setLoading(false);
       }
-    };
+    }, SEARCH_DELAY_MS);
 
-    fetchActivities();
-  }, []);
+    return () => clearTimeout(timer);
+  }, [fetchPage]);
 
-  // Apply filters when search term or difficulty filter changes
-  useEffect(() => {
-    if (activities.length > 0) {
-      const filtered = activities.filter(activity => {
-        const matchesSearch = (
-          (activity.title?.toLowerCase() || '').includes(searchTerm.toLowerCase()) || 
-          (activity.description?.toLowerCase() || '').includes(searchTerm.toLowerCase()) ||
-          (activity.location_name?.toLowerCase() || '').includes(searchTerm.toLowerCase())
-        );
-        
-        const matchesDifficulty = difficultyFilter === 'all' || 
-          activity.difficulty_level?.toLowerCase() === difficultyFilter.toLowerCase();
-        
-        return matchesSearch && matchesDifficulty;
-      });
-      
-      setFilteredActivities(filtered);
+  // Append the next page after the activities already shown
+  const handleLoadMore = async () => {
+    const requestId = latestRequest.current;
+    setLoadingMore(true);
+    try {
+      const data = await fetchPage(nextCursor);
+      if (requestId !== latestRequest.current) return;
+      setActivities((current) => [...current, ...(data.activities || [])]);
+      setNextCursor(data.has_more ? data.next_cursor : null);
+    } catch (err) {
+      console.error('Error fetching more activities:', err);
+      setError('Failed to load more activities. Please try again later.');
+    } finally {
+      setLoadingMore(false);
     }
-  }, [searchTerm, difficultyFilter, activities]);
+  };
 
   // Handle details view
   const handleViewDetails = (activityId) => {
@@ -147,54 +147,63 @@ const Activities = () => {
         </div>
       ) : error ? (
         <Alert variant="danger">{error}</Alert>
-      ) : filteredActivities.length > 0 ? (
-        <Row className="g-4">
-          {filteredActivities.map((activity) => (
-            <Col key={activity.id || activity.activity_id} md={6} lg={4}>
-              <Card className="h-100 activity-card">
-                {activity.image_url && (
-                  <div className="activity-image-container">
-                    <Card.Img
-                      variant="top"
-                      src={activity.image_url}
-                      alt={activity.title || activity.name}
-                      onError={(e) => {
-                        e.target.src = 'https://via.placeholder.com/300x200?text=No+Image';
-                      }}
-                    />
-                  </div>
-                )}
-                <Card.Body>
-                  <Card.Title>{activity.title || activity.name}</Card.Title>
-                  <Card.Subtitle className="mb-2 text-muted">
-                    <i className="bi bi-geo-alt"></i> {activity.location_name || 'Location not specified'}
-                  </Card.Subtitle>
-                  <div className="d-flex justify-content-between mb-2">
-                    <Badge bg={getDifficultyBadgeVariant(activity.difficulty_level)}>
-                      {activity.difficulty_level || 'Difficulty not specified'}
-                    </Badge>
-                    <div className="price">
-                      {formatPrice(activity.price || 0)}
+      ) : activities.length > 0 ? (
+        <>
+          <Row className="g-4">
+            {activities.map((activity) => (
+              <Col key={activity.id || activity.activity_id} md={6} lg={4}>
+                <Card className="h-100 activity-card">
+                  {activity.image_url && (
+                    <div className="activity-image-container">
+                      <Card.Img
+                        variant="top"
+                        src={activity.image_url}
+                        alt={activity.title || activity.name}
+                        onError={(e) => {
+                          e.target.src = 'https://via.placeholder.com/300x200?text=No+Image';
+                        }}
+                      />
                     </div>
-                  </div>
-                  <Card.Text className="activity-description">
-                    {activity.description || 'No description available.'}
-                  </Card.Text>
-                </Card.Body>
-                <Card.Footer className="bg-transparent">
-                  <div className="d-grid">
-                    <Button 
-                      variant="primary" 
-                      onClick={() => handleViewDetails(activity.id || activity.activity_id)}
-                    >
-                      View Details
-                    </Button>
-                  </div>
-                </Card.Footer>
-              </Card>
-            </Col>
-          ))}
-        </Row>
+                  )}
+                  <Card.Body>
+                    <Card.Title>{activity.title || activity.name}</Card.Title>
+                    <Card.Subtitle className="mb-2 text-muted">
+                      <i className="bi bi-geo-alt"></i> {activity.location_name || 'Location not specified'}
+                    </Card.Subtitle>
+                    <div className="d-flex justify-content-between mb-2">
+                      <Badge bg={getDifficultyBadgeVariant(activity.difficulty_level)}>
+                        {activity.difficulty_level || 'Difficulty not specified'}
+                      </Badge>
+                      <div className="price">
+                        {formatPrice(activity.price || 0)}
+                      </div>
+                    </div>
+                    <Card.Text className="activity-description">
+                      {activity.description || 'No description available.'}
+                    </Card.Text>
+                  </Card.Body>
+                  <Card.Footer className="bg-transparent">
+                    <div className="d-grid">
+                      <Button 
+                        variant="primary" 
+                        onClick={() => handleViewDetails(activity.id || activity.activity_id)}
+                      >
+                        View Details
+                      </Button>
+                    </div>
+                  </Card.Footer>
+                </Card>
+              </Col>
+            ))}
+          </Row>
+          {nextCursor && (
+            <div className="text-center mt-4">
+              <Button variant="outline-primary" onClick={handleLoadMore} disabled={loadingMore}>
+                {loadingMore ? <Spinner animation="border" size="sm" /> : 'Load more'}
+              </Button>
+            </div>
+          )}
+        </>
       ) : (
         <Alert variant="info" className="text-center">
           <p className="mb-0">No activities found matching your criteria.</p>
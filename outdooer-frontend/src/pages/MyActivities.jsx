@@ -41,12 +41,18 @@ const MyActivities = () => {
     const fetchMyActivities = async () => {
       try {
         setLoading(true);
-        const response = await activitiesApi.getMyActivities();
         
-        // Debug logs
-        console.log('Activities response:', response);
+        // The endpoint is keyset-paginated; follow the cursor so the tab
+        // filters and counts below cover every activity
+        const allActivities = [];
+        let cursor = null;
+        do {
+          const response = await activitiesApi.getMyActivities({ limit: 100, ...(cursor && { cursor }) });
+          allActivities.push(...(response.activities || []));
+          cursor = response.has_more ? response.next_cursor : null;
+        } while (cursor);
         
-        setActivities(response.activities || []);
+        setActivities(allActivities);
       } catch (err) {
         console.error('Error fetching activities:', err);
         setError('Failed to load your activities. Please try again.');
@@ -1,6 +1,9 @@
 // src/services/permissionService.js
 import api from '../api';
 
+// Checks per /permissions/check-bulk request; the server's MAX_BULK_PERMISSION_CHECKS
+const MAX_BULK_PERMISSION_CHECKS = 200;
+
 /**
  * Service for handling permissions and roles in the Outdooer application
  */
@@ -11,15 +14,26 @@ class PermissionService {
    */
   permissionCache = {};
   
+  /**
+   * Checks queued during the current tick, sent together to /permissions/check-bulk
+   * Format: { cacheKey: { check, promise, resolve } }
+   */
+  pendingChecks = {};
+  flushScheduled = false;
+  
   /**
    * Check if a user has permission to perform an operation
+   * 
+   * Checks made in the same tick (e.g. every PermissionGate on a page) are
+   * batched into a single bulk request.
+   * 
    * @param {string} operation - The operation to check (e.g., 'create_activity')
    * @param {number|null} resourceId - ID of the resource (optional)
    * @param {number|null} teamId - ID of the team (optional)
    * @returns {Promise<boolean>} - Whether the user has permission
    */
   async checkPermission(operation, resourceId = null, teamId = null) {
-    // Generate cache key
+    // Generate cache key (same format as the bulk endpoint's decisions map)
     const cacheKey = `${operation}_${resourceId || ''}_${teamId || ''}`;
     
     // Return cached result if available
@@ -27,23 +41,68 @@ class PermissionService {
       return this.permissionCache[cacheKey];
     }
     
+    // Share an in-flight check for the same key
+    if (this.pendingChecks[cacheKey]) {
+      return this.pendingChecks[cacheKey].promise;
+    }
+    
+    let resolve;
+    const promise = new Promise((res) => { resolve = res; });
+    this.pendingChecks[cacheKey] = {
+      check: { operation, resource_id: resourceId, team_id: teamId },
+      promise,
+      resolve
+    };
+    
+    if (!this.flushScheduled) {
+      this.flushScheduled = true;
+      setTimeout(() => this.flushPendingChecks(), 0);
+    }
+    
+    return promise;
+  }
+  
+  /**
+   * Send all queued checks in bulk requests of at most
+   * MAX_BULK_PERMISSION_CHECKS checks and resolve their promises
+   */
+  async flushPendingChecks() {
+    const pending = this.pendingChecks;
+    this.pendingChecks = {};
+    this.flushScheduled = false;
+    
+    const keys = Object.keys(pending);
+    const batches = [];
+    for (let start = 0; start < keys.length; start += MAX_BULK_PERMISSION_CHECKS) {
+      batches.push(keys.slice(start, start + MAX_BULK_PERMISSION_CHECKS));
+    }
+    
+    await Promise.all(batches.map((batch) => this.sendChecks(batch, pending)));
+  }
+  
+  /**
+   * Send one bulk request for some queued checks and resolve their promises
+   * @param {Array<string>} keys - Cache keys of the checks to send
+   * @param {Object} pending - Queued checks by cache key
+   */
+  async sendChecks(keys, pending) {
+    let decisions = {};
     try {
-      // Call backend API to check permission
-      const response = await api.post('/permissions/check', {
-        operation,
-        resource_id: resourceId,
-        team_id: teamId
+      const response = await api.post('/permissions/check-bulk', {
+        checks: keys.map((key) => pending[key].check)
       });
-      
-      // Cache the result
-      const hasPermission = response.data.has_permission;
-      this.permissionCache[cacheKey] = hasPermission;
-      
-      return hasPermission;
+      decisions = response.data.decisions || {};
     } catch (err) {
       console.error('Permission check error:', err);
-      return false;
     }
+    
+    keys.forEach((key) => {
+      const hasPermission = decisions[key] === true;
+      if (decisions[key] !== undefined) {
+        this.permissionCache[key] = hasPermission;
+      }
+      pending[key].resolve(hasPermission);
+    });
   }
   
   /**